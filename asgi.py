@@ -0,0 +1,113 @@
+# asgi.py
+import asyncio
+import json
+from asgiref.wsgi import WsgiToAsgi
+from flask_jwt_extended import decode_token
+from app import create_app
+from extensions import db
+from journalapi import sharding
+from journalapi.auth import is_token_revoked
+from journalapi.events import HEARTBEAT, RESET
+from journalapi.resources.events import last_event_id
+
+
+class JournalASGI:
+    """
+    Wrap the Flask app in an ASGI adapter.
+
+    The event loop owns the sockets, so idle keep-alive connections and slow
+    uploads cost no worker thread. The request body is buffered by the adapter
+    before the view runs, and each view then executes in asgiref's thread pool
+    (size controlled by the ASGI_THREADS environment variable).
+
+    GET /events is the exception: it is served natively on the event loop so
+    thousands of idle SSE subscribers cost a buffer each rather than a thread.
+    The token is checked with the Flask app's JWT configuration and blocklist;
+    any request that fails the check is handed to Flask to produce the usual error.
+    """
+
+    def __init__(self, flask_app):
+        self.wsgi_application = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == "/events" and scope["method"] == "GET":
+            return await self.events(scope, receive, send)
+        return await self.wsgi(scope, receive, send)
+
+    def _authenticate(self, headers):
+        """The user id of a valid, unrevoked access token in the Authorization header, else None."""
+        app = self.wsgi_application
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme != app.config["JWT_HEADER_TYPE"] or not token:
+            return None
+        with app.app_context():
+            try:
+                claims = decode_token(token)
+                if claims.get("type") != "access" or is_token_revoked(claims):
+                    return None
+                return int(claims[app.config["JWT_IDENTITY_CLAIM"]])
+            except Exception:
+                return None
+            finally:
+                db.session.remove()
+
+    def _replay(self, broker, user_id, since):
+        with self.wsgi_application.app_context():
+            try:
+                with sharding.use_shard(sharding.shard_of(user_id)):
+                    return broker.replay(user_id, since)
+            finally:
+                db.session.remove()
+
+    async def events(self, scope, receive, send):
+        headers = {k.decode("latin1"): v.decode("latin1") for k, v in scope.get("headers", [])}
+        user_id = await asyncio.to_thread(self._authenticate, headers)
+        if user_id is None:
+            return await self.wsgi(scope, receive, send)
+
+        broker = self.wsgi_application.extensions["journal_events"]
+        sub = broker.subscribe(user_id, loop=asyncio.get_running_loop())
+        if sub is None:
+            body = json.dumps({"error": "Too many event subscribers, retry later"}).encode()
+            await send({"type": "http.response.start", "status": 503,
+                        "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            sub.close()
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            since = last_event_id(headers.get("last-event-id"))
+            replay = await asyncio.to_thread(self._replay, broker, user_id, since) if since is not None else []
+            await send({"type": "http.response.start", "status": 200, "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ]})
+            await send({"type": "http.response.body", "body": b"retry: 3000\n\n" + b"".join(replay),
+                        "more_body": True})
+            while not sub.closed:
+                event = await sub.next(broker.heartbeat)
+                if sub.closed:
+                    break
+                if sub.overflowed:
+                    await send({"type": "http.response.body", "body": RESET})
+                    return
+                await send({"type": "http.response.body", "body": event or HEARTBEAT, "more_body": True})
+        except OSError:
+            pass
+        finally:
+            watcher.cancel()
+            broker.unsubscribe(sub)
+
+
+def create_asgi_app(test_config=None):
+    return JournalASGI(create_app(test_config))
+
+
+app = create_asgi_app()
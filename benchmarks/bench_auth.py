@@ -0,0 +1,57 @@
+# benchmarks/bench_auth.py
+"""
+Per-request JWT overhead with and without the verified-token cache and the
+user-existence check.
+
+    python benchmarks/bench_auth.py --iterations 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask_jwt_extended import create_access_token, verify_jwt_in_request  # noqa: E402
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from journalapi.models import User  # noqa: E402
+
+CASES = [
+    ("no cache, no user check", {"JWT_DECODE_CACHE_SIZE": 0, "JWT_USER_CHECK": False}),
+    ("cache, no user check", {"JWT_DECODE_CACHE_SIZE": 4096, "JWT_USER_CHECK": False}),
+    ("cache + user check", {"JWT_DECODE_CACHE_SIZE": 4096, "JWT_USER_CHECK": True}),
+    ("no cache + user check", {"JWT_DECODE_CACHE_SIZE": 0, "JWT_USER_CHECK": True}),
+]
+
+
+def run(config, iterations):
+    app = create_app(dict(config, TESTING=True, SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+                          SECRET_KEY="bench-secret-key-with-at-least-32-bytes"))
+    with app.app_context():
+        db.create_all()
+        user = User(username="bench", email="bench@example.com", password="x")
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id))
+    headers = {"Authorization": f"Bearer {token}"}
+    with app.test_request_context("/entries/", headers=headers):
+        verify_jwt_in_request()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            verify_jwt_in_request()
+        elapsed = time.perf_counter() - start
+    return elapsed / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    print(f"{'case':<26} {'us/request':>10}")
+    for name, config in CASES:
+        print(f"{name:<26} {run(config, args.iterations):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
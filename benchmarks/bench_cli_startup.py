@@ -0,0 +1,81 @@
+# benchmarks/bench_cli_startup.py
+"""
+Wall-clock startup of CLI commands, plus the slowest imports of one of them from `python -X importtime`.
+
+    python benchmarks/bench_cli_startup.py --runs 20
+    python benchmarks/bench_cli_startup.py --command "auth me" --budget-ms 100
+
+Exits non-zero if the first command's median, less that of a bare `python -c pass`, is over --budget-ms.
+"""
+import argparse
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+COMMANDS = ["auth me", "--help", "entry --help", "comment --help"]
+
+
+def run(args, extra=()):
+    env = dict(os.environ, JOURNAL_CACHE="0")
+    return subprocess.run([sys.executable, *extra, "-m", "client.main", *args], cwd=ROOT, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+
+def time_command(args, runs, python_only=False):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        if python_only:
+            subprocess.run([sys.executable, "-c", "pass"])
+        else:
+            run(args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples)
+
+
+def slowest_imports(args, top):
+    """(cumulative µs, module) of the top-level imports, slowest first."""
+    rows = []
+    for line in run(args, extra=("-X", "importtime")).stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):  # top level only; nested imports are counted in their parent
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--command", action="append", help="CLI arguments to time (repeatable)")
+    parser.add_argument("--budget-ms", type=float, default=100)
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    options = parser.parse_args()
+    commands = [shlex.split(c) for c in options.command or COMMANDS]
+
+    interpreter, best = time_command([], options.runs, python_only=True)
+    print(f"{'python -c pass':<24} {interpreter:8.1f} ms median  {best:8.1f} ms best")
+    results = []
+    for args in commands:
+        median, best = time_command(args, options.runs)
+        results.append(median)
+        print(f"{'journal ' + ' '.join(args):<24} {median:8.1f} ms median  {best:8.1f} ms best")
+
+    print(f"\nSlowest imports of `journal {' '.join(commands[0])}` (cumulative):")
+    for micros, name in slowest_imports(commands[0], options.top):
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+
+    cost = results[0] - interpreter
+    print(f"\n`journal {' '.join(commands[0])}` adds {cost:.1f} ms to interpreter startup "
+          f"(budget {options.budget_ms:.0f} ms)")
+    if cost > options.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_compression.py
+"""
+Database size and read/write latency of entry content stored plain, zlib-compressed and compressed against a trained dictionary.
+
+    python benchmarks/bench_compression.py --entries 5000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import text  # noqa: E402
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from journalapi.compression import train_dictionary  # noqa: E402
+from journalapi.models import JournalEntry, User  # noqa: E402
+
+PHRASES = [
+    "Today I woke up early", "and went for a walk in the park", "I felt grateful for",
+    "my family and friends", "work was stressful again", "but the team meeting went well",
+    "I could not sleep last night", "so I read a book until late", "the weather was cold and grey",
+    "I cooked dinner with my partner", "tomorrow I want to focus on", "exercise and eating better",
+    "I had coffee with an old friend", "we talked about the past year", "I am proud of myself",
+    "I need to remember to call my mother", "the exam is next week", "I should start studying",
+]
+
+CASES = [
+    ("plain", {"COMPRESSION_ENABLED": False}, False),
+    ("zlib", {}, False),
+    ("zlib + dictionary", {}, True),
+]
+
+
+def corpus(count, seed=7):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        # Mostly short entries with a long tail, all below the blob tier's 8 KiB.
+        sentences = min(int(rng.expovariate(1 / 6)) + 1, 80)
+        texts.append(". ".join(" ".join(rng.sample(PHRASES, 2)) for _ in range(sentences)) + ".")
+    return texts
+
+
+def run(config, trained, texts):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    app = create_app(dict(config, TESTING=True, SQLALCHEMY_DATABASE_URI=f"sqlite:///{path}",
+                          COMPACTION_INTERVAL_SECONDS=0, AUTOSAVE_FLUSHER_ENABLED=False,
+                          EVENTS_TAILER_ENABLED=False))
+    try:
+        with app.app_context():
+            db.create_all()
+            user = User(username="bench", email="bench@example.com", password="x")
+            db.session.add(user)
+            db.session.commit()
+            if trained:
+                # Train on a sample of the same text, then start from an empty table.
+                db.session.add_all(JournalEntry(user_id=user.id, title="sample", content=t, tags="[]")
+                                   for t in texts[:500])
+                db.session.commit()
+                train_dictionary(sample_size=500)
+                db.session.execute(db.delete(JournalEntry))
+                db.session.commit()
+
+            start = time.perf_counter()
+            for i in range(0, len(texts), 100):
+                db.session.add_all(JournalEntry(user_id=user.id, title="t", content=t, tags="[]")
+                                   for t in texts[i:i + 100])
+                db.session.commit()
+            write = time.perf_counter() - start
+
+            db.session.expire_all()
+            start = time.perf_counter()
+            sum(len(content) for content in db.session.execute(db.select(JournalEntry.inline_content)).scalars())
+            read = time.perf_counter() - start
+
+            stored = db.session.execute(text("SELECT sum(length(CAST(content AS BLOB))) FROM journal_entries")).scalar()
+            db.session.commit()
+            db.session.execute(text("VACUUM"))
+        db_size = os.path.getsize(path)
+        return stored, db_size, write / len(texts) * 1e6, read / len(texts) * 1e6
+    finally:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=5000)
+    args = parser.parse_args()
+    texts = corpus(args.entries)
+    raw = sum(len(t.encode("utf-8")) for t in texts)
+    print(f"{args.entries} entries, {raw / 1024:.0f} KiB of text")
+    print(f"{'case':<20} {'content KiB':>11} {'db file KiB':>11} {'write us':>9} {'read us':>8}")
+    for name, config, trained in CASES:
+        stored, db_size, write, read = run(config, trained, texts)
+        print(f"{name:<20} {stored / 1024:>11.0f} {db_size / 1024:>11.0f} {write:>9.1f} {read:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_seed.py
+"""
+Seed a synthetic dataset into a temporary SQLite file, then time read endpoints for the busiest user.
+
+    python benchmarks/bench_seed.py --users 10000 --entries 200000
+    python benchmarks/bench_seed.py --keep /tmp/journal-200k.db   # reuse the file for profiling
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import func, select  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from journalapi.models import JournalEntry  # noqa: E402
+from journalapi.seed import seed  # noqa: E402
+
+
+def time_get(client, url, headers, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, (url, response.status_code)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--entries", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", help="Write the database here and keep it.")
+    args = parser.parse_args()
+
+    path = args.keep or tempfile.mkstemp(suffix=".db")[1]
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "RATELIMIT_ENABLED": False,
+                      "COMPACTION_INTERVAL_SECONDS": 0, "AUTOSAVE_FLUSHER_ENABLED": False,
+                      "EVENTS_TAILER_ENABLED": False}, profile="prod")
+    try:
+        with app.app_context():
+            db.create_all()
+            start = time.perf_counter()
+            totals = seed(users=args.users, entries=args.entries, seed=args.seed)
+            elapsed = time.perf_counter() - start
+            rows = sum(totals.values())
+            print(", ".join(f"{count} {table}" for table, count in totals.items()))
+            print(f"seeded {rows} rows in {elapsed:.1f} s ({rows / elapsed:,.0f} rows/s), "
+                  f"{os.path.getsize(path) / 2**20:.0f} MiB")
+
+            user_id, count = db.session.execute(
+                select(JournalEntry.user_id, func.count()).group_by(JournalEntry.user_id)
+                .order_by(func.count().desc()).limit(1)).one()
+            entry_id = db.session.scalar(select(JournalEntry.id).where(JournalEntry.user_id == user_id)
+                                         .order_by(JournalEntry.comment_count.desc()).limit(1))
+            headers = {"Authorization": f"Bearer {create_access_token(identity=str(user_id))}"}
+
+        client = app.test_client()
+        print(f"busiest user {user_id}: {count} entries")
+        print(f"{'endpoint':<40} {'median ms':>9}")
+        for url in ("/entries/", f"/users/{user_id}/stats", f"/users/{user_id}/analytics",
+                    f"/entries/{entry_id}/comments", f"/entries/{entry_id}/history"):
+            print(f"{url:<40} {time_get(client, url, headers, args.repeat):>9.2f}")
+    finally:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        if not args.keep:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/bench_server_startup.py
+"""
+Worker boot time (imports + create_app) in fresh interpreters, plus the slowest imports from `python -X importtime`.
+
+    python benchmarks/bench_server_startup.py --runs 10 --budget-ms 1500
+
+Exits non-zero if the prod profile (what gunicorn runs) boots slower than --budget-ms.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FACTORIES = {
+    "prod profile (gunicorn)": "from journalapi import create_app; create_app(profile='prod')",
+    "test profile": "from journalapi import create_app; create_app(profile='test')",
+    "dev profile (with Swagger)": "from journalapi import create_app; create_app(profile='dev')",
+}
+
+
+def boot(code, extra=()):
+    return subprocess.run([sys.executable, *extra, "-c", code], cwd=ROOT, check=True,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+
+def time_boot(code, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        boot(code)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples)
+
+
+def slowest_imports(code, top):
+    """(cumulative µs, module) of the imports up to one level deep, slowest first."""
+    rows = []
+    for line in boot(code, extra=("-X", "importtime")).stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if len(name) - len(name.lstrip()) <= 3:  # the package itself and its direct imports
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    options = parser.parse_args()
+
+    results = {}
+    for label, code in FACTORIES.items():
+        median, best = time_boot(code, options.runs)
+        results[label] = median
+        print(f"{label:<38} {median:8.1f} ms median  {best:8.1f} ms best")
+
+    production = next(iter(FACTORIES))
+    print(f"\nSlowest imports of {production} (cumulative):")
+    for micros, name in slowest_imports(FACTORIES[production], options.top):
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+
+    if results[production] > options.budget_ms:
+        print(f"\n❌ {production} booted in {results[production]:.1f} ms, over the {options.budget_ms:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# benchmarks/bench_serving.py
+"""
+Side-by-side benchmark of the serving modes: the old sync gunicorn command,
+gunicorn with gunicorn.conf.py (gthread, preload, keepalive) and ASGI.
+
+Each server is started as a subprocess on a local port. The benchmark first
+parks a number of idle keep-alive connections on the server (the "slow
+clients"), then runs concurrent keep-alive clients against GET /entries/ for
+a fixed duration and reports throughput, latency percentiles and timeouts.
+
+    python benchmarks/bench_serving.py --idle 200 --concurrency 50 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+MODES = {
+    "sync": lambda port, workers: [
+        sys.executable, "-m", "gunicorn", "-w", str(workers),
+        "-b", f"127.0.0.1:{port}", "wsgi:app",
+    ],
+    "gthread": lambda port, workers: [
+        sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT, "gunicorn.conf.py"),
+        "-w", str(workers), "-b", f"127.0.0.1:{port}", "wsgi:app",
+    ],
+    "asgi": lambda port, workers: [
+        sys.executable, "-m", "uvicorn", "asgi:app", "--workers", str(workers),
+        "--host", "127.0.0.1", "--port", str(port), "--timeout-keep-alive", "75",
+        "--log-level", "warning",
+    ],
+}
+
+
+def init_db():
+    from app import create_app
+    from extensions import db
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def get_token(port):
+    email = f"bench_{os.getpid()}_{port}@example.com"
+    body = {"username": f"bench{port}", "email": email, "password": "benchpass"}
+    for path in ("/users/register", "/users/login"):
+        req = urllib.request.Request(
+            f"http://127.0.0.1:{port}{path}",
+            data=json.dumps(body).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=30) as res:
+                data = json.loads(res.read())
+        except urllib.error.HTTPError:
+            data = {}
+    return data["token"]
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    parts = status_line.split()
+    if len(parts) < 2:
+        raise ConnectionError("connection closed")
+    length = 0
+    keep_alive = True
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value.strip())
+        elif name.lower() == "connection" and value.strip().lower() == "close":
+            keep_alive = False
+    await reader.readexactly(length)
+    return int(parts[1]), keep_alive
+
+
+async def idle_connection(port, hold):
+    try:
+        _, writer = await asyncio.open_connection("127.0.0.1", port)
+    except OSError:
+        return
+    try:
+        await asyncio.sleep(hold)
+    finally:
+        writer.close()
+
+
+async def client(port, token, stop_at, latencies, errors, timeout):
+    request = (
+        f"GET /entries/ HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n"
+        f"Authorization: Bearer {token}\r\nConnection: keep-alive\r\n\r\n"
+    ).encode()
+    reader = writer = None
+    while time.perf_counter() < stop_at:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection("127.0.0.1", port), timeout
+                )
+            start = time.perf_counter()
+            writer.write(request)
+            status, keep_alive = await asyncio.wait_for(read_response(reader), timeout)
+            if status != 200:
+                errors["status"] += 1
+            latencies.append(time.perf_counter() - start)
+            if not keep_alive:
+                # Sync gunicorn workers close the socket after every response.
+                writer.close()
+                writer = None
+        except asyncio.TimeoutError:
+            errors["timeout"] += 1
+            writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError):
+            errors["connection"] += 1
+            writer = None
+            await asyncio.sleep(0.05)
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(port, token, args):
+    idle = [asyncio.create_task(idle_connection(port, args.duration + 5)) for _ in range(args.idle)]
+    await asyncio.sleep(0.5)
+    latencies = []
+    errors = {"status": 0, "timeout": 0, "connection": 0}
+    stop_at = time.perf_counter() + args.duration
+    await asyncio.gather(*[
+        client(port, token, stop_at, latencies, errors, args.timeout)
+        for _ in range(args.concurrency)
+    ])
+    for task in idle:
+        task.cancel()
+    return latencies, errors
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def bench(mode, args, port):
+    proc = subprocess.Popen(MODES[mode](port, args.workers), cwd=ROOT)
+    try:
+        wait_for_port(port)
+        token = get_token(port)
+        latencies, errors = asyncio.run(run_load(port, token, args))
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "rps": len(latencies) / args.duration,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": (statistics.fmean(latencies) * 1000) if latencies else float("nan"),
+        **errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modes", default="sync,gthread,asgi")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--idle", type=int, default=200, help="idle keep-alive connections held open")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    init_db()
+    results = [bench(mode, args, args.port + i) for i, mode in enumerate(args.modes.split(","))]
+
+    print(f"\nidle={args.idle} concurrency={args.concurrency} workers={args.workers} duration={args.duration}s")
+    print(f"{'mode':<8} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'timeouts':>9} {'conn err':>9}")
+    for r in results:
+        print(f"{r['mode']:<8} {r['requests']:>9} {r['rps']:>9.1f} {r['p50_ms']:>9.1f} "
+              f"{r['p99_ms']:>9.1f} {r['timeout']:>9} {r['connection']:>9}")
+
+
+if __name__ == "__main__":
+    main()
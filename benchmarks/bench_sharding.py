@@ -0,0 +1,133 @@
+# benchmarks/bench_sharding.py
+"""
+Write throughput against 1, 2 and 4 SQLite shards, with writer processes posting entries through the API.
+
+    python benchmarks/bench_sharding.py --shards 1,2,4 --writers 4 --seconds 10
+    python benchmarks/bench_sharding.py --mode session   # the database layer alone, no HTTP
+
+Every writer is a separate process with its own app and engines, as gunicorn
+workers would be. With one shard they all queue for the same SQLite write lock;
+with N shards, N commits can be in flight at once. Scaling stops at the number
+of CPU cores and the disk's fsync rate: on a single core the request handling
+itself is the bottleneck, and only --mode session shows the shards' effect.
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from journalapi import sharding  # noqa: E402
+from journalapi.models import JournalEntry, User  # noqa: E402
+
+
+def make_app(work, shards):
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(work, 'directory.db')}",
+        "SHARD_URIS": [f"sqlite:///{os.path.join(work, f'shard{i}.db')}" for i in range(shards)],
+        "SQLALCHEMY_ENGINE_OPTIONS": {"connect_args": {"timeout": 60}},
+        "RATELIMIT_ENABLED": False, "EVENTS_TAILER_ENABLED": False, "AUTOSAVE_FLUSHER_ENABLED": False,
+        "COMPACTION_INTERVAL_SECONDS": 0, "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1",
+        "SECRET_KEY": "bench-" + "x" * 32,
+    }, profile="prod")
+
+
+def prepare(work, shards, users):
+    """Create the databases and `users` users; returns (user_id, access token) pairs."""
+    app = make_app(work, shards)
+    with app.app_context():
+        sharding.create_all()
+        accounts = []
+        for i in range(users):
+            user = User(username=f"writer{i}", email=f"writer{i}@example.com", password="-")
+            sharding.place_new_user(user)
+            db.session.add(user)
+            db.session.commit()
+            accounts.append((user.id, create_access_token(identity=str(user.id))))
+    return accounts
+
+
+def post_entries(app, accounts, seconds):
+    """Full requests: routing, JWT, validation, entry, stats and change feed."""
+    client = app.test_client()
+    headers = [{"Authorization": f"Bearer {token}"} for _, token in accounts]
+    body = {"title": "Benchmark", "content": CONTENT, "tags": ["bench"]}
+    done, deadline = 0, time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        response = client.post("/entries/", json=body, headers=headers[done % len(headers)])
+        assert response.status_code == 201, response.get_data(as_text=True)
+        done += 1
+    return done
+
+
+def insert_entries(app, accounts, seconds):
+    """One entry per transaction through the routed session, without the HTTP layer."""
+    with app.app_context():
+        router = sharding.router()
+        placed = [(user_id, router.locate(user_id=user_id).shard) for user_id, _ in accounts]
+        done, deadline = 0, time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            user_id, shard = placed[done % len(placed)]
+            with sharding.use_shard(shard):
+                db.session.add(JournalEntry(user_id=user_id, title="Benchmark", content=CONTENT, tags="[]"))
+                db.session.commit()
+            done += 1
+    return done
+
+
+MODES = {"api": post_entries, "session": insert_entries}
+CONTENT = "Wrote a little today. " * 8
+
+
+def writer(work, shards, accounts, seconds, mode, start, results):
+    app = make_app(work, shards)
+    start.wait()
+    results.put(MODES[mode](app, accounts, seconds))
+
+
+def run(shards, writers, users, seconds, mode):
+    work = tempfile.mkdtemp()
+    try:
+        accounts = prepare(work, shards, users)
+        start, results = multiprocessing.Barrier(writers + 1), multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=writer, args=(work, shards, accounts[i::writers], seconds,
+                                                              mode, start, results))
+                 for i in range(writers)]
+        for proc in procs:
+            proc.start()
+        start.wait()
+        total = sum(results.get() for _ in procs)
+        for proc in procs:
+            proc.join()
+        return total / seconds
+    finally:
+        shutil.rmtree(work)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--shards", default="1,2,4", help="Comma-separated shard counts.")
+    parser.add_argument("--writers", type=int, default=4, help="Writer processes.")
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--mode", choices=sorted(MODES), default="api")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.writers} writer processes ({args.mode}), {args.seconds:g} s per run")
+    print(f"{'shards':>6} {'entries/s':>10} {'speedup':>8}")
+    baseline = None
+    for shards in (int(n) for n in args.shards.split(",")):
+        rate = run(shards, args.writers, args.users, args.seconds, args.mode)
+        baseline = baseline or rate
+        print(f"{shards:>6} {rate:>10.0f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
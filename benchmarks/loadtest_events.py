@@ -0,0 +1,159 @@
+# benchmarks/loadtest_events.py
+"""
+Load test for the SSE endpoint with thousands of idle subscribers.
+
+Starts uvicorn (asgi:app, where GET /events is served natively on the event
+loop), opens --subscribers SSE connections spread over --users accounts and
+lets them sit idle, then creates --events entries through the API and measures
+how long each change takes to reach every subscriber of its owner. Reports
+connection success, delivery ratio, fan-out latency and server RSS.
+
+    python benchmarks/loadtest_events.py --subscribers 2000 --users 10 --events 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from loadtest_ratelimit import make_tokens, wait_for_port  # noqa: E402
+
+
+def server_rss_mb(pid):
+    """Resident memory of the server process and its workers, in MB."""
+    total = 0
+    pids = [pid]
+    try:
+        pids += [int(p) for p in subprocess.check_output(["pgrep", "-P", str(pid)], text=True).split()]
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        pass
+    for p in pids:
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total / 1024
+
+
+async def subscriber(port, token, received, connected, stop):
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    except OSError:
+        return
+    writer.write(
+        f"GET /events HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {token}\r\n"
+        f"Accept: text/event-stream\r\n\r\n".encode()
+    )
+    try:
+        status = await asyncio.wait_for(reader.readline(), 30)
+        if b" 200 " not in status:
+            return
+        connected.append(1)
+        while not stop.is_set():
+            line = await reader.readline()
+            if not line:
+                return
+            if line.startswith(b"data: {"):
+                # Chunked framing lines are skipped; only SSE data lines matter here.
+                payload = json.loads(line[6:])
+                received.setdefault(payload["id"], []).append(time.perf_counter())
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def post_entry(port, token, title):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps({"title": title, "content": "load test", "tags": []}).encode()
+    writer.write(
+        f"POST /entries/ HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {token}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+        + body
+    )
+    response = await reader.read()
+    writer.close()
+    return json.loads(response.split(b"\r\n\r\n", 1)[1])["entry_id"]
+
+
+async def run(args, tokens, server_pid):
+    received, connected, stop = {}, [], asyncio.Event()
+    tasks = []
+    for i in range(args.subscribers):
+        tasks.append(asyncio.create_task(subscriber(args.port, tokens[i % len(tokens)], received, connected, stop)))
+        if i % 200 == 199:
+            await asyncio.sleep(0.05)
+    deadline = time.time() + 60
+    while len(connected) < args.subscribers and time.time() < deadline:
+        await asyncio.sleep(0.5)
+    await asyncio.sleep(args.idle)
+    rss = server_rss_mb(server_pid)
+
+    posted = {}
+    for n in range(args.events):
+        owner = n % len(tokens)
+        start = time.perf_counter()
+        entry_id = await post_entry(args.port, tokens[owner], f"event {n}")
+        posted[entry_id] = (start, owner)
+        await asyncio.sleep(args.interval)
+    await asyncio.sleep(2)
+    stop.set()
+    for task in tasks:
+        task.cancel()
+
+    per_user = [0] * len(tokens)
+    for i in range(len(connected)):
+        per_user[i % len(tokens)] += 1
+    expected = sum(per_user[owner] for _, owner in posted.values())
+    latencies = sorted(t - start for entry_id, (start, _) in posted.items() for t in received.get(entry_id, []))
+    return len(connected), expected, latencies, rss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8300)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.2, help="seconds between entry writes")
+    parser.add_argument("--idle", type=float, default=5.0, help="seconds subscribers sit idle before writes")
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, args.subscribers * 2 + 256)), hard))
+    tokens = make_tokens(args.users)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "asgi:app", "--workers", str(args.workers),
+         "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning",
+         "--limit-concurrency", str(args.subscribers * 2 + 100), "--backlog", "4096"],
+        cwd=ROOT,
+    )
+    try:
+        wait_for_port(args.port)
+        connected, expected, latencies, rss = asyncio.run(run(args, tokens, server.pid))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    def pct(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else float("nan")
+
+    print(f"\nsubscribers connected: {connected}/{args.subscribers} over {args.users} users, "
+          f"{args.workers} worker(s), server RSS with idle subscribers: {rss:.0f} MB")
+    print(f"events delivered:      {len(latencies)}/{expected} "
+          f"({100.0 * len(latencies) / max(expected, 1):.1f}%)")
+    print(f"fan-out latency ms:    p50 {pct(0.50):.0f}  p99 {pct(0.99):.0f}  max {pct(1.0):.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# benchmarks/loadtest_ratelimit.py
+"""
+Abuse load test for the rate limiter.
+
+Starts gunicorn (gunicorn.conf.py, SQLite-backed counters shared by all
+workers), then runs one abusive client with many threads hammering
+GET /entries/ next to a few well-behaved clients that stay inside their
+budget. Reports per-client success, 429 count and latency; with the limiter
+on, the well-behaved clients should keep ~100% success and low latency.
+
+    python benchmarks/loadtest_ratelimit.py --abuser-threads 8 --duration 15
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+
+def make_tokens(count):
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+    from extensions import db
+    from journalapi.models import User
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        tokens = []
+        stamp = int(time.time())
+        for i in range(count):
+            user = User(username=f"load{stamp}_{i}", email=f"load{stamp}_{i}@example.com", password="x")
+            db.session.add(user)
+            db.session.commit()
+            tokens.append(create_access_token(identity=str(user.id)))
+    return tokens
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def worker(port, token, stop_at, interval, stats, lock):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.time() < stop_at:
+        start = time.perf_counter()
+        try:
+            conn.request("GET", "/entries/", headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            status = 0
+        elapsed = time.perf_counter() - start
+        with lock:
+            stats.setdefault(status, 0)
+            stats[status] += 1
+            if status == 200:
+                stats.setdefault("latencies", []).append(elapsed)
+        if interval:
+            time.sleep(max(0.0, interval - elapsed))
+    conn.close()
+
+
+def summarize(name, stats):
+    latencies = sorted(stats.get("latencies", []))
+    total = sum(v for k, v in stats.items() if k != "latencies")
+    ok = stats.get(200, 0)
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else float("nan")
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000 if latencies else float("nan")
+    print(f"{name:<10} {total:>7} {ok:>7} {stats.get(429, 0):>7} {100.0 * ok / max(total, 1):>8.1f}% "
+          f"{p50:>8.1f} {p99:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--abuser-threads", type=int, default=8)
+    parser.add_argument("--normal-clients", type=int, default=4)
+    parser.add_argument("--normal-rps", type=float, default=1.5, help="per well-behaved client")
+    parser.add_argument("--duration", type=float, default=15.0)
+    args = parser.parse_args()
+
+    tokens = make_tokens(args.normal_clients + 1)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT, "gunicorn.conf.py"),
+         "-w", str(args.workers), "-b", f"127.0.0.1:{args.port}", "wsgi:app"],
+        cwd=ROOT,
+    )
+    try:
+        wait_for_port(args.port)
+        lock = threading.Lock()
+        stop_at = time.time() + args.duration
+        clients = {"abuser": {}}
+        threads = [
+            threading.Thread(target=worker, args=(args.port, tokens[0], stop_at, 0, clients["abuser"], lock))
+            for _ in range(args.abuser_threads)
+        ]
+        for i in range(args.normal_clients):
+            clients[f"normal-{i}"] = {}
+            threads.append(threading.Thread(
+                target=worker,
+                args=(args.port, tokens[i + 1], stop_at, 1 / args.normal_rps, clients[f"normal-{i}"], lock),
+            ))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    print(f"\n{'client':<10} {'total':>7} {'200':>7} {'429':>7} {'success':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, stats in clients.items():
+        summarize(name, stats)
+
+
+if __name__ == "__main__":
+    main()
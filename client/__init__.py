@@ -0,0 +1,2 @@
+# PWP_JournalAPI/client/__init__.py
+"""Command line client for the Journal API; the `journal` console script runs client.main."""
@@ -3,14 +3,19 @@
 
 import os
 import json
-from config import TOKEN_FILE
+from . import config
+
+# (path, mtime_ns) -> token of the last read; a CLI run makes many authenticated
+# requests, so the file is only re-read when it changed (e.g. a login elsewhere).
+_cache = {}
 
 def save_token(token: str):
     """
     Save JWT token to a file for future authenticated requests.
     """
+    _cache.clear()
     try:
-        with open(TOKEN_FILE, "w") as f:
+        with open(config.TOKEN_FILE, "w") as f:
             json.dump({"token": token}, f)
     except Exception as e:
         print(f"[red]❌ Failed to save token: {e}[/red]")
@@ -20,22 +25,30 @@ def get_token() -> str:
     Load the saved JWT token from file.
     Returns the token string or None if not found.
     """
-    if not os.path.exists(TOKEN_FILE):
+    try:
+        key = (config.TOKEN_FILE, os.stat(config.TOKEN_FILE).st_mtime_ns)
+    except OSError:
         return None
+    if key in _cache:
+        return _cache[key]
     try:
-        with open(TOKEN_FILE, "r") as f:
-            return json.load(f).get("token")
+        with open(config.TOKEN_FILE, "r") as f:
+            token = json.load(f).get("token")
     except Exception as e:
         print(f"[red]❌ Failed to read token: {e}[/red]")
         return None
+    _cache.clear()
+    _cache[key] = token
+    return token
 
 def clear_token():
     """
     Delete the stored JWT token to log out the user.
     """
-    if os.path.exists(TOKEN_FILE):
+    _cache.clear()
+    if os.path.exists(config.TOKEN_FILE):
         try:
-            os.remove(TOKEN_FILE)
+            os.remove(config.TOKEN_FILE)
         except Exception as e:
             print(f"[red]❌ Failed to clear token: {e}[/red]")
 
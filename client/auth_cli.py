@@ -1,8 +1,8 @@
 # PWP_JournalAPI/client/auth_cli.py
 import typer
-import requests
 from rich import print
-import auth, config  # from client
+from . import auth
+# http_client is imported by the commands that talk to the server, so `auth me` stays instant.
 
 auth_app = typer.Typer(help="Authentication commands")
 
@@ -16,11 +16,12 @@ def register(
     Register a new user with username, email, and password.
     Handles validation and server errors cleanly.
     """
-    res = requests.post(f"{config.API_URL}/users/register", json={
+    from . import http_client
+    res = http_client.post("/users/register", json={
         "username": username,
         "email": email,
         "password": password
-    })
+    }, authenticated=False)
 
     if res.status_code == 201:
         print("[green]✅ Registered![/green]")
@@ -45,7 +46,8 @@ def login(
     """
     Log in and store the JWT token.
     """
-    res = requests.post(f"{config.API_URL}/users/login", json={"email": email, "password": password})
+    from . import http_client
+    res = http_client.post("/users/login", json={"email": email, "password": password}, authenticated=False)
     if res.ok:
         auth.save_token(res.json()["token"])
         print("[green]✅ Logged in[/green]")
@@ -60,9 +62,18 @@ def login(
 @auth_app.command("logout")
 def logout():
     """
-    Remove saved token (logout).
+    Revoke the token on the server and remove the saved copy and cached responses.
     """
+    import requests
+    from . import http_client
+    token = auth.get_token()
+    if token:
+        try:
+            http_client.post("/users/logout")
+        except requests.RequestException:
+            print("[yellow]⚠️ Could not reach server; token removed locally only[/yellow]")
     auth.clear_token()
+    http_client.cache.clear()
     print("[yellow]🔓 Logged out[/yellow]")
 
 
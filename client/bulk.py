@@ -0,0 +1,302 @@
+# PWP_JournalAPI/client/bulk.py
+"""
+Bulk import and export of journal entries.
+
+Sources and targets are streamed, never loaded whole. Two formats:
+
+- JSON Lines: one {"title", "content", "tags", "date"} object per line.
+- Markdown: a directory with one .md file per entry. Each file has an
+  optional front-matter block of title, date and tags (a JSON list). A file
+  without front matter takes its title from a leading "# heading" or its
+  file name.
+
+Imports are sent to POST /entries/batch in batches of up to BATCH_SIZE
+entries. Up to `concurrency` batches are in flight at once over the shared
+keep-alive session. Progress is recorded in a checkpoint file next to the
+source after every finished batch, so an interrupted import resumes where it
+stopped. A batch that was in flight when the import stopped is sent again;
+every entry carries an idempotency key made from the source and its index,
+so the server reuses the entries the first attempt created instead of
+adding them twice. Exports page through the GET /sync snapshot and write each
+page as it arrives, recording the last entry written in the same way.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from . import http_client
+
+BATCH_SIZE = 100  # the server's limit per request
+MAX_BATCH_BYTES = 512 * 1024  # well under the API's 1 MiB body limit
+CHECKPOINT_EVERY = 100  # exported entries between checkpoint writes
+SNAPSHOT_PAGE = 200  # entries per /sync page during an export
+FRONT_MATTER = "---"
+
+
+class BulkError(Exception):
+    """The server refused to list entries for an export."""
+
+
+class CheckpointMismatch(Exception):
+    """The source changed since its checkpoint was written."""
+
+
+# -- formats ---------------------------------------------------------------------
+
+def detect_format(path):
+    return "markdown" if os.path.isdir(path) or path.endswith(".md") else "jsonl"
+
+
+def _record(data):
+    tags = data.get("tags") or []
+    if isinstance(tags, str):
+        tags = [t.strip() for t in tags.split(",") if t.strip()]
+    record = {"title": str(data.get("title") or "").strip(), "content": data.get("content") or "", "tags": tags}
+    if data.get("date"):
+        record["date"] = data["date"]
+    return record
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield _record(json.loads(line))
+
+
+def parse_markdown(text, fallback_title):
+    meta, body = {}, text
+    lines = text.split("\n")
+    if lines and lines[0].strip() == FRONT_MATTER and FRONT_MATTER in (l.strip() for l in lines[1:]):
+        end = next(i for i, l in enumerate(lines[1:], 1) if l.strip() == FRONT_MATTER)
+        for line in lines[1:end]:
+            key, _, value = line.partition(":")
+            meta[key.strip()] = value.strip()
+        body = "\n".join(lines[end + 1:])
+        if meta.get("tags", "").startswith("["):
+            meta["tags"] = json.loads(meta["tags"])
+    body = body.strip("\n")
+    if "title" not in meta:
+        heading = re.match(r"#\s+(.+)\n?", body)
+        if heading:
+            meta["title"], body = heading.group(1), body[heading.end():].lstrip("\n")
+        else:
+            meta["title"] = fallback_title
+    meta["content"] = body
+    return _record(meta)
+
+
+def markdown_files(path):
+    return sorted(name for name in os.listdir(path) if name.endswith(".md"))
+
+
+def count_records(path, fmt=None):
+    """Number of entries in `path`, for progress reporting; reads the source once."""
+    if (fmt or detect_format(path)) == "markdown":
+        return len(markdown_files(path))
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def read_markdown(path):
+    for name in markdown_files(path):
+        with open(os.path.join(path, name), encoding="utf-8") as f:
+            yield parse_markdown(f.read(), os.path.splitext(name)[0])
+
+
+def to_markdown(entry):
+    title = " ".join(entry["title"].splitlines())
+    return (f"{FRONT_MATTER}\ntitle: {title}\ndate: {entry.get('date') or ''}\n"
+            f"tags: {json.dumps(entry.get('tags', []))}\n{FRONT_MATTER}\n\n{entry['content']}\n")
+
+
+def _slug(title):
+    return re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-")[:40] or "entry"
+
+
+# -- checkpoints ---------------------------------------------------------------------
+
+def checkpoint_path(path, action):
+    return f"{os.path.abspath(path).rstrip(os.sep)}.{action}-checkpoint.json"
+
+
+def _fingerprint(path, fmt):
+    if fmt == "markdown":
+        return len(markdown_files(path))
+    return os.path.getsize(path)
+
+
+def _load_checkpoint(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _discard(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _save_checkpoint(path, state):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+# -- import ---------------------------------------------------------------------
+
+def batches(records, batch_size):
+    """Yield (start index, records) batches bounded by count and by encoded size."""
+    batch, size, start = [], 0, 0
+    for index, record in enumerate(records):
+        encoded = len(json.dumps(record))
+        if batch and (len(batch) >= batch_size or size + encoded > MAX_BATCH_BYTES):
+            yield start, batch
+            batch, size, start = [], 0, index
+        batch.append(record)
+        size += encoded
+    if batch:
+        yield start, batch
+
+
+def _keyed(records, path, fingerprint):
+    """Give each record an idempotency key: the same source and index always send the same key."""
+    source = hashlib.sha256(f"{os.path.abspath(path)}|{fingerprint}".encode()).hexdigest()[:32]
+    for index, record in enumerate(records):
+        yield {**record, "idempotency_key": f"{source}:{index}"}
+
+
+def _send(batch):
+    response = http_client.post("/entries/batch", json={"entries": batch})
+    if response.status_code == 201:
+        return None
+    try:
+        return response.json()
+    except ValueError:
+        return {"error": f"{response.status_code} {response.text}"}
+
+
+def import_entries(path, fmt=None, batch_size=BATCH_SIZE, concurrency=4, checkpoint=None,
+                   restart=False, progress=None):
+    """
+    Import every entry in `path`. Returns {"imported", "skipped", "failed"}, where
+    "failed" maps a batch's first record index to the server's errors. The
+    checkpoint is removed once every batch has succeeded.
+    """
+    fmt = fmt or detect_format(path)
+    checkpoint = checkpoint or checkpoint_path(path, "import")
+    state = None if restart else _load_checkpoint(checkpoint)
+    fingerprint = _fingerprint(path, fmt)
+    if state is None:
+        state = {"source": os.path.abspath(path), "fingerprint": fingerprint, "batch_size": batch_size, "done": []}
+    elif state["fingerprint"] != fingerprint or state["source"] != os.path.abspath(path):
+        raise CheckpointMismatch(f"{path} changed since {checkpoint} was written; use --restart")
+    done = set(state["done"])
+    records = _keyed(read_markdown(path) if fmt == "markdown" else read_jsonl(path), path, fingerprint)
+    report = {"imported": 0, "skipped": 0, "failed": {}}
+
+    def finished(future):
+        start, count = inflight.pop(future)
+        errors = future.result()
+        if errors is None:
+            done.add(start)
+            state["done"] = sorted(done)
+            _save_checkpoint(checkpoint, state)
+            report["imported"] += count
+        else:
+            report["failed"][start] = errors
+        if progress:
+            progress(count)
+
+    inflight = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        try:
+            for start, batch in batches(records, state["batch_size"]):
+                if start in done:
+                    report["skipped"] += len(batch)
+                    if progress:
+                        progress(len(batch))
+                    continue
+                # Keep the pipeline full but bounded: a slow server never piles up batches in memory.
+                while len(inflight) >= concurrency * 2:
+                    for future in wait(inflight, return_when=FIRST_COMPLETED).done:
+                        finished(future)
+                inflight[pool.submit(_send, batch)] = (start, len(batch))
+            while inflight:
+                for future in wait(inflight, return_when=FIRST_COMPLETED).done:
+                    finished(future)
+        finally:
+            # On an error, let what was sent finish and be checkpointed before it propagates.
+            for future in list(inflight):
+                try:
+                    finished(future)
+                except Exception:
+                    inflight.pop(future, None)
+    if not report["failed"]:
+        _discard(checkpoint)
+    return report
+
+
+# -- export ---------------------------------------------------------------------
+
+def _snapshot(page_size=SNAPSHOT_PAGE):
+    """Yield every entry in id order, fetching the /sync snapshot one page at a time."""
+    params = {"limit": page_size}
+    while True:
+        response = http_client.get("/sync", params=params, use_cache=False)
+        if response.status_code != 200:
+            raise BulkError(f"Could not fetch entries: {response.status_code} {response.text}")
+        body = response.json()
+        for change in body["changes"]:
+            if change["kind"] != "entry":
+                return  # entries come first; the rest of the snapshot is comments and history
+            yield change["data"]
+        if not body["has_more"]:
+            return
+        params = {"since": body["next"], "limit": page_size}
+
+
+def export_entries(path, fmt=None, checkpoint=None, restart=False, progress=None, page_size=SNAPSHOT_PAGE):
+    """Write every entry to `path`; returns how many were written this run."""
+    fmt = fmt or detect_format(path)
+    checkpoint = checkpoint or checkpoint_path(path, "export")
+    state = None if restart else _load_checkpoint(checkpoint)
+    state = state or {"last_id": 0, "offset": 0}
+    entries = (e for e in _snapshot(page_size) if e["id"] > state["last_id"])
+    written = 0
+    if fmt == "markdown":
+        os.makedirs(path, exist_ok=True)
+        for entry in entries:
+            target = os.path.join(path, f"{entry['id']:06d}-{_slug(entry['title'])}.md")
+            fd, tmp = tempfile.mkstemp(dir=path, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(to_markdown(entry))
+            os.replace(tmp, target)
+            state["last_id"] = entry["id"]
+            written += 1
+            if written % CHECKPOINT_EVERY == 0:
+                _save_checkpoint(checkpoint, state)
+            if progress:
+                progress(1)
+    else:
+        mode = "r+b" if state["offset"] and os.path.exists(path) else "wb"
+        with open(path, mode) as f:
+            f.seek(state["offset"])
+            f.truncate()  # drop a line half-written before the interruption
+            for entry in entries:
+                record = {key: entry.get(key) for key in ("id", "title", "content", "tags", "date", "last_updated")}
+                f.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+                written += 1
+                if written % CHECKPOINT_EVERY == 0:
+                    f.flush()
+                    state.update(last_id=entry["id"], offset=f.tell())
+                    _save_checkpoint(checkpoint, state)
+                if progress:
+                    progress(1)
+    _discard(checkpoint)
+    return written
@@ -1,26 +1,79 @@
 # PWP_JournalAPI/client/comments_cli.py
 import typer
-import requests
 from rich import print
-import auth, config
+from . import http_client
 
 comment_app = typer.Typer(help="Manage comments")
 
+def _failure(res):
+    """A failed response's status and error body, for printing."""
+    try:
+        body = res.json()
+        body = body.get("error", body) if isinstance(body, dict) else body
+    except ValueError:
+        body = res.text
+    return f"{res.status_code} {body}"
+
+def _all_pages(res):
+    """
+    Every comment behind a comments listing, following its _links.next pages;
+    returns (comments, the failed response or None).
+    """
+    comments = []
+    while res.ok:
+        body = res.json()
+        comments.extend(body.get('comments', []))
+        next_page = body.get('_links', {}).get('next')
+        if not next_page:
+            return comments, None
+        res = http_client.get(next_page['href'])
+    return comments, res
+
 @comment_app.command("list")
 def list_comments(entry_id: int):
-    res = requests.get(f"{config.API_URL}/entries/{entry_id}/comments", headers={"Authorization": f"Bearer {auth.get_token()}"})
-    comments = res.json().get('comments', [])  # Access 'comments' key, default to empty list
-    if not comments:
-        print("[yellow]⚠️ No comments found.[/yellow]")
+    comments, failed = _all_pages(http_client.get(f"/entries/{entry_id}/comments"))
     for c in comments:
         print(f"[{c['id']}] {c['content']}")
+    if failed is not None:
+        print(f"[red]❌ Failed to list comments: {_failure(failed)}[/red]")
+        raise typer.Exit(1)
+    if not comments:
+        print("[yellow]⚠️ No comments found.[/yellow]")
+
+@comment_app.command("list-all")
+def list_all_comments(
+    workers: int = typer.Option(None, "--workers", "-w", help="Concurrent requests (default: JOURNAL_MAX_WORKERS)")
+):
+    """
+    List the comments of every one of your entries. First pages are fetched
+    concurrently; further pages of busy entries follow.
+    """
+    res = http_client.get("/entries/")
+    if res.status_code != 200:
+        print(f"[red]❌ Failed to list entries: {_failure(res)}[/red]")
+        raise typer.Exit(1)
+    entries = res.json().get('entries', [])
+    pages = http_client.fetch_all([f"/entries/{entry['id']}/comments" for entry in entries], max_workers=workers)
+    failures = 0
+    for entry, page in zip(entries, pages):
+        print(f"[bold cyan][{entry['id']}][/bold cyan] {entry['title']}")
+        comments, failed = _all_pages(page)
+        for c in comments:
+            print(f"  [{c['id']}] {c['content']}")
+        if failed is not None:
+            failures += 1
+            print(f"  [red]❌ Failed to list comments: {_failure(failed)}[/red]")
+        elif not comments:
+            print("  [dim]No comments[/dim]")
+    if failures:
+        raise typer.Exit(1)
 
 @comment_app.command("add")
 def add_comment(entry_id: int, content: str):
-    res = requests.post(f"{config.API_URL}/entries/{entry_id}/comments", json={"content": content}, headers={"Authorization": f"Bearer {auth.get_token()}"})
+    res = http_client.post(f"/entries/{entry_id}/comments", json={"content": content})
     print("[green]✅ Comment added[/green]" if res.ok else f"[red]❌ {res.json()}[/red]")
 
 @comment_app.command("delete")
 def delete_comment(entry_id: int, comment_id: int):
-    res = requests.delete(f"{config.API_URL}/entries/{entry_id}/comments/{comment_id}", headers={"Authorization": f"Bearer {auth.get_token()}"})
-    print("[green]✅ Deleted[/green]" if res.ok else f"[red]❌ {res.json()}[/red]")
\ No newline at end of file
+    res = http_client.delete(f"/entries/{entry_id}/comments/{comment_id}")
+    print("[green]✅ Deleted[/green]" if res.ok else f"[red]❌ {res.json()}[/red]")
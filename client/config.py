@@ -2,4 +2,16 @@
 import os
 
 API_URL = os.getenv("API_URL", "https://project_2012966-pwp-deploy-tests.2.rahtiapp.fi")
-TOKEN_FILE = os.path.expanduser("~/.journal_token")
\ No newline at end of file
+TOKEN_FILE = os.path.expanduser("~/.journal_token")
+
+# HTTP client (see http_client.py)
+TIMEOUT = float(os.getenv("JOURNAL_TIMEOUT", "10"))
+RETRIES = int(os.getenv("JOURNAL_RETRIES", "3"))
+BACKOFF_FACTOR = float(os.getenv("JOURNAL_BACKOFF", "0.5"))
+MAX_WORKERS = int(os.getenv("JOURNAL_MAX_WORKERS", "8"))
+CACHE_DIR = os.path.expanduser(os.getenv("JOURNAL_CACHE_DIR", "~/.journal_cache"))
+CACHE_ENABLED = os.getenv("JOURNAL_CACHE", "1") != "0"
+
+# Offline replica (see replica.py)
+REPLICA_DIR = os.path.expanduser(os.getenv("JOURNAL_REPLICA_DIR", "~/.journal_replica"))
+REPLICA_SYNC_INTERVAL = float(os.getenv("JOURNAL_SYNC_INTERVAL", "60"))
@@ -1,32 +1,81 @@
 # PWP_JournalAPI/client/entries_cli.py
 import typer
-import requests
 from rich import print
-import auth, config
+from . import auth, replica
+# requests, rich.progress and bulk are imported by the commands that use them:
+# `entry list` and friends read the local replica and should start instantly.
 
-entry_app = typer.Typer(help="Manage journal entries")
+entry_app = typer.Typer(help="Manage journal entries (served from the local replica)")
+
+def _open():
+    if not auth.get_token():
+        print("[red]❌ You must login first[/red]")
+        raise typer.Exit()
+    return replica.open_replica()
+
+def _sync_now(store, quiet=False):
+    import requests
+    try:
+        report = store.sync()
+    except FileExistsError:
+        if not quiet:
+            print("[yellow]⚠️ A sync is already running.[/yellow]")
+        return None
+    except (requests.RequestException, replica.SyncError) as e:
+        if not quiet:
+            print(f"[yellow]⚠️ Offline, using local data: {e}[/yellow]")
+        return None
+    if not quiet and report["conflicts"]:
+        print(f"[yellow]⚠️ {report['conflicts']} conflicting entries; see `entry conflicts`.[/yellow]")
+    return report
+
+def _label(entry):
+    pending = " [yellow](pending sync)[/yellow]" if entry["state"] != replica.CLEAN else ""
+    entry_id = "new" if entry["id"] < 0 else entry["id"]
+    return f"[bold cyan][{entry_id}][/bold cyan] {entry['title']} - Tags: {entry['tags']}{pending}"
 
 @entry_app.command("list")
 def list_entries():
     """
     List all your journal entries.
     """
-    token = auth.get_token()
-    if not token:
-        print("[red]❌ You must login first[/red]")
+    store = _open()
+    if store.last_sync is None:
+        _sync_now(store)  # first use: fill the replica
+    entries = store.entries()
+    if not entries:
+        print("[yellow]⚠️ No journal entries found.[/yellow]")
+    for entry in entries:
+        print(_label(entry))
+        print(f"  [dim]Last updated: {entry.get('last_updated') or 'N/A'}[/dim]")
+        print("  [dim]-- -- --[/dim]")
+    replica.sync_in_background(store)
+
+@entry_app.command("show")
+def show(entry_id: int = typer.Argument(..., help="ID of the entry to show")):
+    """
+    Show one journal entry.
+    """
+    store = _open()
+    entry = store.get(entry_id)
+    if entry is None:
+        print("[yellow]⚠️ Entry not found.[/yellow]")
         raise typer.Exit()
+    print(_label(entry))
+    print(entry["content"])
+    replica.sync_in_background(store)
 
-    res = requests.get(f"{config.API_URL}/entries/", headers={"Authorization": f"Bearer {token}"})
-    if res.status_code == 200:
-        entries = res.json().get('entries', [])  # Access 'entries' key, default to empty list
-        if not entries:
-            print("[yellow]⚠️ No journal entries found.[/yellow]")
-        for entry in entries:
-            print(f"[bold cyan][{entry['id']}][/bold cyan] {entry['title']} - Tags: {entry['tags']}")
-            print(f"  [dim]Last updated: {entry.get('last_updated', 'N/A')}[/dim]")
-            print("  [dim]-- -- --[/dim]")
-    else:
-        print(f"[red]❌ Failed to list entries: {res.json()}[/red]")
+@entry_app.command("search")
+def search(query: str = typer.Argument(..., help="Words to look for in titles, content and tags")):
+    """
+    Full-text search of your entries, offline.
+    """
+    store = _open()
+    results = store.search(query)
+    if not results:
+        print("[yellow]⚠️ No matching entries.[/yellow]")
+    for entry in results:
+        print(_label(entry))
 
 @entry_app.command("create")
 def create(
@@ -37,38 +86,139 @@ def create(
     """
     Create a new journal entry.
     """
-    token = auth.get_token()
-    if not token:
-        print("[red]❌ You must login first[/red]")
-        raise typer.Exit()
-
+    store = _open()
     tag_list = [t.strip() for t in tags.split(",") if t.strip()]
+    store.create(title, content, tag_list)
+    print("[green]✅ Entry created successfully![/green]")
+    replica.sync_in_background(store, force=True)
 
-    res = requests.post(f"{config.API_URL}/entries/", json={
-        "title": title,
-        "content": content,
-        "tags": tag_list
-    }, headers={"Authorization": f"Bearer {token}"})
-
-    if res.status_code == 201:
-        print("[green]✅ Entry created successfully![/green]")
-    else:
-        print(f"[red]❌ Failed to create entry: {res.json()}[/red]")
+@entry_app.command("edit")
+def edit(
+    entry_id: int = typer.Argument(..., help="ID of the entry to edit"),
+    title: str = typer.Option(None, "--title", help="New title"),
+    content: str = typer.Option(None, "--content", help="New content"),
+    tags: str = typer.Option(None, "--tags", "-t", help="New comma-separated tags")
+):
+    """
+    Edit a journal entry.
+    """
+    store = _open()
+    tag_list = [t.strip() for t in tags.split(",") if t.strip()] if tags is not None else None
+    if not store.edit(entry_id, title=title, content=content, tags=tag_list):
+        print("[yellow]⚠️ Entry not found.[/yellow]")
+        raise typer.Exit()
+    print("[green]✅ Entry updated.[/green]")
+    replica.sync_in_background(store, force=True)
 
 @entry_app.command("delete")
 def delete(entry_id: int = typer.Argument(..., help="ID of the entry to delete")):
     """
     Delete a journal entry by ID.
     """
-    token = auth.get_token()
-    if not token:
-        print("[red]❌ You must login first[/red]")
-        raise typer.Exit()
-
-    res = requests.delete(f"{config.API_URL}/entries/{entry_id}", headers={"Authorization": f"Bearer {token}"})
-    if res.status_code == 200:
+    store = _open()
+    if store.delete(entry_id):
         print("[green]✅ Entry deleted successfully.[/green]")
-    elif res.status_code == 404:
-        print("[yellow]⚠️ Entry not found.[/yellow]")
+        replica.sync_in_background(store, force=True)
     else:
-        print(f"[red]❌ Failed to delete entry: {res.json()}[/red]")
\ No newline at end of file
+        print("[yellow]⚠️ Entry not found.[/yellow]")
+
+@entry_app.command("sync")
+def sync(quiet: bool = typer.Option(False, "--quiet", "-q", help="Print nothing (used by background sync)")):
+    """
+    Push local changes and pull changes from the server now.
+    """
+    store = _open()
+    report = _sync_now(store, quiet=quiet)
+    if report and not quiet:
+        print(f"[green]✅ Synced: {report['pushed']} pushed, {report['pulled']} pulled.[/green]")
+
+@entry_app.command("conflicts")
+def conflicts():
+    """
+    List entries changed both locally and on the server.
+    """
+    store = _open()
+    items = store.conflicts()
+    if not items:
+        print("[green]✅ No conflicts.[/green]")
+    for item in items:
+        local, server = item["local"], item["server"]
+        print(f"[bold cyan][{item['entry_id']}][/bold cyan]")
+        print(f"  local:  {local['title'] if local else '(deleted)'}")
+        print(f"  server: {server['title'] if server else '(deleted)'}")
+
+@entry_app.command("resolve")
+def resolve(
+    entry_id: int = typer.Argument(..., help="ID of the conflicting entry"),
+    keep: str = typer.Option(..., "--keep", help="Which copy to keep: local or server")
+):
+    """
+    Settle a conflict by keeping the local or the server copy.
+    """
+    if keep not in ("local", "server"):
+        print("[red]❌ --keep must be 'local' or 'server'[/red]")
+        raise typer.Exit()
+    store = _open()
+    if not store.resolve(entry_id, keep):
+        print("[yellow]⚠️ No conflict for that entry.[/yellow]")
+        raise typer.Exit()
+    print(f"[green]✅ Kept the {keep} copy.[/green]")
+    replica.sync_in_background(store, force=True)
+
+@entry_app.command("import")
+def import_entries(
+    path: str = typer.Argument(..., help="JSON Lines file or directory of Markdown files"),
+    fmt: str = typer.Option(None, "--format", "-f", help="jsonl or markdown (default: from the path)"),
+    batch_size: int = typer.Option(100, "--batch-size", help="Entries per request (max 100)"),
+    concurrency: int = typer.Option(4, "--concurrency", "-c", help="Batches in flight at once"),
+    restart: bool = typer.Option(False, "--restart", help="Ignore the checkpoint and start over")
+):
+    """
+    Import entries in batches; rerun after an interruption to resume.
+    """
+    import requests
+    from rich.progress import Progress
+    from . import bulk
+    store = _open()
+    try:
+        with Progress() as progress:
+            task = progress.add_task("Importing", total=bulk.count_records(path, fmt))
+            report = bulk.import_entries(path, fmt=fmt, batch_size=min(batch_size, bulk.BATCH_SIZE),
+                                         concurrency=concurrency, restart=restart,
+                                         progress=lambda n: progress.advance(task, n))
+    except bulk.CheckpointMismatch as e:
+        print(f"[red]❌ {e}[/red]")
+        raise typer.Exit(1)
+    except requests.RequestException as e:
+        print(f"[red]❌ Interrupted ({e}); rerun the same command to resume.[/red]")
+        raise typer.Exit(1)
+    print(f"[green]✅ Imported {report['imported']} entries"
+          + (f", {report['skipped']} already imported" if report["skipped"] else "") + ".[/green]")
+    for start, errors in sorted(report["failed"].items()):
+        print(f"[red]❌ Batch starting at entry {start + 1} rejected: {errors}[/red]")
+    replica.sync_in_background(store, force=True)
+    if report["failed"]:
+        raise typer.Exit(1)
+
+@entry_app.command("export")
+def export_entries(
+    path: str = typer.Argument(..., help="JSON Lines file or directory for Markdown files"),
+    fmt: str = typer.Option(None, "--format", "-f", help="jsonl or markdown (default: from the path)"),
+    restart: bool = typer.Option(False, "--restart", help="Ignore the checkpoint and start over")
+):
+    """
+    Export all entries from the server; rerun after an interruption to resume.
+    """
+    import requests
+    from rich.progress import Progress
+    from . import bulk
+    _open()
+    try:
+        with Progress() as progress:
+            task = progress.add_task("Exporting", total=None)
+            written = bulk.export_entries(path, fmt=fmt, restart=restart,
+                                          progress=lambda n: progress.advance(task, n))
+    except (requests.RequestException, bulk.BulkError) as e:
+        print(f"[red]❌ Export stopped ({e}); rerun the same command to resume.[/red]")
+        raise typer.Exit(1)
+    print(f"[green]✅ Exported {written} entries to {path}.[/green]")
@@ -0,0 +1,149 @@
+# PWP_JournalAPI/client/http_client.py
+"""
+Shared HTTP layer for the CLI commands.
+
+All commands go through one requests.Session, so connections to API_URL are
+kept alive and reused rather than paying a TCP and TLS handshake per call.
+Idempotent requests are retried with exponential backoff on connection
+errors, 429 and 5xx responses, honoring Retry-After. Responses are
+requested gzip-compressed.
+
+GET responses with an ETag or Last-Modified are kept in an on-disk cache
+(CACHE_DIR) and revalidated with If-None-Match / If-Modified-Since. A 304
+is answered from the copy on disk. fetch_all() runs many GETs at once on a
+thread pool sharing the session's connection pool.
+
+requests (and urllib3 beneath it) is imported when the first request is
+sent, not at import time, so commands that never touch the network start
+without paying for it.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from . import auth, config
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """The process-wide session, created on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            retry = Retry(total=config.RETRIES, backoff_factor=config.BACKOFF_FACTOR,
+                          status_forcelist=RETRY_STATUSES, allowed_methods=IDEMPOTENT_METHODS,
+                          respect_retry_after_header=True, raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=config.MAX_WORKERS, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["Accept-Encoding"] = "gzip, deflate"
+            _session = session
+        return _session
+
+
+class ResponseCache:
+    """GET responses on disk, one JSON file per URL and credential."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, url, headers):
+        # Keyed by the token as well, so users sharing a machine never see each other's data.
+        key = f"{url}\n{headers.get('Authorization', '')}"
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url, headers):
+        try:
+            with open(self._path(url, headers), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url, headers, response):
+        validators = {name: response.headers[name] for name in ("ETag", "Last-Modified") if name in response.headers}
+        if not validators:
+            return
+        record = {"url": url, "validators": validators, "encoding": response.encoding,
+                  "headers": {"Content-Type": response.headers.get("Content-Type", "")},
+                  "body": response.content.decode("latin-1")}
+        os.makedirs(self.directory, exist_ok=True)
+        # Write-then-rename: concurrent fetches never read a half-written file.
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp, self._path(url, headers))
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.directory, name))
+
+
+cache = ResponseCache(config.CACHE_DIR)
+
+
+def _from_cache(response, record):
+    response.status_code = 200
+    response._content = record["body"].encode("latin-1")
+    response.encoding = record["encoding"]
+    response.headers.update(record["headers"])
+    response.from_cache = True
+    return response
+
+
+def request(method, path, authenticated=True, use_cache=True, **kwargs):
+    """Send a request to the API; `path` is relative to API_URL."""
+    url = f"{config.API_URL}{path}"
+    headers = dict(kwargs.pop("headers", None) or {})
+    if authenticated:
+        headers.update(auth.get_auth())
+    kwargs.setdefault("timeout", config.TIMEOUT)
+    record = None
+    if method == "GET" and use_cache and config.CACHE_ENABLED:
+        record = cache.get(url, headers)
+        if record:
+            validators = record["validators"]
+            if "ETag" in validators:
+                headers["If-None-Match"] = validators["ETag"]
+            if "Last-Modified" in validators:
+                headers["If-Modified-Since"] = validators["Last-Modified"]
+    response = get_session().request(method, url, headers=headers, **kwargs)
+    response.from_cache = False
+    if record and response.status_code == 304:
+        return _from_cache(response, record)
+    if method == "GET" and use_cache and config.CACHE_ENABLED and response.status_code == 200:
+        cache.put(url, headers, response)
+    return response
+
+
+def get(path, **kwargs):
+    return request("GET", path, **kwargs)
+
+def post(path, **kwargs):
+    return request("POST", path, **kwargs)
+
+def delete(path, **kwargs):
+    return request("DELETE", path, **kwargs)
+
+
+def fetch_all(paths, max_workers=None):
+    """GET every path concurrently; responses come back in the order of `paths`."""
+    paths = list(paths)
+    if not paths:
+        return []
+    workers = min(max_workers or config.MAX_WORKERS, len(paths))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(get, paths))
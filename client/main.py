@@ -1,13 +1,55 @@
 # PWP_JournalAPI/client/main.py
-import typer 
-from auth_cli import auth_app # client.
-from entries_cli import entry_app # client.
-from comments_cli import comment_app # client.
+"""
+Journal API CLI entry point: the `journal` console script (see setup.py).
+`python client/main.py ...` and `python -m client.main ...` also work.
+
+Sub-command groups are loaded on demand. `journal auth me` imports only
+auth_cli, never requests, rich's progress bars or the replica, and the
+top-level --help is written from SUBCOMMANDS without importing anything.
+Check startup cost with benchmarks/bench_cli_startup.py.
+"""
+import importlib
+import os
+import sys
+from typer.core import TyperGroup
+from typer.main import get_command
+
+if __package__ in (None, ""):
+    # Run as a script: make `client` importable as a package.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# name -> (module, Typer app attribute, help)
+SUBCOMMANDS = {
+    "auth": ("client.auth_cli", "auth_app", "Authentication commands"),
+    "entry": ("client.entries_cli", "entry_app", "Manage journal entries (served from the local replica)"),
+    "comment": ("client.comments_cli", "comment_app", "Manage comments"),
+}
+
+
+class LazyGroup(TyperGroup):
+    """A click group that imports a sub-command's module only when it is invoked."""
+
+    def list_commands(self, ctx):
+        return list(SUBCOMMANDS)
+
+    def get_command(self, ctx, name):
+        if name not in SUBCOMMANDS:
+            return None
+        module, attr, _ = SUBCOMMANDS[name]
+        return get_command(getattr(importlib.import_module(module), attr))
+
+    def format_commands(self, ctx, formatter):
+        with formatter.section("Commands"):
+            formatter.write_dl([(name, help) for name, (_, _, help) in SUBCOMMANDS.items()])
+
+
+# Plain (non-rich) help for the top level: rich help would load every group to describe it.
+cli = LazyGroup(name="journal", help="Journal API CLI", rich_markup_mode=None)
+
+
+def main():
+    cli(prog_name="journal")
 
-app = typer.Typer(help="Journal API CLI")
-app.add_typer(auth_app, name="auth")
-app.add_typer(entry_app, name="entry")
-app.add_typer(comment_app, name="comment")
 
 if __name__ == "__main__":
-    app()
+    main()
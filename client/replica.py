@@ -0,0 +1,410 @@
+# PWP_JournalAPI/client/replica.py
+"""
+Offline-first local replica of the user's journal entries.
+
+Entries are kept in a SQLite file under REPLICA_DIR, one per API and user,
+so read commands never wait for the network and keep working offline. Writes
+go to the replica first and are marked pending.
+
+sync() pushes pending writes and then pulls changes:
+
+- push: new entries (negative local ids) are POSTed with an Idempotency-Key
+  kept until the local row gets its server id, so a create retried after a
+  lost response does not make a copy. An edit or delete is only sent if the
+  server copy still has the `last_updated` the local copy was based on, and
+  carries that copy's ETag in If-Match, so an edit that lands in between
+  makes the server refuse it (412). Either way the entry is recorded as a
+  conflict and left alone until `entry resolve`.
+- pull: applies GET /sync deltas since the stored token, one page per
+  transaction. Changes to an entry with pending local writes are recorded
+  as conflicts instead of overwriting them.
+
+sync_in_background() starts `journal entry sync` in a detached process when the
+replica is stale or has pending writes, so commands return immediately. Its
+errors are appended to `<replica>.log`.
+"""
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from . import auth, config, http_client
+
+CLEAN, CREATED, MODIFIED, DELETED = 0, 1, 2, 3
+LOCK_STALE_SECONDS = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    tags TEXT NOT NULL DEFAULT '[]',
+    date TEXT,
+    last_updated TEXT,  -- the server version this copy is based on
+    comment_count INTEGER NOT NULL DEFAULT 0,
+    state INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS conflicts (
+    entry_id INTEGER PRIMARY KEY,
+    server TEXT,  -- the server's copy as JSON; NULL when it was deleted there
+    detected_at REAL NOT NULL
+);
+"""
+
+# External-content FTS5 index kept current by triggers.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts
+    USING fts5(title, content, tags, content='entries', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts(rowid, title, content, tags) VALUES (new.id, new.title, new.content, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, title, content, tags)
+        VALUES ('delete', old.id, old.title, old.content, old.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_au AFTER UPDATE ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, title, content, tags)
+        VALUES ('delete', old.id, old.title, old.content, old.tags);
+    INSERT INTO entries_fts(rowid, title, content, tags) VALUES (new.id, new.title, new.content, new.tags);
+END;
+"""
+
+
+class SyncError(Exception):
+    """The server refused a write for a reason other than a conflict."""
+
+
+def _token_subject(token):
+    try:
+        payload = token.split(".")[1]
+        return str(json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))["sub"])
+    except (IndexError, KeyError, ValueError):
+        return "anonymous"
+
+
+def replica_path(token=None):
+    """Replica file for the current API_URL and the user the token belongs to."""
+    subject = _token_subject(token or auth.get_token() or "")
+    name = hashlib.sha256(f"{config.API_URL}\n{subject}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(config.REPLICA_DIR, f"{name}.db")
+
+
+def _create_key_name(entry_id):
+    return f"create_key:{entry_id}"
+
+
+def _row(row):
+    if row is None:
+        return None
+    entry = dict(row)
+    entry["tags"] = json.loads(entry["tags"])
+    return entry
+
+
+class Replica:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=10)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")  # a background sync never blocks local reads
+        self.db.executescript(SCHEMA)
+        try:
+            self.db.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:  # SQLite built without FTS5
+            self.fts = False
+
+    def close(self):
+        self.db.close()
+
+    # -- metadata ------------------------------------------------------------
+
+    def _meta(self, key):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def last_sync(self):
+        value = self._meta("last_sync")
+        return float(value) if value else None
+
+    def pending_count(self):
+        return self.db.execute("SELECT count(*) FROM entries WHERE state != ?", (CLEAN,)).fetchone()[0]
+
+    # -- local reads ---------------------------------------------------------
+
+    def entries(self):
+        return [_row(r) for r in self.db.execute(
+            "SELECT * FROM entries WHERE state != ? ORDER BY id < 0, abs(id)", (DELETED,))]
+
+    def get(self, entry_id):
+        return _row(self.db.execute("SELECT * FROM entries WHERE id = ? AND state != ?",
+                                    (entry_id, DELETED)).fetchone())
+
+    def search(self, query, limit=50):
+        terms = query.split()
+        if not terms:
+            return []
+        if self.fts:
+            match = " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+            rows = self.db.execute(
+                "SELECT entries.* FROM entries_fts JOIN entries ON entries.id = entries_fts.rowid "
+                "WHERE entries_fts MATCH ? AND entries.state != ? ORDER BY bm25(entries_fts) LIMIT ?",
+                (match, DELETED, limit))
+        else:
+            clauses = " AND ".join("(title || ' ' || content || ' ' || tags) LIKE ?" for _ in terms)
+            rows = self.db.execute(f"SELECT * FROM entries WHERE {clauses} AND state != ? LIMIT ?",
+                                   [f"%{term}%" for term in terms] + [DELETED, limit])
+        return [_row(r) for r in rows]
+
+    # -- local writes ----------------------------------------------------------
+
+    def _next_local_id(self):
+        """Entries not yet on the server get negative ids."""
+        lowest = self.db.execute("SELECT min(id) FROM entries").fetchone()[0] or 0
+        return min(lowest, 0) - 1
+
+    def create(self, title, content, tags):
+        with self.db:
+            entry_id = self._next_local_id()
+            self.db.execute("INSERT INTO entries (id, title, content, tags, state) VALUES (?, ?, ?, ?, ?)",
+                            (entry_id, title, content, json.dumps(tags), CREATED))
+        return entry_id
+
+    def edit(self, entry_id, **fields):
+        entry = self.get(entry_id)
+        if entry is None:
+            return False
+        changes = {k: (json.dumps(v) if k == "tags" else v) for k, v in fields.items() if v is not None}
+        if not changes:
+            return True
+        assignments = ", ".join(f"{column} = ?" for column in changes)
+        state = CREATED if entry["state"] == CREATED else MODIFIED
+        with self.db:
+            self.db.execute(f"UPDATE entries SET {assignments}, state = ? WHERE id = ?",
+                            [*changes.values(), state, entry_id])
+        return True
+
+    def delete(self, entry_id):
+        entry = self.get(entry_id)
+        if entry is None:
+            return False
+        with self.db:
+            if entry["state"] == CREATED:
+                self.db.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+                self.db.execute("DELETE FROM meta WHERE key = ?", (_create_key_name(entry_id),))
+            else:
+                self.db.execute("UPDATE entries SET state = ? WHERE id = ?", (DELETED, entry_id))
+        return True
+
+    # -- sync ------------------------------------------------------------------
+
+    def _store(self, data, state=CLEAN):
+        self.db.execute(
+            "INSERT OR REPLACE INTO entries (id, title, content, tags, date, last_updated, comment_count, state) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (data["id"], data["title"], data["content"], json.dumps(data.get("tags", [])), data.get("date"),
+             data.get("last_updated"), data.get("comment_count", 0), state))
+
+    def _conflict(self, entry_id, server):
+        self.db.execute("INSERT OR REPLACE INTO conflicts (entry_id, server, detected_at) VALUES (?, ?, ?)",
+                        (entry_id, json.dumps(server) if server is not None else None, time.time()))
+
+    def _in_conflict(self, entry_id):
+        return self.db.execute("SELECT 1 FROM conflicts WHERE entry_id = ?", (entry_id,)).fetchone() is not None
+
+    def _apply(self, change):
+        entry_id = change["id"]
+        local = self.db.execute("SELECT state, last_updated FROM entries WHERE id = ?", (entry_id,)).fetchone()
+        data = change.get("data") if change["op"] == "upsert" else None
+        if local is not None and local["state"] != CLEAN:
+            if data is None or data.get("last_updated") != local["last_updated"]:
+                self._conflict(entry_id, data)
+            return
+        if data is None:
+            self.db.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+        else:
+            self._store(data)
+
+    def pull(self):
+        """Apply server changes since the last pull; returns how many were applied."""
+        applied = 0
+        token = self._meta("sync_token")
+        while True:
+            response = http_client.get("/sync", params={"since": token} if token else None, use_cache=False)
+            if response.status_code == 400 and token:
+                token = None  # the server no longer knows this token: start over from a snapshot
+                continue
+            if response.status_code != 200:
+                raise SyncError(f"Sync failed: {response.status_code} {response.text}")
+            body = response.json()
+            changes = [c for c in body["changes"] if c["kind"] == "entry"]
+            with self.db:
+                if token is None:
+                    # A snapshot lists only what exists; clean rows missing from it were deleted.
+                    live = [c["id"] for c in changes]
+                    self.db.execute(f"DELETE FROM entries WHERE state = ? AND id > 0 AND id NOT IN "
+                                    f"({','.join('?' * len(live)) or 'NULL'})", [CLEAN, *live])
+                for change in changes:
+                    self._apply(change)
+                token = body["next"]
+                self._set_meta("sync_token", token)
+            applied += len(changes)
+            if not body.get("has_more"):
+                return applied
+
+    def _server_copy(self, entry_id):
+        """The server's entry and its ETag, or (None, None) if it is gone."""
+        response = http_client.get(f"/entries/{entry_id}", use_cache=False)
+        if response.status_code == 404:
+            return None, None
+        if response.status_code != 200:
+            raise SyncError(f"Could not fetch entry {entry_id}: {response.status_code}")
+        return response.json(), response.headers.get("ETag")
+
+    def _create_key(self, entry_id):
+        """The Idempotency-Key for creating local entry entry_id, stored before it is first sent."""
+        name = _create_key_name(entry_id)
+        key = self._meta(name)
+        if key is None:
+            key = uuid.uuid4().hex
+            with self.db:
+                self._set_meta(name, key)
+        return key
+
+    def _push_one(self, entry):
+        entry_id = entry["id"]
+        body = {"title": entry["title"], "content": entry["content"], "tags": entry["tags"]}
+        if entry["state"] == CREATED:
+            response = http_client.post("/entries/", json=body, headers={"Idempotency-Key": self._create_key(entry_id)})
+            if response.status_code != 201:
+                raise SyncError(f"Could not create entry {entry['title']!r}: {response.text}")
+            with self.db:
+                # The change feed fills in dates and last_updated on the next pull.
+                self.db.execute("UPDATE entries SET id = ?, state = ? WHERE id = ?",
+                                (response.json()["entry_id"], CLEAN, entry_id))
+                self.db.execute("DELETE FROM meta WHERE key = ?", (_create_key_name(entry_id),))
+            return
+        server, etag = self._server_copy(entry_id)
+        if server is None or server.get("last_updated") != entry["last_updated"]:
+            with self.db:
+                self._conflict(entry_id, server)
+            return
+        # The server re-checks the copy we compared against, in the same transaction as the write.
+        headers = {"If-Match": etag} if etag else {}
+        if entry["state"] == DELETED:
+            response = http_client.delete(f"/entries/{entry_id}", headers=headers)
+            if response.status_code == 412:
+                return self._changed_meanwhile(entry_id)
+            if response.status_code not in (200, 404):
+                raise SyncError(f"Could not delete entry {entry_id}: {response.text}")
+            with self.db:
+                self.db.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+            return
+        response = http_client.request("PATCH", f"/entries/{entry_id}", json=body, headers=headers)
+        if response.status_code == 412:
+            return self._changed_meanwhile(entry_id)
+        if response.status_code != 200:
+            raise SyncError(f"Could not update entry {entry_id}: {response.text}")
+        with self.db:
+            self._store(response.json())
+
+    def _changed_meanwhile(self, entry_id):
+        server, _ = self._server_copy(entry_id)
+        with self.db:
+            self._conflict(entry_id, server)
+
+    def push(self):
+        """Send pending local writes; returns how many were sent."""
+        rows = self.db.execute("SELECT * FROM entries WHERE state != ? ORDER BY abs(id)", (CLEAN,)).fetchall()
+        pushed = 0
+        for entry in map(_row, rows):
+            if self._in_conflict(entry["id"]):
+                continue
+            self._push_one(entry)
+            pushed += 0 if self._in_conflict(entry["id"]) else 1
+        return pushed
+
+    @contextmanager
+    def _lock(self):
+        path = self.path + ".lock"
+        try:
+            if time.time() - os.path.getmtime(path) > LOCK_STALE_SECONDS:
+                os.remove(path)
+        except OSError:
+            pass
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        try:
+            yield
+        finally:
+            os.close(fd)
+            os.remove(path)
+
+    def sync(self):
+        """Push, then pull. Raises FileExistsError if another sync is running."""
+        with self._lock():
+            pushed = self.push()
+            pulled = self.pull()
+            with self.db:
+                self._set_meta("last_sync", str(time.time()))
+        return {"pushed": pushed, "pulled": pulled, "conflicts": len(self.conflicts())}
+
+    # -- conflicts ---------------------------------------------------------------
+
+    def conflicts(self):
+        items = []
+        for row in self.db.execute("SELECT * FROM conflicts ORDER BY entry_id"):
+            local = _row(self.db.execute("SELECT * FROM entries WHERE id = ?", (row["entry_id"],)).fetchone())
+            items.append({"entry_id": row["entry_id"], "local": local,
+                          "server": json.loads(row["server"]) if row["server"] else None})
+        return items
+
+    def resolve(self, entry_id, keep):
+        """Settle a conflict by keeping the "local" or the "server" copy."""
+        conflict = next((c for c in self.conflicts() if c["entry_id"] == entry_id), None)
+        if conflict is None:
+            return False
+        server = conflict["server"]
+        with self.db:
+            self.db.execute("DELETE FROM conflicts WHERE entry_id = ?", (entry_id,))
+            if keep == "server":
+                if server is None:
+                    self.db.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+                else:
+                    self._store(server)
+            elif server is None:
+                # Deleted on the server: the local copy comes back as a new entry.
+                self.db.execute("UPDATE entries SET id = ?, state = ? WHERE id = ?",
+                                (self._next_local_id(), CREATED, entry_id))
+            else:
+                # Rebase the local edit on the server version so the next push overwrites it.
+                self.db.execute("UPDATE entries SET last_updated = ? WHERE id = ?", (server["last_updated"], entry_id))
+        return True
+
+
+def open_replica():
+    return Replica(replica_path())
+
+
+def sync_in_background(replica, force=False):
+    """Start a detached `entry sync` if the replica is stale or has pending writes; returns the process or None."""
+    last = replica.last_sync
+    if not force and not replica.pending_count() and last and time.time() - last < config.REPLICA_SYNC_INTERVAL:
+        return None
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    options = {"creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP} \
+        if sys.platform == "win32" else {"start_new_session": True}
+    # Nobody watches the detached process, so its errors go to a log next to the replica.
+    with open(replica.path + ".log", "ab") as log:
+        return subprocess.Popen([sys.executable, "-m", "client.main", "entry", "sync", "--quiet"], cwd=root,
+                                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=log, **options)
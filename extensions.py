@@ -1,3 +1,31 @@
+from flask import current_app, g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 
-db = SQLAlchemy()  # Create a single DB instance
+
+class RoutingSession(Session):
+    """
+    Sends reads to g.db_read_engine when journalapi.replicas routed the request
+    to a replica. Writes go to the primary, and so does everything after the
+    first write, so a request always reads what it wrote. With
+    journalapi.sharding on, statements on sharded tables go to the shard
+    chosen for the app context instead.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if not has_app_context():
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        shards = current_app.extensions.get("journal_shards")
+        if shards is not None:
+            engine = shards.bind(mapper, clause)
+            if engine is not None:
+                return engine
+        engine = g.get("db_read_engine")
+        if engine is not None:
+            if not self._flushing and not getattr(clause, "is_dml", False):
+                return engine
+            g.db_read_engine = None
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})  # Create a single DB instance
@@ -0,0 +1,59 @@
+# gunicorn.conf.py
+import multiprocessing
+import os
+
+
+def _cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+wsgi_app = os.environ.get("GUNICORN_APP", "journalapi:create_app(profile='prod')")
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# gthread workers keep client connections open and serve several requests
+# per process, so one slow request no longer blocks the whole worker.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.environ.get("WEB_CONCURRENCY", _cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+# Import the app once in the master; workers fork with the code already loaded.
+preload_app = True
+
+# Must outlive nginx's upstream keepalive_timeout so nginx always closes first.
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 75))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = 30
+
+# Recycle workers periodically; the jitter keeps them from restarting together.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+
+def post_fork(server, worker):
+    """
+    Drop DB connections inherited from the preloaded master.
+
+    SQLite/DBAPI connections must not be shared across processes, so each
+    worker discards the parent's pools (without closing the parent's sockets)
+    and opens its own connections lazily. That includes the shard and replica
+    engines of journalapi.sharding and journalapi.replicas.
+    """
+    app = server.app.wsgi()
+    engines = []
+    sqlalchemy = app.extensions.get("sqlalchemy")
+    if sqlalchemy is not None:
+        with app.app_context():
+            engines.extend(sqlalchemy.engines.values())
+    for name in ("journal_shards", "journal_replicas"):
+        router = app.extensions.get(name)
+        if router is not None:
+            engines.extend(router.engines)
+    for engine in engines:
+        engine.dispose(close=False)
+    server.log.info("Worker %s: disposed %d inherited DB engine pools", worker.pid, len(engines))
@@ -1,23 +1,46 @@
 import os
+import sys
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager
+from extensions import db
+from journalapi import profiles
+from journalapi.auth import init_app as init_auth
+from journalapi.autosave import init_app as init_autosave
+from journalapi.blobs import init_app as init_blobs
+from journalapi.changes import init_app as init_changes
+from journalapi.compaction import init_app as init_compaction
+from journalapi.compression import init_app as init_compression
+from journalapi.conditional import init_app as init_conditional
+from journalapi.docs import init_app as init_docs
+from journalapi.events import init_app as init_events
+from journalapi.limits import init_app as init_limits
+from journalapi.ratelimit import init_app as init_ratelimit
+from journalapi.replicas import init_app as init_replicas
+from journalapi.sharding import init_app as init_sharding
+from journalapi.softdelete import init_app as init_softdelete
 
-db = SQLAlchemy()
-jwt = JWTManager()
 
-def create_app(config=None):
+def create_app(config=None, profile=None):
+    """
+    Build the API. `profile` is one of journalapi.profiles.PROFILES (dev, test,
+    prod); `config` overrides it. This is the only factory: `app.create_app`,
+    gunicorn, asgi.py and the CLI all end up here.
+    """
     app = Flask(__name__, instance_relative_config=True)
     app.config.from_mapping(
         SECRET_KEY=os.environ.get("JWT_SECRET_KEY", "dev"),
         SQLALCHEMY_DATABASE_URI="sqlite:///" + os.path.join(app.instance_path, "journal.db"),
-        SQLALCHEMY_TRACK_MODIFICATIONS=False
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        SWAGGER={"title": "PWP Journal API", "uiversion": 3}
     )
+    app.config["PROFILE"] = profiles.resolve(profile, config)
+    app.config.from_mapping(profiles.settings(app.config["PROFILE"]))
 
     if config:
         app.config.update(config)
     else:
         app.config.from_pyfile("config.py", silent=True)
+    app.logger.setLevel(app.config["LOG_LEVEL"])
 
     # Ensure instance folder exists
     try:
@@ -28,15 +51,63 @@ def create_app(config=None):
     # Initialize extensions
     with app.app_context():
         db.init_app(app)
-        jwt.init_app(app)
+        init_auth(app)
+        init_sharding(app)
+        init_replicas(app)
+        init_ratelimit(app)
+        init_changes(app)
+        init_events(app)
+        init_softdelete(app)
+        init_compaction(app)
+        init_autosave(app)
+        init_limits(app)
+        init_blobs(app)
+        init_compression(app)
+        init_conditional(app)
+        init_docs(app)
+
+    # Root health-check route
+    from journalapi.utils import JsonResponse
+
+    @app.route("/")
+    def root():
+        return JsonResponse({"message": "✅ Journal API is running!"}, 200)
 
     # Register API blueprint
     from journalapi.api import api_bp
     app.register_blueprint(api_bp)
 
     # Register CLI commands
-    from journalapi.cli import init_db_command, masterkey_command
+    from journalapi.cli import compile_openapi_command, compress_content_command, init_db_command, masterkey_command, purge_deleted_command, rebuild_stats_command, seed_command, shards_group, upgrade_db_command
     app.cli.add_command(init_db_command)
     app.cli.add_command(masterkey_command)
+    app.cli.add_command(upgrade_db_command)
+    app.cli.add_command(rebuild_stats_command)
+    app.cli.add_command(purge_deleted_command)
+    app.cli.add_command(compress_content_command)
+    app.cli.add_command(compile_openapi_command)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(shards_group)
+
+    check_shared_engine(app)
+    if app.config["PROFILE"] == "prod" and app.config["SECRET_KEY"] == "dev":
+        app.logger.warning("Running the prod profile with the default SECRET_KEY; set JWT_SECRET_KEY")
+    return app
+
 
-    return app
\ No newline at end of file
+def check_shared_engine(app):
+    """
+    Startup self-check: every loaded journalapi module and every model must use
+    extensions.db, and so one engine per app. A second SQLAlchemy() would leave
+    its users without a registered app, failing only at request time.
+    """
+    if app.extensions.get("sqlalchemy") is not db:
+        raise RuntimeError("extensions.db is not registered on the app")
+    for name, module in list(sys.modules.items()):
+        if name == "extensions" or name.startswith("journalapi"):
+            other = getattr(module, "db", None)
+            if isinstance(other, SQLAlchemy) and other is not db:
+                raise RuntimeError(f"{name}.db is a separate SQLAlchemy instance; import it from extensions")
+    for mapper in db.Model.registry.mappers:
+        if mapper.local_table is not None and mapper.local_table.metadata is not db.metadata:
+            raise RuntimeError(f"{mapper.class_.__name__} is not mapped on extensions.db")
@@ -0,0 +1,191 @@
+# PWP_JournalAPI/journalapi/analytics.py
+"""
+Time-series analytics over a user's journal entries.
+
+Counts and means are computed by SQLite with GROUP BY on a strftime() bucket,
+tag frequencies by GROUP BY over json_each(tags). SQLite has no percentile
+aggregate, so scores are fetched once as two ordered columns and percentiles
+are computed per bucket with vectorized NumPy index arithmetic (or a plain
+Python loop when NumPy is not installed). NumPy is imported on the first
+percentile query rather than at worker boot.
+
+Results are cached in analytics_buckets. Entry writes call mark_stale(), and a
+read only recomputes the buckets flagged since the previous read.
+"""
+import json
+from sqlalchemy import delete, func, or_, select, true
+from sqlalchemy.dialects.sqlite import insert
+from extensions import db
+from journalapi import replicas
+from journalapi.models import AnalyticsBucket, JournalEntry
+
+np = None
+_numpy_checked = False
+
+GRANULARITIES = {"day": "%Y-%m-%d", "week": "%Y-W%W", "month": "%Y-%m"}
+PERCENTILES = (50, 90)
+TOP_TAGS = 5
+# Marker row: the granularity has been computed in full for this user.
+COMPLETE = "*"
+
+
+def bucket_key(granularity, value):
+    return value.strftime(GRANULARITIES[granularity])
+
+def _bucket_expr(granularity):
+    return func.strftime(GRANULARITIES[granularity], JournalEntry.date)
+
+
+def mark_stale(entry):
+    """Flag the cached buckets containing entry.date; call in the entry's write transaction."""
+    if entry.date is None:
+        return
+    rows = [
+        {"user_id": entry.user_id, "granularity": name, "bucket": bucket_key(name, entry.date), "stale": True}
+        for name in GRANULARITIES
+    ]
+    stmt = insert(AnalyticsBucket).values(rows)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[AnalyticsBucket.user_id, AnalyticsBucket.granularity, AnalyticsBucket.bucket],
+        set_={"stale": True},
+    ))
+
+
+def _percentile(values, q):
+    """Linear-interpolated percentile of an ascending list (NumPy's default method)."""
+    pos = (len(values) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+def _numpy():
+    """The numpy module, imported on first use; None when it is not installed."""
+    global np, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+    return np
+
+def percentiles(keys, values):
+    """
+    {bucket: (p50, p90, ...)} for parallel columns sorted by (bucket, value).
+    """
+    if not keys:
+        return {}
+    if _numpy() is not None:
+        vals = np.asarray(values, dtype=float)
+        buckets, starts, counts = np.unique(np.asarray(keys), return_index=True, return_counts=True)
+        columns = []
+        for q in PERCENTILES:
+            pos = starts + (counts - 1) * (q / 100)
+            lo = np.floor(pos).astype(np.int64)
+            hi = np.minimum(lo + 1, starts + counts - 1)
+            columns.append(vals[lo] + (vals[hi] - vals[lo]) * (pos - lo))
+        return {bucket: tuple(float(col[i]) for col in columns) for i, bucket in enumerate(buckets.tolist())}
+    groups = {}
+    for key, value in zip(keys, values):
+        groups.setdefault(key, []).append(value)
+    return {key: tuple(_percentile(vals, q) for q in PERCENTILES) for key, vals in groups.items()}
+
+
+def compute(user_id, granularity, buckets=None):
+    """Aggregate the given buckets (all when None) straight from journal_entries."""
+    key = _bucket_expr(granularity)
+    scope = [JournalEntry.user_id == user_id, JournalEntry.date.isnot(None)]
+    if buckets is not None:
+        scope.append(key.in_(buckets))
+
+    results = {}
+    for bucket, count, mean in db.session.execute(
+        select(key, func.count(), func.avg(JournalEntry.sentiment_score)).where(*scope).group_by(key)
+    ):
+        results[bucket] = {
+            "entry_count": count, "sentiment_mean": mean,
+            "sentiment_p50": None, "sentiment_p90": None, "top_tags": [],
+        }
+
+    rows = db.session.execute(
+        select(key, JournalEntry.sentiment_score)
+        .where(*scope, JournalEntry.sentiment_score.isnot(None))
+        .order_by(key, JournalEntry.sentiment_score)
+    ).all()
+    for bucket, (p50, p90) in percentiles([r[0] for r in rows], [r[1] for r in rows]).items():
+        results[bucket].update(sentiment_p50=p50, sentiment_p90=p90)
+
+    tag = func.json_each(JournalEntry.tags).table_valued("value")
+    tag_rows = db.session.execute(
+        select(key, tag.c.value, func.count())
+        .select_from(JournalEntry).join(tag, true())
+        .where(*scope, func.json_valid(JournalEntry.tags))
+        .group_by(key, tag.c.value)
+        .order_by(key, func.count().desc(), tag.c.value)
+    )
+    for bucket, name, count in tag_rows:
+        top = results[bucket]["top_tags"]
+        if len(top) < TOP_TAGS:
+            top.append({"tag": name, "count": count})
+    return results
+
+
+def _store(user_id, granularity, results):
+    rows = [
+        dict(user_id=user_id, granularity=granularity, bucket=bucket, stale=False,
+             **{**values, "top_tags": json.dumps(values["top_tags"])})
+        for bucket, values in results.items()
+    ]
+    if rows:
+        db.session.execute(insert(AnalyticsBucket), rows)
+
+def refresh(user_id, granularity):
+    """Bring the cache for one user and granularity up to date; returns the buckets recomputed."""
+    scope = [AnalyticsBucket.user_id == user_id, AnalyticsBucket.granularity == granularity]
+    pending = db.session.scalars(
+        select(AnalyticsBucket.bucket).where(*scope, or_(AnalyticsBucket.bucket == COMPLETE, AnalyticsBucket.stale))
+    ).all()
+    if pending == [COMPLETE]:
+        return 0
+    # Recompute from the primary: results computed on a lagging replica would be stored as current.
+    replicas.use_primary()
+    if db.session.get(AnalyticsBucket, (user_id, granularity, COMPLETE)) is None:
+        db.session.execute(delete(AnalyticsBucket).where(*scope))
+        results = compute(user_id, granularity)
+        _store(user_id, granularity, results)
+        db.session.add(AnalyticsBucket(user_id=user_id, granularity=granularity, bucket=COMPLETE, stale=False))
+        db.session.commit()
+        return len(results)
+    stale = list(db.session.scalars(select(AnalyticsBucket.bucket).where(*scope, AnalyticsBucket.stale)))
+    if not stale:
+        return 0
+    results = compute(user_id, granularity, stale)
+    db.session.execute(delete(AnalyticsBucket).where(*scope, AnalyticsBucket.bucket.in_(stale)))
+    _store(user_id, granularity, results)
+    db.session.commit()
+    return len(stale)
+
+
+def get_analytics(user_id, granularity):
+    refresh(user_id, granularity)
+    rows = db.session.scalars(
+        select(AnalyticsBucket)
+        .where(AnalyticsBucket.user_id == user_id, AnalyticsBucket.granularity == granularity,
+               AnalyticsBucket.bucket != COMPLETE)
+        .order_by(AnalyticsBucket.bucket)
+        .execution_options(populate_existing=True)
+    )
+    return [
+        {
+            "bucket": row.bucket,
+            "entry_count": row.entry_count,
+            "sentiment": {
+                "mean": row.sentiment_mean,
+                "p50": row.sentiment_p50,
+                "p90": row.sentiment_p90,
+            },
+            "top_tags": json.loads(row.top_tags or "[]"),
+        }
+        for row in rows
+    ]
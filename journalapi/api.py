@@ -6,10 +6,10 @@ from flask_restful import Api
 
 # your resources
 from journalapi.resources.user import (
-    UserRegisterResource, UserLoginResource, UserResource
+    UserRegisterResource, UserLoginResource, UserLogoutResource, UserResource, UserStatsResource
 )
 from journalapi.resources.journal_entry import (
-    JournalEntryListResource, JournalEntryResource
+    EntryContentResource, JournalEntryBatchResource, JournalEntryListResource, JournalEntryResource
 )
 from journalapi.resources.comment import (
     CommentCollectionResource, CommentItemResource
@@ -17,6 +17,10 @@ from journalapi.resources.comment import (
 from journalapi.resources.edit_history import (
     EditHistoryResource
 )
+from journalapi.resources.draft import EntryDraftResource
+from journalapi.resources.analytics import UserAnalyticsResource
+from journalapi.resources.sync import SyncResource
+from journalapi.resources.events import EventStreamResource
 # from journalapi.resources.edit_history import EditHistoryResource
 
 api_bp = Blueprint("api", __name__, url_prefix="")  # or "/api" if you want
@@ -25,15 +29,26 @@ api = Api(api_bp)
 # User endpoints
 api.add_resource(UserRegisterResource, "/users/register")
 api.add_resource(UserLoginResource, "/users/login")
+api.add_resource(UserLogoutResource, "/users/logout")
 api.add_resource(UserResource, "/users/<int:user_id>")
+api.add_resource(UserStatsResource, "/users/<int:user_id>/stats")
+api.add_resource(UserAnalyticsResource, "/users/<int:user_id>/analytics")
 
 # Journal endpoints
 api.add_resource(JournalEntryListResource, "/entries/")
+api.add_resource(JournalEntryBatchResource, "/entries/batch")
 api.add_resource(JournalEntryResource, "/entries/<int:entry_id>")
+api.add_resource(EntryDraftResource, "/entries/<int:entry_id>/draft")
+# Raw text body, streamed and held to ENTRY_MAX_CONTENT_BYTES (see journalapi.limits).
+api.add_resource(EntryContentResource, "/entries/<int:entry_id>/content", endpoint="entry_content")
 
 # Comment endpoints
 api.add_resource(CommentCollectionResource, "/entries/<int:entry_id>/comments")
 api.add_resource(CommentItemResource, "/entries/<int:entry_id>/comments/<int:comment_id>")
 
+# Delta sync
+api.add_resource(SyncResource, "/sync")
+api.add_resource(EventStreamResource, "/events")
+
 # If you add edit history:
 api.add_resource(EditHistoryResource, "/entries/<int:entry_id>/history")
@@ -0,0 +1,180 @@
+# PWP_JournalAPI/journalapi/auth.py
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from flask_jwt_extended import JWTManager
+from werkzeug.security import generate_password_hash
+from journalapi import blocklist
+
+
+class TokenCache:
+    """Bounded LRU of verified tokens, keyed by the SHA-256 digest of the raw JWT."""
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest):
+        with self._lock:
+            claims = self._data.get(digest)
+            if claims is not None:
+                self._data.move_to_end(digest)
+            return claims
+
+    def put(self, digest, claims):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[digest] = claims
+            self._data.move_to_end(digest)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, digest):
+        with self._lock:
+            self._data.pop(digest, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class UserCache:
+    """Per-process TTL cache of "does this user still exist" answers."""
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def exists(self, user_id, loader):
+        now = time.monotonic()
+        entry = self._data.get(user_id)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+        exists = loader(user_id)
+        with self._lock:
+            self._data[user_id] = (exists, now + self.ttl)
+        return exists
+
+    def invalidate(self, user_id, exists=None):
+        with self._lock:
+            if exists is None:
+                self._data.pop(user_id, None)
+            else:
+                self._data[user_id] = (exists, time.monotonic() + self.ttl)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class CachingJWTManager(JWTManager):
+    """
+    JWTManager that skips signature verification for tokens it has already
+    verified. A cache hit still enforces expiry; the blocklist loader runs on
+    every request regardless, so revocation is never bypassed.
+    """
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        state = current_app.extensions.get("journal_auth")
+        if state is None or csrf_value:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        digest = hashlib.sha256(encoded_token.encode()).digest()
+        claims = state.tokens.get(digest)
+        if claims is not None:
+            exp = claims.get("exp")
+            if allow_expired or exp is None or time.time() <= exp + state.leeway:
+                return dict(claims)
+            state.tokens.discard(digest)
+
+        claims = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        if not allow_expired:
+            state.tokens.put(digest, dict(claims))
+        return claims
+
+
+class AuthState:
+    def __init__(self, app):
+        self.tokens = TokenCache(app.config["JWT_DECODE_CACHE_SIZE"])
+        self.users = UserCache(app.config["JWT_USER_CACHE_TTL"])
+        self.leeway = int(app.config.get("JWT_DECODE_LEEWAY", 0))
+        self.check_users = app.config["JWT_USER_CHECK"]
+
+
+jwt = CachingJWTManager()
+
+
+def _read_key(path):
+    with open(path, "r") as f:
+        return f.read()
+
+
+def init_app(app):
+    """Configure the JWT layer: caches, blocklist, user checks and optional asymmetric keys."""
+    app.config.setdefault("JWT_DECODE_CACHE_SIZE", 4096)
+    app.config.setdefault("JWT_USER_CACHE_TTL", 30)
+    app.config.setdefault("JWT_USER_CHECK", False)
+    app.config.setdefault("PASSWORD_HASH_METHOD", "pbkdf2:sha256")
+
+    private_key_file = app.config.get("JWT_PRIVATE_KEY_FILE") or os.environ.get("JWT_PRIVATE_KEY_FILE")
+    public_key_file = app.config.get("JWT_PUBLIC_KEY_FILE") or os.environ.get("JWT_PUBLIC_KEY_FILE")
+    if private_key_file:
+        app.config["JWT_PRIVATE_KEY"] = _read_key(private_key_file)
+    if public_key_file:
+        app.config["JWT_PUBLIC_KEY"] = _read_key(public_key_file)
+    if public_key_file or private_key_file:
+        app.config.setdefault("JWT_ALGORITHM", "RS256")
+
+    app.extensions["journal_auth"] = AuthState(app)
+    blocklist.init_app(app)
+    jwt.init_app(app)
+
+
+def _user_exists(user_id):
+    from extensions import db
+    from journalapi import sharding
+    from journalapi.models import User
+    # Not the request's shard: comment requests are routed to the entry owner's.
+    with sharding.use_shard(sharding.shard_of(user_id)):
+        return db.session.get(User, user_id) is not None
+
+
+@jwt.token_in_blocklist_loader
+def _is_token_revoked(jwt_header, jwt_payload):
+    return is_token_revoked(jwt_payload)
+
+
+def is_token_revoked(jwt_payload):
+    """Whether decoded claims were revoked (or, with JWT_USER_CHECK, belong to a deleted user)."""
+    revoked = blocklist.get_blocklist()
+    if revoked is not None and jwt_payload.get("jti") and revoked.is_revoked(jwt_payload["jti"]):
+        return True
+    state = current_app.extensions.get("journal_auth")
+    if state is None or not state.check_users:
+        return False
+    try:
+        user_id = int(jwt_payload[current_app.config.get("JWT_IDENTITY_CLAIM", "sub")])
+    except (KeyError, TypeError, ValueError):
+        return True
+    return not state.users.exists(user_id, _user_exists)
+
+
+def hash_password(password):
+    """Hash a password with PASSWORD_HASH_METHOD (the test profile uses a one-iteration PBKDF2)."""
+    return generate_password_hash(password, method=current_app.config["PASSWORD_HASH_METHOD"])
+
+
+def invalidate_user(user_id, deleted=False):
+    """Drop (or mark as deleted) the cached existence answer for a user."""
+    state = current_app.extensions.get("journal_auth")
+    if state is not None:
+        state.users.invalidate(user_id, exists=False if deleted else None)
@@ -0,0 +1,194 @@
+# PWP_JournalAPI/journalapi/autosave.py
+"""
+Autosave drafts with write coalescing and group commit.
+
+PATCH /entries/<id>/draft neither touches journal_entries nor commits. The
+patch is merged into an in-memory buffer keyed by entry id, so any number of
+saves of one entry between flushes become a single row write. A flusher
+thread per process writes everything pending as one multi-row upsert into
+entry_drafts and commits once every AUTOSAVE_FLUSH_SECONDS (sooner when
+AUTOSAVE_MAX_PENDING entries are waiting). With SQLite that is one fsync for
+all the drafts saved in the interval, across all entries and users.
+
+Durability, per response:
+
+- 202 (default): the draft is held in this worker's memory. It reaches the
+  database within AUTOSAVE_FLUSH_SECONDS, or when the process exits cleanly.
+  A crash or SIGKILL before then loses at most that window of saves.
+- 200 (?durable=1): the request waits for the next group commit and only
+  answers once the draft is on disk; 503 if that takes longer than
+  AUTOSAVE_DURABLE_TIMEOUT.
+
+Drafts are private: they never change the entry, its history, stats,
+analytics or the sync feed. Saving the entry itself (PUT, PATCH, the content
+PUT or DELETE) publishes and discards the draft. Several workers may buffer
+saves of the same entry; rows carry saved_at and the newest save wins. A
+discard therefore leaves a tombstone row (discarded_at set, saved_at = the
+discard time) rather than deleting it, so saves another worker buffered
+before the publish lose to it when they are flushed; journalapi.compaction
+drops tombstones once they are DRAFT_TOMBSTONE_SECONDS old. With journalapi.sharding a flush
+commits once per shard that has pending drafts.
+"""
+import atexit
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from sqlalchemy.dialects.sqlite import insert
+from extensions import db
+from journalapi import sharding
+from journalapi.models import EntryDraft
+
+FIELDS = ("title", "content", "tags")
+
+
+class DraftBuffer:
+    def __init__(self, app):
+        self.app = app
+        self.interval = app.config["AUTOSAVE_FLUSH_SECONDS"]
+        self.max_pending = app.config["AUTOSAVE_MAX_PENDING"]
+        self.durable_timeout = app.config["AUTOSAVE_DURABLE_TIMEOUT"]
+        self.background = app.config["AUTOSAVE_FLUSHER_ENABLED"]
+        self._pending = {}
+        self._cond = threading.Condition()
+        # Serializes flushes so "durable up to generation N" is never reported early.
+        self._flush_lock = threading.Lock()
+        self._generation = 0
+        self._durable = 0
+        self._wake = threading.Event()
+        self._thread_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    # -- saving --------------------------------------------------------
+
+    def current(self, entry):
+        """The latest draft of an entry as a row dict, and whether it is on disk; None without a draft."""
+        with self._cond:
+            row = self._pending.get(entry.id)
+            if row is not None:
+                return dict(row), False
+        draft = db.session.get(EntryDraft, entry.id)
+        if draft is None or draft.discarded_at is not None:
+            return None, True
+        return {"entry_id": entry.id, "user_id": draft.user_id, "title": draft.title,
+                "content": draft.content, "tags": draft.tags, "saved_at": draft.saved_at}, True
+
+    def save(self, entry, changes):
+        """Merge `changes` into the entry's draft; returns (row, generation)."""
+        with self._cond:
+            base = self._pending.get(entry.id)
+        if base is None:
+            base, _ = self.current(entry)
+        if base is None:
+            base = {"entry_id": entry.id, "user_id": entry.user_id, "title": entry.title,
+                    "content": entry.content, "tags": entry.tags}
+        if "tags" in changes:
+            changes = {**changes, "tags": json.dumps(changes["tags"])}
+        with self._cond:
+            row = {**self._pending.get(entry.id, base), **changes, "saved_at": datetime.now(timezone.utc)}
+            self._pending[entry.id] = row
+            self._generation += 1
+            generation = self._generation
+            full = len(self._pending) >= self.max_pending
+        self._ensure_flusher()
+        if full:
+            self._wake.set()
+        return dict(row), generation
+
+    def discard(self, entry):
+        """Drop an entry's draft; the tombstone commits with the caller's transaction."""
+        with self._flush_lock, self._cond:
+            self._pending.pop(entry.id, None)
+        discarded = datetime.now(timezone.utc)
+        stmt = insert(EntryDraft).values(entry_id=entry.id, user_id=entry.user_id, title=None, content=None,
+                                         tags="[]", saved_at=discarded, discarded_at=discarded)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[EntryDraft.entry_id],
+            set_={name: stmt.excluded[name] for name in (*FIELDS, "saved_at", "discarded_at")},
+        ))
+
+    def pending_count(self):
+        return len(self._pending)
+
+    # -- group commit --------------------------------------------------
+
+    def flush(self):
+        """Write every buffered draft in one transaction; returns the number of rows written."""
+        with self._flush_lock:
+            with self._cond:
+                rows = list(self._pending.values())
+                self._pending = {}
+                generation = self._generation
+            if rows:
+                stmt = insert(EntryDraft)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[EntryDraft.entry_id],
+                    set_={**{name: stmt.excluded[name] for name in (*FIELDS, "saved_at")}, "discarded_at": None},
+                    # Also keeps a tombstone when the save predates the publish.
+                    where=EntryDraft.saved_at <= stmt.excluded.saved_at,
+                )
+                try:
+                    for shard, group in sharding.by_shard(rows):
+                        with sharding.use_shard(shard):
+                            db.session.execute(stmt, group)
+                            db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    with self._cond:
+                        # Keep anything saved since, and retry the rest next time.
+                        for row in rows:
+                            self._pending.setdefault(row["entry_id"], row)
+                    raise
+            with self._cond:
+                self._durable = max(self._durable, generation)
+                self._cond.notify_all()
+            return len(rows)
+
+    def wait_durable(self, generation):
+        """Block until the save with this generation is committed; False on timeout."""
+        if not self._flusher_alive():
+            self.flush()
+            return self._durable >= generation
+        self._wake.set()
+        with self._cond:
+            return self._cond.wait_for(lambda: self._durable >= generation, self.durable_timeout)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._flush_in_context()
+
+    def _flush_in_context(self):
+        with self.app.app_context():
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception("Draft flush failed")
+            finally:
+                db.session.remove()
+
+    def _flusher_alive(self):
+        return self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+
+    def _ensure_flusher(self):
+        if not self.background:
+            return
+        with self._thread_lock:
+            # Threads do not survive fork; each worker starts its own flusher.
+            if self._flusher_alive():
+                return
+            if self._pid is None:
+                atexit.register(self._flush_in_context)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="journal-autosave", daemon=True)
+            self._thread.start()
+
+
+def init_app(app):
+    app.config.setdefault("AUTOSAVE_FLUSH_SECONDS", 1.0)
+    app.config.setdefault("AUTOSAVE_MAX_PENDING", 1000)
+    app.config.setdefault("AUTOSAVE_DURABLE_TIMEOUT", 5.0)
+    app.config.setdefault("AUTOSAVE_FLUSHER_ENABLED", True)
+    app.extensions["journal_autosave"] = DraftBuffer(app)
@@ -0,0 +1,107 @@
+# PWP_JournalAPI/journalapi/blobs.py
+"""
+Storage tier for large entry bodies.
+
+On flush, entry text longer than ENTRY_INLINE_MAX_BYTES (UTF-8) is moved out
+of journal_entries into entry_blobs: zlib-compressed and keyed by its
+SHA-256, so identical bodies are stored once. The hot row keeps only the
+digest, which keeps journal_entries pages small and list scans cache-friendly;
+JournalEntry.content loads and decompresses the blob on first access.
+
+Blobs no longer referenced by any entry are removed by journalapi.compaction.
+"""
+import hashlib
+import zlib
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, or_, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from extensions import db
+from journalapi.models import EntryBlob, JournalEntry
+
+DEFAULT_INLINE_MAX_BYTES = 8 * 1024
+
+
+def inline_limit():
+    if has_app_context():
+        return current_app.config.get("ENTRY_INLINE_MAX_BYTES", DEFAULT_INLINE_MAX_BYTES)
+    return DEFAULT_INLINE_MAX_BYTES
+
+def is_large(text, limit):
+    # UTF-8 needs at most 4 bytes per character, so short strings skip the encode.
+    return text is not None and len(text) * 4 > limit and len(text.encode("utf-8")) > limit
+
+
+def store(session, text):
+    """Add `text` to entry_blobs (a no-op when identical text is stored already); returns its digest."""
+    data = text.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    session.execute(
+        insert(EntryBlob)
+        .values(digest=digest, size=len(data), data=zlib.compress(data))
+        .on_conflict_do_nothing(index_elements=[EntryBlob.digest])
+    )
+    return digest
+
+def load(digest):
+    blob = db.session.get(EntryBlob, digest)
+    if blob is None:
+        raise LookupError(f"Missing entry blob {digest}")
+    return zlib.decompress(blob.data).decode("utf-8")
+
+
+def offload(entry, session, limit):
+    """Move an entry's inline text to the blob tier if it is over `limit`; True when moved."""
+    text = entry.inline_content
+    if not is_large(text, limit):
+        return False
+    entry.content_digest = store(session, text)
+    entry.inline_content = ""
+    entry._blob_cache = (entry.content_digest, text)
+    return True
+
+def _before_flush(session, flush_context, instances):
+    limit = inline_limit()
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, JournalEntry):
+            offload(obj, session, limit)
+
+
+def offload_existing(batch_size=500):
+    """Tier entries written before the blob tier existed (or before the limit was lowered)."""
+    limit = inline_limit()
+    moved = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(JournalEntry.id, JournalEntry.inline_content)
+            .where(JournalEntry.id > last_id, JournalEntry.content_digest.is_(None),
+                   # Compressed rows are shorter on disk than their text.
+                   or_(func.typeof(JournalEntry.inline_content) == "blob",
+                       func.length(JournalEntry.inline_content) * 4 > limit))
+            .order_by(JournalEntry.id)
+            .limit(batch_size)
+            .execution_options(include_deleted=True)
+        ).all()
+        if not rows:
+            return moved
+        for entry_id, text in rows:
+            if not is_large(text, limit):
+                continue
+            # A storage detail, not an edit: no change-log row, last_updated kept.
+            db.session.execute(
+                update(JournalEntry)
+                .where(JournalEntry.id == entry_id)
+                .values({JournalEntry.inline_content: "", JournalEntry.content_digest: store(db.session, text),
+                         JournalEntry.last_updated: JournalEntry.last_updated})
+                .execution_options(synchronize_session=False)
+            )
+            moved += 1
+        last_id = rows[-1][0]
+        db.session.commit()
+
+
+def init_app(app):
+    app.config.setdefault("ENTRY_INLINE_MAX_BYTES", DEFAULT_INLINE_MAX_BYTES)
+    if not event.contains(Session, "before_flush", _before_flush):
+        event.listen(Session, "before_flush", _before_flush)
@@ -0,0 +1,141 @@
+# PWP_JournalAPI/journalapi/blocklist.py
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from flask import current_app
+from extensions import db
+from journalapi.models import TokenBlocklist
+
+NEVER = datetime(9999, 12, 31, tzinfo=timezone.utc)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing on one BLAKE2b digest."""
+
+    def __init__(self, capacity=100000, error_rate=0.01):
+        self.capacity = max(1, capacity)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class Blocklist:
+    """
+    Revoked-token set stored in the token_blocklist table and fronted by a
+    per-worker Bloom filter. A miss in the filter means "not revoked" without
+    touching the database; a hit is confirmed with one indexed lookup.
+
+    Each worker tails the table by primary key every refresh_interval seconds,
+    so revocations made in another gunicorn worker are picked up incrementally.
+    The table is AUTOINCREMENT, so ids of purged rows never come back.
+    The filter is rebuilt from unexpired rows every rebuild_interval seconds
+    (or when it fills up), which is how expired tokens drop out of it.
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.01, refresh_interval=1.0, rebuild_interval=3600):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._last_id = 0
+        self._refreshed_at = 0.0
+        self._built_at = 0.0
+
+    def _rebuild(self):
+        now = datetime.now(timezone.utc)
+        TokenBlocklist.query.filter(TokenBlocklist.expires_at <= now).delete(synchronize_session=False)
+        db.session.commit()
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        last_id = 0
+        for row_id, jti in db.session.query(TokenBlocklist.id, TokenBlocklist.jti).order_by(TokenBlocklist.id):
+            bloom.add(jti)
+            last_id = row_id
+        self._bloom, self._last_id = bloom, last_id
+        self._built_at = time.monotonic()
+
+    def _tail(self):
+        rows = (
+            db.session.query(TokenBlocklist.id, TokenBlocklist.jti)
+            .filter(TokenBlocklist.id > self._last_id)
+            .order_by(TokenBlocklist.id)
+            .all()
+        )
+        for row_id, jti in rows:
+            self._bloom.add(jti)
+            self._last_id = row_id
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and self._bloom is not None and now - self._refreshed_at < self.refresh_interval:
+            return
+        with self._lock:
+            if (self._bloom is None or now - self._built_at >= self.rebuild_interval
+                    or self._bloom.count >= self.capacity):
+                self._rebuild()
+            else:
+                self._tail()
+            self._refreshed_at = now
+
+    def is_revoked(self, jti):
+        self.refresh()
+        if jti not in self._bloom:
+            return False
+        now = datetime.now(timezone.utc)
+        return db.session.query(
+            TokenBlocklist.query.filter(TokenBlocklist.jti == jti, TokenBlocklist.expires_at > now).exists()
+        ).scalar()
+
+    def revoke(self, jti, expires_at, user_id=None):
+        if TokenBlocklist.query.filter_by(jti=jti).first() is None:
+            db.session.add(TokenBlocklist(jti=jti, user_id=user_id, expires_at=expires_at))
+            db.session.commit()
+        self.refresh(force=True)
+
+
+def init_app(app):
+    app.config.setdefault("JWT_BLOCKLIST_ENABLED", True)
+    app.config.setdefault("JWT_BLOCKLIST_CAPACITY", 100000)
+    app.config.setdefault("JWT_BLOCKLIST_ERROR_RATE", 0.01)
+    app.config.setdefault("JWT_BLOCKLIST_REFRESH_SECONDS", 1.0)
+    app.config.setdefault("JWT_BLOCKLIST_REBUILD_SECONDS", 3600)
+    app.extensions["journal_blocklist"] = Blocklist(
+        capacity=app.config["JWT_BLOCKLIST_CAPACITY"],
+        error_rate=app.config["JWT_BLOCKLIST_ERROR_RATE"],
+        refresh_interval=app.config["JWT_BLOCKLIST_REFRESH_SECONDS"],
+        rebuild_interval=app.config["JWT_BLOCKLIST_REBUILD_SECONDS"],
+    )
+
+
+def get_blocklist():
+    if not current_app.config.get("JWT_BLOCKLIST_ENABLED"):
+        return None
+    return current_app.extensions.get("journal_blocklist")
+
+
+def revoke_token(jwt_payload):
+    """Add the token described by jwt_payload to the blocklist until it expires."""
+    blocklist = current_app.extensions["journal_blocklist"]
+    exp = jwt_payload.get("exp")
+    expires_at = datetime.fromtimestamp(exp, timezone.utc) if exp else NEVER
+    user_id = jwt_payload.get(current_app.config.get("JWT_IDENTITY_CLAIM", "sub"))
+    blocklist.revoke(jwt_payload["jti"], expires_at, int(user_id) if user_id is not None else None)
@@ -0,0 +1,103 @@
+# PWP_JournalAPI/journalapi/changes.py
+"""
+Change log for delta sync.
+
+Every flush that inserts, updates or deletes a journal entry, comment or edit
+history row appends one row per object to the changes table, in the same
+transaction. Rows are addressed to the user whose feed they belong in (the
+entry owner), so GET /sync is an index range scan on (user_id, seq).
+
+Bulk query-level writes bypass the ORM unit of work; code issuing them calls
+record() itself.
+"""
+from datetime import datetime, timezone
+from sqlalchemy import event, insert, select
+from sqlalchemy.orm import Session
+from journalapi.models import Change, Comment, EditHistory, JournalEntry
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+KINDS = {JournalEntry: "entry", Comment: "comment", EditHistory: "history"}
+MODELS = {kind: model for model, kind in KINDS.items()}
+
+
+def _owners(session, objects):
+    """Map entry id -> owner for every entry the tracked objects belong to."""
+    owners = {obj.id: obj.user_id for obj in objects if isinstance(obj, JournalEntry)}
+    missing = {obj.journal_entry_id for obj in objects
+               if not isinstance(obj, JournalEntry) and obj.journal_entry_id not in owners}
+    if missing:
+        rows = session.connection().execute(
+            select(JournalEntry.id, JournalEntry.user_id).where(JournalEntry.id.in_(missing))
+        )
+        owners.update(dict(rows.all()))
+    return owners
+
+def _after_flush(session, flush_context):
+    changed = []
+    for obj in session.new:
+        if type(obj) in KINDS:
+            changed.append((obj, UPSERT))
+    for obj in session.dirty:
+        if type(obj) in KINDS and session.is_modified(obj, include_collections=False):
+            # Soft-deleted rows leave the feed as tombstones.
+            changed.append((obj, DELETE if getattr(obj, "deleted_at", None) is not None else UPSERT))
+    for obj in session.deleted:
+        if type(obj) in KINDS:
+            changed.append((obj, DELETE))
+    if not changed:
+        return
+    owners = _owners(session, [obj for obj, _ in changed])
+    now = datetime.now(timezone.utc)
+    rows = []
+    for obj, op in changed:
+        entry_id = obj.id if isinstance(obj, JournalEntry) else obj.journal_entry_id
+        user_id = owners.get(entry_id)
+        if user_id is not None:
+            rows.append({"user_id": user_id, "kind": KINDS[type(obj)], "object_id": obj.id,
+                         "op": op, "changed_at": now})
+    if rows:
+        session.connection().execute(insert(Change.__table__), rows)
+        session.info["journal_changed"] = True
+
+
+def record(session, kind, user_id, object_ids, op):
+    """Log changes made with bulk UPDATE/DELETE statements that skip flush events."""
+    now = datetime.now(timezone.utc)
+    rows = [{"user_id": user_id, "kind": kind, "object_id": object_id, "op": op, "changed_at": now}
+            for object_id in object_ids]
+    if rows:
+        session.execute(insert(Change.__table__), rows)
+        session.info["journal_changed"] = True
+
+
+def head(session, user_id):
+    """Latest sequence number in a user's feed (0 when empty)."""
+    return session.scalar(select(Change.seq).where(Change.user_id == user_id)
+                          .order_by(Change.seq.desc()).limit(1)) or 0
+
+def changes_since(session, user_id, since, limit):
+    """
+    Up to `limit` change-log rows after `since`, collapsed to the latest op per
+    object. Returns (changes, next_seq, has_more).
+    """
+    rows = session.execute(
+        select(Change.seq, Change.kind, Change.object_id, Change.op)
+        .where(Change.user_id == user_id, Change.seq > since)
+        .order_by(Change.seq)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    latest = {}
+    for seq, kind, object_id, op in rows:
+        latest.pop((kind, object_id), None)
+        latest[(kind, object_id)] = (seq, op)
+    next_seq = rows[-1][0] if rows else since
+    return [(seq, kind, object_id, op) for (kind, object_id), (seq, op) in latest.items()], next_seq, has_more
+
+
+def init_app(app):
+    if not event.contains(Session, "after_flush", _after_flush):
+        event.listen(Session, "after_flush", _after_flush)
@@ -1,18 +1,193 @@
 import click
 from flask.cli import with_appcontext
-from journalapi import create_app, db
+from journalapi import sharding
 import secrets
 
+def _shard_prefix():
+    shard = sharding.current_shard()
+    return "" if shard is None else f"[shard {shard}] "
+
+
 @click.command("init-db")
 @with_appcontext
 def init_db_command():
-    app = create_app()
-    with app.app_context():
-        db.create_all()
-        click.echo("Initialized the database.")
+    """Create the tables of the current app's database (the directory and every shard)."""
+    sharding.create_all()
+    click.echo("Initialized the database.")
 
 @click.command("masterkey")
 @with_appcontext
 def masterkey_command():
     key = secrets.token_urlsafe(32)
-    click.echo(f"Generated master key: {key}")
\ No newline at end of file
+    click.echo(f"Generated master key: {key}")
+
+
+@click.command("upgrade-db")
+@with_appcontext
+def upgrade_db_command():
+    """Bring an existing database up to the current models."""
+    from journalapi.schema import upgrade_schema, upgrade_tables
+    if sharding.router() is not None:
+        for column in upgrade_tables():
+            click.echo(f"Added column {column} to the shard directory")
+    for report in sharding.for_each_shard(upgrade_schema):
+        prefix = _shard_prefix()
+        for column in report["columns"]:
+            click.echo(f"{prefix}Added column {column}")
+        click.echo(f"{prefix}Backfilled {report['comment_paths']} comment paths; comment counts recomputed.")
+        click.echo(f"{prefix}Moved {report['tiered_entries']} large entry bodies to entry_blobs.")
+
+
+@click.command("rebuild-stats")
+@click.option("--batch-size", default=500, show_default=True, help="Users recomputed per transaction.")
+@with_appcontext
+def rebuild_stats_command(batch_size):
+    """Recompute user_stats from journal_entries."""
+    from journalapi.stats import rebuild_all
+    users = sum(sharding.for_each_shard(lambda: rebuild_all(batch_size=batch_size)))
+    click.echo(f"Rebuilt stats for {users} users.")
+
+
+@click.command("purge-deleted")
+@click.option("--batch-size", default=500, show_default=True, help="Rows hard-deleted per transaction.")
+@click.option("--grace-seconds", default=0, show_default=True, help="Only purge rows deleted at least this long ago.")
+@click.option("--vacuum", "vacuum_mode", type=click.Choice(["none", "incremental", "full"]),
+              default="incremental", show_default=True, help="How to reclaim space afterwards.")
+@with_appcontext
+def purge_deleted_command(batch_size, grace_seconds, vacuum_mode):
+    """Hard-delete soft-deleted users, entries and comments in batches."""
+    from journalapi.compaction import purge_deleted, vacuum
+
+    def purge():
+        prefix = _shard_prefix()
+        totals = purge_deleted(batch_size=batch_size, grace_seconds=grace_seconds,
+                               progress=lambda stage, done: click.echo(f"{prefix}{stage}: {done} purged"))
+        click.echo(prefix + "Purged " + ", ".join(f"{count} {stage}" for stage, count in totals.items()) + ".")
+        pages = vacuum(vacuum_mode)
+        if pages is not None:
+            click.echo(f"{prefix}Free pages: {pages[0]} -> {pages[1]}.")
+        elif vacuum_mode == "incremental":
+            click.echo(f"{prefix}auto_vacuum is not INCREMENTAL; run once with --vacuum full to enable it.")
+    sharding.for_each_shard(purge)
+
+
+@click.command("compress-content")
+@click.option("--batch-size", default=500, show_default=True, help="Rows rewritten per transaction.")
+@click.option("--train-dictionary", is_flag=True, help="Train a new preset dictionary from recent entries first.")
+@click.option("--sample-size", default=2000, show_default=True, help="Entries sampled to train the dictionary.")
+@click.option("--recompress", is_flag=True, help="Re-encode already compressed values as well.")
+@with_appcontext
+def compress_content_command(batch_size, train_dictionary, sample_size, recompress):
+    """Compress stored entry content and edit history in place."""
+    from journalapi import compression
+    if train_dictionary:
+        # Dictionaries are global; with sharding the first shard supplies the sample.
+        with sharding.use_shard(0):
+            dict_id = compression.train_dictionary(sample_size=sample_size)
+        click.echo(f"Trained dictionary {dict_id}." if dict_id else "Not enough text to train a dictionary.")
+
+    def compress():
+        prefix = _shard_prefix()
+        totals = compression.compress_existing(
+            batch_size=batch_size, recompress=recompress,
+            progress=lambda column, done: click.echo(f"{prefix}{column}: {done} rows"))
+        click.echo(prefix + "Rewrote " + ", ".join(f"{count} {column}" for column, count in totals.items()) + ".")
+    sharding.for_each_shard(compress)
+
+
+@click.command("compile-openapi")
+@with_appcontext
+def compile_openapi_command():
+    """Parse docs/openapi.yaml once and cache it as JSON for Swagger UI."""
+    from flask import current_app
+    from journalapi.docs import compile_spec, compiled_path
+    spec = compile_spec(current_app)
+    click.echo(f"Compiled {len(spec.get('paths', {}))} paths to {compiled_path(current_app)}.")
+
+
+@click.command("seed")
+@click.option("--users", default=1000, show_default=True, help="Users to create.")
+@click.option("--entries", default=20000, show_default=True, help="Entries spread over those users.")
+@click.option("--comments-per-entry", default=1.5, show_default=True, help="Mean comments per entry (skewed).")
+@click.option("--edits-per-entry", default=0.5, show_default=True, help="Mean edit-history rows per entry (skewed).")
+@click.option("--days", default=730, show_default=True, help="Entries are dated within this many days up to --until.")
+@click.option("--until", type=click.DateTime(formats=["%Y-%m-%d"]), help="Last day of generated history [default: today].")
+@click.option("--seed", "seed_value", default=0, show_default=True, help="Same seed and options give the same rows.")
+@click.option("--skip-stats", is_flag=True, help="Leave user_stats for rebuild-stats.")
+@with_appcontext
+def seed_command(users, entries, comments_per_entry, edits_per_entry, days, until, seed_value, skip_stats):
+    """Bulk-insert a synthetic dataset for benchmarks and profiling."""
+    try:
+        from journalapi.seed import SEED_PASSWORD, seed
+    except ImportError as exc:
+        if exc.name != "numpy":
+            raise
+        raise click.ClickException("seed needs numpy: pip install numpy")
+    if sharding.router() is not None:
+        raise click.ClickException("seed writes one database: seed it unsharded, then use `flask shards sync-directory` "
+                                   "and `flask shards rebalance`")
+    totals = seed(users=users, entries=entries, comments_per_entry=comments_per_entry,
+                  edits_per_entry=edits_per_entry, days=days, until=until.date() if until else None,
+                  seed=seed_value, rebuild_stats=not skip_stats,
+                  progress=lambda table, done: click.echo(f"{table}: {done}"))
+    click.echo("Inserted " + ", ".join(f"{count} {table}" for table, count in totals.items()) + ".")
+    click.echo(f"Every seeded user's password is {SEED_PASSWORD!r}.")
+
+
+@click.group("shards")
+def shards_group():
+    """Inspect and rebalance the shards of a sharded deployment (SHARD_URIS)."""
+
+
+def _router():
+    shards = sharding.router()
+    if shards is None:
+        raise click.ClickException("Sharding is off: set SHARD_URIS.")
+    return shards
+
+
+@shards_group.command("status")
+@with_appcontext
+def shards_status_command():
+    """Users and entries per shard, and users waiting to be rebalanced."""
+    _router()
+    click.echo(f"{'shard':>5} {'users':>8} {'away':>6} {'entries':>9}")
+    for row in sharding.status():
+        click.echo(f"{row['shard']:>5} {row['users']:>8} {row['away']:>6} {row['entries']:>9}")
+
+
+@shards_group.command("sync-directory")
+@with_appcontext
+def shards_sync_directory_command():
+    """Rebuild the shard directory from the users found on the shards."""
+    _router()
+    report = sharding.sync_directory()
+    click.echo("Directory: " + ", ".join(f"{count} {action}" for action, count in report.items()) + ".")
+
+
+@shards_group.command("move")
+@click.argument("user_id", type=int)
+@click.argument("shard", type=int)
+@click.option("--grace-seconds", type=float, help="Wait for in-flight writes [default: SHARD_MOVE_GRACE_SECONDS].")
+@with_appcontext
+def shards_move_command(user_id, shard, grace_seconds):
+    """Move one user's rows to SHARD."""
+    if not 0 <= shard < len(_router().engines):
+        raise click.ClickException(f"No shard {shard}.")
+    try:
+        copied = sharding.move_user(user_id, shard, grace_seconds)
+    except LookupError as err:
+        raise click.ClickException(str(err))
+    click.echo(f"Moved user {user_id}: " + ", ".join(f"{count} {table}" for table, count in copied.items()) + ".")
+
+
+@shards_group.command("rebalance")
+@click.option("--grace-seconds", type=float, help="Wait for in-flight writes [default: SHARD_MOVE_GRACE_SECONDS].")
+@click.option("--dry-run", is_flag=True, help="Only count the users that would move.")
+@with_appcontext
+def shards_rebalance_command(grace_seconds, dry_run):
+    """Move every user that is not on its home shard, e.g. after adding a shard."""
+    _router()
+    moved = sharding.rebalance(grace_seconds, dry_run=dry_run,
+                               progress=lambda user_id, source, target: click.echo(f"user {user_id}: {source} -> {target}"))
+    click.echo(f"{moved} users {'would move' if dry_run else 'moved'}.")
@@ -0,0 +1,216 @@
+# PWP_JournalAPI/journalapi/compaction.py
+"""
+Background compaction of soft-deleted rows.
+
+purge_deleted() hard-deletes what journalapi.softdelete has flagged, one
+bounded batch per transaction, so the SQLite write lock is only ever held for
+a short DELETE and API writes interleave between batches. Children are removed
+with plain set-based DELETEs, never by loading ORM cascades. Tombstones were
+already written to the change log when the rows were flagged. Entry blobs
+(journalapi.blobs) that no entry references any more go in the same run, as
+do draft tombstones (journalapi.autosave) older than DRAFT_TOMBSTONE_SECONDS.
+
+vacuum() then returns the freed pages to the filesystem. A full VACUUM also
+switches the database to auto_vacuum=INCREMENTAL, after which every later run
+only needs the cheap PRAGMA incremental_vacuum.
+
+Run it from cron with `flask purge-deleted`, or in-process by setting
+COMPACTION_INTERVAL_SECONDS.
+"""
+import os
+import threading
+import time
+from datetime import timedelta
+from sqlalchemy import delete, select
+from extensions import db
+from journalapi import sharding
+from journalapi.models import (
+    AnalyticsBucket, Comment, EditHistory, EntryBlob, EntryDraft, JournalEntry, User, UserEntryDay, UserStats,
+)
+from journalapi.softdelete import now
+
+# Far longer than any worker holds a buffered draft, so no stale save can
+# outlive the tombstone that shadows it.
+DRAFT_TOMBSTONE_SECONDS = 3600
+
+
+def _next_batch(model, cutoff, batch_size):
+    return list(db.session.scalars(
+        select(model.id)
+        .where(model.deleted_at.isnot(None), model.deleted_at <= cutoff)
+        .order_by(model.id)
+        .limit(batch_size)
+        .execution_options(include_deleted=True)
+    ))
+
+def _delete(model, *criteria):
+    return db.session.execute(
+        delete(model).where(*criteria).execution_options(synchronize_session=False)
+    ).rowcount
+
+def _purge_entries(ids):
+    _delete(Comment, Comment.journal_entry_id.in_(ids))
+    _delete(EditHistory, EditHistory.journal_entry_id.in_(ids))
+    _delete(EntryDraft, EntryDraft.entry_id.in_(ids))
+    return _delete(JournalEntry, JournalEntry.id.in_(ids))
+
+def _purge_comments(ids):
+    return _delete(Comment, Comment.id.in_(ids))
+
+def _purge_users(ids):
+    # Entries flagged together with the user are normally gone by now; sweep
+    # any stragglers so nothing is left pointing at a missing user.
+    entry_ids = select(JournalEntry.id).where(JournalEntry.user_id.in_(ids)).scalar_subquery()
+    _delete(Comment, Comment.journal_entry_id.in_(entry_ids))
+    _delete(EditHistory, EditHistory.journal_entry_id.in_(entry_ids))
+    _delete(JournalEntry, JournalEntry.user_id.in_(ids))
+    _delete(Comment, Comment.user_id.in_(ids))
+    _delete(EditHistory, EditHistory.user_id.in_(ids))
+    for model in (UserStats, UserEntryDay, AnalyticsBucket, EntryDraft):
+        _delete(model, model.user_id.in_(ids))
+    sharding.forget_users(ids)
+    return _delete(User, User.id.in_(ids))
+
+def _unreferenced():
+    # Includes soft-deleted entries: their blobs go once the entry row does.
+    return ~select(JournalEntry.id).where(JournalEntry.content_digest == EntryBlob.digest).exists()
+
+def _next_blob_batch(cutoff, batch_size):
+    return list(db.session.scalars(
+        select(EntryBlob.digest).where(_unreferenced()).limit(batch_size)
+        .execution_options(include_deleted=True)
+    ))
+
+def _purge_blobs(digests):
+    # Re-checked inside the DELETE: a writer may have reused a blob since it was selected.
+    return _delete(EntryBlob, EntryBlob.digest.in_(digests), _unreferenced())
+
+def _next_tombstone_batch(cutoff, batch_size):
+    return list(db.session.scalars(
+        select(EntryDraft.entry_id)
+        .where(EntryDraft.discarded_at <= cutoff - timedelta(seconds=DRAFT_TOMBSTONE_SECONDS))
+        .order_by(EntryDraft.entry_id)
+        .limit(batch_size)
+    ))
+
+def _purge_tombstones(ids):
+    # Re-checked inside the DELETE: the entry may have been autosaved again since.
+    return _delete(EntryDraft, EntryDraft.entry_id.in_(ids), EntryDraft.discarded_at.isnot(None))
+
+# Entries before comments and users, so each stage deletes as little as possible;
+# blobs last, once the rows pointing at them are gone.
+STAGES = (
+    ("entries", lambda cutoff, size: _next_batch(JournalEntry, cutoff, size), _purge_entries),
+    ("comments", lambda cutoff, size: _next_batch(Comment, cutoff, size), _purge_comments),
+    ("users", lambda cutoff, size: _next_batch(User, cutoff, size), _purge_users),
+    ("blobs", _next_blob_batch, _purge_blobs),
+    ("drafts", _next_tombstone_batch, _purge_tombstones),
+)
+
+
+def purge_deleted(batch_size=500, grace_seconds=0, progress=None):
+    """
+    Hard-delete rows soft-deleted at least `grace_seconds` ago, `batch_size`
+    ids per transaction. Calls progress(stage, purged_so_far) after every
+    batch and returns {stage: purged}.
+    """
+    cutoff = now() - timedelta(seconds=grace_seconds)
+    totals = {}
+    for stage, next_batch, purge in STAGES:
+        totals[stage] = 0
+        while True:
+            ids = next_batch(cutoff, batch_size)
+            if not ids:
+                break
+            purge(ids)
+            db.session.commit()
+            totals[stage] += len(ids)
+            if progress is not None:
+                progress(stage, totals[stage])
+    return totals
+
+
+def vacuum(mode="incremental"):
+    """
+    Give free pages back to the filesystem. Returns (pages_before, pages_after)
+    from PRAGMA freelist_count, or None when there is nothing to do.
+    """
+    engine = sharding.current_engine()
+    if mode == "none" or engine.dialect.name != "sqlite":
+        return None
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        before = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        if mode == "full":
+            conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+        elif conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:
+            conn.exec_driver_sql("PRAGMA incremental_vacuum")
+        else:
+            # auto_vacuum is off: only a full VACUUM can shrink the file.
+            return None
+        after = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+    return before, after
+
+
+class Compactor:
+    """Runs purge_deleted() and vacuum() every COMPACTION_INTERVAL_SECONDS in a daemon thread."""
+
+    def __init__(self, app):
+        self.app = app
+        self.interval = app.config["COMPACTION_INTERVAL_SECONDS"]
+        self.batch_size = app.config["COMPACTION_BATCH_SIZE"]
+        self.grace = app.config["COMPACTION_GRACE_SECONDS"]
+        self.vacuum_mode = app.config["COMPACTION_VACUUM"]
+        self.last_run = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def run_once(self):
+        totals = {}
+        for purged in sharding.for_each_shard(self._compact):
+            for stage, count in purged.items():
+                totals[stage] = totals.get(stage, 0) + count
+        if any(totals.values()):
+            self.app.logger.info("Compaction purged %s", totals)
+        self.last_run = totals
+        return totals
+
+    def _compact(self):
+        totals = purge_deleted(self.batch_size, self.grace)
+        if any(totals.values()):
+            vacuum(self.vacuum_mode)
+        return totals
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self.app.app_context():
+                try:
+                    self.run_once()
+                except Exception:
+                    self.app.logger.exception("Compaction run failed")
+                finally:
+                    db.session.remove()
+
+    def ensure_started(self):
+        if self.interval <= 0:
+            return
+        with self._lock:
+            # Threads do not survive fork; each worker starts its own on first request.
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="journal-compaction", daemon=True)
+            self._thread.start()
+
+
+def init_app(app):
+    app.config.setdefault("COMPACTION_INTERVAL_SECONDS", 0)
+    app.config.setdefault("COMPACTION_BATCH_SIZE", 500)
+    app.config.setdefault("COMPACTION_GRACE_SECONDS", 0)
+    app.config.setdefault("COMPACTION_VACUUM", "incremental")
+    compactor = Compactor(app)
+    app.extensions["journal_compaction"] = compactor
+    if compactor.interval > 0:
+        app.before_request(compactor.ensure_started)
@@ -0,0 +1,222 @@
+# PWP_JournalAPI/journalapi/compression.py
+"""
+Transparent compression for stored text.
+
+CompressedText columns keep values shorter than COMPRESSION_MIN_BYTES as
+plain TEXT. Longer values are stored as a BLOB: a one-byte header followed by
+a raw deflate stream. A value that does not shrink is kept as plain TEXT.
+Rows written before compression existed are plain TEXT too, so old and new
+rows read the same and `compress-content` can migrate at any time.
+
+Short journal entries compress poorly on their own. train_dictionary() builds
+a zlib preset dictionary from the most common phrases in existing entries and
+stores it in compression_dictionaries. Values up to
+COMPRESSION_DICTIONARY_MAX_BYTES are then compressed against the newest
+dictionary. Its id is kept in the header, so retired dictionaries still
+decode.
+
+Values are decompressed only when their column is actually loaded. The entry
+list defers content, and edit-history bodies are deferred except on the
+history endpoint.
+"""
+import struct
+import zlib
+from collections import Counter
+from flask import current_app, has_app_context
+from sqlalchemy import cast, func, or_, select, update
+from sqlalchemy.types import LargeBinary, Text, TypeDecorator
+from extensions import db
+
+PLAIN = b"z"
+DICTIONARY = b"d"
+_DICT_ID = struct.Struct(">H")
+WBITS = -15  # raw deflate: no zlib header or checksum on every short value
+MAX_DICTIONARY_BYTES = 32 * 1024  # the deflate window
+
+
+class Codec:
+    """Per-app compression settings and the dictionaries of the app's database."""
+
+    def __init__(self, app):
+        self.enabled = app.config["COMPRESSION_ENABLED"]
+        self.min_bytes = app.config["COMPRESSION_MIN_BYTES"]
+        self.level = app.config["COMPRESSION_LEVEL"]
+        self.dictionary_max_bytes = app.config["COMPRESSION_DICTIONARY_MAX_BYTES"]
+        self._dictionaries = {}
+        self._active = None  # (id, compressobj primed with it); False once known to be none
+
+    def _load(self, dict_id):
+        from journalapi.models import CompressionDictionary
+        # Dictionaries are global: with sharding they live on the directory, not the entry's shard.
+        data = db.session.connection(bind_arguments={"mapper": CompressionDictionary}).execute(
+            select(CompressionDictionary.data).where(CompressionDictionary.id == dict_id)
+        ).scalar()
+        if data is None:
+            raise LookupError(f"Missing compression dictionary {dict_id}")
+        self._dictionaries[dict_id] = data
+        return data
+
+    def dictionary(self, dict_id):
+        data = self._dictionaries.get(dict_id)
+        return data if data is not None else self._load(dict_id)
+
+    def activate(self, dict_id):
+        """Compress new values against dictionary `dict_id` (None for none)."""
+        if dict_id is None:
+            self._active = False
+            return
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, WBITS, zdict=self.dictionary(dict_id))
+        self._active = (dict_id, compressor)
+
+    def active(self):
+        if self._active is None:
+            from journalapi.models import CompressionDictionary
+            conn = db.session.connection(bind_arguments={"mapper": CompressionDictionary})
+            self.activate(conn.execute(select(func.max(CompressionDictionary.id))).scalar())
+        return self._active or None
+
+    def compress(self, text):
+        data = text.encode("utf-8")
+        if not self.enabled or len(data) < self.min_bytes:
+            return text
+        active = self.active() if len(data) <= self.dictionary_max_bytes else None
+        if active:
+            compressor = active[1].copy()
+            header = DICTIONARY + _DICT_ID.pack(active[0])
+        else:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, WBITS)
+            header = PLAIN
+        packed = header + compressor.compress(data) + compressor.flush()
+        return packed if len(packed) < len(data) else text
+
+    def decompress(self, value):
+        header = value[:1]
+        if header == PLAIN:
+            return zlib.decompress(value[1:], WBITS).decode("utf-8")
+        if header == DICTIONARY:
+            (dict_id,) = _DICT_ID.unpack_from(value, 1)
+            decompressor = zlib.decompressobj(WBITS, zdict=self.dictionary(dict_id))
+            return (decompressor.decompress(value[3:]) + decompressor.flush()).decode("utf-8")
+        raise ValueError(f"Unknown compressed value header {header!r}")
+
+
+def codec():
+    return current_app.extensions["journal_compression"]
+
+
+class CompressedText(TypeDecorator):
+    """TEXT column whose longer values are stored compressed; see the module docstring."""
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or not has_app_context():
+            return value
+        return codec().compress(value)
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, bytes):
+            return codec().decompress(value)
+        return value
+
+
+def train_dictionary(sample_size=2000, size=16 * 1024):
+    """
+    Build a preset dictionary from the newest `sample_size` entries and make it
+    the active one. Phrases are ranked by how many bytes they would save and
+    the best go last, where deflate reaches them with the shortest distances.
+    Returns the new dictionary's id, or None when there is nothing to learn from.
+    """
+    from journalapi.models import CompressionDictionary, JournalEntry
+    size = min(size, MAX_DICTIONARY_BYTES)
+    texts = db.session.execute(
+        select(JournalEntry.inline_content)
+        .where(JournalEntry.content_digest.is_(None))
+        .order_by(JournalEntry.id.desc())
+        .limit(sample_size)
+        .execution_options(include_deleted=True)
+    ).scalars().all()
+    phrases = Counter()
+    for text in texts:
+        if len(text) > codec().dictionary_max_bytes:
+            continue  # only short values are compressed against the dictionary
+        words = text.split()
+        for n in (1, 2, 3):
+            for i in range(len(words) - n + 1):
+                phrases[" ".join(words[i:i + n]) + " "] += 1
+    ranked = sorted(((count * len(phrase.encode("utf-8")), phrase)
+                     for phrase, count in phrases.items() if count > 1), reverse=True)
+    chosen, used = [], 0
+    for _, phrase in ranked:
+        encoded = phrase.encode("utf-8")
+        if used + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        used += len(encoded)
+    if not chosen:
+        return None
+    dictionary = CompressionDictionary(data=b"".join(reversed(chosen)), sample_count=len(texts))
+    db.session.add(dictionary)
+    db.session.commit()
+    codec().activate(dictionary.id)
+    return dictionary.id
+
+
+def _compressed_columns():
+    from journalapi.models import EditHistory, JournalEntry
+    return [
+        (JournalEntry, JournalEntry.inline_content, {JournalEntry.last_updated: JournalEntry.last_updated}),
+        (EditHistory, EditHistory.previous_content, {}),
+        (EditHistory, EditHistory.new_content, {}),
+    ]
+
+
+def compress_existing(batch_size=500, recompress=False, progress=None):
+    """
+    Rewrite stored values through CompressedText, one short transaction per
+    batch. Plain values long enough to compress are compressed. With
+    `recompress`, already-compressed values are re-encoded too, for example
+    against a newly trained dictionary. Returns {"table.column": rows rewritten}.
+    """
+    min_bytes = codec().min_bytes
+    totals = {}
+    for model, column, pinned in _compressed_columns():
+        wanted = func.length(cast(column, LargeBinary)) >= min_bytes
+        if recompress:
+            wanted = or_(wanted, func.typeof(column) == "blob")
+        else:
+            wanted = wanted & (func.typeof(column) == "text")
+        name = f"{model.__tablename__}.{column.expression.name}"
+        totals[name] = 0
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(model.id, column)
+                .where(model.id > last_id, wanted)
+                .order_by(model.id)
+                .limit(batch_size)
+                .execution_options(include_deleted=True)
+            ).all()
+            if not rows:
+                break
+            for row_id, value in rows:
+                # A storage detail, not an edit: no change-log row, last_updated kept.
+                db.session.execute(
+                    update(model).where(model.id == row_id).values({column: value, **pinned})
+                    .execution_options(synchronize_session=False)
+                )
+            db.session.commit()
+            last_id = rows[-1][0]
+            totals[name] += len(rows)
+            if progress:
+                progress(name, totals[name])
+    return totals
+
+
+def init_app(app):
+    app.config.setdefault("COMPRESSION_ENABLED", True)
+    app.config.setdefault("COMPRESSION_MIN_BYTES", 64)
+    app.config.setdefault("COMPRESSION_LEVEL", 6)
+    app.config.setdefault("COMPRESSION_DICTIONARY_MAX_BYTES", 4096)
+    app.extensions["journal_compression"] = Codec(app)
@@ -0,0 +1,56 @@
+# PWP_JournalAPI/journalapi/conditional.py
+"""
+Conditional requests for API responses.
+
+Successful GET responses with a JSON or plain-text body get a strong ETag
+(a hash of the body) and `Cache-Control: private, no-cache`. Clients such as
+the CLI's on-disk cache may therefore keep a copy but must revalidate it. A
+matching If-None-Match gets an empty 304. The view still runs, so what this
+saves is the transfer, which is the slow part for the remote CLI.
+
+Writes to a resource call failed_precondition() with the ETag its GET would
+carry now, so If-Match (or If-Unmodified-Since) turns a client's "unchanged
+since I read it" check into part of the write: a changed resource gets 412.
+"""
+from datetime import timezone
+from flask import current_app, request
+from werkzeug.http import generate_etag
+from journalapi.utils import JsonResponse
+
+CACHEABLE_MIMETYPES = {"application/json", "text/plain"}
+
+
+def _conditional(response):
+    if (request.method not in ("GET", "HEAD") or response.status_code != 200 or response.is_streamed
+            or response.mimetype not in CACHEABLE_MIMETYPES or not current_app.config["HTTP_ETAGS_ENABLED"]):
+        return response
+    response.add_etag()
+    response.headers.setdefault("Cache-Control", "private, no-cache")
+    response.vary.add("Authorization")
+    return response.make_conditional(request)
+
+
+def etag_of(response):
+    """The ETag _conditional() gives this response's body."""
+    return generate_etag(response.get_data())
+
+
+def failed_precondition(current_etag, last_modified=None):
+    """
+    412 response when the request's If-Match or If-Unmodified-Since does not
+    hold, else None. current_etag is called only when If-Match is sent.
+    """
+    if request.if_match:
+        if request.if_match.star_tag or request.if_match.contains(current_etag()):
+            return None
+    elif request.if_unmodified_since is None or last_modified is None:
+        return None
+    elif last_modified.replace(tzinfo=last_modified.tzinfo or timezone.utc, microsecond=0) <= \
+            request.if_unmodified_since:
+        return None
+    return JsonResponse({"error": "Precondition failed: the resource has changed since it was read"}, 412)
+
+
+def init_app(app):
+    app.config.setdefault("HTTP_ETAGS_ENABLED", True)
+    app.after_request(_conditional)
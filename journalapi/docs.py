@@ -0,0 +1,57 @@
+# PWP_JournalAPI/journalapi/docs.py
+"""
+Swagger UI at /apidocs, registered only when SWAGGER_ENABLED.
+
+flasgger, and PyYAML under it, are imported only when the docs are enabled,
+so a worker that does not serve them never loads either. The YAML spec is
+parsed once and cached as JSON in the instance folder. Later boots load the
+JSON while it is at least as new as the YAML. `flask compile-openapi` builds
+the cache ahead of time, e.g. in the Docker image.
+"""
+import json
+import os
+import tempfile
+
+SPEC_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "docs", "openapi.yaml")
+
+
+def compiled_path(app):
+    return os.path.join(app.instance_path, "openapi.json")
+
+
+def compile_spec(app):
+    """Parse the YAML spec and write its JSON cache; returns the spec."""
+    import yaml
+    with open(app.config["OPENAPI_SPEC_FILE"], encoding="utf-8") as f:
+        spec = yaml.safe_load(f)
+    target = compiled_path(app)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(spec, f)
+        os.replace(tmp, target)
+    except OSError:
+        app.logger.warning("Could not cache the compiled OpenAPI spec at %s", target)
+    return spec
+
+
+def load_spec(app):
+    """The OpenAPI spec, from the JSON cache when it is up to date."""
+    target = compiled_path(app)
+    try:
+        if os.path.getmtime(target) >= os.path.getmtime(app.config["OPENAPI_SPEC_FILE"]):
+            with open(target, encoding="utf-8") as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+    return compile_spec(app)
+
+
+def init_app(app):
+    app.config.setdefault("SWAGGER_ENABLED", False)
+    app.config.setdefault("OPENAPI_SPEC_FILE", SPEC_FILE)
+    if not app.config["SWAGGER_ENABLED"]:
+        return
+    from flasgger import Swagger
+    Swagger(app, template=load_spec(app))
@@ -0,0 +1,267 @@
+# PWP_JournalAPI/journalapi/events.py
+"""
+Server-Sent Events for entry and comment changes.
+
+Each worker process runs one Broker. Subscribers register per user; a single
+tailer thread per process polls the changes table (see journalapi.changes)
+for rows addressed to users that currently have subscribers and fans them out
+locally; commits made in the same process wake the tailer immediately. The
+changes table is shared by every gunicorn/uvicorn worker, so it
+doubles as the cross-process notification channel: no worker needs to know
+which other worker holds a given connection, and a reconnecting client can
+resume from Last-Event-ID without losing events. With journalapi.sharding the
+tailer polls every shard's changes table, keeping a position per shard.
+
+Every subscription has a bounded buffer. A client that falls more than
+EVENTS_QUEUE_SIZE events behind is sent a "reset" event and disconnected; it
+is expected to catch up through GET /sync and reconnect.
+
+A WSGI stream holds a server thread for as long as it is open, so each
+process accepts at most EVENTS_WSGI_MAX_SUBSCRIBERS of them (default 1, out of
+gunicorn's 4 threads) and answers further ones with 503; the rest of the
+threads keep serving the API. Deployments with many subscribers serve GET
+/events from the ASGI app (asgi.py), whose streams live on the event loop and
+only count against EVENTS_MAX_SUBSCRIBERS.
+"""
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from extensions import db
+from journalapi import sharding
+from journalapi.models import Change
+
+HEARTBEAT = b": keep-alive\n\n"
+RESET = b"event: reset\ndata: {}\n\n"
+
+
+def format_event(seq, kind, object_id, op):
+    data = json.dumps({"seq": seq, "kind": kind, "id": object_id, "op": op})
+    return f"id: {seq}\nevent: {kind}\ndata: {data}\n\n".encode()
+
+
+class Subscription:
+    """Bounded per-connection buffer, consumed by a blocking WSGI generator."""
+
+    def __init__(self, user_id, maxsize):
+        self.user_id = user_id
+        self.maxsize = maxsize
+        self.overflowed = False
+        self._events = deque()
+        self._cond = threading.Condition()
+
+    def push(self, event):
+        with self._cond:
+            if len(self._events) >= self.maxsize:
+                self.overflowed = True
+            else:
+                self._events.append(event)
+            self._notify()
+
+    def _notify(self):
+        self._cond.notify()
+
+    def _pop(self):
+        with self._cond:
+            return self._events.popleft() if self._events else None
+
+    def get(self, timeout):
+        """Next event, or None after `timeout` seconds without one."""
+        with self._cond:
+            if not self._events and not self.overflowed:
+                self._cond.wait(timeout)
+        return self._pop()
+
+
+class AsyncSubscription(Subscription):
+    """Same buffer, consumed from an event loop; pushes arrive from the tailer thread."""
+
+    def __init__(self, user_id, maxsize, loop):
+        super().__init__(user_id, maxsize)
+        self.closed = False
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+
+    def _notify(self):
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def close(self):
+        """Called on the loop when the client disconnects."""
+        self.closed = True
+        self._wakeup.set()
+
+    async def next(self, timeout):
+        self._wakeup.clear()
+        event = self._pop()
+        if event is None and not self.overflowed and not self.closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+            event = self._pop()
+        return event
+
+
+class Broker:
+    def __init__(self, app):
+        self.app = app
+        self.queue_size = app.config["EVENTS_QUEUE_SIZE"]
+        self.heartbeat = app.config["EVENTS_HEARTBEAT_SECONDS"]
+        self.poll_interval = app.config["EVENTS_POLL_SECONDS"]
+        self.max_subscribers = app.config["EVENTS_MAX_SUBSCRIBERS"]
+        self.max_wsgi_subscribers = app.config["EVENTS_WSGI_MAX_SUBSCRIBERS"]
+        self.tail = app.config["EVENTS_TAILER_ENABLED"]
+        self._subscribers = {}
+        self._count = 0
+        self._wsgi_count = 0
+        self._lock = threading.Lock()
+        self._last_seq = {}  # per shard; None is the only key without sharding
+        self._thread = None
+        self._pid = None
+        self._wake = threading.Event()
+
+    # -- subscriptions -------------------------------------------------
+
+    def subscribe(self, user_id, loop=None):
+        """Register a subscription, or return None when this worker is full."""
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                return None
+            if loop is None:
+                if self._wsgi_count >= self.max_wsgi_subscribers:
+                    return None
+                sub = Subscription(user_id, self.queue_size)
+                self._wsgi_count += 1
+            else:
+                sub = AsyncSubscription(user_id, self.queue_size, loop)
+            self._subscribers.setdefault(user_id, set()).add(sub)
+            self._count += 1
+        self._ensure_tailer()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.user_id)
+            if subs and sub in subs:
+                subs.discard(sub)
+                self._count -= 1
+                if not isinstance(sub, AsyncSubscription):
+                    self._wsgi_count -= 1
+                if not subs:
+                    del self._subscribers[sub.user_id]
+
+    def subscriber_count(self):
+        return self._count
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subs = list(self._subscribers.get(user_id, ()))
+        for sub in subs:
+            sub.push(event)
+        return len(subs)
+
+    # -- change-log tailing ------------------------------------------------
+
+    def replay(self, user_id, since, limit=1000):
+        """Events after `since` for a reconnecting client (Last-Event-ID)."""
+        rows = db.session.execute(
+            select(Change.seq, Change.kind, Change.object_id, Change.op)
+            .where(Change.user_id == user_id, Change.seq > since)
+            .order_by(Change.seq)
+            .limit(limit)
+        )
+        return [format_event(*row) for row in rows]
+
+    def poll_once(self):
+        """Deliver change-log rows written since the previous poll; returns the number read."""
+        shard = sharding.current_shard()
+        last_seq = self._last_seq.get(shard)
+        if last_seq is None:
+            self._last_seq[shard] = db.session.scalar(select(func.max(Change.seq))) or 0
+            return 0
+        with self._lock:
+            users = list(self._subscribers)
+        if not users:
+            self._last_seq[shard] = db.session.scalar(select(func.max(Change.seq))) or last_seq
+            return 0
+        rows = db.session.execute(
+            select(Change.seq, Change.user_id, Change.kind, Change.object_id, Change.op)
+            .where(Change.seq > last_seq, Change.user_id.in_(users))
+            .order_by(Change.seq)
+            .limit(1000)
+        ).all()
+        for seq, user_id, kind, object_id, op in rows:
+            self.publish(user_id, format_event(seq, kind, object_id, op))
+        if rows:
+            self._last_seq[shard] = rows[-1][0]
+        return len(rows)
+
+    def _run(self):
+        while True:
+            with self.app.app_context():
+                try:
+                    sharding.for_each_shard(self.poll_once)
+                except Exception:
+                    self.app.logger.exception("Event tailer poll failed")
+                finally:
+                    db.session.remove()
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def nudge(self):
+        """Poll now instead of at the next interval (a local commit wrote changes)."""
+        self._wake.set()
+
+    def _ensure_tailer(self):
+        if not self.tail:
+            return
+        with self._lock:
+            # Threads do not survive fork; a preloaded app starts its tailer in each worker.
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="journal-events-tailer", daemon=True)
+            self._thread.start()
+
+
+def stream(broker, sub, replay=()):
+    """Blocking SSE body for WSGI servers; unsubscribes when the client goes away."""
+    try:
+        yield b"retry: 3000\n\n"
+        for event in replay:
+            yield event
+        while True:
+            event = sub.get(broker.heartbeat)
+            if sub.overflowed:
+                yield RESET
+                return
+            yield event if event is not None else HEARTBEAT
+    finally:
+        broker.unsubscribe(sub)
+
+
+def _after_commit(session):
+    if session.info.pop("journal_changed", False) and has_app_context():
+        broker = current_app.extensions.get("journal_events")
+        if broker is not None:
+            broker.nudge()
+
+def _after_rollback(session):
+    session.info.pop("journal_changed", None)
+
+
+def init_app(app):
+    app.config.setdefault("EVENTS_QUEUE_SIZE", 100)
+    app.config.setdefault("EVENTS_HEARTBEAT_SECONDS", 15)
+    app.config.setdefault("EVENTS_POLL_SECONDS", 0.5)
+    app.config.setdefault("EVENTS_MAX_SUBSCRIBERS", 10000)
+    app.config.setdefault("EVENTS_WSGI_MAX_SUBSCRIBERS", int(os.environ.get("EVENTS_WSGI_MAX_SUBSCRIBERS", 1)))
+    app.config.setdefault("EVENTS_TAILER_ENABLED", True)
+    app.extensions["journal_events"] = Broker(app)
+    if not event.contains(Session, "after_commit", _after_commit):
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "after_rollback", _after_rollback)
@@ -1,6 +1,7 @@
 from journalapi import db
 from journalapi.models import User
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
+from journalapi.auth import hash_password
 
 class UserHandler:
 
@@ -10,7 +11,7 @@ class UserHandler:
         if existing_user:
             return None  # User already exists
 
-        hashed_password = generate_password_hash(password)
+        hashed_password = hash_password(password)
         new_user = User(username=username, email=email, password=hashed_password)
         db.session.add(new_user)
         db.session.commit()
@@ -38,7 +39,7 @@ class UserHandler:
         if email:
             user.email = email
         if password:
-            user.password = generate_password_hash(password)
+            user.password = hash_password(password)
 
         db.session.commit()
         return user
@@ -0,0 +1,98 @@
+# PWP_JournalAPI/journalapi/limits.py
+"""
+Request body size limits, enforced before anything parses the body.
+
+Every request is held to MAX_CONTENT_LENGTH (1 MiB by default); the raw
+entry-content upload endpoint gets ENTRY_MAX_CONTENT_BYTES (16 MiB) instead.
+A declared Content-Length over the limit is refused with 413 before the view
+runs. Chunked bodies have no length up front, so the WSGI input is wrapped in
+a stream that raises 413 as soon as the limit is crossed, and nothing past it
+is ever buffered.
+
+Werkzeug 2.2 only applies MAX_CONTENT_LENGTH to form parsing, not to
+get_json(), which is why the limit is applied here.
+"""
+import codecs
+from flask import current_app, request
+from werkzeug.exceptions import RequestEntityTooLarge
+from journalapi.utils import JsonResponse
+
+# Endpoints that accept large bodies, streamed rather than parsed as JSON.
+LARGE_BODY_ENDPOINTS = {"api.entry_content"}
+CHUNK_SIZE = 64 * 1024
+
+
+class BoundedStream:
+    """File-like wrapper that refuses to read more than `limit` bytes."""
+
+    def __init__(self, stream, limit):
+        self._stream = stream
+        self._limit = limit
+        self._read = 0
+
+    def _count(self, data):
+        self._read += len(data)
+        if self._read > self._limit:
+            raise RequestEntityTooLarge()
+        return data
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            # Never slurp an unbounded stream: read just past the limit at most.
+            size = self._limit - self._read + 1
+        return self._count(self._stream.read(size))
+
+    def readline(self, size=-1):
+        return self._count(self._stream.readline(size))
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def body_limit():
+    """Byte limit for the current request's body."""
+    if request.endpoint in LARGE_BODY_ENDPOINTS:
+        return current_app.config["ENTRY_MAX_CONTENT_BYTES"]
+    return current_app.config["MAX_CONTENT_LENGTH"]
+
+
+def read_text(encoding="utf-8"):
+    """
+    Decode the request body chunk by chunk, so the raw body is never held in
+    memory as a whole. Invalid input raises UnicodeDecodeError and an
+    oversized body 413.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    parts = []
+    while True:
+        chunk = request.stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        parts.append(decoder.decode(chunk))
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
+
+
+def _limit_body():
+    limit = body_limit()
+    if limit is None:
+        return None
+    if request.content_length is not None and request.content_length > limit:
+        return JsonResponse({"error": f"Request body too large (limit {limit} bytes)"}, 413)
+    request.environ["wsgi.input"] = BoundedStream(request.environ["wsgi.input"], limit)
+    return None
+
+def _too_large(err):
+    return JsonResponse({"error": f"Request body too large (limit {body_limit()} bytes)"}, 413)
+
+
+def init_app(app):
+    if app.config.get("MAX_CONTENT_LENGTH") is None:
+        app.config["MAX_CONTENT_LENGTH"] = 1024 * 1024
+    app.config.setdefault("ENTRY_MAX_CONTENT_BYTES", 16 * 1024 * 1024)
+    app.before_request(_limit_body)
+    app.register_error_handler(RequestEntityTooLarge, _too_large)
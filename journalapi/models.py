@@ -2,8 +2,13 @@
 from datetime import datetime, timezone
 import json
 from extensions import db
+from journalapi.compression import CompressedText
 
-class User(db.Model):
+class SoftDeleteMixin:
+    """Rows are deleted by setting deleted_at and hidden from queries; see journalapi.softdelete."""
+    deleted_at = db.Column(db.DateTime, index=True)
+
+class User(SoftDeleteMixin, db.Model):
     __tablename__ = "users"
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), nullable=False)
@@ -13,24 +18,54 @@ class User(db.Model):
     journal_entries = db.relationship("JournalEntry", backref="author", cascade="all, delete-orphan")
     comments = db.relationship("Comment", backref="author", cascade="all, delete-orphan")
     edit_histories = db.relationship("EditHistory", backref="editor", cascade="all, delete-orphan")
+    stats = db.relationship("UserStats", uselist=False, cascade="all, delete-orphan")
+    entry_days = db.relationship("UserEntryDay", cascade="all, delete-orphan")
+    analytics_buckets = db.relationship("AnalyticsBucket", cascade="all, delete-orphan")
+    drafts = db.relationship("EntryDraft", cascade="all, delete-orphan")
 
     def to_dict(self):
         return {"id": self.id, "username": self.username, "email": self.email}
 
-class JournalEntry(db.Model):
+class JournalEntry(SoftDeleteMixin, db.Model):
     __tablename__ = "journal_entries"
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     title = db.Column(db.String(200), nullable=False)
-    content = db.Column(db.Text, nullable=False)
+    # Large bodies live in entry_blobs (see journalapi.blobs); use .content.
+    inline_content = db.Column("content", CompressedText, nullable=False)
+    content_digest = db.Column(db.String(64), db.ForeignKey("entry_blobs.digest"), index=True)
     tags = db.Column(db.String, default="[]")
     sentiment_score = db.Column(db.Float)
     sentiment_tag = db.Column(db.String, default="[]")
     date = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))  # Updated
     last_updated = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))  # Updated
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Idempotency-Key of the POST that created the entry: a retried create returns this entry.
+    idempotency_key = db.Column(db.String(64))
+
+    __table_args__ = (
+        db.Index("ix_journal_entries_user_idempotency_key", "user_id", "idempotency_key", unique=True),
+    )
 
     comments = db.relationship("Comment", backref="journal_entry", cascade="all, delete-orphan")
     edit_histories = db.relationship("EditHistory", backref="journal_entry", cascade="all, delete-orphan")
+    draft = db.relationship("EntryDraft", uselist=False, cascade="all, delete-orphan")
+
+    @property
+    def content(self):
+        """The entry text, loaded from the blob tier on first access when it was moved there."""
+        if self.content_digest is None:
+            return self.inline_content
+        cached = getattr(self, "_blob_cache", None)
+        if cached is None or cached[0] != self.content_digest:
+            from journalapi.blobs import load
+            cached = self._blob_cache = (self.content_digest, load(self.content_digest))
+        return cached[1]
+
+    @content.setter
+    def content(self, value):
+        self.inline_content = value
+        self.content_digest = None
 
     def to_dict(self):
         return {
@@ -41,22 +76,38 @@ class JournalEntry(db.Model):
             "sentiment_score": self.sentiment_score,
             "sentiment_tag": json.loads(self.sentiment_tag) if self.sentiment_tag else [],
             "date": self.date.isoformat() if self.date else None,
-            "last_updated": self.last_updated.isoformat() if self.last_updated else None
+            "last_updated": self.last_updated.isoformat() if self.last_updated else None,
+            "comment_count": self.comment_count or 0
         }
 
-class Comment(db.Model):
+class Comment(SoftDeleteMixin, db.Model):
     __tablename__ = "comments"
+    __table_args__ = (
+        db.Index("ix_comments_entry_timestamp_id", "journal_entry_id", "timestamp", "id"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     journal_entry_id = db.Column(db.Integer, db.ForeignKey("journal_entries.id"), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    parent_id = db.Column(db.Integer, db.ForeignKey("comments.id"), nullable=True, index=True)
+    # Materialized path of zero-padded ancestor ids ("0000000003/0000000007"),
+    # so a whole reply subtree is one indexed prefix scan. Unbounded: every
+    # reply level adds PATH_WIDTH + 1 characters.
+    path = db.Column(db.Text, index=True)
     content = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))  # Updated
 
+    PATH_WIDTH = 10
+
+    def build_path(self, parent=None):
+        segment = str(self.id).zfill(self.PATH_WIDTH)
+        self.path = f"{parent.path}/{segment}" if parent is not None else segment
+
     def to_dict(self):
         return {
             "id": self.id,
             "journal_entry_id": self.journal_entry_id,
             "user_id": self.user_id,
+            "parent_id": self.parent_id,
             "content": self.content,
             "timestamp": self.timestamp.isoformat() if self.timestamp else None
         }
@@ -67,8 +118,9 @@ class EditHistory(db.Model):
     journal_entry_id = db.Column(db.Integer, db.ForeignKey("journal_entries.id"), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     edited_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))  # Updated
-    previous_content = db.Column(db.Text, nullable=False)
-    new_content = db.Column(db.Text, nullable=False)
+    # Only the history endpoint reads the bodies; cascades and purges skip decompressing them.
+    previous_content = db.deferred(db.Column(CompressedText, nullable=False), group="content")
+    new_content = db.deferred(db.Column(CompressedText, nullable=False), group="content")
 
     def to_dict(self):
         return {
@@ -78,4 +130,116 @@ class EditHistory(db.Model):
             "edited_at": self.edited_at.isoformat() if self.edited_at else None,
             "previous_content": self.previous_content,
             "new_content": self.new_content
-        }
\ No newline at end of file
+        }
+
+class TokenBlocklist(db.Model):
+    __tablename__ = "token_blocklist"
+    # Workers tail the table by id (journalapi.blocklist), so ids of purged rows must never be reused.
+    __table_args__ = {"sqlite_autoincrement": True}
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(64), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    revoked_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+class UserStats(db.Model):
+    """Per-user dashboard numbers, kept current by journalapi.stats on every entry write."""
+    __tablename__ = "user_stats"
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    entry_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    word_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    sentiment_total = db.Column(db.Float, nullable=False, default=0.0, server_default="0")
+    sentiment_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    current_streak = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    longest_streak = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    last_entry_day = db.Column(db.Date)
+
+class UserEntryDay(db.Model):
+    """Number of entries a user wrote on each (UTC) day; the input for streaks."""
+    __tablename__ = "user_entry_days"
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    entries = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+class AnalyticsBucket(db.Model):
+    """Cached per-bucket analytics for one user; stale rows are recomputed on the next read."""
+    __tablename__ = "analytics_buckets"
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    granularity = db.Column(db.String(5), primary_key=True)
+    bucket = db.Column(db.String(10), primary_key=True)
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+    sentiment_mean = db.Column(db.Float)
+    sentiment_p50 = db.Column(db.Float)
+    sentiment_p90 = db.Column(db.Float)
+    top_tags = db.Column(db.Text, default="[]")
+    stale = db.Column(db.Boolean, nullable=False, default=True, index=True)
+
+class EntryBlob(db.Model):
+    """Compressed body of a large entry, keyed by the SHA-256 of its text; see journalapi.blobs."""
+    __tablename__ = "entry_blobs"
+    digest = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+
+class CompressionDictionary(db.Model):
+    """Trained zlib preset dictionary for short CompressedText values; see journalapi.compression."""
+    __tablename__ = "compression_dictionaries"
+    id = db.Column(db.Integer, primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)
+    sample_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+class EntryDraft(db.Model):
+    """
+    Autosaved, unpublished edits of an entry, written in group commits by
+    journalapi.autosave. A row with discarded_at set is a tombstone: the draft
+    was published or discarded, and buffered saves older than it are ignored.
+    """
+    __tablename__ = "entry_drafts"
+    entry_id = db.Column(db.Integer, db.ForeignKey("journal_entries.id"), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    title = db.Column(db.String(200))
+    content = db.Column(db.Text)
+    tags = db.Column(db.String, default="[]")
+    saved_at = db.Column(db.DateTime, nullable=False)
+    discarded_at = db.Column(db.DateTime, index=True)
+
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "content": self.content,
+            "tags": json.loads(self.tags) if self.tags else [],
+            "saved_at": self.saved_at.isoformat() if self.saved_at else None,
+        }
+
+class Change(db.Model):
+    """
+    Append-only change log for delta sync. seq is AUTOINCREMENT so sequence
+    numbers are never reused, even after rows are pruned.
+    """
+    __tablename__ = "changes"
+    __table_args__ = (
+        db.Index("ix_changes_user_seq", "user_id", "seq"),
+        {"sqlite_autoincrement": True},
+    )
+    seq = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(16), nullable=False)
+    object_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(8), nullable=False)
+    changed_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+class ShardDirectory(db.Model):
+    """Which shard holds each user's rows, plus what must stay unique across shards; see journalapi.sharding."""
+    __tablename__ = "shard_directory"
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    email = db.Column(db.String(100), unique=True, nullable=False)
+    username = db.Column(db.String(50), nullable=False, index=True)
+    shard = db.Column(db.Integer, nullable=False, index=True)
+    moving = db.Column(db.Boolean, nullable=False, default=False, server_default="0")
+
+class IdBlock(db.Model):
+    """The next id not yet leased to any worker, per sharded table; see journalapi.sharding."""
+    __tablename__ = "id_blocks"
+    name = db.Column(db.String(64), primary_key=True)
+    next_id = db.Column(db.Integer, nullable=False)
@@ -0,0 +1,57 @@
+# PWP_JournalAPI/journalapi/profiles.py
+"""
+Named configuration profiles for create_app().
+
+A profile keeps together the settings that differ between running the API
+locally, under the test suite and in production: debug flags, log level,
+SQLAlchemy engine options and Swagger UI. Settings that are the same
+everywhere, such as ETags and compression, keep their defaults in the
+extension that owns them.
+The profile is chosen by create_app(profile=...), else the JOURNAL_PROFILE
+environment variable, else "test" when the config passed in sets TESTING,
+else "dev". instance/config.py and the config passed to create_app()
+override the profile's values.
+"""
+import copy
+import os
+
+PROFILES = {
+    "dev": {
+        "DEBUG": True,
+        "LOG_LEVEL": "DEBUG",
+        "SWAGGER_ENABLED": True,
+        "SQLALCHEMY_RECORD_QUERIES": True,
+        "SQLALCHEMY_ENGINE_OPTIONS": {},
+    },
+    "test": {
+        "TESTING": True,
+        "DEBUG": False,
+        "LOG_LEVEL": "WARNING",
+        "SWAGGER_ENABLED": False,
+        # Hashing at full cost dominates the suite's run time; nothing tests its strength.
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1",
+        "SQLALCHEMY_RECORD_QUERIES": False,
+        "SQLALCHEMY_ENGINE_OPTIONS": {},
+    },
+    "prod": {
+        "DEBUG": False,
+        "LOG_LEVEL": "INFO",
+        "SWAGGER_ENABLED": False,
+        "SQLALCHEMY_RECORD_QUERIES": False,
+        # Check pooled connections before use and wait out a concurrent writer's lock.
+        "SQLALCHEMY_ENGINE_OPTIONS": {"pool_pre_ping": True, "connect_args": {"timeout": 15}},
+    },
+}
+
+
+def settings(name):
+    """A copy of the profile's settings; extensions may modify what they are given."""
+    return copy.deepcopy(PROFILES[name])
+
+
+def resolve(profile=None, config=None):
+    """The name of the profile to use; raises ValueError for an unknown one."""
+    name = profile or os.environ.get("JOURNAL_PROFILE") or ("test" if (config or {}).get("TESTING") else "dev")
+    if name not in PROFILES:
+        raise ValueError(f"Unknown profile {name!r}; expected one of: {', '.join(PROFILES)}")
+    return name
@@ -0,0 +1,248 @@
+# PWP_JournalAPI/journalapi/ratelimit.py
+import itertools
+import math
+import os
+import sqlite3
+import threading
+import time
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from journalapi.utils import JsonResponse
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+DEFAULT_RULES = {
+    "api.userloginresource": {"rate": "10/minute", "algorithm": "sliding_window", "key": "ip"},
+    "api.userregisterresource": {"rate": "5/minute", "algorithm": "sliding_window", "key": "ip"},
+}
+
+
+def parse_rate(rate):
+    """Parse "10/minute" (or "10/30second") into (limit, period_seconds)."""
+    count, _, per = rate.partition("/")
+    multiplier = "".join(ch for ch in per if ch.isdigit())
+    unit = per[len(multiplier):].rstrip("s") or "second"
+    return int(count), int(multiplier or 1) * PERIODS[unit]
+
+
+class Decision:
+    def __init__(self, allowed, limit, remaining, reset, retry_after=0.0):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.reset = reset
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Bucket of `limit` tokens refilled continuously over `period` seconds; allows bursts."""
+
+    name = "token_bucket"
+
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period
+        self.rate = limit / period
+
+    def __call__(self, state, now):
+        tokens, updated = state if state else (self.limit, now)
+        tokens = min(self.limit, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            tokens -= 1
+            decision = Decision(True, self.limit, int(tokens), (self.limit - tokens) / self.rate)
+        else:
+            wait = (1 - tokens) / self.rate
+            decision = Decision(False, self.limit, 0, (self.limit - tokens) / self.rate, wait)
+        return (tokens, now), decision
+
+
+class SlidingWindow:
+    """Sliding-window counter: the previous fixed window is weighted by its remaining overlap."""
+
+    name = "sliding_window"
+
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period
+
+    def __call__(self, state, now):
+        window = math.floor(now / self.period) * self.period
+        start, previous, current = state if state else (window, 0, 0)
+        if window != start:
+            previous = current if window - start == self.period else 0
+            current = 0
+        weight = 1 - (now - window) / self.period
+        estimate = previous * weight + current
+        reset = window + self.period - now
+        if estimate + 1 <= self.limit:
+            current += 1
+            remaining = max(0, int(self.limit - estimate - 1))
+            return (window, previous, current), Decision(True, self.limit, remaining, reset)
+        if current + 1 > self.limit or not previous:
+            retry_after = reset
+        else:
+            needed_weight = (self.limit - 1 - current) / previous
+            retry_after = max(0.0, window + self.period * (1 - needed_weight) - now)
+        return (window, previous, current), Decision(False, self.limit, 0, reset, retry_after)
+
+
+ALGORITHMS = {TokenBucket.name: TokenBucket, SlidingWindow.name: SlidingWindow}
+
+
+class MemoryStorage:
+    """Process-local counters; only correct with a single worker (tests, dev server)."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def update(self, key, algorithm, now):
+        with self._lock:
+            state, decision = algorithm(self._data.get(key), now)
+            self._data[key] = state
+        return decision
+
+
+class SQLiteStorage:
+    """
+    Counters in a small SQLite file shared by every worker on the host. Each
+    check is one BEGIN IMMEDIATE read-modify-write, which serializes workers
+    on the same key without a server process. Every `purge_every` updates a
+    worker also deletes the expired rows, so keys seen once do not pile up.
+    """
+
+    def __init__(self, path, purge_every=1000):
+        self.path = path
+        self.purge_every = purge_every
+        self._updates = itertools.count(1)
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ratelimit "
+                "(key TEXT PRIMARY KEY, a REAL, b REAL, c REAL, expires REAL)"
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def update(self, key, algorithm, now):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT a, b, c FROM ratelimit WHERE key = ?", (key,)).fetchone()
+            state = tuple(v for v in row if v is not None) if row else None
+            state, decision = algorithm(state, now)
+            values = tuple(state) + (None,) * (3 - len(state))
+            conn.execute(
+                "INSERT OR REPLACE INTO ratelimit (key, a, b, c, expires) VALUES (?, ?, ?, ?, ?)",
+                (key,) + values + (now + 2 * algorithm.period,),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if self.purge_every and next(self._updates) % self.purge_every == 0:
+            self.purge(now)
+        return decision
+
+    def purge(self, now=None):
+        """Delete expired counters; returns how many."""
+        conn = self._connection()
+        return conn.execute("DELETE FROM ratelimit WHERE expires < ?",
+                            (time.time() if now is None else now,)).rowcount
+
+
+def storage_from_uri(uri, purge_every=1000):
+    if uri.startswith("memory://"):
+        return MemoryStorage()
+    if uri.startswith("sqlite:///"):
+        return SQLiteStorage(uri[len("sqlite:///"):], purge_every)
+    raise ValueError(f"Unsupported RATELIMIT_STORAGE_URI: {uri}")
+
+
+class RateLimiter:
+    def __init__(self, app):
+        self.storage = storage_from_uri(app.config["RATELIMIT_STORAGE_URI"], app.config["RATELIMIT_PURGE_EVERY"])
+        self.default = self._build(app.config["RATELIMIT_DEFAULT"], app.config["RATELIMIT_ALGORITHM"])
+        self.rules = {
+            endpoint: self._build(rule, app.config["RATELIMIT_ALGORITHM"])
+            for endpoint, rule in app.config["RATELIMIT_RULES"].items()
+        }
+        self.proxy_count = app.config["RATELIMIT_PROXY_COUNT"]
+
+    @staticmethod
+    def _build(rule, default_algorithm):
+        if isinstance(rule, str):
+            rule = {"rate": rule}
+        limit, period = parse_rate(rule["rate"])
+        algorithm = ALGORITHMS[rule.get("algorithm", default_algorithm)](limit, period)
+        return algorithm, rule.get("key", "identity")
+
+    def client_ip(self):
+        route = request.access_route
+        if self.proxy_count and len(route) >= self.proxy_count:
+            return route[-self.proxy_count]
+        return request.remote_addr or "unknown"
+
+    def client_key(self, key_kind):
+        if key_kind == "identity":
+            try:
+                verify_jwt_in_request(optional=True)
+                identity = get_jwt_identity()
+            except Exception:
+                identity = None
+            if identity is not None:
+                return f"user:{identity}"
+        return f"ip:{self.client_ip()}"
+
+    def check(self):
+        endpoint = request.endpoint
+        if endpoint in self.rules:
+            (algorithm, key_kind), scope = self.rules[endpoint], endpoint
+        else:
+            (algorithm, key_kind), scope = self.default, "default"
+        key = f"{scope}:{self.client_key(key_kind)}"
+        return self.storage.update(key, algorithm, time.time())
+
+
+def _before_request():
+    limiter = current_app.extensions.get("journal_ratelimit")
+    if limiter is None or request.method == "OPTIONS":
+        return None
+    decision = limiter.check()
+    g.ratelimit = decision
+    if not decision.allowed:
+        return JsonResponse({"error": "Too many requests", "retry_after": math.ceil(decision.retry_after)}, 429)
+    return None
+
+
+def _after_request(response):
+    decision = g.pop("ratelimit", None)
+    if decision is not None:
+        response.headers["RateLimit-Limit"] = str(decision.limit)
+        response.headers["RateLimit-Remaining"] = str(decision.remaining)
+        response.headers["RateLimit-Reset"] = str(math.ceil(decision.reset))
+        if not decision.allowed:
+            response.headers["Retry-After"] = str(max(1, math.ceil(decision.retry_after)))
+    return response
+
+
+def init_app(app):
+    app.config.setdefault("RATELIMIT_ENABLED", True)
+    app.config.setdefault("RATELIMIT_STORAGE_URI", "memory://" if app.testing else
+                          "sqlite:///" + os.path.join(app.instance_path, "ratelimit.db"))
+    app.config.setdefault("RATELIMIT_ALGORITHM", TokenBucket.name)
+    app.config.setdefault("RATELIMIT_DEFAULT", "120/minute")
+    app.config.setdefault("RATELIMIT_RULES", DEFAULT_RULES)
+    app.config.setdefault("RATELIMIT_PROXY_COUNT", 0)
+    app.config.setdefault("RATELIMIT_PURGE_EVERY", 1000)
+    if not app.config["RATELIMIT_ENABLED"]:
+        return
+    app.extensions["journal_ratelimit"] = RateLimiter(app)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
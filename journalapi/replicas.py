@@ -0,0 +1,149 @@
+# PWP_JournalAPI/journalapi/replicas.py
+"""
+Read-replica routing.
+
+With DATABASE_REPLICA_URIS set, GET and HEAD requests to the API's resources
+read from the replica engines in turn, and all other requests use the
+primary. The choice is made per request in before_request and applied by
+extensions.RoutingSession, so resources are unchanged. A request that writes
+anyway, such as a first stats read that builds the row, switches to the
+primary at its first INSERT/UPDATE/DELETE or flush. Code that computes what
+it is about to write (the stats and analytics caches) calls use_primary()
+first, so a lagging replica is never copied into the primary.
+
+Replicas lag behind the primary. After a user's write request, that user's
+reads stay on the primary for REPLICA_STICKY_SECONDS, so they see their own
+changes. The per-user markers live in REPLICA_STICKY_STORAGE_URI: memory://
+(one worker) or a SQLite file shared by every worker on the host, like the
+rate-limit counters.
+"""
+import copy
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from flask import current_app, g, has_app_context, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import create_engine
+
+SAFE_METHODS = ("GET", "HEAD")
+
+
+class MemoryMarkers:
+    """Process-local write markers; only correct with a single worker (tests, dev server)."""
+
+    def __init__(self):
+        self._until = {}
+        self._lock = threading.Lock()
+
+    def mark(self, user_id, until):
+        with self._lock:
+            self._until[user_id] = until
+
+    def active(self, user_id, now):
+        return self._until.get(user_id, 0) > now
+
+
+class SQLiteMarkers:
+    """Write markers in a small SQLite file shared by every worker on the host."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("CREATE TABLE IF NOT EXISTS sticky (user_id TEXT PRIMARY KEY, until REAL)")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def mark(self, user_id, until):
+        self._connection().execute("INSERT OR REPLACE INTO sticky (user_id, until) VALUES (?, ?)",
+                                   (str(user_id), until))
+
+    def active(self, user_id, now):
+        row = self._connection().execute("SELECT until FROM sticky WHERE user_id = ?", (str(user_id),)).fetchone()
+        return row is not None and row[0] > now
+
+
+def markers_from_uri(uri):
+    if uri.startswith("memory://"):
+        return MemoryMarkers()
+    if uri.startswith("sqlite:///"):
+        return SQLiteMarkers(uri[len("sqlite:///"):])
+    raise ValueError(f"Unsupported REPLICA_STICKY_STORAGE_URI: {uri}")
+
+
+class ReplicaRouter:
+    def __init__(self, app):
+        options = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+        self.engines = [create_engine(uri, **copy.deepcopy(options)) for uri in app.config["DATABASE_REPLICA_URIS"]]
+        self._turn = itertools.cycle(self.engines)
+        self._lock = threading.Lock()
+        self.sticky_seconds = app.config["REPLICA_STICKY_SECONDS"]
+        self.markers = markers_from_uri(app.config["REPLICA_STICKY_STORAGE_URI"])
+
+    def next_engine(self):
+        with self._lock:
+            return next(self._turn)
+
+    def reads_from_primary(self, user_id):
+        return user_id is not None and self.markers.active(user_id, time.time())
+
+    def wrote(self, user_id):
+        self.markers.mark(user_id, time.time() + self.sticky_seconds)
+
+
+def use_primary():
+    """Send the rest of this request to the primary, for code that writes back what it reads."""
+    if has_app_context():
+        g.pop("db_read_engine", None)
+
+
+def _identity():
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity()
+    except Exception:
+        return None
+
+
+def _before_request():
+    router = current_app.extensions.get("journal_replicas")
+    if router is None or request.blueprint != "api" or request.method not in SAFE_METHODS:
+        return None
+    if not router.reads_from_primary(_identity()):
+        g.db_read_engine = router.next_engine()
+    return None
+
+
+def _after_request(response):
+    router = current_app.extensions.get("journal_replicas")
+    if router is not None and request.blueprint == "api" and request.method not in SAFE_METHODS + ("OPTIONS",):
+        try:
+            user_id = get_jwt_identity()
+        except RuntimeError:  # the endpoint does not take a token
+            user_id = None
+        if user_id is not None:
+            router.wrote(user_id)
+    return response
+
+
+def init_app(app):
+    app.config.setdefault("DATABASE_REPLICA_URIS",
+                          [uri for uri in os.environ.get("DATABASE_REPLICA_URIS", "").split(",") if uri])
+    app.config.setdefault("REPLICA_STICKY_SECONDS", 5)
+    app.config.setdefault("REPLICA_STICKY_STORAGE_URI", "memory://" if app.testing else
+                          "sqlite:///" + os.path.join(app.instance_path, "replica_sticky.db"))
+    if not app.config["DATABASE_REPLICA_URIS"]:
+        return
+    if "journal_shards" in app.extensions:
+        raise ValueError("DATABASE_REPLICA_URIS and SHARD_URIS cannot be combined")
+    app.extensions["journal_replicas"] = ReplicaRouter(app)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
@@ -0,0 +1,30 @@
+# journalapi/resources/analytics.py
+from flask_restful import Resource
+from flask import request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from extensions import db
+from journalapi import analytics
+from journalapi.models import User
+from journalapi.utils import JsonResponse
+
+class UserAnalyticsResource(Resource):
+    @jwt_required()
+    def get(self, user_id):
+        current_user_id = get_jwt_identity()
+        if str(user_id) != current_user_id:
+            return JsonResponse({"error": "Unauthorized"}, 403)
+        granularity = request.args.get("bucket", "week")
+        if granularity not in analytics.GRANULARITIES:
+            return JsonResponse({"error": f"bucket must be one of: {', '.join(analytics.GRANULARITIES)}"}, 400)
+        if not db.session.get(User, user_id):
+            return JsonResponse({"error": "User not found"}, 404)
+        response_data = {
+            "bucket": granularity,
+            "buckets": analytics.get_analytics(user_id, granularity),
+            "_links": {
+                "self": {"href": f"/users/{user_id}/analytics?bucket={granularity}"},
+                "user": {"href": f"/users/{user_id}"},
+                "stats": {"href": f"/users/{user_id}/stats"}
+            }
+        }
+        return JsonResponse(response_data, 200)
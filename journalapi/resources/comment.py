@@ -1,41 +1,126 @@
 # journalapi/resources/comment.py
+from datetime import datetime
+from urllib.parse import urlencode
 from flask_restful import Resource
 from flask import request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
+from sqlalchemy import and_, or_
 from extensions import db
-from journalapi.models import Comment
-from journalapi.utils import JsonResponse
+from journalapi.models import Comment, JournalEntry
+from journalapi.softdelete import delete_comments
+from journalapi.utils import JsonResponse, decode_cursor, encode_cursor, load_merge_patch
 from schemas import CommentSchema
 
 comment_schema = CommentSchema()
+# Replies cannot be moved to another parent; only the text is editable.
+comment_patch_schema = CommentSchema(only=("content",))
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _adjust_comment_count(entry_id, delta):
+    # Single UPDATE ... SET comment_count = comment_count + delta, so concurrent
+    # writers never lose an increment. last_updated is pinned to its current
+    # value: a new comment is not an edit of the entry.
+    JournalEntry.query.filter_by(id=entry_id).update(
+        {
+            JournalEntry.comment_count: JournalEntry.comment_count + delta,
+            JournalEntry.last_updated: JournalEntry.last_updated,
+        },
+        synchronize_session=False,
+    )
+
+def _subtree(comment):
+    """Query for a comment and all of its replies, as one prefix scan on path."""
+    query = Comment.query.filter(Comment.journal_entry_id == comment.journal_entry_id)
+    if comment.path is None:
+        return query.filter(Comment.id == comment.id)
+    return query.filter(or_(Comment.id == comment.id, Comment.path.like(comment.path + "/%")))
+
+def _comment_links(entry_id, comment_id):
+    return {
+        "self": {"href": f"/entries/{entry_id}/comments/{comment_id}"},
+        "edit": {"href": f"/entries/{entry_id}/comments/{comment_id}"},
+        "delete": {"href": f"/entries/{entry_id}/comments/{comment_id}"},
+        "replies": {"href": f"/entries/{entry_id}/comments?parent_id={comment_id}"},
+        "thread": {"href": f"/entries/{entry_id}/comments?thread={comment_id}"},
+        "entry": {"href": f"/entries/{entry_id}"}
+    }
+
+def _comment_data(comment):
+    return {
+        "id": comment.id,
+        "journal_entry_id": comment.journal_entry_id,
+        "user_id": comment.user_id,
+        "parent_id": comment.parent_id,
+        "content": comment.content,
+        "timestamp": comment.timestamp.isoformat() if comment.timestamp else None,
+        "_links": _comment_links(comment.journal_entry_id, comment.id)
+    }
 
 class CommentCollectionResource(Resource):
     @jwt_required()
     def get(self, entry_id):
-        comments = Comment.query.filter_by(journal_entry_id=entry_id).all()
-        data = []
-        for c in comments:
-            item = {
-                "id": c.id,
-                "journal_entry_id": c.journal_entry_id,
-                "user_id": c.user_id,
-                "content": c.content,
-                "timestamp": c.timestamp.isoformat() if c.timestamp else None,
-                "_links": {
-                    "self": {"href": f"/entries/{entry_id}/comments/{c.id}"},
-                    "edit": {"href": f"/entries/{entry_id}/comments/{c.id}"},
-                    "delete": {"href": f"/entries/{entry_id}/comments/{c.id}"},
-                    "entry": {"href": f"/entries/{entry_id}"}
-                }
-            }
-            data.append(item)
+        user_id = int(get_jwt_identity())
+        entry = db.session.get(JournalEntry, entry_id)
+        if not entry or entry.user_id != user_id:
+            return JsonResponse({"error": "Not found"}, 404)
+
+        args = request.args
+        try:
+            limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+            if limit < 1:
+                raise ValueError("limit must be positive")
+            limit = min(limit, MAX_PAGE_SIZE)
+            after = None
+            if args.get("cursor"):
+                stamp, last_id = decode_cursor(args["cursor"])
+                after = (datetime.fromisoformat(stamp), int(last_id))
+            parent_id = args.get("parent_id")
+            if parent_id not in (None, "root"):
+                parent_id = int(parent_id)
+            thread_id = int(args["thread"]) if args.get("thread") else None
+        except ValueError:
+            return JsonResponse({"error": "Invalid limit, cursor, parent_id or thread"}, 400)
+
+        query = Comment.query.filter_by(journal_entry_id=entry_id)
+        if parent_id == "root":
+            query = query.filter(Comment.parent_id.is_(None))
+        elif parent_id is not None:
+            query = query.filter(Comment.parent_id == parent_id)
+        if thread_id is not None:
+            root = db.session.get(Comment, thread_id)
+            if not root or root.journal_entry_id != entry_id:
+                return JsonResponse({"error": "Not found"}, 404)
+            query = _subtree(root)
+        if after is not None:
+            stamp, last_id = after
+            query = query.filter(or_(
+                Comment.timestamp > stamp,
+                and_(Comment.timestamp == stamp, Comment.id > last_id),
+            ))
+        # Keyset pagination on (timestamp, id), served by ix_comments_entry_timestamp_id;
+        # fetching one extra row tells us whether there is a next page.
+        comments = query.order_by(Comment.timestamp, Comment.id).limit(limit + 1).all()
+        has_more = len(comments) > limit
+        comments = comments[:limit]
+
+        data = [_comment_data(c) for c in comments]
+        links = {
+            "self": {"href": f"/entries/{entry_id}/comments"},
+            "entry": {"href": f"/entries/{entry_id}"}
+        }
+        if has_more:
+            last = comments[-1]
+            params = {k: v for k, v in args.items() if k != "cursor"}
+            params["cursor"] = encode_cursor(last.timestamp.isoformat(), last.id)
+            links["next"] = {"href": f"/entries/{entry_id}/comments?{urlencode(params)}"}
         response_data = {
             "comments": data,
-            "_links": {
-                "self": {"href": f"/entries/{entry_id}/comments"},
-                "entry": {"href": f"/entries/{entry_id}"}
-            }
+            "count": entry.comment_count or 0,
+            "_links": links
         }
         return JsonResponse(response_data, 200)
 
@@ -46,17 +131,27 @@ class CommentCollectionResource(Resource):
         except ValidationError as err:
             return JsonResponse({"errors": err.messages}, 422)
         user_id = int(get_jwt_identity())
-        comment = Comment(journal_entry_id=entry_id, user_id=user_id, content=data["content"])
+        if db.session.get(JournalEntry, entry_id) is None:
+            return JsonResponse({"error": "Not found"}, 404)
+        parent = None
+        if data.get("parent_id") is not None:
+            parent = db.session.get(Comment, data["parent_id"])
+            if not parent or parent.journal_entry_id != entry_id:
+                return JsonResponse({"errors": {"parent_id": ["Parent comment not found on this entry."]}}, 422)
+        comment = Comment(
+            journal_entry_id=entry_id,
+            user_id=user_id,
+            content=data["content"],
+            parent_id=parent.id if parent else None
+        )
         db.session.add(comment)
+        db.session.flush()
+        comment.build_path(parent)
+        _adjust_comment_count(entry_id, 1)
         db.session.commit()
         response_data = {
             "comment_id": comment.id,
-            "_links": {
-                "self": {"href": f"/entries/{entry_id}/comments/{comment.id}"},
-                "edit": {"href": f"/entries/{entry_id}/comments/{comment.id}"},
-                "delete": {"href": f"/entries/{entry_id}/comments/{comment.id}"},
-                "entry": {"href": f"/entries/{entry_id}"}
-            }
+            "_links": _comment_links(entry_id, comment.id)
         }
         return JsonResponse(response_data, 201)
 
@@ -84,19 +179,39 @@ class CommentItemResource(Resource):
         }
         return JsonResponse(response_data, 200)
 
+    @jwt_required()
+    def patch(self, entry_id, comment_id):
+        user_id = int(get_jwt_identity())
+        comment = db.session.get(Comment, comment_id)
+        if not comment or comment.user_id != user_id or comment.journal_entry_id != entry_id:
+            return JsonResponse({"error": "Not found"}, 404)
+        try:
+            changes = load_merge_patch(comment_patch_schema, {"content": comment.content}, request.get_json())
+        except ValidationError as err:
+            return JsonResponse({"errors": err.messages}, 422)
+        if changes:
+            comment.content = changes["content"]
+            db.session.commit()
+        response_data = _comment_data(comment)
+        response_data["changed"] = sorted(changes)
+        return JsonResponse(response_data, 200)
+
     @jwt_required()
     def delete(self, entry_id, comment_id):
         user_id = int(get_jwt_identity())
         comment = db.session.get(Comment, comment_id)
         if not comment or comment.user_id != user_id or comment.journal_entry_id != entry_id:
             return JsonResponse({"error": "Not found"}, 404)
-        db.session.delete(comment)
+        # Replies go with their parent; the count drops by however many rows left.
+        removed_ids = [row.id for row in _subtree(comment).with_entities(Comment.id)]
+        removed = delete_comments(entry_id, comment.journal_entry.user_id, removed_ids)
         db.session.commit()
         response_data = {
             "message": "Comment deleted successfully",
+            "deleted": removed,
             "_links": {
                 "self": {"href": f"/entries/{entry_id}/comments"},
                 "entry": {"href": f"/entries/{entry_id}"}
             }
         }
-        return JsonResponse(response_data, 200)
\ No newline at end of file
+        return JsonResponse(response_data, 200)
@@ -0,0 +1,83 @@
+# journalapi/resources/draft.py
+import json
+from flask import current_app, request
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from marshmallow import ValidationError
+from extensions import db
+from journalapi.models import JournalEntry
+from journalapi.utils import JsonResponse
+from schemas import JournalEntrySchema
+
+draft_schema = JournalEntrySchema(partial=True)
+
+
+def _draft_links(entry_id):
+    return {
+        "self": {"href": f"/entries/{entry_id}/draft"},
+        "publish": {"href": f"/entries/{entry_id}"},
+        "discard": {"href": f"/entries/{entry_id}/draft"},
+        "entry": {"href": f"/entries/{entry_id}"}
+    }
+
+def _draft_data(entry_id, row, durable):
+    return {
+        "entry_id": entry_id,
+        "title": row["title"],
+        "content": row["content"],
+        "tags": json.loads(row["tags"]) if row["tags"] else [],
+        "saved_at": row["saved_at"].isoformat(),
+        "durable": durable,
+        "_links": _draft_links(entry_id)
+    }
+
+
+class EntryDraftResource(Resource):
+    """Autosave target for the editor; see journalapi.autosave for the durability rules."""
+
+    def _entry(self, entry_id):
+        entry = db.session.get(JournalEntry, entry_id)
+        if not entry or entry.user_id != int(get_jwt_identity()):
+            return None
+        return entry
+
+    @jwt_required()
+    def get(self, entry_id):
+        entry = self._entry(entry_id)
+        if entry is None:
+            return JsonResponse({"error": "Not found"}, 404)
+        row, durable = current_app.extensions["journal_autosave"].current(entry)
+        if row is None:
+            return JsonResponse({"error": "No draft"}, 404)
+        return JsonResponse(_draft_data(entry_id, row, durable), 200)
+
+    @jwt_required()
+    def patch(self, entry_id):
+        try:
+            changes = draft_schema.load(request.get_json())
+        except ValidationError as err:
+            return JsonResponse({"errors": err.messages}, 422)
+        entry = self._entry(entry_id)
+        if entry is None:
+            return JsonResponse({"error": "Not found"}, 404)
+        durable = request.args.get("durable", "").lower() in ("1", "true")
+        autosave = current_app.extensions["journal_autosave"]
+        row, generation = autosave.save(entry, changes)
+        # Release the read transaction before waiting so the flusher is not blocked by it.
+        db.session.rollback()
+        if durable and not autosave.wait_durable(generation):
+            return JsonResponse({"error": "Draft was not saved durably in time, retry"}, 503)
+        return JsonResponse(_draft_data(entry_id, row, durable), 200 if durable else 202)
+
+    @jwt_required()
+    def delete(self, entry_id):
+        entry = self._entry(entry_id)
+        if entry is None:
+            return JsonResponse({"error": "Not found"}, 404)
+        current_app.extensions["journal_autosave"].discard(entry)
+        db.session.commit()
+        response_data = {
+            "message": "Draft discarded",
+            "_links": {"entry": {"href": f"/entries/{entry_id}"}}
+        }
+        return JsonResponse(response_data, 200)
@@ -1,5 +1,6 @@
 # journalapi/resources/edit_history.py
 from flask_restful import Resource
+from sqlalchemy.orm import undefer_group
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from journalapi.models import EditHistory
 from journalapi.utils import JsonResponse
@@ -8,7 +9,7 @@ class EditHistoryResource(Resource):
     @jwt_required()
     def get(self, entry_id):
         user_id = int(get_jwt_identity())
-        edits = EditHistory.query.filter_by(journal_entry_id=entry_id).all()
+        edits = EditHistory.query.filter_by(journal_entry_id=entry_id).options(undefer_group("content")).all()
         data = []
         for edit in edits:
             item = edit.to_dict()
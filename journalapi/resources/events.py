@@ -0,0 +1,28 @@
+# journalapi/resources/events.py
+from flask_restful import Resource
+from flask import Response, current_app, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from journalapi.events import stream
+from journalapi.utils import JsonResponse
+
+def last_event_id(value):
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+class EventStreamResource(Resource):
+    @jwt_required()
+    def get(self):
+        user_id = int(get_jwt_identity())
+        broker = current_app.extensions["journal_events"]
+        sub = broker.subscribe(user_id)
+        if sub is None:
+            return JsonResponse({"error": "Too many event subscribers, retry later"}, 503)
+        # Subscribe before replaying so nothing falls in between; clients drop duplicate ids.
+        since = last_event_id(request.headers.get("Last-Event-ID"))
+        replay = broker.replay(user_id, since) if since is not None else []
+        response = Response(stream(broker, sub, replay), mimetype="text/event-stream")
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
@@ -1,21 +1,106 @@
 # journalapi/resources/journal_entry.py
 from flask_restful import Resource
-from flask import request
+from flask import Response, current_app, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import defer
 import json
 from extensions import db
+from journalapi import analytics, stats
+from journalapi.conditional import etag_of, failed_precondition
+from journalapi.softdelete import now
 from journalapi.models import JournalEntry
-from journalapi.utils import JsonResponse
-from schemas import JournalEntrySchema
+from journalapi.limits import read_text
+from journalapi.utils import JsonResponse, load_merge_patch
+from schemas import EntryImportSchema, JournalEntrySchema
 
 entry_schema = JournalEntrySchema()
+import_schema = EntryImportSchema()
+
+MAX_BATCH = 100
+MAX_IDEMPOTENCY_KEY = 64
+
+
+def _created(entry_id):
+    response_data = {
+        "entry_id": entry_id,
+        "_links": {
+            "self": {"href": f"/entries/{entry_id}"},
+            "edit": {"href": f"/entries/{entry_id}"},
+            "delete": {"href": f"/entries/{entry_id}"},
+            "comments": {"href": f"/entries/{entry_id}/comments"},
+            "history": {"href": f"/entries/{entry_id}/history"}
+        }
+    }
+    return JsonResponse(response_data, 201)
+
+def _created_with(user_id, key):
+    """The id of the entry an earlier POST with this Idempotency-Key created, if any (even if deleted since)."""
+    return db.session.scalar(
+        select(JournalEntry.id)
+        .where(JournalEntry.user_id == user_id, JournalEntry.idempotency_key == key)
+        .execution_options(include_deleted=True)
+    )
+
+def _entry_response(entry):
+    """GET /entries/<id>; writes compare If-Match with the ETag of this response."""
+    entry_data = entry.to_dict()
+    entry_data["_links"] = {
+        "self": {"href": f"/entries/{entry.id}"},
+        "edit": {"href": f"/entries/{entry.id}"},
+        "delete": {"href": f"/entries/{entry.id}"},
+        "comments": {"href": f"/entries/{entry.id}/comments"},
+        "history": {"href": f"/entries/{entry.id}/history"}
+    }
+    return JsonResponse(entry_data, 200)
+
+def _precondition(entry):
+    return failed_precondition(lambda: etag_of(_entry_response(entry)), entry.last_updated)
+
+def _create_batch(user_id, rows):
+    """Create the batch's entries and commit; items whose idempotency_key was seen before reuse that entry."""
+    keys = {data["idempotency_key"] for data in rows if data["idempotency_key"] is not None}
+    known = dict(db.session.execute(
+        select(JournalEntry.idempotency_key, JournalEntry.id)
+        .where(JournalEntry.user_id == user_id, JournalEntry.idempotency_key.in_(keys))
+        .execution_options(include_deleted=True)
+    ).all()) if keys else {}
+    entry_ids = []
+    for data in rows:
+        key = data["idempotency_key"]
+        if key in known:
+            entry_ids.append(known[key])
+            continue
+        entry = JournalEntry(
+            user_id=user_id,
+            title=data["title"],
+            content=data["content"],
+            tags=json.dumps(data.get("tags", [])),
+            sentiment_score=0.75,
+            sentiment_tag=json.dumps(["positive"]),
+            idempotency_key=key
+        )
+        if data["date"] is not None:
+            entry.date = data["date"]
+        # Flushed one by one: the stats hooks expect every earlier entry to be counted already.
+        db.session.add(entry)
+        db.session.flush()
+        stats.entry_created(entry)
+        analytics.mark_stale(entry)
+        if key is not None:
+            known[key] = entry.id
+        entry_ids.append(entry.id)
+    db.session.commit()
+    return entry_ids
 
 class JournalEntryListResource(Resource):
     @jwt_required()
     def get(self):
         user_id = int(get_jwt_identity())
-        entries = JournalEntry.query.filter_by(user_id=user_id).all()
+        # The list never shows bodies, so leave them out of the scan.
+        entries = JournalEntry.query.filter_by(user_id=user_id).options(defer(JournalEntry.inline_content)).all()
         data = []
         for e in entries:
             item = {
@@ -23,6 +108,7 @@ class JournalEntryListResource(Resource):
                 "title": e.title,
                 "tags": json.loads(e.tags),
                 "last_updated": e.last_updated.isoformat() if e.last_updated else None,
+                "comment_count": e.comment_count or 0,
                 "_links": {
                     "self": {"href": f"/entries/{e.id}"},
                     "edit": {"href": f"/entries/{e.id}"},
@@ -48,24 +134,69 @@ class JournalEntryListResource(Resource):
             data = entry_schema.load(request.get_json())
         except ValidationError as err:
             return JsonResponse({"errors": err.messages}, 422)
+        # A client that retries a create (e.g. after a timeout) sends the same key and gets the same entry.
+        key = request.headers.get("Idempotency-Key")
+        if key is not None:
+            if not 0 < len(key) <= MAX_IDEMPOTENCY_KEY:
+                return JsonResponse({"error": f"Idempotency-Key must be 1 to {MAX_IDEMPOTENCY_KEY} characters"}, 400)
+            existing = _created_with(user_id, key)
+            if existing is not None:
+                return _created(existing)
         new_entry = JournalEntry(
             user_id=user_id,
             title=data["title"],
             content=data["content"],
             tags=json.dumps(data.get("tags", [])),
             sentiment_score=0.75,
-            sentiment_tag=json.dumps(["positive"])
+            sentiment_tag=json.dumps(["positive"]),
+            idempotency_key=key
         )
         db.session.add(new_entry)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            # A concurrent retry with the same key committed first.
+            db.session.rollback()
+            existing = _created_with(user_id, key) if key is not None else None
+            if existing is None:
+                raise
+            return _created(existing)
+        stats.entry_created(new_entry)
+        analytics.mark_stale(new_entry)
         db.session.commit()
+        return _created(new_entry.id)
+
+class JournalEntryBatchResource(Resource):
+    @jwt_required()
+    def post(self):
+        """
+        Create up to MAX_BATCH entries in one transaction; one invalid entry
+        rejects the batch. Entries may carry an idempotency_key so that a
+        resent batch does not create them twice.
+        """
+        user_id = int(get_jwt_identity())
+        body = request.get_json(silent=True)
+        items = body.get("entries") if isinstance(body, dict) else None
+        if not isinstance(items, list) or not items:
+            return JsonResponse({"error": "Expected a non-empty \"entries\" list"}, 400)
+        if len(items) > MAX_BATCH:
+            return JsonResponse({"error": f"At most {MAX_BATCH} entries per batch"}, 400)
+        try:
+            rows = import_schema.load(items, many=True)
+        except ValidationError as err:
+            return JsonResponse({"errors": err.messages}, 422)
+        try:
+            entry_ids = _create_batch(user_id, rows)
+        except IntegrityError:
+            # A concurrent resend of the same batch committed first; its entries are reused now.
+            db.session.rollback()
+            entry_ids = _create_batch(user_id, rows)
         response_data = {
-            "entry_id": new_entry.id,
+            "entry_ids": entry_ids,
+            "count": len(entry_ids),
             "_links": {
-                "self": {"href": f"/entries/{new_entry.id}"},
-                "edit": {"href": f"/entries/{new_entry.id}"},
-                "delete": {"href": f"/entries/{new_entry.id}"},
-                "comments": {"href": f"/entries/{new_entry.id}/comments"},
-                "history": {"href": f"/entries/{new_entry.id}/history"}
+                "self": {"href": "/entries/batch"},
+                "entries": {"href": "/entries/"}
             }
         }
         return JsonResponse(response_data, 201)
@@ -77,15 +208,7 @@ class JournalEntryResource(Resource):
         entry = db.session.get(JournalEntry, entry_id)
         if not entry or entry.user_id != user_id:
             return JsonResponse({"error": "Not found"}, 404)
-        entry_data = entry.to_dict()
-        entry_data["_links"] = {
-            "self": {"href": f"/entries/{entry_id}"},
-            "edit": {"href": f"/entries/{entry_id}"},
-            "delete": {"href": f"/entries/{entry_id}"},
-            "comments": {"href": f"/entries/{entry_id}/comments"},
-            "history": {"href": f"/entries/{entry_id}/history"}
-        }
-        return JsonResponse(entry_data, 200)
+        return _entry_response(entry)
 
     @jwt_required()
     def put(self, entry_id):
@@ -97,9 +220,18 @@ class JournalEntryResource(Resource):
         entry = db.session.get(JournalEntry, entry_id)
         if not entry or entry.user_id != user_id:
             return JsonResponse({"error": "Not found"}, 404)
+        failed = _precondition(entry)
+        if failed:
+            return failed
+        old_content, old_score = entry.content, entry.sentiment_score
         entry.title = data["title"]
         entry.content = data["content"]
         entry.tags = json.dumps(data["tags"])
+        # Saving the entry publishes whatever was autosaved.
+        current_app.extensions["journal_autosave"].discard(entry)
+        db.session.flush()
+        stats.entry_updated(entry, old_content, old_score)
+        analytics.mark_stale(entry)
         db.session.commit()
         response_data = {
             "message": "Entry fully replaced",
@@ -113,13 +245,57 @@ class JournalEntryResource(Resource):
         }
         return JsonResponse(response_data, 200)
 
+    @jwt_required()
+    def patch(self, entry_id):
+        """JSON Merge Patch; only the fields that change are written, and a no-op writes nothing."""
+        user_id = int(get_jwt_identity())
+        entry = db.session.get(JournalEntry, entry_id)
+        if not entry or entry.user_id != user_id:
+            return JsonResponse({"error": "Not found"}, 404)
+        failed = _precondition(entry)
+        if failed:
+            return failed
+        current = {"title": entry.title, "content": entry.content, "tags": json.loads(entry.tags or "[]")}
+        try:
+            changes = load_merge_patch(entry_schema, current, request.get_json())
+        except ValidationError as err:
+            return JsonResponse({"errors": err.messages}, 422)
+        if changes:
+            old_content, old_score = entry.content, entry.sentiment_score
+            for field, value in changes.items():
+                setattr(entry, field, json.dumps(value) if field == "tags" else value)
+            current_app.extensions["journal_autosave"].discard(entry)
+            db.session.flush()
+            stats.entry_updated(entry, old_content, old_score)
+            analytics.mark_stale(entry)
+            db.session.commit()
+        entry_data = entry.to_dict()
+        entry_data["changed"] = sorted(changes)
+        entry_data["_links"] = {
+            "self": {"href": f"/entries/{entry_id}"},
+            "edit": {"href": f"/entries/{entry_id}"},
+            "delete": {"href": f"/entries/{entry_id}"},
+            "comments": {"href": f"/entries/{entry_id}/comments"},
+            "history": {"href": f"/entries/{entry_id}/history"}
+        }
+        return JsonResponse(entry_data, 200)
+
     @jwt_required()
     def delete(self, entry_id):
         user_id = int(get_jwt_identity())
         entry = db.session.get(JournalEntry, entry_id)
         if not entry or entry.user_id != user_id:
             return JsonResponse({"error": "Not found"}, 404)
-        db.session.delete(entry)
+        failed = _precondition(entry)
+        if failed:
+            return failed
+        # Comments and history stay until compaction; they are unreachable
+        # once the entry is hidden.
+        entry.deleted_at = now()
+        current_app.extensions["journal_autosave"].discard(entry)
+        db.session.flush()
+        stats.entry_deleted(entry)
+        analytics.mark_stale(entry)
         db.session.commit()
         response_data = {
             "message": "Entry deleted successfully",
@@ -128,4 +304,48 @@ class JournalEntryResource(Resource):
                 "create": {"href": "/entries"}
             }
         }
-        return JsonResponse(response_data, 200)
\ No newline at end of file
+        return JsonResponse(response_data, 200)
+
+
+class EntryContentResource(Resource):
+    """An entry's body as raw text, for bodies too large to send comfortably inside JSON."""
+
+    @jwt_required()
+    def get(self, entry_id):
+        user_id = int(get_jwt_identity())
+        entry = db.session.get(JournalEntry, entry_id)
+        if not entry or entry.user_id != user_id:
+            return JsonResponse({"error": "Not found"}, 404)
+        return Response(entry.content, status=200, mimetype="text/plain")
+
+    @jwt_required()
+    def put(self, entry_id):
+        user_id = int(get_jwt_identity())
+        entry = db.session.get(JournalEntry, entry_id)
+        if not entry or entry.user_id != user_id:
+            return JsonResponse({"error": "Not found"}, 404)
+        if request.mimetype != "text/plain":
+            return JsonResponse({"error": "Content-Type must be text/plain"}, 415)
+        try:
+            content = read_text(request.mimetype_params.get("charset", "utf-8"))
+        except (UnicodeDecodeError, LookupError):
+            return JsonResponse({"errors": {"content": ["Body is not valid text in the declared charset."]}}, 422)
+        if not content:
+            return JsonResponse({"errors": {"content": ["Shorter than minimum length 1."]}}, 422)
+        if content != entry.content:
+            old_content, old_score = entry.content, entry.sentiment_score
+            entry.content = content
+            current_app.extensions["journal_autosave"].discard(entry)
+            db.session.flush()
+            stats.entry_updated(entry, old_content, old_score)
+            analytics.mark_stale(entry)
+            db.session.commit()
+        response_data = {
+            "message": "Entry content replaced",
+            "size": len(content.encode("utf-8")),
+            "_links": {
+                "self": {"href": f"/entries/{entry_id}/content"},
+                "entry": {"href": f"/entries/{entry_id}"}
+            }
+        }
+        return JsonResponse(response_data, 200)
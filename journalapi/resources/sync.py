@@ -0,0 +1,139 @@
+# journalapi/resources/sync.py
+from flask_restful import Resource
+from flask import request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import undefer_group
+from extensions import db
+from journalapi import changes, sharding
+from journalapi.models import Comment, EditHistory, JournalEntry
+from journalapi.utils import JsonResponse, decode_cursor, encode_cursor
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+SNAPSHOT_TOKEN = "snapshot"
+SNAPSHOT_KINDS = ("entry", "comment", "history")  # page order; see _snapshot_queries
+
+def _snapshot_queries(user_id):
+    """The snapshot's kinds in page order, each with a query over the user's live objects of that kind."""
+    return (
+        ("entry", JournalEntry, JournalEntry.query.filter_by(user_id=user_id)),
+        ("comment", Comment, Comment.query.join(JournalEntry, Comment.journal_entry_id == JournalEntry.id)
+         .filter(JournalEntry.user_id == user_id)),
+        # Addressed to the entry owner, as the history deltas in the change feed are.
+        ("history", EditHistory, EditHistory.query.join(JournalEntry, EditHistory.journal_entry_id == JournalEntry.id)
+         .filter(JournalEntry.user_id == user_id).options(undefer_group("content"))),
+    )
+
+def _snapshot(user_id, after=None, limit=None):
+    """
+    Every live object in the user's feed, as upserts ordered by kind and then
+    id, starting after the (kind, id) position `after`. With a limit, returns
+    at most that many and whether more follow.
+    """
+    items = []
+    for kind, model, query in _snapshot_queries(user_id):
+        if after is not None and SNAPSHOT_KINDS.index(kind) < SNAPSHOT_KINDS.index(after[0]):
+            continue
+        if after is not None and kind == after[0]:
+            query = query.filter(model.id > after[1])
+        query = query.order_by(model.id)
+        if limit is not None:
+            # One extra row tells whether another page follows.
+            query = query.limit(limit + 1 - len(items))
+        for obj in query:
+            items.append({"kind": kind, "id": obj.id, "op": changes.UPSERT, "data": obj.to_dict()})
+        if limit is not None and len(items) > limit:
+            return items[:limit], True
+    return items, False
+
+def _resolve(rows):
+    """Attach current data to upserts; objects gone since are reported as deletes."""
+    wanted = {}
+    for _, kind, object_id, op in rows:
+        if op == changes.UPSERT:
+            wanted.setdefault(kind, set()).add(object_id)
+    current = {}
+    for kind, ids in wanted.items():
+        model = changes.MODELS[kind]
+        for obj in model.query.filter(model.id.in_(ids)):
+            current[(kind, obj.id)] = obj
+    items = []
+    for seq, kind, object_id, op in rows:
+        obj = current.get((kind, object_id)) if op == changes.UPSERT else None
+        item = {"seq": seq, "kind": kind, "id": object_id, "op": changes.UPSERT if obj else changes.DELETE}
+        if obj is not None:
+            item["data"] = obj.to_dict()
+        items.append(item)
+    return items
+
+def _since(token):
+    """
+    The sequence number in a since token, and the snapshot position it
+    continues from (None for a delta token). With sharding, sequence numbers
+    are per shard and the token names its shard; a token from another shard
+    (the user has moved) is rejected, so the client starts over from a
+    snapshot.
+    """
+    values = decode_cursor(token)
+    shard = sharding.current_shard()
+    if shard is not None:
+        if values[-1:] != [str(shard)]:
+            raise ValueError("since token is from another shard")
+        values = values[:-1]
+    if values[0] == SNAPSHOT_TOKEN:
+        _, head, kind, last_id = values
+        if kind not in SNAPSHOT_KINDS:
+            raise ValueError("unknown snapshot kind")
+        return int(head), (kind, int(last_id))
+    return int(values[0]), None
+
+def _token(*values):
+    shard = sharding.current_shard()
+    return encode_cursor(*values) if shard is None else encode_cursor(*values, shard)
+
+class SyncResource(Resource):
+    @jwt_required()
+    def get(self):
+        """
+        Without since, a snapshot; it is paged only when the client passes a
+        limit, and each page's next token continues the snapshot until the
+        last one, whose token starts the delta feed.
+        """
+        user_id = int(get_jwt_identity())
+        try:
+            limit = int(request.args.get("limit", DEFAULT_LIMIT))
+            if limit < 1:
+                raise ValueError("limit must be positive")
+            limit = min(limit, MAX_LIMIT)
+            token = request.args.get("since")
+            since, position = _since(token) if token else (None, None)
+        except ValueError:
+            return JsonResponse({"error": "Invalid since token or limit"}, 400)
+
+        if since is None:
+            # Read the head first: anything written during the snapshot is replayed next time.
+            next_seq = changes.head(db.session, user_id)
+            items, has_more = _snapshot(user_id, limit=limit if "limit" in request.args else None)
+        elif position is not None:
+            next_seq = since
+            items, has_more = _snapshot(user_id, after=position, limit=limit)
+        else:
+            rows, next_seq, has_more = changes.changes_since(db.session, user_id, since, limit)
+            items = _resolve(rows)
+
+        if has_more and (since is None or position is not None):
+            # A snapshot page's token carries the head read before the first page.
+            next_token = _token(SNAPSHOT_TOKEN, next_seq, items[-1]["kind"], items[-1]["id"])
+        else:
+            next_token = _token(next_seq)
+        response_data = {
+            "changes": items,
+            "next": next_token,
+            "has_more": has_more,
+            "_links": {
+                "self": {"href": "/sync"},
+                "next": {"href": f"/sync?since={next_token}"},
+                "entries": {"href": "/entries/"}
+            }
+        }
+        return JsonResponse(response_data, 200)
@@ -1,13 +1,17 @@
 # PWP_JournalAPI/resources/user.py
 from flask_restful import Resource
 from flask import request, current_app
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
+from werkzeug.security import check_password_hash
 from marshmallow import ValidationError
 import traceback
 from extensions import db
+from journalapi import sharding, stats
 from journalapi.models import User
-from journalapi.utils import JsonResponse
+from journalapi.auth import hash_password, invalidate_user
+from journalapi.blocklist import revoke_token
+from journalapi.softdelete import delete_user
+from journalapi.utils import JsonResponse, load_merge_patch
 
 try:
     from schemas import UserRegisterSchema, UserLoginSchema
@@ -17,16 +21,33 @@ except ImportError:
 register_schema = UserRegisterSchema()
 login_schema = UserLoginSchema()
 
+
+def _user_changes(user, patch):
+    """
+    Validated changes a merge patch makes to a user; raises ValidationError.
+    The password is write-only, so it only counts as a change when it does
+    not match the stored hash.
+    """
+    if not isinstance(patch, dict):
+        raise ValidationError("Merge patch must be a JSON object.")
+    fields = {k: v for k, v in patch.items() if k != "password"}
+    changes = load_merge_patch(register_schema, {"username": user.username, "email": user.email}, fields)
+    password = patch.get("password")
+    if "password" in patch and (password is None or not check_password_hash(user.password, str(password))):
+        changes.update(register_schema.load({"password": password}, partial=True))
+    return changes
+
 class UserRegisterResource(Resource):
     def post(self):
         try:
             data = register_schema.load(request.get_json())
-            if User.query.filter_by(email=data["email"]).first():
+            if sharding.user_exists(email=data["email"]):
                 return JsonResponse({"error": "Email already registered"}, 400)
-            if User.query.filter_by(username=data["username"]).first():
+            if sharding.user_exists(username=data["username"]):
                 return JsonResponse({"error": "Username already taken"}, 400)
-            hashed_password = generate_password_hash(data["password"])
+            hashed_password = hash_password(data["password"])
             user = User(username=data["username"], email=data["email"], password=hashed_password)
+            sharding.place_new_user(user)
             db.session.add(user)
             db.session.commit()
             return JsonResponse({"message": "User registered successfully"}, 201)
@@ -43,12 +64,25 @@ class UserLoginResource(Resource):
             data = login_schema.load(request.get_json())
         except ValidationError as err:
             return JsonResponse({"errors": err.messages}, 422)
+        sharding.route(email=data["email"])
         user = User.query.filter_by(email=data["email"]).first()
         if not user or not check_password_hash(user.password, data["password"]):
             return JsonResponse({"error": "Invalid credentials"}, 401)
         token = create_access_token(identity=str(user.id))
         return JsonResponse({"token": token}, 200)
 
+class UserLogoutResource(Resource):
+    @jwt_required()
+    def post(self):
+        revoke_token(get_jwt())
+        response_data = {
+            "message": "Logged out successfully",
+            "_links": {
+                "login": {"href": "/users/login"}
+            }
+        }
+        return JsonResponse(response_data, 200)
+
 class UserResource(Resource):
     @jwt_required()
     def get(self, user_id):
@@ -78,14 +112,9 @@ class UserResource(Resource):
         user = db.session.get(User, user_id)
         if not user:
             return JsonResponse({"error": "User not found"}, 404)
-        data = request.get_json() or {}
-        if "username" in data:
-            user.username = data["username"]
-        if "email" in data:
-            user.email = data["email"]
-        if "password" in data:
-            user.password = generate_password_hash(data["password"])
-        db.session.commit()
+        _, error = self._apply(user, request.get_json() or {})
+        if error is not None:
+            return error
         response_data = {
             "message": "User updated successfully",
             "_links": {
@@ -96,6 +125,47 @@ class UserResource(Resource):
         }
         return JsonResponse(response_data, 200)
 
+    @jwt_required()
+    def patch(self, user_id):
+        """JSON Merge Patch of username, email and password; a no-op writes nothing."""
+        current_user_id = get_jwt_identity()
+        if str(user_id) != current_user_id:
+            return JsonResponse({"error": "Unauthorized"}, 403)
+        user = db.session.get(User, user_id)
+        if not user:
+            return JsonResponse({"error": "User not found"}, 404)
+        changes, error = self._apply(user, request.get_json())
+        if error is not None:
+            return error
+        user_data = user.to_dict()
+        user_data["changed"] = sorted(changes)
+        user_data["_links"] = {
+            "self": {"href": f"/users/{user_id}"},
+            "edit": {"href": f"/users/{user_id}"},
+            "delete": {"href": f"/users/{user_id}"}
+        }
+        return JsonResponse(user_data, 200)
+
+    def _apply(self, user, patch):
+        """Validate and write a patch; returns (changes, error_response)."""
+        try:
+            changes = _user_changes(user, patch)
+        except ValidationError as err:
+            return None, JsonResponse({"errors": err.messages}, 422)
+        if "email" in changes and sharding.user_exists(email=changes["email"], exclude=user.id):
+            return None, JsonResponse({"error": "Email already registered"}, 400)
+        if "username" in changes and sharding.user_exists(username=changes["username"], exclude=user.id):
+            return None, JsonResponse({"error": "Username already taken"}, 400)
+        if not changes:
+            return changes, None
+        for field, value in changes.items():
+            setattr(user, field, hash_password(value) if field == "password" else value)
+        if "email" in changes or "username" in changes:
+            sharding.update_directory(user)
+        db.session.commit()
+        invalidate_user(user.id)
+        return changes, None
+
     @jwt_required()
     def delete(self, user_id):
         current_user_id = get_jwt_identity()
@@ -104,8 +174,12 @@ class UserResource(Resource):
         user = db.session.get(User, user_id)
         if not user:
             return JsonResponse({"error": "User not found"}, 404)
-        db.session.delete(user)
+        # Flag the account and its data; compaction removes the rows later.
+        delete_user(user)
+        sharding.update_directory(user)  # releases the email on every shard
         db.session.commit()
+        invalidate_user(user_id, deleted=True)
+        revoke_token(get_jwt())
         response_data = {
             "message": "User deleted successfully",
             "_links": {
@@ -113,4 +187,20 @@ class UserResource(Resource):
                 "register": {"href": "/users/register"}
             }
         }
-        return JsonResponse(response_data, 200)
\ No newline at end of file
+        return JsonResponse(response_data, 200)
+
+class UserStatsResource(Resource):
+    @jwt_required()
+    def get(self, user_id):
+        current_user_id = get_jwt_identity()
+        if str(user_id) != current_user_id:
+            return JsonResponse({"error": "Unauthorized"}, 403)
+        if not db.session.get(User, user_id):
+            return JsonResponse({"error": "User not found"}, 404)
+        response_data = stats.get_stats(user_id)
+        response_data["_links"] = {
+            "self": {"href": f"/users/{user_id}/stats"},
+            "user": {"href": f"/users/{user_id}"},
+            "entries": {"href": "/entries/"}
+        }
+        return JsonResponse(response_data, 200)
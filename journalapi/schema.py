@@ -0,0 +1,125 @@
+# PWP_JournalAPI/journalapi/schema.py
+"""
+In-place schema upgrades for existing SQLite databases.
+
+The project has no migration framework: db.create_all() only creates missing
+tables, so columns and indexes added to existing models are applied here and
+any denormalized data they carry is backfilled.
+"""
+from sqlalchemy import func, inspect, or_, select, text, update
+from sqlalchemy.orm import aliased
+from extensions import db
+from journalapi import sharding
+from journalapi.blobs import offload_existing
+from journalapi.models import Comment, JournalEntry
+
+
+def _add_missing_columns(table, existing, dialect):
+    added = []
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect)}"
+        if column.server_default is not None:
+            # SQLite only accepts NOT NULL on an added column when it has a default.
+            ddl += f" DEFAULT {column.server_default.arg}"
+            if not column.nullable:
+                ddl += " NOT NULL"
+        db.session.execute(text(ddl))
+        added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def _parent_has_path():
+    parent = aliased(Comment)
+    return or_(
+        Comment.parent_id.is_(None),
+        Comment.parent_id.in_(select(parent.id).where(parent.path.isnot(None))),
+    )
+
+
+def _backfill_comment_paths():
+    """Fill Comment.path level by level, parents before their replies."""
+    filled = 0
+    while True:
+        pending = (
+            Comment.query.filter(Comment.path.is_(None))
+            .filter(_parent_has_path())
+            .limit(1000)
+            .all()
+        )
+        if not pending:
+            return filled
+        for comment in pending:
+            parent = db.session.get(Comment, comment.parent_id) if comment.parent_id else None
+            comment.build_path(parent)
+        db.session.commit()
+        filled += len(pending)
+
+
+def recount_comments():
+    """Recompute JournalEntry.comment_count from the comments table."""
+    counts = (
+        select(func.count(Comment.id))
+        .where(Comment.journal_entry_id == JournalEntry.id, Comment.deleted_at.is_(None))
+        .scalar_subquery()
+    )
+    result = db.session.execute(update(JournalEntry).values(comment_count=counts,
+                                                               last_updated=JournalEntry.last_updated))
+    db.session.commit()
+    return result.rowcount
+
+
+def _ensure_autoincrement(table, engine):
+    """Rebuild a SQLite table created before it was declared AUTOINCREMENT, keeping its rows."""
+    if engine.dialect.name != "sqlite" or not table.dialect_options["sqlite"]["autoincrement"]:
+        return
+    conn = db.session.connection()
+    sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                       {"name": table.name}).scalar()
+    if sql is None or "AUTOINCREMENT" in sql.upper():
+        return
+    old = f"{table.name}_before_autoincrement"
+    conn.execute(text(f"ALTER TABLE {table.name} RENAME TO {old}"))
+    # Index names move with the renamed table; free them for the new one.
+    for (index,) in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index' "
+                                      "AND tbl_name = :name AND sql IS NOT NULL"), {"name": old}).all():
+        conn.execute(text(f"DROP INDEX {index}"))
+    table.create(conn)
+    columns = ", ".join(col["name"] for col in inspect(conn).get_columns(old) if col["name"] in table.c)
+    conn.execute(text(f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {old}"))
+    conn.execute(text(f"DROP TABLE {old}"))
+
+
+def upgrade_tables():
+    """
+    Create missing tables, columns and indexes on the current database (the
+    chosen shard, with sharding); returns the columns added.
+    """
+    engine = sharding.current_engine()
+    db.metadata.create_all(engine)
+    for table in db.metadata.sorted_tables:
+        _ensure_autoincrement(table, engine)
+    db.session.commit()
+    inspector = inspect(engine)
+    added = []
+    for table in db.metadata.sorted_tables:
+        existing = {col["name"] for col in inspector.get_columns(table.name)}
+        added.extend(_add_missing_columns(table, existing, engine.dialect))
+    db.session.commit()
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    return added
+
+
+def upgrade_schema():
+    """
+    Create missing tables, columns and indexes, then backfill derived data.
+    With sharding, run it once per shard (journalapi.sharding.for_each_shard).
+    """
+    added = upgrade_tables()
+    paths = _backfill_comment_paths()
+    recount_comments()
+    tiered = offload_existing()
+    return {"columns": added, "comment_paths": paths, "tiered_entries": tiered}
@@ -0,0 +1,214 @@
+# PWP_JournalAPI/journalapi/seed.py
+"""
+Synthetic data at production-like volumes for benchmarks and profiling (`flask seed`).
+
+Rows are drawn with numpy and written with executemany INSERTs on the
+tables, bypassing the ORM. The per-entry hooks (stats, change feed, blob
+tiering) do not run. Stats are rebuilt for the new users at the end, and
+bodies are kept below the blob tier's limit.
+
+The shapes follow what real journals look like:
+- User activity is heavy-tailed (lognormal weights), so a few users write
+  most entries.
+- Comments and edits per entry are negative-binomial: most entries have
+  none and a few have many.
+- Text lengths are lognormal, with Zipf-distributed words and tags.
+
+Every block of entries draws from its own generator seeded with (seed,
+stream, block), so the same seed and options always give the same rows. Ids
+continue after the rows already in the database.
+"""
+import json
+from datetime import datetime, time, timedelta, timezone
+import numpy as np
+from sqlalchemy import func, select
+from extensions import db
+from journalapi import blobs, stats
+from journalapi.auth import hash_password
+from journalapi.models import Comment, EditHistory, JournalEntry, User
+
+BLOCK_SIZE = 10_000
+SEED_PASSWORD = "password123"
+REPLY_SHARE = 0.3  # comments that answer the first comment on their entry
+
+_ACTIVITY, _ENTRIES = 1, 2  # generator streams
+
+WORDS = np.array((
+    "i the and to a was my of it in that today me for with but so we had felt just not at this "
+    "about have really all time work feel day like out more what after some been when she he they "
+    "up good think morning home night again friend family week still tired happy walk coffee "
+    "better long little talked sleep dinner started finally need want try tomorrow maybe "
+    "went back call mother father sister brother meeting project deadline email book read music "
+    "run gym rain sun cold warm park city train late early quiet busy calm anxious grateful proud "
+    "stressed excited bored lonely hopeful plan goal list write remember forget learn class exam "
+    "weekend holiday trip cooked lunch breakfast tea kitchen garden dog cat partner kids office "
+    "doctor headache laugh cried smile thought idea decided change small big new old first last"
+).split())
+TAGS = np.array((
+    "reflection gratitude work family health fitness travel food sleep study friends mood goals "
+    "anxiety reading music weekend routine money nature love creativity habits career therapy "
+    "mindfulness productivity home pets journal ideas"
+).split())
+
+
+def _zipf(size, exponent=1.1):
+    weights = 1.0 / np.arange(1, size + 1) ** exponent
+    return weights / weights.sum()
+
+_WORD_P = _zipf(len(WORDS))
+_TAG_P = _zipf(len(TAGS), 0.9)
+
+
+def _rng(seed, table, block):
+    return np.random.default_rng([seed, table, block])
+
+def _next_id(table):
+    return (db.session.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+def _overdispersed(rng, mean, size, shape):
+    """Counts with the given mean; a small shape means most are 0 and a few are large."""
+    if mean <= 0:
+        return np.zeros(size, dtype=np.int64)
+    return rng.negative_binomial(shape, shape / (shape + mean), size)
+
+
+def _texts(rng, median_words, count, max_words, sigma=0.9):
+    """count strings of Zipf-drawn words with lognormal lengths."""
+    lengths = np.clip(rng.lognormal(np.log(median_words), sigma, count).astype(np.int64), 1, max_words)
+    words = WORDS[rng.choice(len(WORDS), int(lengths.sum()), p=_WORD_P)].tolist()
+    ends = np.cumsum(lengths).tolist()
+    return [" ".join(words[start:end]).capitalize() + "." for start, end in zip([0] + ends[:-1], ends)]
+
+def _tag_lists(rng, count):
+    per_entry = np.minimum(rng.poisson(1.5, count), 5)
+    drawn = TAGS[rng.choice(len(TAGS), int(per_entry.sum()), p=_TAG_P)]
+    return [json.dumps(list(dict.fromkeys(chunk.tolist())))
+            for chunk in np.split(drawn, np.cumsum(per_entry)[:-1])]
+
+def _sentiment(rng, count):
+    """Mostly positive scores in [0, 1]; about one in ten entries was never scored."""
+    scores = np.round(rng.beta(5, 2, count), 2)
+    scores[rng.random(count) < 0.1] = np.nan
+    tags = np.where(scores >= 0.6, '["positive"]', np.where(scores < 0.4, '["negative"]', '["neutral"]'))
+    return [None if np.isnan(s) else s for s in scores.tolist()], np.where(np.isnan(scores), "[]", tags).tolist()
+
+def _datetimes(anchor, seconds_before):
+    return [anchor - timedelta(seconds=s) for s in seconds_before.tolist()]
+
+
+def _user_rows(first_id, count, password):
+    return [{"id": i, "username": f"user{i}", "email": f"user{i}@seed.example", "password": password}
+            for i in range(first_id, first_id + count)]
+
+
+def _entry_block(rng, ids, owners, anchor, days, max_words, comments_per_entry, edits_per_entry):
+    n = len(ids)
+    ages = rng.uniform(0, days * 86400, n)
+    edit_counts = _overdispersed(rng, edits_per_entry, n, 0.3)
+    comment_counts = _overdispersed(rng, comments_per_entry, n, 0.5)
+    # Edited entries were last touched some time after they were written, never after the anchor.
+    touched = np.where(edit_counts > 0, ages - np.minimum(rng.exponential(3 * 86400, n), ages), ages)
+    scores, feelings = _sentiment(rng, n)
+    entries = [
+        {"id": i, "user_id": u, "title": t, "content": c, "tags": g, "sentiment_score": s,
+         "sentiment_tag": f, "date": d, "last_updated": l, "comment_count": k}
+        for i, u, t, c, g, s, f, d, l, k in zip(
+            ids.tolist(), owners.tolist(), _texts(rng, 4, n, 12, 0.4), _texts(rng, 80, n, max_words),
+            _tag_lists(rng, n), scores, feelings, _datetimes(anchor, ages), _datetimes(anchor, touched),
+            comment_counts.tolist())
+    ]
+    return entries, ages, touched, comment_counts, edit_counts
+
+
+def _comment_block(rng, first_id, entry_ids, ages, counts, commenters, anchor):
+    total = int(counts.sum())
+    ids = first_id + np.arange(total)
+    starts = np.cumsum(counts) - counts
+    roots = np.repeat(first_id + starts, counts)
+    replies = (ids != roots) & (rng.random(total) < REPLY_SHARE)
+    # Comments arrive within days of the entry, but not after the anchor.
+    entry_ages = np.repeat(ages, counts)
+    comment_ages = entry_ages - np.minimum(rng.exponential(2 * 86400, total), entry_ages)
+    rows = []
+    for i, entry_id, root, reply, user_id, content, stamp in zip(
+            ids.tolist(), np.repeat(entry_ids, counts).tolist(), roots.tolist(), replies.tolist(),
+            commenters.tolist(), _texts(rng, 12, total, 120), _datetimes(anchor, comment_ages)):
+        segment = str(i).zfill(Comment.PATH_WIDTH)
+        rows.append({"id": i, "journal_entry_id": entry_id, "user_id": user_id,
+                     "parent_id": root if reply else None,
+                     "path": f"{str(root).zfill(Comment.PATH_WIDTH)}/{segment}" if reply else segment,
+                     "content": content, "timestamp": stamp})
+    return rows
+
+
+def _history_block(rng, first_id, entry_ids, owners, ages, touched, counts, anchor, max_words):
+    total = int(counts.sum())
+    start, end = np.repeat(ages, counts), np.repeat(touched, counts)
+    edited = end + (start - end) * rng.random(total)
+    return [
+        {"id": i, "journal_entry_id": e, "user_id": u, "edited_at": a, "previous_content": p, "new_content": c}
+        for i, e, u, a, p, c in zip(
+            range(first_id, first_id + total), np.repeat(entry_ids, counts).tolist(),
+            np.repeat(owners, counts).tolist(), _datetimes(anchor, edited),
+            _texts(rng, 80, total, max_words), _texts(rng, 80, total, max_words))
+    ]
+
+
+def seed(users=1000, entries=20000, comments_per_entry=1.5, edits_per_entry=0.5, days=730,
+         until=None, seed=0, rebuild_stats=True, progress=None):
+    """
+    Insert `users` new users and `entries` entries spread over them, with
+    comments and edit history, committing every BLOCK_SIZE entries. Entries
+    fall within the `days` days up to `until` (a date, default today, UTC).
+    Returns the number of rows written per table.
+    """
+    if users < 1:
+        raise ValueError("seed() needs at least one user")
+    progress = progress or (lambda table, done: None)
+    anchor = datetime.combine(until or datetime.now(timezone.utc).date(), time()) + timedelta(days=1)
+    # Bodies stay inline: roughly six bytes per word.
+    max_words = max(blobs.inline_limit() // 8, 1)
+    totals = {"users": 0, "entries": 0, "comments": 0, "edit_history": 0}
+
+    tables = {name: model.__table__ for name, model in
+              (("users", User), ("entries", JournalEntry), ("comments", Comment), ("edit_history", EditHistory))}
+    next_id = {name: _next_id(table) for name, table in tables.items()}
+
+    # One hash for every seeded user; hashing 100k passwords would take hours.
+    password = hash_password(SEED_PASSWORD)
+    first_user = next_id["users"]
+    for start in range(0, users, BLOCK_SIZE):
+        rows = _user_rows(first_user + start, min(BLOCK_SIZE, users - start), password)
+        db.session.execute(tables["users"].insert(), rows)
+        db.session.commit()
+        totals["users"] += len(rows)
+        progress("users", totals["users"])
+
+    activity = _rng(seed, _ACTIVITY, 0).lognormal(0.0, 1.5, users)
+    activity /= activity.sum()
+    for block, start in enumerate(range(0, entries, BLOCK_SIZE)):
+        rng = _rng(seed, _ENTRIES, block)
+        ids = next_id["entries"] + start + np.arange(min(BLOCK_SIZE, entries - start))
+        owners = first_user + rng.choice(users, len(ids), p=activity)
+        entry_rows, ages, touched, comment_counts, edit_counts = _entry_block(
+            rng, ids, owners, anchor, days, max_words, comments_per_entry, edits_per_entry)
+        commenters = first_user + rng.choice(users, int(comment_counts.sum()), p=activity)
+        comment_rows = _comment_block(rng, next_id["comments"], ids, ages, comment_counts, commenters, anchor)
+        history_rows = _history_block(rng, next_id["edit_history"], ids, owners, ages, touched, edit_counts,
+                                      anchor, max_words)
+
+        for name, rows in (("entries", entry_rows), ("comments", comment_rows), ("edit_history", history_rows)):
+            if rows:
+                db.session.execute(tables[name].insert(), rows)
+            totals[name] += len(rows)
+        next_id["comments"] += len(comment_rows)
+        next_id["edit_history"] += len(history_rows)
+        db.session.commit()
+        progress("entries", totals["entries"])
+
+    if rebuild_stats:
+        for start in range(0, users, 500):
+            stats.rebuild_users(list(range(first_user + start, first_user + min(start + 500, users))))
+            db.session.commit()
+        progress("stats", users)
+    return totals
@@ -0,0 +1,529 @@
+# PWP_JournalAPI/journalapi/sharding.py
+"""
+Horizontal sharding of journal data by user id.
+
+With SHARD_URIS set, each user's rows live in one of N databases (shards):
+the user row, entries, comments on those entries, edit history, drafts,
+blobs, stats, analytics and the change feed. Every shard has the full schema
+and is a complete journal database for its users, so joins, cascades and the
+maintenance jobs work inside it unchanged. SQLALCHEMY_DATABASE_URI becomes the
+directory. It holds the global tables: shard_directory (user id -> shard,
+plus the email and username that must be unique across shards), id_blocks,
+compression_dictionaries and token_blocklist.
+
+Routing is done by extensions.RoutingSession. Statements on global tables go
+to the directory and everything else to the shard chosen for the current app
+context (g.db_shard). An API request is routed by the user id in its access
+token, except comment routes: other users comment on an entry too, so those go
+to the shard of the entry's owner (found by probing the shards for the entry
+id, the caller's first). Register and login route themselves by the new id
+and by email. Jobs and CLI commands run per shard with for_each_shard() or
+use_shard(). Touching a sharded table with no shard chosen raises
+RuntimeError instead of quietly using the directory.
+
+Ids of users, entries, comments and edit history are unique across shards,
+so rows can move without renumbering: each worker leases blocks of
+SHARD_ID_BLOCK_SIZE ids from id_blocks. A new user is placed on its home
+shard, a jump consistent hash of the id, so adding a shard only moves about
+1/N of the users. move_user() copies a user's rows to another shard, flips
+the directory and deletes the source rows; rebalance() moves every user that
+is not on its home shard. Change-feed sequence numbers are per shard, so after
+a move the user's sync clients get a 400 for their old token and start again
+from a snapshot.
+
+A commit that writes to the directory and a shard (registration, an email
+change) is two commits, not one. If the second fails, sync_directory()
+repairs the directory from the shards.
+"""
+import copy
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import current_app, g, has_app_context, request
+from flask_jwt_extended import decode_token
+from sqlalchemy import column, create_engine, delete, event, func, inspect, select, table, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.sql.util import find_tables
+from extensions import db
+from journalapi.models import (
+    Comment, CompressionDictionary, EditHistory, IdBlock, JournalEntry, ShardDirectory, TokenBlocklist, User,
+)
+from journalapi.utils import JsonResponse
+
+GLOBAL_TABLES = frozenset(model.__tablename__ for model in
+                          (ShardDirectory, IdBlock, CompressionDictionary, TokenBlocklist))
+# Rows created outside registration get their id here; users are placed by place_new_user().
+ALLOCATED_IDS = (JournalEntry, Comment, EditHistory)
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Routes where users other than the owner act on an entry; served from the entry owner's shard.
+SHARED_ENTRY_RULES = frozenset({"/entries/<int:entry_id>/comments",
+                                "/entries/<int:entry_id>/comments/<int:comment_id>"})
+MOVE_BATCH = 100
+COPY_BATCH = 1000
+
+
+def home_shard(user_id, shard_count):
+    """Jump consistent hash (Lamping & Veach): going from N to N+1 shards moves 1/(N+1) of the users."""
+    key, bucket, jump = int(user_id), -1, 0
+    while jump < shard_count:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+class IdAllocator:
+    """Ids unique across shards, leased from id_blocks a block at a time."""
+
+    def __init__(self, router, block_size):
+        self.router = router
+        self.block_size = block_size
+        self._blocks = {}
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def next_id(self, name):
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked worker must not hand out the rest of its parent's blocks.
+                self._blocks, self._pid = {}, os.getpid()
+            start, end = self._blocks.get(name, (0, 0))
+            if start >= end:
+                start, end = self._lease(name)
+            self._blocks[name] = (start + 1, end)
+            return start
+
+    def _lease(self, name):
+        # Own transaction on the directory: a lease must not wait for, or roll back with, the caller's.
+        with db.engine.begin() as conn:
+            if conn.execute(select(IdBlock.next_id).where(IdBlock.name == name)).scalar() is None:
+                first = self.router.high_water(name) + 1
+                conn.execute(insert(IdBlock).values(name=name, next_id=first).on_conflict_do_nothing())
+            end = conn.execute(
+                update(IdBlock).where(IdBlock.name == name)
+                .values(next_id=IdBlock.next_id + self.block_size)
+                .returning(IdBlock.next_id)
+            ).scalar()
+        return end - self.block_size, end
+
+
+class ShardRouter:
+    def __init__(self, app):
+        options = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+        self.engines = [create_engine(uri, **copy.deepcopy(options)) for uri in app.config["SHARD_URIS"]]
+        self.ids = IdAllocator(self, app.config["SHARD_ID_BLOCK_SIZE"])
+        self.move_grace = app.config["SHARD_MOVE_GRACE_SECONDS"]
+
+    def home(self, user_id):
+        return home_shard(user_id, len(self.engines))
+
+    def bind(self, mapper=None, clause=None):
+        """The shard engine for a statement, or None when it belongs on the directory."""
+        if mapper is not None:
+            names = {inspect(mapper).local_table.name}
+        elif clause is not None:
+            names = {t.name for t in find_tables(clause, check_columns=True, include_crud=True)}
+        else:
+            names = set()
+        if names and names <= GLOBAL_TABLES:
+            return None
+        index = g.get("db_shard")
+        if index is None:
+            if not names:
+                return None  # a bare connection() or text() outside any shard
+            raise RuntimeError(f"No shard chosen for a statement on {', '.join(sorted(names))}")
+        return self.engines[index]
+
+    def locate(self, user_id=None, email=None):
+        """The user's directory row as (user_id, shard, moving), or None."""
+        query = select(ShardDirectory.user_id, ShardDirectory.shard, ShardDirectory.moving)
+        if user_id is not None:
+            query = query.where(ShardDirectory.user_id == int(user_id))
+        else:
+            query = query.where(ShardDirectory.email == email)
+        with db.engine.connect() as conn:
+            return conn.execute(query).first()
+
+    def high_water(self, name):
+        """The largest id of table `name` on any shard."""
+        id_column = db.metadata.tables[name].c.id
+        highest = 0
+        for engine in self.engines:
+            with engine.connect() as conn:
+                highest = max(highest, conn.execute(select(func.max(id_column))).scalar() or 0)
+        return highest
+
+
+def router():
+    """The app's ShardRouter, or None when sharding is off."""
+    return current_app.extensions.get("journal_shards")
+
+
+def current_shard():
+    return g.get("db_shard")
+
+
+def current_engine():
+    """The chosen shard's engine, else the default one; for code that needs an engine (DDL, VACUUM)."""
+    shards = router()
+    index = current_shard()
+    return shards.engines[index] if shards is not None and index is not None else db.engine
+
+
+def shard_of(user_id):
+    """The shard holding user_id's rows (their home shard if they are not in the directory); None when off."""
+    shards = router()
+    if shards is None:
+        return None
+    place = shards.locate(user_id=user_id)
+    return place.shard if place is not None else shards.home(user_id)
+
+
+@contextmanager
+def use_shard(index):
+    """Route sharded tables to shard `index` inside the block; does nothing when sharding is off."""
+    if router() is None:
+        yield
+        return
+    previous = g.get("db_shard")
+    g.db_shard = index
+    try:
+        yield
+    finally:
+        g.db_shard = previous
+
+
+def for_each_shard(fn, fresh_session=True):
+    """
+    fn() once per shard with that shard chosen and a fresh session; [fn()]
+    when sharding is off. With fresh_session=False the statements join the
+    caller's session instead and commit with it, one shard after another.
+    """
+    shards = router()
+    if shards is None:
+        return [fn()]
+    results = []
+    for index in range(len(shards.engines)):
+        with use_shard(index):
+            try:
+                results.append(fn())
+            finally:
+                if fresh_session:
+                    db.session.remove()
+    return results
+
+
+def by_shard(rows, key="user_id"):
+    """Group row dicts by their user's shard as [(shard, rows)]; one (None, rows) group when sharding is off."""
+    shards = router()
+    if shards is None:
+        return [(None, rows)]
+    with db.engine.connect() as conn:
+        placed = dict(conn.execute(select(ShardDirectory.user_id, ShardDirectory.shard)
+                                   .where(ShardDirectory.user_id.in_({row[key] for row in rows}))).all())
+    groups = {}
+    for row in rows:
+        groups.setdefault(placed.get(row[key], shards.home(row[key])), []).append(row)
+    return sorted(groups.items())
+
+
+def query_all(statement):
+    """
+    Cross-shard admin helper: run a read-only statement on every shard and
+    return (shard, row) pairs. Rows are not merged, so aggregates come back
+    once per shard. Without sharding the shard is None.
+    """
+    def run():
+        return [(current_shard(), row) for row in db.session.execute(statement).all()]
+    return [pair for rows in for_each_shard(run) for pair in rows]
+
+
+def count_all(model):
+    """Rows of `model` across all shards (soft-deleted rows excluded, as usual)."""
+    return sum(row[0] for _, row in query_all(select(func.count()).select_from(model)))
+
+
+def create_all():
+    """Create the tables on the directory and on every shard."""
+    db.create_all()
+    shards = router()
+    for engine in shards.engines if shards is not None else ():
+        db.metadata.create_all(engine)
+
+
+# -- users -----------------------------------------------------------------
+
+def user_exists(email=None, username=None, exclude=None):
+    """Whether another user already has this email or username, on any shard."""
+    model, column_ = (ShardDirectory, ShardDirectory.user_id) if router() else (User, User.id)
+    field = model.email == email if email is not None else model.username == username
+    query = select(column_).where(field)
+    if exclude is not None:
+        query = query.where(column_ != exclude)
+    return db.session.execute(query.limit(1)).first() is not None
+
+
+def place_new_user(user):
+    """Give a new user its id and shard and add its directory row to the session."""
+    shards = router()
+    if shards is None:
+        return
+    user.id = shards.ids.next_id(User.__tablename__)
+    g.db_shard = shards.home(user.id)
+    db.session.add(ShardDirectory(user_id=user.id, email=user.email, username=user.username, shard=g.db_shard))
+
+
+def update_directory(user):
+    """Mirror a user's email and username into the directory (in the caller's transaction)."""
+    if router() is not None:
+        db.session.execute(update(ShardDirectory).where(ShardDirectory.user_id == user.id)
+                           .values(email=user.email, username=user.username))
+
+
+def forget_users(user_ids):
+    """Drop purged users from the directory (in the caller's transaction)."""
+    if router() is not None:
+        db.session.execute(delete(ShardDirectory).where(ShardDirectory.user_id.in_(user_ids)))
+
+
+def route(email):
+    """Choose the shard of the user with this email, for requests without a token (login)."""
+    shards = router()
+    if shards is None:
+        return
+    place = shards.locate(email=email)
+    # An unknown email still needs a shard to answer "invalid credentials" from.
+    g.db_shard = place.shard if place is not None else 0
+
+
+def _assign_id(mapper, connection, target):
+    shards = current_app.extensions.get("journal_shards") if has_app_context() else None
+    if shards is not None and target.id is None:
+        target.id = shards.ids.next_id(mapper.local_table.name)
+
+
+def _token_identity():
+    """The user id in the request's bearer token, without touching the database."""
+    header = request.headers.get("Authorization", "")
+    if not header.startswith("Bearer "):
+        return None
+    try:
+        claims = decode_token(header[len("Bearer "):], allow_expired=True)
+        return int(claims[current_app.config["JWT_IDENTITY_CLAIM"]])
+    except Exception:  # a bad token is rejected later, by jwt_required
+        return None
+
+
+def _entry_owner(entry_id, first):
+    """The user id owning entry `entry_id`, probing shard `first` before the others; None if no shard has it."""
+    shards = router()
+    for index in [first] + [i for i in range(len(shards.engines)) if i != first]:
+        with shards.engines[index].connect() as conn:
+            owner = conn.execute(select(JournalEntry.user_id).where(JournalEntry.id == entry_id)).scalar()
+        if owner is not None:
+            return owner
+    return None
+
+
+def _before_request():
+    shards = router()
+    user_id = _token_identity()
+    if user_id is None:
+        return None
+    place = shards.locate(user_id=user_id)
+    if place is None:
+        # Deleted or unknown: the token check answers from the home shard.
+        g.db_shard = shards.home(user_id)
+        return None
+    if request.url_rule is not None and request.url_rule.rule in SHARED_ENTRY_RULES:
+        owner = _entry_owner(request.view_args["entry_id"], place.shard)
+        if owner is not None and owner != user_id:
+            place = shards.locate(user_id=owner) or place
+    g.db_shard = place.shard
+    if place.moving and request.method not in SAFE_METHODS:
+        response = JsonResponse({"error": "Account is being moved, retry shortly"}, 503)
+        response.headers["Retry-After"] = str(max(1, int(shards.move_grace)))
+        return response
+    return None
+
+
+# -- moving users ----------------------------------------------------------
+
+def _plain(name):
+    """Table `name` without column types, so values are copied exactly as stored (compressed stays compressed)."""
+    return table(name, *(column(c.name) for c in db.metadata.tables[name].columns))
+
+
+def _user_tables(user_id):
+    """(table, where, order_by, omit) for every table holding a user's rows, parents first."""
+    entries = _plain("journal_entries")
+    entry_ids = select(entries.c.id).where(entries.c.user_id == user_id)
+    digests = select(entries.c.content_digest).where(entries.c.user_id == user_id,
+                                                     entries.c.content_digest.is_not(None))
+    specs = []
+    for name, where, order_by, omit in (
+        ("users", lambda t: t.c.id == user_id, "id", ()),
+        ("entry_blobs", lambda t: t.c.digest.in_(digests), "digest", ()),
+        ("journal_entries", lambda t: t.c.user_id == user_id, "id", ()),
+        ("comments", lambda t: t.c.journal_entry_id.in_(entry_ids), "path", ()),
+        ("edit_history", lambda t: t.c.journal_entry_id.in_(entry_ids), "id", ()),
+        ("entry_drafts", lambda t: t.c.user_id == user_id, "entry_id", ()),
+        ("user_stats", lambda t: t.c.user_id == user_id, "user_id", ()),
+        ("user_entry_days", lambda t: t.c.user_id == user_id, "day", ()),
+        ("analytics_buckets", lambda t: t.c.user_id == user_id, "bucket", ()),
+        # The target shard numbers the change feed itself.
+        ("changes", lambda t: t.c.user_id == user_id, "seq", ("seq",)),
+    ):
+        plain = _plain(name)
+        specs.append((plain, where(plain), plain.c[order_by], omit))
+    return specs
+
+
+def _copy(source, target, plain, where, order_by, omit):
+    columns = [c for c in plain.c if c.name not in omit]
+    statement = plain.insert()
+    if plain.name == "entry_blobs":
+        statement = statement.prefix_with("OR IGNORE")  # blobs are shared by digest
+    copied = 0
+    result = source.execute(select(*columns).where(where).order_by(order_by))
+    while True:
+        rows = result.fetchmany(COPY_BATCH)
+        if not rows:
+            return copied
+        target.execute(statement, [dict(row._mapping) for row in rows])
+        copied += len(rows)
+
+
+def _delete_user_rows(conn, specs):
+    # Children first: comments and history are found through the user's entries.
+    for plain, where, _, _ in reversed(specs):
+        if plain.name != "entry_blobs":  # unreferenced blobs are purged by compaction
+            conn.execute(delete(plain).where(where))
+
+
+def _set_moving(user_ids, moving):
+    with db.engine.begin() as conn:
+        conn.execute(update(ShardDirectory).where(ShardDirectory.user_id.in_(user_ids)).values(moving=moving))
+
+
+def move_user(user_id, target, grace_seconds=None):
+    """
+    Move every row of a user to shard `target`. Writes for the user get 503
+    while it runs. The grace period lets writes that started before then
+    finish on the source. Returns {table: rows copied}.
+    """
+    shards = router()
+    place = shards.locate(user_id=user_id)
+    if place is None:
+        raise LookupError(f"User {user_id} is not in the shard directory")
+    if place.shard == target:
+        return {}
+    _set_moving([user_id], True)
+    try:
+        time.sleep(shards.move_grace if grace_seconds is None else grace_seconds)
+        specs = _user_tables(user_id)
+        copied = {}
+        with shards.engines[place.shard].connect() as source, shards.engines[target].begin() as conn:
+            _delete_user_rows(conn, specs)  # leftovers of an interrupted move
+            for plain, where, order_by, omit in specs:
+                copied[plain.name] = _copy(source, conn, plain, where, order_by, omit)
+        with db.engine.begin() as conn:
+            conn.execute(update(ShardDirectory).where(ShardDirectory.user_id == user_id)
+                         .values(shard=target, moving=False))
+    except BaseException:
+        _set_moving([user_id], False)
+        raise
+    with shards.engines[place.shard].begin() as conn:
+        _delete_user_rows(conn, specs)
+    return copied
+
+
+def rebalance(grace_seconds=None, dry_run=False, progress=None):
+    """
+    Move every user that is not on its home shard, MOVE_BATCH users per grace
+    period. Calls progress(user_id, source, target) per user and returns the
+    number of users moved (or to be moved, with `dry_run`).
+    """
+    shards = router()
+    grace = shards.move_grace if grace_seconds is None else grace_seconds
+    with db.engine.connect() as conn:
+        rows = conn.execute(select(ShardDirectory.user_id, ShardDirectory.shard)
+                            .order_by(ShardDirectory.user_id)).all()
+    moves = [(user_id, shard, shards.home(user_id)) for user_id, shard in rows if shard != shards.home(user_id)]
+    if dry_run:
+        return len(moves)
+    for start in range(0, len(moves), MOVE_BATCH):
+        batch = moves[start:start + MOVE_BATCH]
+        user_ids = [user_id for user_id, _, _ in batch]
+        _set_moving(user_ids, True)
+        try:
+            time.sleep(grace)
+            for user_id, source, target in batch:
+                move_user(user_id, target, grace_seconds=0)
+                if progress is not None:
+                    progress(user_id, source, target)
+        finally:
+            _set_moving(user_ids, False)  # after a failure, the rest of the batch takes writes again
+    return len(moves)
+
+
+def sync_directory():
+    """
+    Make the directory match the users found on the shards: add missing rows,
+    fix shard numbers and drop rows of users no shard has. This is also the
+    migration path from one database: make it the first shard, sync, then
+    rebalance. Returns {"added": n, "updated": n, "removed": n}.
+    """
+    found = {}
+    for shard, row in query_all(select(User.id, User.email, User.username)
+                                .execution_options(include_deleted=True)):
+        if row.id in found:
+            raise ValueError(f"User {row.id} exists on shards {found[row.id][0]} and {shard}")
+        found[row.id] = (shard, row)
+    report = {"added": 0, "updated": 0, "removed": 0}
+    with db.engine.begin() as conn:
+        listed = dict(conn.execute(select(ShardDirectory.user_id, ShardDirectory.shard)).all())
+        for user_id, (shard, row) in found.items():
+            if user_id not in listed:
+                conn.execute(insert(ShardDirectory).values(user_id=user_id, email=row.email,
+                                                           username=row.username, shard=shard))
+                report["added"] += 1
+            elif listed[user_id] != shard:
+                conn.execute(update(ShardDirectory).where(ShardDirectory.user_id == user_id)
+                             .values(shard=shard, moving=False))
+                report["updated"] += 1
+        gone = [user_id for user_id in listed if user_id not in found]
+        if gone:
+            conn.execute(delete(ShardDirectory).where(ShardDirectory.user_id.in_(gone)))
+        report["removed"] = len(gone)
+    return report
+
+
+def status():
+    """Per shard: directory users, users away from their home shard, and live entries."""
+    shards = router()
+    with db.engine.connect() as conn:
+        rows = conn.execute(select(ShardDirectory.user_id, ShardDirectory.shard)).all()
+    report = [{"shard": i, "users": 0, "away": 0, "entries": 0} for i in range(len(shards.engines))]
+    for user_id, shard in rows:
+        if shard >= len(report):
+            report.extend({"shard": i, "users": 0, "away": 0, "entries": 0} for i in range(len(report), shard + 1))
+        report[shard]["users"] += 1
+        report[shard]["away"] += shards.home(user_id) != shard
+    for shard, (count,) in query_all(select(func.count()).select_from(JournalEntry)):
+        report[shard]["entries"] = count
+    return report
+
+
+def init_app(app):
+    app.config.setdefault("SHARD_URIS", [uri for uri in os.environ.get("SHARD_URIS", "").split(",") if uri])
+    app.config.setdefault("SHARD_ID_BLOCK_SIZE", 1000)
+    app.config.setdefault("SHARD_MOVE_GRACE_SECONDS", 2)
+    if not app.config["SHARD_URIS"]:
+        return
+    app.extensions["journal_shards"] = ShardRouter(app)
+    app.before_request(_before_request)
+    for model in ALLOCATED_IDS:
+        if not event.contains(model, "before_insert", _assign_id):
+            event.listen(model, "before_insert", _assign_id)
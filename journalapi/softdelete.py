@@ -0,0 +1,95 @@
+# PWP_JournalAPI/journalapi/softdelete.py
+"""
+Soft delete for users, journal entries and comments.
+
+Deleting one of these rows only sets deleted_at, which returns immediately no
+matter how much data hangs off it. A do_orm_execute hook adds
+"deleted_at IS NULL" to every ORM SELECT, so session.get(), Model.query,
+select() statements and relationship loads all behave as if the row were
+gone. Pass execution_options(include_deleted=True) to see deleted rows.
+
+The rows are removed for good later, in bounded batches, by
+journalapi.compaction.
+"""
+from collections import defaultdict
+from datetime import datetime, timezone
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, with_loader_criteria
+from extensions import db
+from journalapi import changes, sharding
+from journalapi.models import Comment, JournalEntry, SoftDeleteMixin
+
+
+def now():
+    return datetime.now(timezone.utc)
+
+
+def _hide_deleted(state):
+    if (
+        state.is_select
+        and not state.is_column_load
+        and not state.execution_options.get("include_deleted", False)
+    ):
+        state.statement = state.statement.options(
+            with_loader_criteria(SoftDeleteMixin, lambda cls: cls.deleted_at.is_(None), include_aliases=True)
+        )
+
+
+def delete_comments(entry_id, owner_id, comment_ids, stamp=None):
+    """Soft-delete comments of one entry, keeping comment_count and the owner's change feed in step."""
+    if not comment_ids:
+        return 0
+    Comment.query.filter(Comment.id.in_(comment_ids)).update(
+        {Comment.deleted_at: stamp or now()}, synchronize_session=False
+    )
+    JournalEntry.query.filter_by(id=entry_id).update(
+        {
+            JournalEntry.comment_count: JournalEntry.comment_count - len(comment_ids),
+            JournalEntry.last_updated: JournalEntry.last_updated,
+        },
+        synchronize_session=False,
+    )
+    changes.record(db.session, "comment", owner_id, comment_ids, changes.DELETE)
+    return len(comment_ids)
+
+
+def delete_user(user):
+    """
+    Soft-delete a user together with everything they wrote, in a handful of
+    set-based UPDATEs. Comments left on other people's entries are taken out
+    of those entries' counts and feeds; the user's own feed is not updated,
+    since nobody can read it any more. The email address is released so it
+    can be registered again before compaction runs. With journalapi.sharding
+    those comments live on the entry owners' shards, so every shard is
+    visited, within the caller's transaction.
+    """
+    stamp = now()
+
+    def delete_foreign_comments():
+        foreign = db.session.execute(
+            select(Comment.id, Comment.journal_entry_id, JournalEntry.user_id)
+            .join(JournalEntry, Comment.journal_entry_id == JournalEntry.id)
+            .where(Comment.user_id == user.id, JournalEntry.user_id != user.id)
+        ).all()
+        by_entry = defaultdict(list)
+        for comment_id, entry_id, owner_id in foreign:
+            by_entry[(entry_id, owner_id)].append(comment_id)
+        for (entry_id, owner_id), comment_ids in by_entry.items():
+            delete_comments(entry_id, owner_id, comment_ids, stamp)
+
+    sharding.for_each_shard(delete_foreign_comments, fresh_session=False)
+
+    Comment.query.filter(Comment.user_id == user.id, Comment.deleted_at.is_(None)).update(
+        {Comment.deleted_at: stamp}, synchronize_session=False
+    )
+    JournalEntry.query.filter(JournalEntry.user_id == user.id, JournalEntry.deleted_at.is_(None)).update(
+        {JournalEntry.deleted_at: stamp, JournalEntry.last_updated: JournalEntry.last_updated},
+        synchronize_session=False,
+    )
+    user.deleted_at = stamp
+    user.email = f"deleted-{user.id}@deleted.invalid"
+
+
+def init_app(app):
+    if not event.contains(Session, "do_orm_execute", _hide_deleted):
+        event.listen(Session, "do_orm_execute", _hide_deleted)
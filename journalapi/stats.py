@@ -0,0 +1,214 @@
+# PWP_JournalAPI/journalapi/stats.py
+"""
+Incremental maintenance of the user_stats and user_entry_days tables.
+
+Entry resources call entry_created / entry_updated / entry_deleted after
+flushing the entry write and before committing, so the counters commit or roll
+back with it. Counters are bumped with single UPSERT/UPDATE statements rather than
+read-modify-write, and streaks are only recomputed from the (small) per-day
+table when a backdated day appears or a day loses its last entry.
+"""
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.sqlite import insert
+from extensions import db
+from journalapi import blobs, replicas
+from journalapi.models import JournalEntry, User, UserEntryDay, UserStats
+
+
+def word_count(text):
+    return len(text.split()) if text else 0
+
+def day_of(created):
+    return (created or datetime.now(timezone.utc)).date()
+
+
+def _bump_stats(user_id, **deltas):
+    stmt = insert(UserStats).values(user_id=user_id, **deltas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserStats.user_id],
+        set_={name: getattr(UserStats, name) + stmt.excluded[name] for name in deltas},
+    )
+    db.session.execute(stmt)
+
+def _sentiment_deltas(score, sign):
+    if score is None:
+        return {"sentiment_total": 0.0, "sentiment_count": 0}
+    return {"sentiment_total": sign * score, "sentiment_count": sign}
+
+
+def streaks(days):
+    """(current, longest, last_day) for an ascending list of distinct days."""
+    if not days:
+        return 0, 0, None
+    run = longest = 1
+    for previous, day in zip(days, days[1:]):
+        run = run + 1 if day - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+    return run, longest, days[-1]
+
+def _recompute_streaks(user_id):
+    days = list(db.session.scalars(
+        select(UserEntryDay.day).where(UserEntryDay.user_id == user_id).order_by(UserEntryDay.day)
+    ))
+    current, longest, last = streaks(days)
+    db.session.execute(
+        update(UserStats).where(UserStats.user_id == user_id)
+        .values(current_streak=current, longest_streak=longest, last_entry_day=last)
+    )
+
+def _day_added(user_id, day):
+    current, longest, last = db.session.execute(
+        select(UserStats.current_streak, UserStats.longest_streak, UserStats.last_entry_day)
+        .where(UserStats.user_id == user_id)
+    ).one()
+    if last is None or day > last + timedelta(days=1):
+        current = 1
+    elif day == last + timedelta(days=1):
+        current += 1
+    else:
+        # A backdated entry can join or bridge older runs.
+        return _recompute_streaks(user_id)
+    db.session.execute(
+        update(UserStats).where(UserStats.user_id == user_id)
+        .values(current_streak=current, longest_streak=max(longest, current), last_entry_day=day)
+    )
+
+def _add_to_day(user_id, day, delta):
+    if delta > 0:
+        stmt = insert(UserEntryDay).values(user_id=user_id, day=day, entries=delta)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserEntryDay.user_id, UserEntryDay.day],
+            set_={"entries": UserEntryDay.entries + stmt.excluded.entries},
+        )
+        db.session.execute(stmt)
+        entries = db.session.scalar(
+            select(UserEntryDay.entries).where(UserEntryDay.user_id == user_id, UserEntryDay.day == day)
+        )
+        if entries == delta:
+            _day_added(user_id, day)
+        return
+    db.session.execute(
+        update(UserEntryDay).where(UserEntryDay.user_id == user_id, UserEntryDay.day == day)
+        .values(entries=UserEntryDay.entries + delta)
+    )
+    removed = db.session.execute(
+        delete(UserEntryDay).where(UserEntryDay.user_id == user_id, UserEntryDay.day == day,
+                                   UserEntryDay.entries <= 0)
+    ).rowcount
+    if removed:
+        _recompute_streaks(user_id)
+
+
+def _has_stats(user_id):
+    """
+    True when the user already has a stats row. Otherwise the row is built from
+    the flushed state of journal_entries, which already includes the write the
+    caller is about to apply, so the caller must skip its delta.
+    """
+    if db.session.scalar(select(UserStats.user_id).where(UserStats.user_id == user_id)) is not None:
+        return True
+    rebuild_users([user_id])
+    return False
+
+# The hooks below run after the entry write has been flushed.
+
+def entry_created(entry):
+    """Count a new entry."""
+    if not _has_stats(entry.user_id):
+        return
+    _bump_stats(entry.user_id, entry_count=1, word_count=word_count(entry.content),
+                **_sentiment_deltas(entry.sentiment_score, 1))
+    _add_to_day(entry.user_id, day_of(entry.date), 1)
+
+def entry_updated(entry, old_content, old_score=None):
+    """Apply the difference between the old and current content/score of an entry."""
+    if not _has_stats(entry.user_id):
+        return
+    deltas = {"word_count": word_count(entry.content) - word_count(old_content)}
+    if old_score != entry.sentiment_score:
+        old = _sentiment_deltas(old_score, -1)
+        new = _sentiment_deltas(entry.sentiment_score, 1)
+        deltas.update({name: old[name] + new[name] for name in old})
+    if any(deltas.values()):
+        _bump_stats(entry.user_id, **deltas)
+
+def entry_deleted(entry):
+    """Remove a deleted entry's contribution."""
+    if not _has_stats(entry.user_id):
+        return
+    _bump_stats(entry.user_id, entry_count=-1, word_count=-word_count(entry.content),
+                **_sentiment_deltas(entry.sentiment_score, -1))
+    _add_to_day(entry.user_id, day_of(entry.date), -1)
+
+
+def rebuild_users(user_ids):
+    """Recompute stats and day counts for the given users from journal_entries."""
+    user_ids = list(user_ids)
+    db.session.execute(delete(UserEntryDay).where(UserEntryDay.user_id.in_(user_ids)))
+    db.session.execute(delete(UserStats).where(UserStats.user_id.in_(user_ids)))
+    totals = {uid: {"entry_count": 0, "word_count": 0, "sentiment_total": 0.0, "sentiment_count": 0}
+              for uid in user_ids}
+    days = {uid: {} for uid in user_ids}
+    rows = db.session.execute(
+        select(JournalEntry.user_id, JournalEntry.inline_content, JournalEntry.content_digest,
+               JournalEntry.sentiment_score, JournalEntry.date)
+        .where(JournalEntry.user_id.in_(user_ids))
+        .execution_options(yield_per=1000)
+    )
+    for user_id, content, digest, score, created in rows:
+        if digest is not None:
+            content = blobs.load(digest)
+        total = totals[user_id]
+        total["entry_count"] += 1
+        total["word_count"] += word_count(content)
+        if score is not None:
+            total["sentiment_total"] += score
+            total["sentiment_count"] += 1
+        day = day_of(created)
+        days[user_id][day] = days[user_id].get(day, 0) + 1
+    stats_rows, day_rows = [], []
+    for user_id in user_ids:
+        current, longest, last = streaks(sorted(days[user_id]))
+        stats_rows.append(dict(user_id=user_id, current_streak=current, longest_streak=longest,
+                               last_entry_day=last, **totals[user_id]))
+        day_rows.extend({"user_id": user_id, "day": day, "entries": count}
+                        for day, count in days[user_id].items())
+    db.session.execute(insert(UserStats), stats_rows)
+    if day_rows:
+        db.session.execute(insert(UserEntryDay), day_rows)
+
+def rebuild_all(batch_size=500):
+    """Recompute every user's stats in batches of batch_size users; returns the user count."""
+    last_id, rebuilt = 0, 0
+    while True:
+        user_ids = list(db.session.scalars(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size)
+        ))
+        if not user_ids:
+            return rebuilt
+        rebuild_users(user_ids)
+        db.session.commit()
+        rebuilt += len(user_ids)
+        last_id = user_ids[-1]
+
+
+def get_stats(user_id, today=None):
+    """Stats for one user as a dict, building the row on first use."""
+    if db.session.scalar(select(UserStats.user_id).where(UserStats.user_id == user_id)) is None:
+        # Build from the primary; a lagging replica's entries would be stored as the user's totals.
+        replicas.use_primary()
+        if not _has_stats(user_id):
+            db.session.commit()
+    stats = db.session.get(UserStats, user_id, populate_existing=True)
+    today = today or datetime.now(timezone.utc).date()
+    # A streak that ended before yesterday is no longer current.
+    active = stats.last_entry_day is not None and stats.last_entry_day >= today - timedelta(days=1)
+    return {
+        "entry_count": stats.entry_count,
+        "word_count": stats.word_count,
+        "average_sentiment": (stats.sentiment_total / stats.sentiment_count) if stats.sentiment_count else None,
+        "current_streak": stats.current_streak if active else 0,
+        "longest_streak": stats.longest_streak,
+        "last_entry_day": stats.last_entry_day.isoformat() if stats.last_entry_day else None,
+    }
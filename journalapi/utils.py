@@ -1,6 +1,8 @@
 # PWP_JournalAPI/journalapi/utils.py
+import base64
 import json
 from flask import Response
+from marshmallow import ValidationError
 
 def JsonResponse(body, status=200, mimetype="application/json"):
     if isinstance(body, dict) and "_links" not in body:
@@ -40,3 +42,43 @@ def generate_links(resource_type, id_):
             "delete": {"href": f"/entries/{id_}/comments/{id_}"}
         }
     return {}
+
+
+def encode_cursor(*values):
+    """Opaque pagination cursor from the sort key of the last item on a page."""
+    raw = "|".join(str(v) for v in values)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError on malformed input."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+    except (TypeError, UnicodeDecodeError, base64.binascii.Error) as err:
+        raise ValueError("Invalid cursor") from err
+
+
+def merge_patch(target, patch):
+    """Apply an RFC 7386 JSON Merge Patch to `target` and return the result."""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+def load_merge_patch(schema, current, patch):
+    """
+    Apply a merge patch to the `current` representation and validate only the
+    fields it actually changes, as a partial load of `schema`. Returns the
+    validated changes ({} for a no-op); raises ValidationError.
+    """
+    if not isinstance(patch, dict):
+        raise ValidationError("Merge patch must be a JSON object.")
+    patched = merge_patch(current, patch)
+    changes = {key: patched.get(key) for key in set(current) | set(patched)
+               if patched.get(key) != current.get(key)}
+    return schema.load(changes, partial=True)
@@ -21,7 +21,14 @@ class JournalEntrySchema(Schema):
     content = fields.Str(required=True, validate=validate.Length(min=1))  # Ensure content isn't empty
     tags = fields.List(fields.Str(), required=True)
 
+class EntryImportSchema(JournalEntrySchema):
+    # Imported entries keep the date they were written in the source journal.
+    date = fields.DateTime(load_default=None)
+    # Per entry, as the Idempotency-Key header of POST /entries/: a resent batch reuses the entries it created.
+    idempotency_key = fields.Str(load_default=None, validate=validate.Length(min=1, max=64))
+
 class CommentSchema(Schema):
     class Meta:
         unknown = EXCLUDE
-    content = fields.Str(required=True, validate=validate.Length(min=1))
\ No newline at end of file
+    content = fields.Str(required=True, validate=validate.Length(min=1))
+    parent_id = fields.Int(allow_none=True, load_default=None)
\ No newline at end of file
@@ -0,0 +1,7 @@
+#!/bin/sh
+     cd /opt/journalapi
+     . /opt/journalapi/venv/bin/activate
+     export ASGI_THREADS="${ASGI_THREADS:-16}"
+     export JOURNAL_PROFILE="${JOURNAL_PROFILE:-prod}"
+     exec uvicorn asgi:app --workers "${WEB_CONCURRENCY:-3}" --host 0.0.0.0 --port 8000 \
+          --timeout-keep-alive 75 --backlog 4096 --limit-concurrency 4000
@@ -18,7 +18,11 @@ setup(
     "requests",
     "typer",
     "marshmallow",
-    "click"
+    "click",
+    "rich"
 ],
+    entry_points={
+        "console_scripts": ["journal=client.main:main"],
+    },
     python_requires='>=3.7',
 )
\ No newline at end of file
@@ -1,4 +1,21 @@
 # PWP_JournalAPI/tests/conftest.py
+"""
+Shared pytest fixtures.
+
+- Passwords are hashed with one PBKDF2 iteration for the whole run, instead
+  of werkzeug's 260,000. The test profile's PASSWORD_HASH_METHOD does the
+  same for hashes made by the app.
+- `shared_app` is one test-profile app per session (per xdist worker), and
+  its schema is created once.
+- `transactional_db` runs each test inside a transaction on that app's
+  single in-memory connection. Every session commit only releases a
+  SAVEPOINT, and the transaction is rolled back after the test. Test classes
+  opt in with @pytest.mark.usefixtures("transactional_db") and get
+  self.app.
+
+Classes that need their own config or a file database (the client tests
+run a real server) keep building their own app in setUp.
+"""
 import pytest
 import os
 import sys
@@ -6,17 +23,67 @@ import sys
 # Add project root to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app import create_app
-from extensions import db
+import werkzeug.security  # noqa: E402
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
 
-@pytest.fixture
-def test_client():
-    # Create a test app with in-memory DB
-    app = create_app({
-        "TESTING": True,
-        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
-    })
+SHARED_CONFIG = {
+    "TESTING": True,
+    "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+    "EVENTS_TAILER_ENABLED": False,
+    "RATELIMIT_ENABLED": False,
+}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def cheap_password_hashing():
+    default = werkzeug.security.DEFAULT_PBKDF2_ITERATIONS
+    werkzeug.security.DEFAULT_PBKDF2_ITERATIONS = 1
+    yield
+    werkzeug.security.DEFAULT_PBKDF2_ITERATIONS = default
+
+
+@pytest.fixture(scope="session")
+def shared_app():
+    app = create_app(SHARED_CONFIG, profile="test")
     with app.app_context():
         db.create_all()
-        yield app.test_client()
-        db.drop_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def transactional_db(request, shared_app):
+    with shared_app.app_context():
+        connection = db.engine.connect()
+    # pysqlite would commit on RELEASE of the outermost SAVEPOINT; take over BEGIN/COMMIT.
+    connection.connection.driver_connection.isolation_level = None
+    connection.exec_driver_sql("BEGIN")
+
+    factory = db.session.session_factory
+    original_class, original_kw = factory.class_, dict(factory.kw)
+
+    class JoinedSession(original_class):
+        def get_bind(self, *args, **kwargs):
+            return connection
+
+    factory.class_ = JoinedSession
+    factory.configure(join_transaction_mode="create_savepoint")
+    if request.instance is not None:
+        request.instance.app = shared_app
+    try:
+        yield shared_app
+    finally:
+        with shared_app.app_context():
+            db.session.remove()
+        factory.class_, factory.kw = original_class, original_kw
+        connection.rollback()
+        connection.close()
+
+
+@pytest.fixture
+def test_client(transactional_db):
+    with transactional_db.app_context():
+        yield transactional_db.test_client()
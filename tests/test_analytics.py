@@ -0,0 +1,95 @@
+# tests/test_analytics.py
+import unittest
+import pytest
+import json
+from datetime import datetime
+from unittest import mock
+from extensions import db
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token
+from journalapi import analytics
+from journalapi.models import User, JournalEntry, AnalyticsBucket
+
+@pytest.mark.usefixtures("transactional_db")
+class TestAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            user = User(username="testuser", email="test@example.com",
+                        password=generate_password_hash("password123"))
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+            for day, score, tags in [
+                (datetime(2024, 1, 1, 9), 0.1, ["work", "tired"]),
+                (datetime(2024, 1, 1, 21), 0.5, ["work"]),
+                (datetime(2024, 1, 3, 8), 0.9, ["family"]),
+                (datetime(2024, 2, 10, 8), 0.4, []),
+            ]:
+                db.session.add(JournalEntry(user_id=user.id, title="t", content="c", date=day,
+                                            sentiment_score=score, tags=json.dumps(tags)))
+            db.session.commit()
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+
+    def _get(self, bucket):
+        response = self.client.get(f"/users/{self.user_id}/analytics?bucket={bucket}", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        return {b["bucket"]: b for b in response.get_json()["buckets"]}
+
+    def test_daily_buckets(self):
+        buckets = self._get("day")
+        self.assertEqual(list(buckets), ["2024-01-01", "2024-01-03", "2024-02-10"])
+        first = buckets["2024-01-01"]
+        self.assertEqual(first["entry_count"], 2)
+        self.assertAlmostEqual(first["sentiment"]["mean"], 0.3)
+        self.assertAlmostEqual(first["sentiment"]["p50"], 0.3)
+        self.assertAlmostEqual(first["sentiment"]["p90"], 0.46)
+        self.assertEqual(first["top_tags"], [{"tag": "work", "count": 2}, {"tag": "tired", "count": 1}])
+        self.assertEqual(buckets["2024-02-10"]["top_tags"], [])
+
+    def test_weekly_and_monthly_buckets(self):
+        self.assertEqual(self._get("week")["2024-W01"]["entry_count"], 3)
+        months = self._get("month")
+        self.assertEqual(months["2024-01"]["entry_count"], 3)
+        self.assertAlmostEqual(months["2024-01"]["sentiment"]["p50"], 0.5)
+
+    def test_only_touched_buckets_are_recomputed(self):
+        self._get("month")
+        response = self.client.post("/entries/", json={"title": "t", "content": "c", "tags": ["new"]},
+                                    headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        with self.app.app_context():
+            stale = AnalyticsBucket.query.filter_by(user_id=self.user_id, granularity="month", stale=True).all()
+            self.assertEqual(len(stale), 1)
+            with mock.patch.object(analytics, "compute", wraps=analytics.compute) as compute:
+                recomputed = analytics.refresh(self.user_id, "month")
+            compute.assert_called_once_with(self.user_id, "month", [stale[0].bucket])
+            self.assertEqual(recomputed, 1)
+        self.assertEqual(len(self._get("month")), 3)
+
+    def test_deleted_bucket_disappears(self):
+        self._get("day")
+        with self.app.app_context():
+            entry = JournalEntry.query.filter_by(user_id=self.user_id, sentiment_score=0.4).one()
+            entry_id = entry.id
+        self.client.delete(f"/entries/{entry_id}", headers=self.headers)
+        self.assertNotIn("2024-02-10", self._get("day"))
+
+    def test_percentiles_match_without_numpy(self):
+        keys = ["a"] * 4 + ["b"] * 3 + ["c"]
+        values = [0.1, 0.2, 0.4, 0.8, 0.3, 0.6, 0.9, 0.5]
+        vectorized = analytics.percentiles(keys, values)
+        with mock.patch.object(analytics, "np", None):
+            fallback = analytics.percentiles(keys, values)
+        self.assertEqual(vectorized.keys(), fallback.keys())
+        for key in vectorized:
+            for a, b in zip(vectorized[key], fallback[key]):
+                self.assertAlmostEqual(a, b)
+        self.assertEqual(fallback["c"], (0.5, 0.5))
+
+    def test_invalid_bucket(self):
+        response = self.client.get(f"/users/{self.user_id}/analytics?bucket=year", headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == "__main__":
+    unittest.main()
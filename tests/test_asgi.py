@@ -0,0 +1,66 @@
+# tests/test_asgi.py
+import asyncio
+import json
+import unittest
+from asgiref.testing import ApplicationCommunicator
+from asgi import create_asgi_app
+from extensions import db
+
+class TestAsgi(unittest.TestCase):
+    def setUp(self):
+        self.asgi_app = create_asgi_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"
+        })
+        self.app = self.asgi_app.wsgi_application
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def request(self, method, path, body=None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": method,
+            "path": path,
+            "query_string": b"",
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(payload)).encode())
+            ],
+        }
+
+        async def run():
+            communicator = ApplicationCommunicator(self.asgi_app, scope)
+            await communicator.send_input({"type": "http.request", "body": payload})
+            start = await communicator.receive_output(5)
+            chunks = []
+            while True:
+                message = await communicator.receive_output(5)
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body"):
+                    break
+            return start["status"], b"".join(chunks)
+
+        return asyncio.run(run())
+
+    def test_protected_route_requires_token(self):
+        status, _ = self.request("GET", "/entries/")
+        self.assertEqual(status, 401)
+
+    def test_register_through_asgi(self):
+        status, body = self.request("POST", "/users/register", {
+            "username": "asgiuser",
+            "email": "asgi@example.com",
+            "password": "password123"
+        })
+        self.assertEqual(status, 201)
+        self.assertIn("message", json.loads(body))
+
+if __name__ == "__main__":
+    unittest.main()
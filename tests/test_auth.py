@@ -0,0 +1,114 @@
+# tests/test_auth.py
+import importlib.util
+import time
+import unittest
+from unittest.mock import patch
+from app import create_app
+from extensions import db
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token
+from flask_jwt_extended.tokens import _decode_jwt
+from journalapi.auth import TokenCache
+from journalapi.models import User
+
+HAS_CRYPTOGRAPHY = importlib.util.find_spec("cryptography") is not None
+
+class TestAuth(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "JWT_USER_CHECK": True
+        })
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="testuser", email="test@example.com", password=generate_password_hash("password123"))
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+            self.token = create_access_token(identity=str(self.user_id))
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def auth(self, token=None):
+        return {"Authorization": f"Bearer {token or self.token}"}
+
+    def test_verified_token_is_cached(self):
+        with patch("flask_jwt_extended.jwt_manager._decode_jwt", wraps=_decode_jwt) as decode:
+            self.assertEqual(self.client.get("/entries/", headers=self.auth()).status_code, 200)
+            self.assertEqual(self.client.get("/entries/", headers=self.auth()).status_code, 200)
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual(len(self.app.extensions["journal_auth"].tokens), 1)
+
+    def test_expired_cached_token_is_rejected(self):
+        self.client.get("/entries/", headers=self.auth())
+        cache = self.app.extensions["journal_auth"].tokens
+        digest, claims = next(iter(cache._data.items()))
+        cache.put(digest, dict(claims, exp=int(time.time()) - 10))
+        response = self.client.get("/entries/", headers=self.auth())
+        self.assertEqual(response.status_code, 200)  # real token is still valid, re-verified
+        self.assertGreater(cache.get(digest)["exp"], time.time())
+
+    def test_deleted_user_token_is_revoked(self):
+        response = self.client.delete(f"/users/{self.user_id}", headers=self.auth())
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get("/entries/", headers=self.auth())
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("revoked", response.get_json()["msg"].lower())
+
+    def test_unknown_user_token_is_revoked(self):
+        with self.app.app_context():
+            token = create_access_token(identity=str(self.user_id + 999))
+        response = self.client.get("/entries/", headers=self.auth(token))
+        self.assertEqual(response.status_code, 401)
+
+    def test_user_check_uses_cache(self):
+        self.client.get("/entries/", headers=self.auth())
+        with patch("journalapi.auth._user_exists") as loader:
+            self.client.get("/entries/", headers=self.auth())
+        loader.assert_not_called()
+
+    def test_token_cache_is_bounded(self):
+        cache = TokenCache(maxsize=2)
+        cache.put(b"a", {"sub": "1"})
+        cache.put(b"b", {"sub": "2"})
+        cache.get(b"a")
+        cache.put(b"c", {"sub": "3"})
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(b"b"))
+        self.assertIsNotNone(cache.get(b"a"))
+
+    @unittest.skipUnless(HAS_CRYPTOGRAPHY, "cryptography is required for RS256")
+    def test_asymmetric_keys(self):
+        import os
+        import tempfile
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        with tempfile.TemporaryDirectory() as tmp:
+            private_path = os.path.join(tmp, "private.pem")
+            public_path = os.path.join(tmp, "public.pem")
+            with open(private_path, "wb") as f:
+                f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                          serialization.NoEncryption()))
+            with open(public_path, "wb") as f:
+                f.write(key.public_key().public_bytes(serialization.Encoding.PEM,
+                                                      serialization.PublicFormat.SubjectPublicKeyInfo))
+            app = create_app({
+                "TESTING": True,
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                "JWT_PRIVATE_KEY_FILE": private_path,
+                "JWT_PUBLIC_KEY_FILE": public_path
+            })
+        self.assertEqual(app.config["JWT_ALGORITHM"], "RS256")
+        with app.app_context():
+            db.create_all()
+            token = create_access_token(identity="1")
+        self.assertEqual(app.test_client().get("/entries/", headers=self.auth(token)).status_code, 200)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,233 @@
+# tests/test_autosave.py
+import os
+import tempfile
+import time
+import unittest
+from datetime import timedelta
+from unittest import mock
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import create_app
+from extensions import db
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token
+from journalapi.compaction import DRAFT_TOMBSTONE_SECONDS, purge_deleted
+from journalapi.models import EntryDraft, JournalEntry, User
+
+class TestAutosave(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "RATELIMIT_ENABLED": False,
+            "AUTOSAVE_FLUSHER_ENABLED": False
+        })
+        self.client = self.app.test_client()
+        self.buffer = self.app.extensions["journal_autosave"]
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="testuser", email="test@example.com",
+                        password=generate_password_hash("password123"))
+            other = User(username="otheruser", email="other@example.com",
+                         password=generate_password_hash("password123"))
+            db.session.add_all([user, other])
+            db.session.commit()
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+            self.other_headers = {"Authorization": f"Bearer {create_access_token(identity=str(other.id))}"}
+        response = self.client.post("/entries/", json={"title": "t", "content": "published", "tags": ["a"]},
+                                    headers=self.headers)
+        self.entry_id = response.get_json()["entry_id"]
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _autosave(self, body, **params):
+        return self.client.patch(f"/entries/{self.entry_id}/draft", json=body, query_string=params,
+                                 headers=self.headers)
+
+    def _stored(self):
+        with self.app.app_context():
+            return db.session.get(EntryDraft, self.entry_id)
+
+    def test_saves_are_buffered_and_coalesced(self):
+        for n in range(5):
+            response = self._autosave({"content": f"draft {n}"})
+            self.assertEqual(response.status_code, 202)
+            self.assertFalse(response.get_json()["durable"])
+        response = self._autosave({"tags": ["b"]})
+        self.assertIsNone(self._stored())
+        self.assertEqual(self.buffer.pending_count(), 1)
+
+        draft = self.client.get(f"/entries/{self.entry_id}/draft", headers=self.headers).get_json()
+        self.assertEqual((draft["title"], draft["content"], draft["tags"]), ("t", "draft 4", ["b"]))
+        self.assertFalse(draft["durable"])
+
+        commits = []
+        record = commits.append
+        with self.app.app_context():
+            event.listen(Session, "after_commit", record)
+            try:
+                self.assertEqual(self.buffer.flush(), 1)
+            finally:
+                event.remove(Session, "after_commit", record)
+        self.assertEqual(len(commits), 1)
+        self.assertEqual(self._stored().content, "draft 4")
+        self.assertTrue(self.client.get(f"/entries/{self.entry_id}/draft", headers=self.headers)
+                        .get_json()["durable"])
+
+        entry = self.client.get(f"/entries/{self.entry_id}", headers=self.headers).get_json()
+        self.assertEqual(entry["content"], "published")
+
+    def test_one_group_commit_for_many_entries(self):
+        ids = [self.entry_id]
+        for n in range(3):
+            ids.append(self.client.post("/entries/", json={"title": f"e{n}", "content": "c", "tags": []},
+                                        headers=self.headers).get_json()["entry_id"])
+        for entry_id in ids:
+            self.client.patch(f"/entries/{entry_id}/draft", json={"content": "x"}, headers=self.headers)
+        with self.app.app_context():
+            self.assertEqual(self.buffer.flush(), 4)
+            self.assertEqual(EntryDraft.query.count(), 4)
+
+    def test_durable_save_is_on_disk_before_response(self):
+        response = self._autosave({"title": "new title"}, durable=1)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()["durable"])
+        self.assertEqual(self._stored().title, "new title")
+        self.assertEqual(self.buffer.pending_count(), 0)
+
+    def test_newest_save_wins_across_flushes(self):
+        self._autosave({"content": "newer"}, durable=1)
+        stale = {"entry_id": self.entry_id, "user_id": 1, "title": "t", "content": "older",
+                 "tags": "[]", "saved_at": self._stored().saved_at.replace(year=2000)}
+        self.buffer._pending[self.entry_id] = stale
+        with self.app.app_context():
+            self.buffer.flush()
+        self.assertEqual(self._stored().content, "newer")
+
+    def test_publishing_the_entry_discards_the_draft(self):
+        self._autosave({"content": "draft"}, durable=1)
+        self._autosave({"content": "draft 2"})
+        self.client.put(f"/entries/{self.entry_id}", json={"title": "t", "content": "draft 2", "tags": []},
+                        headers=self.headers)
+        self.assertIsNotNone(self._stored().discarded_at)
+        self.assertEqual(self.buffer.pending_count(), 0)
+        self.assertEqual(self.client.get(f"/entries/{self.entry_id}/draft", headers=self.headers).status_code, 404)
+
+    def test_every_entry_write_discards_the_draft(self):
+        writes = [
+            lambda: self.client.patch(f"/entries/{self.entry_id}", json={"title": "patched"}, headers=self.headers),
+            lambda: self.client.put(f"/entries/{self.entry_id}/content", data="replaced",
+                                    content_type="text/plain", headers=self.headers),
+            lambda: self.client.delete(f"/entries/{self.entry_id}", headers=self.headers),
+        ]
+        for write in writes:
+            self._autosave({"content": "draft"}, durable=1)
+            self._autosave({"content": "draft 2"})
+            self.assertEqual(write().status_code, 200)
+            self.assertIsNotNone(self._stored().discarded_at)
+            self.assertEqual(self.buffer.pending_count(), 0)
+            self.assertEqual(self.client.get(f"/entries/{self.entry_id}/draft", headers=self.headers).status_code,
+                             404)
+
+    def test_stale_save_from_another_worker_does_not_resurrect_the_draft(self):
+        self._autosave({"content": "draft"}, durable=1)
+        # Buffered in another worker just before the entry was published there.
+        other_worker = {"entry_id": self.entry_id, "user_id": 1, "title": "t", "content": "stale",
+                        "tags": "[]", "saved_at": self._stored().saved_at}
+        self.client.put(f"/entries/{self.entry_id}", json={"title": "t", "content": "published", "tags": []},
+                        headers=self.headers)
+        self.buffer._pending[self.entry_id] = other_worker
+        with self.app.app_context():
+            self.buffer.flush()
+        self.assertIsNotNone(self._stored().discarded_at)
+        self.assertEqual(self.client.get(f"/entries/{self.entry_id}/draft", headers=self.headers).status_code, 404)
+
+        # A save made after the publish starts a new draft.
+        self._autosave({"content": "next draft"}, durable=1)
+        self.assertIsNone(self._stored().discarded_at)
+        draft = self.client.get(f"/entries/{self.entry_id}/draft", headers=self.headers).get_json()
+        self.assertEqual(draft["content"], "next draft")
+
+    def test_compaction_drops_old_tombstones(self):
+        self._autosave({"content": "draft"}, durable=1)
+        self.client.delete(f"/entries/{self.entry_id}/draft", headers=self.headers)
+        with self.app.app_context():
+            self.assertEqual(purge_deleted()["drafts"], 0)
+            draft = db.session.get(EntryDraft, self.entry_id)
+            draft.discarded_at -= timedelta(seconds=DRAFT_TOMBSTONE_SECONDS + 1)
+            db.session.commit()
+            self.assertEqual(purge_deleted()["drafts"], 1)
+        self.assertIsNone(self._stored())
+
+    def test_discard_and_validation(self):
+        self._autosave({"content": "draft"}, durable=1)
+        self.assertEqual(self.client.delete(f"/entries/{self.entry_id}/draft", headers=self.headers).status_code, 200)
+        self.assertIsNotNone(self._stored().discarded_at)
+        self.assertEqual(self._autosave({"tags": "not a list"}).status_code, 422)
+        response = self.client.patch(f"/entries/{self.entry_id}/draft", json={"content": "x"},
+                                     headers=self.other_headers)
+        self.assertEqual(response.status_code, 404)
+
+    def test_failed_flush_keeps_drafts_buffered(self):
+        self._autosave({"content": "draft"})
+        with self.app.app_context():
+            with self.assertRaises(Exception):
+                with mock.patch.object(db.session, "commit", side_effect=RuntimeError("disk full")):
+                    self.buffer.flush()
+            self.assertEqual(self.buffer.pending_count(), 1)
+            self.assertEqual(self.buffer.flush(), 1)
+
+
+class TestAutosaveFlusher(unittest.TestCase):
+    """The background flusher against a file database, as in production."""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{self.path}",
+            "RATELIMIT_ENABLED": False,
+            "EVENTS_TAILER_ENABLED": False,
+            "AUTOSAVE_FLUSH_SECONDS": 0.05
+        })
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="testuser", email="test@example.com", password="x")
+            db.session.add(user)
+            db.session.flush()
+            entry = JournalEntry(user_id=user.id, title="t", content="c", tags="[]")
+            db.session.add(entry)
+            db.session.commit()
+            self.entry_id = entry.id
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.remove(self.path)
+
+    def test_timer_flushes_and_durable_waits_for_group_commit(self):
+        response = self.client.patch(f"/entries/{self.entry_id}/draft", json={"content": "timer"},
+                                     headers=self.headers)
+        self.assertEqual(response.status_code, 202)
+        deadline = time.time() + 5
+        while self.app.extensions["journal_autosave"].pending_count() and time.time() < deadline:
+            time.sleep(0.02)
+        time.sleep(0.1)
+        with self.app.app_context():
+            self.assertEqual(db.session.get(EntryDraft, self.entry_id).content, "timer")
+
+        response = self.client.patch(f"/entries/{self.entry_id}/draft", json={"content": "durable"},
+                                     query_string={"durable": 1}, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        with self.app.app_context():
+            self.assertEqual(db.session.get(EntryDraft, self.entry_id).content, "durable")
+
+if __name__ == "__main__":
+    unittest.main()
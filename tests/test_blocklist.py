@@ -0,0 +1,89 @@
+# tests/test_blocklist.py
+import unittest
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from extensions import db
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token
+from journalapi.blocklist import BloomFilter, Blocklist
+from journalapi.models import User, TokenBlocklist
+
+@pytest.mark.usefixtures("transactional_db")
+class TestBlocklist(unittest.TestCase):
+    def setUp(self):
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            user = User(username="testuser", email="test@example.com", password=generate_password_hash("password123"))
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+            self.token = create_access_token(identity=str(self.user_id))
+            self.other_token = create_access_token(identity=str(self.user_id))
+
+    def auth(self, token):
+        return {"Authorization": f"Bearer {token}"}
+
+    def test_logout_revokes_token(self):
+        response = self.client.post("/users/logout", headers=self.auth(self.token))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["_links"]["login"]["href"], "/users/login")
+        response = self.client.get("/entries/", headers=self.auth(self.token))
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get("/entries/", headers=self.auth(self.other_token))
+        self.assertEqual(response.status_code, 200)
+
+    def test_logout_requires_token(self):
+        response = self.client.post("/users/logout")
+        self.assertEqual(response.status_code, 401)
+
+    def test_not_revoked_check_skips_database(self):
+        self.client.get("/entries/", headers=self.auth(self.token))
+        blocklist = self.app.extensions["journal_blocklist"]
+        blocklist.refresh_interval = 3600
+        with self.app.app_context(), patch.object(db.session, "query", wraps=db.session.query) as query:
+            self.assertFalse(blocklist.is_revoked("never-revoked-jti"))
+        query.assert_not_called()
+
+    def test_other_worker_picks_up_revocation(self):
+        worker = Blocklist(refresh_interval=0)
+        with self.app.app_context():
+            self.assertFalse(worker.is_revoked("jti-1"))
+            expires = datetime.now(timezone.utc) + timedelta(minutes=5)
+            self.app.extensions["journal_blocklist"].revoke("jti-1", expires)
+            self.assertTrue(worker.is_revoked("jti-1"))
+
+    def test_expired_entries_are_purged(self):
+        with self.app.app_context():
+            past = datetime.now(timezone.utc) - timedelta(minutes=5)
+            db.session.add(TokenBlocklist(jti="old-jti", expires_at=past))
+            db.session.commit()
+            worker = Blocklist(refresh_interval=0, rebuild_interval=0)
+            self.assertFalse(worker.is_revoked("old-jti"))
+            self.assertEqual(TokenBlocklist.query.count(), 0)
+
+    def test_revocation_after_a_full_purge_reaches_other_workers(self):
+        with self.app.app_context():
+            worker = Blocklist(refresh_interval=0)
+            purger = Blocklist(refresh_interval=0, rebuild_interval=0)
+            row = TokenBlocklist(jti="old-jti", expires_at=datetime.now(timezone.utc) + timedelta(minutes=5))
+            db.session.add(row)
+            db.session.commit()
+            self.assertTrue(worker.is_revoked("old-jti"))  # worker has tailed past the old row
+            row.expires_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+            db.session.commit()
+            purger.refresh(force=True)
+            self.assertEqual(TokenBlocklist.query.count(), 0)
+            purger.revoke("new-jti", datetime.now(timezone.utc) + timedelta(minutes=5))
+            self.assertTrue(worker.is_revoked("new-jti"))
+
+    def test_bloom_filter_false_positive_rate(self):
+        bloom = BloomFilter(capacity=5000, error_rate=0.01)
+        for i in range(5000):
+            bloom.add(f"member-{i}")
+        self.assertTrue(all(f"member-{i}" in bloom for i in range(5000)))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives / 10000, 0.03)
+
+if __name__ == "__main__":
+    unittest.main()
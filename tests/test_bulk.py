@@ -0,0 +1,255 @@
+# tests/test_bulk.py
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import requests
+from werkzeug.serving import make_server
+from app import create_app
+from extensions import db
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token
+from journalapi.models import JournalEntry, User
+
+from client import bulk, http_client
+from client import config as client_config
+
+def _entries(n, start=0):
+    return [{"title": f"Entry {i}", "content": f"Body {i}", "tags": ["imported"]} for i in range(start, start + n)]
+
+class TestEntryBatch(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "RATELIMIT_ENABLED": False
+        })
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="testuser", email="test@example.com",
+                        password=generate_password_hash("password123"))
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_batch_create_keeps_dates_and_updates_stats(self):
+        items = _entries(3)
+        items[0]["date"] = "2020-01-02T08:00:00"
+        response = self.client.post("/entries/batch", json={"entries": items}, headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        ids = response.get_json()["entry_ids"]
+        self.assertEqual(len(ids), 3)
+        with self.app.app_context():
+            self.assertEqual(db.session.get(JournalEntry, ids[0]).date.year, 2020)
+        stats = self.client.get(f"/users/{self.user_id}/stats", headers=self.headers).get_json()
+        self.assertEqual(stats["entry_count"], 3)
+
+    def test_one_invalid_entry_rejects_the_batch(self):
+        items = _entries(3)
+        items[1]["title"] = ""
+        response = self.client.post("/entries/batch", json={"entries": items}, headers=self.headers)
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("1", response.get_json()["errors"])
+        with self.app.app_context():
+            self.assertEqual(JournalEntry.query.count(), 0)
+
+    def test_resent_batch_reuses_keyed_entries(self):
+        items = [{**item, "idempotency_key": f"k{i}"} for i, item in enumerate(_entries(3))]
+        first = self.client.post("/entries/batch", json={"entries": items[:2]}, headers=self.headers)
+        again = self.client.post("/entries/batch", json={"entries": items}, headers=self.headers)
+        self.assertEqual(again.status_code, 201)
+        self.assertEqual(again.get_json()["entry_ids"][:2], first.get_json()["entry_ids"])
+        with self.app.app_context():
+            self.assertEqual(JournalEntry.query.count(), 3)
+        stats = self.client.get(f"/users/{self.user_id}/stats", headers=self.headers).get_json()
+        self.assertEqual(stats["entry_count"], 3)
+        items[0]["idempotency_key"] = "k" * 65
+        response = self.client.post("/entries/batch", json={"entries": items}, headers=self.headers)
+        self.assertEqual(response.status_code, 422)
+
+    def test_batch_shape_and_size(self):
+        for body in ({}, {"entries": []}, {"entries": "x"}, {"entries": _entries(101)}):
+            self.assertEqual(self.client.post("/entries/batch", json=body, headers=self.headers).status_code, 400)
+
+
+class TestBulkTransfer(unittest.TestCase):
+    """client/bulk.py against a real local server."""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{self.path}",
+            "RATELIMIT_ENABLED": False,
+            "EVENTS_TAILER_ENABLED": False
+        })
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="testuser", email="test@example.com",
+                        password=generate_password_hash("password123"))
+            db.session.add(user)
+            db.session.commit()
+            token = create_access_token(identity=str(user.id))
+        self.server = make_server("127.0.0.1", 0, self.app, threaded=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.work = tempfile.mkdtemp()
+        patches = [
+            mock.patch.object(client_config, "API_URL", f"http://127.0.0.1:{self.server.server_port}"),
+            mock.patch.object(client_config, "CACHE_ENABLED", False),
+            mock.patch.object(http_client.auth, "get_auth", return_value={"Authorization": f"Bearer {token}"}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.remove(self.path)
+        shutil.rmtree(self.work)
+
+    def _write_jsonl(self, items):
+        path = os.path.join(self.work, "journal.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for item in items:
+                f.write(json.dumps(item) + "\n")
+        return path
+
+    def _titles(self):
+        with self.app.app_context():
+            return sorted(e.title for e in JournalEntry.query.all())
+
+    def test_import_in_concurrent_batches(self):
+        path = self._write_jsonl(_entries(25))
+        seen = []
+        report = bulk.import_entries(path, batch_size=4, concurrency=3, progress=seen.append)
+        self.assertEqual(report, {"imported": 25, "skipped": 0, "failed": {}})
+        self.assertEqual(sum(seen), 25)
+        self.assertEqual(len(self._titles()), 25)
+        self.assertFalse(os.path.exists(bulk.checkpoint_path(path, "import")))
+
+    def test_import_resumes_from_checkpoint(self):
+        path = self._write_jsonl(_entries(10))
+        real_send, calls = bulk._send, []
+
+        def flaky(batch):
+            calls.append(batch)
+            if len(calls) == 3:
+                raise requests.ConnectionError("network down")
+            return real_send(batch)
+
+        with mock.patch.object(bulk, "_send", flaky):
+            with self.assertRaises(requests.ConnectionError):
+                bulk.import_entries(path, batch_size=2, concurrency=1)
+        self.assertEqual(len(self._titles()), 4)
+        with open(bulk.checkpoint_path(path, "import")) as f:
+            self.assertEqual(json.load(f)["done"], [0, 2])
+
+        report = bulk.import_entries(path, batch_size=50, concurrency=2)
+        self.assertEqual((report["imported"], report["skipped"]), (6, 4))
+        self.assertEqual(self._titles(), sorted(f"Entry {i}" for i in range(10)))
+
+    def test_batch_sent_before_an_interruption_is_not_duplicated(self):
+        path = self._write_jsonl(_entries(10))
+        real_send, calls = bulk._send, []
+
+        def lost_reply(batch):
+            calls.append(batch)
+            errors = real_send(batch)
+            if len(calls) == 3:
+                raise requests.ConnectionError("reply lost")  # stored by the server, not checkpointed
+            return errors
+
+        with mock.patch.object(bulk, "_send", lost_reply):
+            with self.assertRaises(requests.ConnectionError):
+                bulk.import_entries(path, batch_size=2, concurrency=1)
+        with open(bulk.checkpoint_path(path, "import")) as f:
+            self.assertNotIn(4, json.load(f)["done"])
+        report = bulk.import_entries(path, batch_size=2, concurrency=1)
+        self.assertEqual(report["imported"] + report["skipped"], 10)
+        self.assertEqual(self._titles(), sorted(f"Entry {i}" for i in range(10)))
+
+    def test_rejected_batch_is_reported_and_retried(self):
+        items = _entries(4)
+        items[3]["content"] = ""
+        path = self._write_jsonl(items)
+        report = bulk.import_entries(path, batch_size=2)
+        self.assertEqual(report["imported"], 2)
+        self.assertEqual(list(report["failed"]), [2])
+        self.assertTrue(os.path.exists(bulk.checkpoint_path(path, "import")))
+        with self.assertRaises(bulk.CheckpointMismatch):
+            self._write_jsonl(_entries(5))
+            bulk.import_entries(path)
+
+    def test_markdown_round_trip(self):
+        source = os.path.join(self.work, "notes")
+        os.makedirs(source)
+        with open(os.path.join(source, "a.md"), "w", encoding="utf-8") as f:
+            f.write("# Morning pages\n\nWrote three pages.\n")
+        with open(os.path.join(source, "b.md"), "w", encoding="utf-8") as f:
+            f.write('---\ntitle: Trip\ndate: 2021-06-01T10:00:00\ntags: ["travel", "summer"]\n---\n\nThe lake.\n')
+        with open(os.path.join(source, "plain.md"), "w", encoding="utf-8") as f:
+            f.write("Just text.\n")
+        self.assertEqual(bulk.import_entries(source)["imported"], 3)
+        self.assertEqual(self._titles(), ["Morning pages", "Trip", "plain"])
+
+        target = os.path.join(self.work, "export")
+        self.assertEqual(bulk.export_entries(target, fmt="markdown"), 3)
+        files = bulk.markdown_files(target)
+        self.assertEqual(len(files), 3)
+        records = list(bulk.read_markdown(target))
+        trip = next(r for r in records if r["title"] == "Trip")
+        self.assertEqual((trip["content"], trip["tags"]), ("The lake.", ["travel", "summer"]))
+        self.assertTrue(trip["date"].startswith("2021-06-01"))
+
+    def test_export_writes_each_snapshot_page_as_it_arrives(self):
+        bulk.import_entries(self._write_jsonl(_entries(5)))
+        target = os.path.join(self.work, "pages")
+        real_get, on_disk = http_client.get, []
+
+        def get(path, **kwargs):
+            if path == "/sync":
+                self.assertEqual(kwargs["params"]["limit"], 2)
+                on_disk.append(len(bulk.markdown_files(target)) if os.path.isdir(target) else 0)
+            return real_get(path, **kwargs)
+
+        with mock.patch.object(bulk.http_client, "get", get):
+            self.assertEqual(bulk.export_entries(target, fmt="markdown", page_size=2), 5)
+        self.assertEqual(on_disk, [0, 2, 4])
+
+    def test_jsonl_export_resumes(self):
+        bulk.import_entries(self._write_jsonl(_entries(5)))
+        target = os.path.join(self.work, "out.jsonl")
+        with mock.patch.object(bulk, "CHECKPOINT_EVERY", 2):
+            real_dumps, calls = json.dumps, []
+
+            def failing_dumps(obj, **kwargs):
+                if "content" in obj:
+                    calls.append(obj)
+                    if len(calls) == 4:
+                        raise KeyboardInterrupt
+                return real_dumps(obj, **kwargs)
+
+            with mock.patch.object(bulk.json, "dumps", failing_dumps):
+                with self.assertRaises(KeyboardInterrupt):
+                    bulk.export_entries(target)
+            self.assertEqual(bulk.export_entries(target), 3)
+        with open(target, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([line["title"] for line in lines], [f"Entry {i}" for i in range(5)])
+
+if __name__ == "__main__":
+    unittest.main()
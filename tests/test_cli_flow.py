@@ -3,17 +3,23 @@ import os
 import subprocess
 import unittest
 import re
+import tempfile
 import time
 import multiprocessing
 from app import create_app
 from extensions import db
-from journalapi.models import User, JournalEntry, Comment, EditHistory
 
 from client.config import TOKEN_FILE
 
+# The server and the reset below share this file; the repo's instance/journal.db is never touched.
+DB_PATH = os.path.join(tempfile.mkdtemp(), "journal.db")
+
+def _app():
+    return create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{DB_PATH}"})
+
 def run_flask_app():
     """Run the Flask app in a separate process."""
-    app = create_app()
+    app = _app()
     app.run(host="localhost", port=8000, debug=False, use_reloader=False)
 
 class TestJournalCLIFlow(unittest.TestCase):
@@ -27,7 +33,7 @@ class TestJournalCLIFlow(unittest.TestCase):
         print("DEBUG [setUpClass] Flask server started")
 
         # Reset the database for a clean test environment
-        app = create_app()
+        app = _app()
         with app.app_context():
             db.drop_all()
             db.create_all()
@@ -41,6 +47,8 @@ class TestJournalCLIFlow(unittest.TestCase):
         # Clean up token file
         if os.path.exists(TOKEN_FILE):
             os.remove(TOKEN_FILE)
+        if os.path.exists(DB_PATH):
+            os.remove(DB_PATH)
         print("DEBUG [tearDownClass] Flask server terminated and token file cleaned")
 
     def run_cli(self, command):
@@ -0,0 +1,79 @@
+# tests/test_cli_startup.py
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from client import auth
+from client import config as client_config
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+class TestLazyCLI(unittest.TestCase):
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.home)
+
+    def _run(self, *args):
+        """Run the CLI in a fresh interpreter; returns (result, modules it imported)."""
+        script = ("import sys\nfrom client.main import cli\n"
+                  f"cli({list(args)!r}, prog_name='journal', standalone_mode=False)\n"
+                  "sys.stderr.write('\\n'.join(sys.modules))")
+        env = dict(os.environ, HOME=self.home, USERPROFILE=self.home)
+        result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env,
+                                capture_output=True, text=True, timeout=60)
+        return result, set(result.stderr.splitlines())
+
+    def test_auth_me_skips_network_and_replica_modules(self):
+        result, modules = self._run("auth", "me")
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("Not logged in", result.stdout)
+        self.assertIn("client.auth_cli", modules)
+        for heavy in ("requests", "urllib3", "client.http_client", "client.replica", "client.entries_cli",
+                      "rich.progress"):
+            self.assertNotIn(heavy, modules)
+
+    def test_top_level_help_loads_no_subcommands(self):
+        result, modules = self._run("--help")
+        self.assertEqual(result.returncode, 0)
+        for name in ("auth", "entry", "comment"):
+            self.assertIn(name, result.stdout)
+        self.assertFalse({"client.auth_cli", "client.entries_cli", "client.comments_cli"} & modules)
+
+    def test_script_invocation_still_works(self):
+        env = dict(os.environ, HOME=self.home, USERPROFILE=self.home)
+        result = subprocess.run([sys.executable, "main.py", "auth", "me"], cwd=os.path.join(ROOT, "client"),
+                                env=env, capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("Not logged in", result.stdout)
+
+
+class TestTokenCache(unittest.TestCase):
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.home)
+        patch = mock.patch.object(client_config, "TOKEN_FILE", os.path.join(self.home, ".journal_token"))
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.addCleanup(auth._cache.clear)
+
+    def test_token_read_once_until_file_changes(self):
+        self.assertIsNone(auth.get_token())
+        auth.save_token("first")
+        with mock.patch("builtins.open", wraps=open) as opened:
+            self.assertEqual(auth.get_token(), "first")
+            self.assertEqual(auth.get_auth(), {"Authorization": "Bearer first"})
+            self.assertEqual(opened.call_count, 1)
+
+        with open(client_config.TOKEN_FILE, "w") as f:
+            f.write('{"token": "second"}')
+        os.utime(client_config.TOKEN_FILE, ns=(0, 1))  # a login from another shell
+        self.assertEqual(auth.get_token(), "second")
+
+        auth.clear_token()
+        self.assertIsNone(auth.get_token())
+
+if __name__ == "__main__":
+    unittest.main()
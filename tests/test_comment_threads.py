@@ -0,0 +1,169 @@
+# tests/test_comment_threads.py
+import unittest
+import json
+from app import create_app
+from extensions import db
+from sqlalchemy import text
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token
+from journalapi.models import User, JournalEntry, Comment
+from journalapi.schema import upgrade_schema
+
+class TestCommentThreads(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "RATELIMIT_ENABLED": False
+        })
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="testuser", email="test@example.com",
+                        password=generate_password_hash("password123"))
+            other = User(username="otheruser", email="other@example.com",
+                         password=generate_password_hash("password123"))
+            db.session.add_all([user, other])
+            db.session.commit()
+            entry = JournalEntry(user_id=user.id, title="Entry", content="Content", tags=json.dumps([]))
+            db.session.add(entry)
+            db.session.commit()
+            self.entry_id = entry.id
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+            self.other_headers = {"Authorization": f"Bearer {create_access_token(identity=str(other.id))}"}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _post(self, content, parent_id=None):
+        response = self.client.post(
+            f"/entries/{self.entry_id}/comments",
+            json={"content": content, "parent_id": parent_id},
+            headers=self.headers
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.get_json()["comment_id"]
+
+    def _count(self):
+        with self.app.app_context():
+            return db.session.get(JournalEntry, self.entry_id).comment_count
+
+    def test_cursor_pagination_walks_every_comment_once(self):
+        ids = [self._post(f"comment {i}") for i in range(7)]
+        seen = []
+        url = f"/entries/{self.entry_id}/comments?limit=3"
+        pages = 0
+        while url:
+            response = self.client.get(url, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            data = response.get_json()
+            self.assertEqual(data["count"], 7)
+            seen.extend(c["id"] for c in data["comments"])
+            url = data["_links"].get("next", {}).get("href")
+            pages += 1
+        self.assertEqual(seen, ids)
+        self.assertEqual(pages, 3)
+
+    def test_invalid_cursor_and_limit(self):
+        for query in ("cursor=%%%", "limit=0", "limit=abc", "parent_id=x"):
+            response = self.client.get(f"/entries/{self.entry_id}/comments?{query}", headers=self.headers)
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_listing_requires_entry_ownership(self):
+        self._post("private")
+        response = self.client.get(f"/entries/{self.entry_id}/comments", headers=self.other_headers)
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get("/entries/999/comments", headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    def test_replies_and_thread_subtree(self):
+        root = self._post("root")
+        reply = self._post("reply", root)
+        nested = self._post("nested", reply)
+        other_root = self._post("other root")
+
+        data = self.client.get(f"/entries/{self.entry_id}/comments?parent_id=root",
+                               headers=self.headers).get_json()
+        self.assertEqual([c["id"] for c in data["comments"]], [root, other_root])
+
+        data = self.client.get(f"/entries/{self.entry_id}/comments?parent_id={root}",
+                               headers=self.headers).get_json()
+        self.assertEqual([c["id"] for c in data["comments"]], [reply])
+
+        data = self.client.get(f"/entries/{self.entry_id}/comments?thread={root}",
+                               headers=self.headers).get_json()
+        self.assertEqual([c["id"] for c in data["comments"]], [root, reply, nested])
+        self.assertEqual(data["comments"][2]["parent_id"], reply)
+
+    def test_deep_threads_outgrow_any_fixed_path_width(self):
+        self.assertIsNone(getattr(Comment.__table__.c.path.type, "length", None))
+        ids = [self._post("level 0")]
+        for level in range(1, 30):
+            ids.append(self._post(f"level {level}", ids[-1]))
+        with self.app.app_context():
+            self.assertGreater(len(db.session.get(Comment, ids[-1]).path), 255)
+        data = self.client.get(f"/entries/{self.entry_id}/comments?thread={ids[0]}&limit=50",
+                               headers=self.headers).get_json()
+        self.assertEqual([c["id"] for c in data["comments"]], ids)
+
+    def test_reply_to_unknown_parent(self):
+        response = self.client.post(
+            f"/entries/{self.entry_id}/comments",
+            json={"content": "orphan", "parent_id": 12345},
+            headers=self.headers
+        )
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("parent_id", response.get_json()["errors"])
+
+    def test_comment_count_follows_inserts_and_deletes(self):
+        root = self._post("root")
+        reply = self._post("reply", root)
+        self._post("nested", reply)
+        self._post("other root")
+        self.assertEqual(self._count(), 4)
+
+        response = self.client.delete(f"/entries/{self.entry_id}/comments/{root}", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["deleted"], 3)
+        self.assertEqual(self._count(), 1)
+
+        entries = self.client.get("/entries/", headers=self.headers).get_json()["entries"]
+        self.assertEqual(entries[0]["comment_count"], 1)
+
+    def test_upgrade_schema_backfills_paths_and_counts(self):
+        with self.app.app_context():
+            parent = Comment(journal_entry_id=self.entry_id, user_id=1, content="a")
+            db.session.add(parent)
+            db.session.flush()
+            child = Comment(journal_entry_id=self.entry_id, user_id=1, content="b", parent_id=parent.id)
+            db.session.add(child)
+            db.session.commit()
+            self.assertIsNone(child.path)
+            self.assertEqual(db.session.get(JournalEntry, self.entry_id).comment_count, 0)
+
+            report = upgrade_schema()
+            self.assertEqual(report["comment_paths"], 2)
+            child = db.session.get(Comment, child.id)
+            self.assertEqual(child.path, f"{parent.id:010d}/{child.id:010d}")
+            self.assertEqual(db.session.get(JournalEntry, self.entry_id).comment_count, 2)
+
+    def test_upgrade_schema_adds_missing_columns(self):
+        with self.app.app_context():
+            db.drop_all()
+            db.session.execute(text(
+                "CREATE TABLE journal_entries (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, "
+                "title VARCHAR(255) NOT NULL, content TEXT NOT NULL, tags VARCHAR, sentiment_score FLOAT, "
+                "sentiment_tag VARCHAR, date DATETIME, last_updated DATETIME)"
+            ))
+            db.session.execute(text(
+                "INSERT INTO journal_entries (id, user_id, title, content) VALUES (1, 1, 't', 'c')"
+            ))
+            db.session.commit()
+            report = upgrade_schema()
+            self.assertIn("journal_entries.comment_count", report["columns"])
+            self.assertEqual(db.session.get(JournalEntry, 1).comment_count, 0)
+
+if __name__ == "__main__":
+    unittest.main()
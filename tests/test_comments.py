@@ -1,21 +1,17 @@
 # tests/test_comments.py
 import unittest
+import pytest
 import json
-from app import create_app
 from extensions import db
 from werkzeug.security import generate_password_hash
 from flask_jwt_extended import create_access_token
 from journalapi.models import User, JournalEntry, Comment
 
+@pytest.mark.usefixtures("transactional_db")
 class TestComments(unittest.TestCase):
     def setUp(self):
-        self.app = create_app({
-            "TESTING": True,
-            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"
-        })
         self.client = self.app.test_client()
         with self.app.app_context():
-            db.create_all()
             hashed_password = generate_password_hash("password123")
             user = User(username="testuser", email="test@example.com", password=hashed_password)
             db.session.add(user)
@@ -34,11 +30,6 @@ class TestComments(unittest.TestCase):
             self.entry_id = entry.id
             self.token = create_access_token(identity=str(self.user_id))
 
-    def tearDown(self):
-        with self.app.app_context():
-            db.session.remove()
-            db.drop_all()
-
     def test_get_comments_empty(self):
         response = self.client.get(
             f"/entries/{self.entry_id}/comments",
@@ -0,0 +1,106 @@
+# tests/test_compression.py
+import base64
+import os
+import unittest
+import pytest
+from sqlalchemy import text
+from extensions import db
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token
+from journalapi.compression import compress_existing, train_dictionary
+from journalapi.models import EditHistory, JournalEntry, User
+
+SENTENCE = "Today I went for a long walk in the park and felt grateful for the quiet morning. "
+
+@pytest.mark.usefixtures("transactional_db")
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            user = User(username="testuser", email="test@example.com",
+                        password=generate_password_hash("password123"))
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+
+    def _create(self, content):
+        response = self.client.post("/entries/", json={"title": "t", "content": content, "tags": []},
+                                    headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        return response.get_json()["entry_id"]
+
+    def _stored(self, sql, **params):
+        with self.app.app_context():
+            return db.session.execute(text(sql), params).one()
+
+    def _entry_storage(self, entry_id):
+        return self._stored("SELECT typeof(content), length(CAST(content AS BLOB)) FROM journal_entries "
+                            "WHERE id = :id", id=entry_id)
+
+    def test_long_text_is_stored_compressed(self):
+        body = SENTENCE * 20
+        entry_id = self._create(body)
+        kind, size = self._entry_storage(entry_id)
+        self.assertEqual(kind, "blob")
+        self.assertLess(size, len(body) / 4)
+        self.assertEqual(self.client.get(f"/entries/{entry_id}", headers=self.headers).get_json()["content"], body)
+
+        self.assertEqual(self._entry_storage(self._create("short note"))[0], "text")
+        noise = base64.b64encode(os.urandom(60)).decode()[:70]
+        self.assertEqual(self._entry_storage(self._create(noise))[0], "text")
+
+    def test_edit_history_is_compressed(self):
+        entry_id = self._create(SENTENCE * 5)
+        with self.app.app_context():
+            db.session.add(EditHistory(journal_entry_id=entry_id, user_id=self.user_id,
+                                       previous_content=SENTENCE * 5, new_content=SENTENCE * 6))
+            db.session.commit()
+        kinds = self._stored("SELECT typeof(previous_content), typeof(new_content) FROM edit_history")
+        self.assertEqual(tuple(kinds), ("blob", "blob"))
+        edits = self.client.get(f"/entries/{entry_id}/history", headers=self.headers).get_json()["edits"]
+        self.assertEqual((edits[0]["previous_content"], edits[0]["new_content"]), (SENTENCE * 5, SENTENCE * 6))
+
+    def test_migration_compresses_plain_rows(self):
+        self.app.extensions["journal_compression"].enabled = False
+        entry_id = self._create(SENTENCE * 10)
+        self.assertEqual(self._entry_storage(entry_id)[0], "text")
+        self.app.extensions["journal_compression"].enabled = True
+        with self.app.app_context():
+            before = db.session.get(JournalEntry, entry_id).last_updated
+        result = self.app.test_cli_runner().invoke(args=["compress-content"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Rewrote 1 journal_entries.content", result.output)
+        self.assertEqual(self._entry_storage(entry_id)[0], "blob")
+        with self.app.app_context():
+            entry = db.session.get(JournalEntry, entry_id)
+            self.assertEqual((entry.content, entry.last_updated), (SENTENCE * 10, before))
+            self.assertEqual(compress_existing()["journal_entries.content"], 0)
+
+    def test_trained_dictionary_shrinks_short_entries(self):
+        phrases = ["felt grateful for the quiet morning", "went for a long walk in the park",
+                   "had coffee with an old friend", "could not sleep because of work"]
+        for i in range(40):
+            self._create(f"Entry {i}: I {phrases[i % 4]} and then I {phrases[(i + 1) % 4]}.")
+        short = "Later I went for a long walk in the park and felt grateful for the quiet morning."
+        plain_id = self._create(short)
+        plain_size = self._entry_storage(plain_id)[1]
+
+        with self.app.app_context():
+            first = train_dictionary()
+        self.assertIsNotNone(first)
+        dict_id = self._create(short)
+        self.assertLess(self._entry_storage(dict_id)[1], plain_size)
+        self.assertEqual(self._stored("SELECT substr(content, 1, 1) FROM journal_entries WHERE id = :id",
+                                      id=dict_id)[0], b"d")
+
+        # A newer dictionary takes over; values written with the old one still read back.
+        with self.app.app_context():
+            self.assertGreater(train_dictionary(), first)
+            self.app.extensions["journal_compression"]._dictionaries.clear()
+            self.assertEqual(db.session.get(JournalEntry, dict_id).content, short)
+            self.assertEqual(compress_existing(recompress=True)["journal_entries.content"], 42)
+        self.assertEqual(self.client.get(f"/entries/{plain_id}", headers=self.headers).get_json()["content"], short)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,250 @@
+# tests/test_events.py
+import asyncio
+import http.client
+import importlib.util
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from asgiref.testing import ApplicationCommunicator
+from app import create_app
+from asgi import JournalASGI
+from extensions import db
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token, decode_token
+from journalapi.blocklist import revoke_token
+from journalapi.events import HEARTBEAT, RESET, Subscription, stream
+from journalapi.models import User
+
+class TestEvents(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "RATELIMIT_ENABLED": False,
+            "EVENTS_TAILER_ENABLED": False,
+            "EVENTS_HEARTBEAT_SECONDS": 0.05,
+            "EVENTS_QUEUE_SIZE": 3,
+            "EVENTS_WSGI_MAX_SUBSCRIBERS": 2
+        })
+        self.client = self.app.test_client()
+        self.broker = self.app.extensions["journal_events"]
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="testuser", email="test@example.com",
+                        password=generate_password_hash("password123"))
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+            self.token = create_access_token(identity=str(user.id))
+            self.headers = {"Authorization": f"Bearer {self.token}"}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _create_entry(self, title="entry"):
+        response = self.client.post("/entries/", json={"title": title, "content": "c", "tags": []},
+                                    headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        return response.get_json()["entry_id"]
+
+    def test_tailer_delivers_only_to_the_owner(self):
+        with self.app.app_context():
+            self.broker.poll_once()
+        mine = self.broker.subscribe(self.user_id)
+        other = self.broker.subscribe(self.user_id + 1)
+        entry_id = self._create_entry()
+        with self.app.app_context():
+            self.assertEqual(self.broker.poll_once(), 1)
+        event = mine.get(0.1).decode()
+        self.assertIn("event: entry", event)
+        payload = json.loads(event.split("data: ")[1])
+        self.assertEqual((payload["id"], payload["op"]), (entry_id, "upsert"))
+        self.assertIsNone(other.get(0.01))
+
+    def test_slow_subscriber_gets_reset(self):
+        sub = self.broker.subscribe(self.user_id)
+        body = stream(self.broker, sub)
+        self.assertEqual(next(body), b"retry: 3000\n\n")
+        for i in range(5):
+            self.broker.publish(self.user_id, f"data: {i}\n\n".encode())
+        self.assertTrue(sub.overflowed)
+        self.assertEqual(next(body), RESET)
+        with self.assertRaises(StopIteration):
+            next(body)
+        self.assertEqual(self.broker.subscriber_count(), 0)
+
+    def test_heartbeat_when_idle(self):
+        sub = self.broker.subscribe(self.user_id)
+        body = stream(self.broker, sub)
+        next(body)
+        self.assertEqual(next(body), HEARTBEAT)
+        body.close()
+        self.assertEqual(self.broker.subscriber_count(), 0)
+
+    def test_subscription_buffer_is_bounded(self):
+        sub = Subscription(1, maxsize=2)
+        for i in range(4):
+            sub.push(i)
+        self.assertEqual([sub.get(0), sub.get(0), sub.get(0)], [0, 1, None])
+
+    def test_wsgi_endpoint_replays_from_last_event_id(self):
+        self._create_entry("first")
+        second = self._create_entry("second")
+        response = self.client.get("/events", headers={**self.headers, "Last-Event-ID": "1"}, buffered=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "text/event-stream")
+        chunks = iter(response.response)
+        self.assertEqual(next(chunks), b"retry: 3000\n\n")
+        replayed = next(chunks).decode()
+        self.assertIn(f'"id": {second}', replayed)
+        response.close()
+        self.assertEqual(self.broker.subscriber_count(), 0)
+
+    def test_requires_token(self):
+        self.assertEqual(self.client.get("/events").status_code, 401)
+
+    def test_subscriber_cap(self):
+        self.broker.max_subscribers = 0
+        self.assertEqual(self.client.get("/events", headers=self.headers).status_code, 503)
+
+    def test_wsgi_streams_are_capped_below_the_thread_count(self):
+        self.broker.max_wsgi_subscribers = 1
+        stream_response = self.client.get("/events", headers=self.headers, buffered=False)
+        self.assertEqual(stream_response.status_code, 200)
+        self.assertEqual(self.client.get("/events", headers=self.headers).status_code, 503)
+        self.assertIsNotNone(self.broker.subscribe(self.user_id, loop=asyncio.new_event_loop()))
+        stream_response.close()
+        self.assertEqual(self.client.get("/events", headers=self.headers, buffered=False).status_code, 200)
+
+    def test_asgi_stream_rejects_revoked_token(self):
+        with self.app.app_context():
+            claims = decode_token(self.token)
+            self.assertEqual(JournalASGI(self.app)._authenticate({"authorization": f"Bearer {self.token}"}),
+                             self.user_id)
+            revoke_token(claims)
+        self.assertIsNone(JournalASGI(self.app)._authenticate({"authorization": f"Bearer {self.token}"}))
+        self.assertIsNone(JournalASGI(self.app)._authenticate({"authorization": "Bearer not-a-token"}))
+
+    def test_asgi_stream(self):
+        asgi_app = JournalASGI(self.app)
+        scope = {
+            "type": "http", "http_version": "1.1", "method": "GET", "path": "/events",
+            "query_string": b"", "headers": [(b"authorization", f"Bearer {self.token}".encode())],
+        }
+
+        async def run():
+            communicator = ApplicationCommunicator(asgi_app, scope)
+            await communicator.send_input({"type": "http.request", "body": b""})
+            start = await communicator.receive_output(5)
+            first = await communicator.receive_output(5)
+            self.broker.publish(self.user_id, b"data: hello\n\n")
+            event = await communicator.receive_output(5)
+            while event["body"] == HEARTBEAT:
+                event = await communicator.receive_output(5)
+            await communicator.send_input({"type": "http.disconnect"})
+            await communicator.wait(5)
+            return start, first, event
+
+        start, first, event = asyncio.run(run())
+        self.assertEqual(start["status"], 200)
+        self.assertEqual(first["body"], b"retry: 3000\n\n")
+        self.assertEqual(event["body"], b"data: hello\n\n")
+        self.assertEqual(self.broker.subscriber_count(), 0)
+
+    def test_asgi_stream_without_token_falls_back_to_flask(self):
+        asgi_app = JournalASGI(self.app)
+        scope = {"type": "http", "http_version": "1.1", "method": "GET", "path": "/events",
+                 "query_string": b"", "headers": []}
+
+        async def run():
+            communicator = ApplicationCommunicator(asgi_app, scope)
+            await communicator.send_input({"type": "http.request", "body": b""})
+            start = await communicator.receive_output(5)
+            # Drain the body so the WSGI thread finishes before the loop closes.
+            while (await communicator.receive_output(5)).get("more_body"):
+                pass
+            await communicator.wait(5)
+            return start
+
+        self.assertEqual(asyncio.run(run())["status"], 401)
+
+
+@unittest.skipIf(importlib.util.find_spec("gunicorn") is None, "gunicorn is not installed")
+class TestEventsUnderGunicorn(unittest.TestCase):
+    """A real gthread worker: open streams must leave threads for the API."""
+
+    THREADS = 2
+
+    def setUp(self):
+        self.work = tempfile.mkdtemp()
+        config = {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(self.work, 'journal.db')}",
+                  "RATELIMIT_ENABLED": False, "EVENTS_HEARTBEAT_SECONDS": 1}
+        app = create_app(config)
+        with app.app_context():
+            db.create_all()
+            user = User(username="testuser", email="test@example.com", password="-")
+            db.session.add(user)
+            db.session.commit()
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        env = dict(os.environ, GUNICORN_APP=f"app:create_app({config!r})", WEB_CONCURRENCY="1",
+                   GUNICORN_THREADS=str(self.THREADS), GUNICORN_BIND=f"127.0.0.1:{self.port}",
+                   EVENTS_WSGI_MAX_SUBSCRIBERS="1")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.server = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"], cwd=root,
+                                       env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.streams = []
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                self.get("/")
+                break
+            except OSError:
+                if time.monotonic() > deadline or self.server.poll() is not None:
+                    self.fail("gunicorn did not start")
+                time.sleep(0.2)
+
+    def tearDown(self):
+        for conn in self.streams:
+            conn.close()
+        self.server.terminate()
+        try:
+            self.server.wait(10)
+        except subprocess.TimeoutExpired:
+            self.server.kill()
+            self.server.wait()
+        shutil.rmtree(self.work)
+
+    def get(self, path, keep=False):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        conn.request("GET", path, headers=self.headers)
+        response = conn.getresponse()
+        if keep:
+            self.streams.append(conn)
+            return response
+        response.read()
+        conn.close()
+        return response
+
+    def test_api_is_served_while_streams_are_open(self):
+        stream = self.get("/events", keep=True)
+        self.assertEqual(stream.status, 200)
+        self.assertEqual(stream.read(13), b"retry: 3000\n\n")
+        for _ in range(self.THREADS):
+            self.assertEqual(self.get("/events", keep=True).status, 503)
+        for _ in range(3):
+            self.assertEqual(self.get("/entries/").status, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
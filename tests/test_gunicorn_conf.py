@@ -0,0 +1,63 @@
+# tests/test_gunicorn_conf.py
+import os
+import runpy
+import unittest
+from unittest import mock
+from app import create_app
+from extensions import db
+
+CONF_PATH = os.path.join(os.path.dirname(__file__), "..", "gunicorn.conf.py")
+
+class TestGunicornConf(unittest.TestCase):
+    def setUp(self):
+        self.conf = runpy.run_path(CONF_PATH)
+
+    def test_worker_settings(self):
+        self.assertEqual(self.conf["worker_class"], "gthread")
+        self.assertTrue(self.conf["preload_app"])
+        self.assertGreaterEqual(self.conf["workers"], 3)
+        self.assertGreater(self.conf["threads"], 1)
+        self.assertGreater(self.conf["max_requests_jitter"], 0)
+        self.assertGreater(self.conf["keepalive"], 60)
+
+    def test_worker_count_from_env(self):
+        with mock.patch.dict(os.environ, {"WEB_CONCURRENCY": "7"}):
+            conf = runpy.run_path(CONF_PATH)
+        self.assertEqual(conf["workers"], 7)
+
+    def test_post_fork_disposes_engine_pool(self):
+        app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"
+        })
+        with app.app_context():
+            old_pool = db.engine.pool
+        server = mock.Mock()
+        server.app.wsgi.return_value = app
+        self.conf["post_fork"](server, mock.Mock(pid=1234))
+        with app.app_context():
+            self.assertIsNot(db.engine.pool, old_pool)
+
+    def test_post_fork_disposes_shard_and_replica_pools(self):
+        sharded = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "SHARD_URIS": ["sqlite:///:memory:", "sqlite:///:memory:"],
+            "EVENTS_TAILER_ENABLED": False
+        })
+        replicated = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "DATABASE_REPLICA_URIS": ["sqlite:///:memory:"]
+        })
+        for app, name in ((sharded, "journal_shards"), (replicated, "journal_replicas")):
+            engines = app.extensions[name].engines
+            old_pools = [engine.pool for engine in engines]
+            server = mock.Mock()
+            server.app.wsgi.return_value = app
+            self.conf["post_fork"](server, mock.Mock(pid=1234))
+            for engine, old_pool in zip(engines, old_pools):
+                self.assertIsNot(engine.pool, old_pool)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+# tests/test_http_client.py
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from werkzeug.serving import make_server
+from app import create_app
+from extensions import db
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token
+from journalapi.models import User
+
+from typer.testing import CliRunner
+from client import http_client
+from client import config as client_config
+from client.comments_cli import comment_app
+
+class TestConditionalGet(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "RATELIMIT_ENABLED": False
+        })
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="testuser", email="test@example.com",
+                        password=generate_password_hash("password123"))
+            db.session.add(user)
+            db.session.commit()
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_etag_and_not_modified(self):
+        self.client.post("/entries/", json={"title": "t", "content": "c", "tags": []}, headers=self.headers)
+        first = self.client.get("/entries/", headers=self.headers)
+        etag = first.headers["ETag"]
+        self.assertEqual(first.headers["Cache-Control"], "private, no-cache")
+        self.assertIn("Authorization", first.headers["Vary"])
+
+        again = self.client.get("/entries/", headers={**self.headers, "If-None-Match": etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.get_data(), b"")
+
+        self.client.post("/entries/", json={"title": "t2", "content": "c", "tags": []}, headers=self.headers)
+        changed = self.client.get("/entries/", headers={**self.headers, "If-None-Match": etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["ETag"], etag)
+
+    def test_only_successful_gets_are_tagged(self):
+        created = self.client.post("/entries/", json={"title": "t", "content": "c", "tags": []}, headers=self.headers)
+        self.assertNotIn("ETag", created.headers)
+        self.assertNotIn("ETag", self.client.get("/entries/999", headers=self.headers).headers)
+
+
+class TestHttpClient(unittest.TestCase):
+    """The CLI's HTTP layer against a real local server."""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{self.path}",
+            "RATELIMIT_ENABLED": False,
+            "EVENTS_TAILER_ENABLED": False
+        })
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="testuser", email="test@example.com",
+                        password=generate_password_hash("password123"))
+            db.session.add(user)
+            db.session.commit()
+            token = create_access_token(identity=str(user.id))
+        self.server = make_server("127.0.0.1", 0, self.app, threaded=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.cache_dir = tempfile.mkdtemp()
+        patches = [
+            mock.patch.object(client_config, "API_URL", f"http://127.0.0.1:{self.server.server_port}"),
+            mock.patch.object(http_client, "cache", http_client.ResponseCache(self.cache_dir)),
+            mock.patch.object(http_client.auth, "get_auth", return_value={"Authorization": f"Bearer {token}"}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.remove(self.path)
+        shutil.rmtree(self.cache_dir)
+
+    def test_session_is_shared_and_retries(self):
+        session = http_client.get_session()
+        self.assertIs(http_client.get_session(), session)
+        retry = session.get_adapter("https://example.com").max_retries
+        self.assertEqual(retry.total, client_config.RETRIES)
+        self.assertIn(503, retry.status_forcelist)
+        self.assertNotIn("POST", retry.allowed_methods)
+
+    def test_revalidated_responses_come_from_disk(self):
+        self.assertEqual(http_client.post("/entries/", json={"title": "t", "content": "c", "tags": []}).status_code, 201)
+        first = http_client.get("/entries/")
+        self.assertFalse(first.from_cache)
+        second = http_client.get("/entries/")
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.json(), first.json())
+
+        http_client.post("/entries/", json={"title": "t2", "content": "c", "tags": []})
+        third = http_client.get("/entries/")
+        self.assertFalse(third.from_cache)
+        self.assertEqual(len(third.json()["entries"]), 2)
+
+        http_client.cache.clear()
+        self.assertFalse(http_client.get("/entries/").from_cache)
+
+    def test_fetch_all_keeps_order(self):
+        ids = [http_client.post("/entries/", json={"title": f"e{n}", "content": "c", "tags": []}).json()["entry_id"]
+               for n in range(6)]
+        for entry_id in ids:
+            http_client.post(f"/entries/{entry_id}/comments", json={"content": f"on {entry_id}"})
+        pages = http_client.fetch_all([f"/entries/{entry_id}/comments" for entry_id in ids], max_workers=4)
+        self.assertEqual([page.json()["comments"][0]["content"] for page in pages], [f"on {i}" for i in ids])
+
+    def test_comment_listings_follow_every_page(self):
+        ids = [http_client.post("/entries/", json={"title": f"e{n}", "content": "c", "tags": []}).json()["entry_id"]
+               for n in range(2)]
+        for n in range(55):  # more than one page of 50
+            http_client.post(f"/entries/{ids[0]}/comments", json={"content": f"comment {n}"})
+        runner = CliRunner()
+        result = runner.invoke(comment_app, ["list", str(ids[0])])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("comment 0\n", result.output)
+        self.assertIn("comment 54\n", result.output)
+        result = runner.invoke(comment_app, ["list-all"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(result.output.count("] comment "), 55)
+        self.assertIn("No comments", result.output)
+
+    def test_comment_listings_report_failures(self):
+        entry_id = http_client.post("/entries/", json={"title": "e", "content": "c", "tags": []}).json()["entry_id"]
+        with mock.patch.object(self.app, "view_functions",
+                               {**self.app.view_functions, "api.commentcollectionresource":
+                                lambda **kwargs: ({"error": "Too many requests"}, 429)}):
+            result = CliRunner().invoke(comment_app, ["list-all"])
+        self.assertEqual(result.exit_code, 1, result.output)
+        self.assertIn("429 Too many requests", result.output)
+        self.assertNotIn("No comments", result.output)
+        result = CliRunner().invoke(comment_app, ["list", "999"])
+        self.assertEqual(result.exit_code, 1, result.output)
+        self.assertIn("404 Not found", result.output)
+        self.assertEqual(CliRunner().invoke(comment_app, ["list", str(entry_id)]).exit_code, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,21 +1,17 @@
 # tests/test_journal_entry_routes.py
 import unittest
+import pytest
 import json
-from app import create_app
 from extensions import db
 from werkzeug.security import generate_password_hash
 from flask_jwt_extended import create_access_token
 from journalapi.models import User
 
+@pytest.mark.usefixtures("transactional_db")
 class TestJournalEntryRoutes(unittest.TestCase):
     def setUp(self):
-        self.app = create_app({
-            "TESTING": True,
-            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"
-        })
         self.client = self.app.test_client()
         with self.app.app_context():
-            db.create_all()
             hashed_password = generate_password_hash("password123")
             user = User(username="testuser", email="test@example.com", password=hashed_password)
             db.session.add(user)
@@ -23,11 +19,6 @@ class TestJournalEntryRoutes(unittest.TestCase):
             self.user_id = user.id
             self.token = create_access_token(identity=str(self.user_id))
 
-    def tearDown(self):
-        with self.app.app_context():
-            db.session.remove()
-            db.drop_all()
-
     def test_get_entries_empty(self):
         response = self.client.get(
             "/entries/",
@@ -375,5 +366,39 @@ class TestJournalEntryRoutes(unittest.TestCase):
         data = response.get_json()
         self.assertIn("error", data)
 
+    def test_create_with_idempotency_key_is_not_repeated(self):
+        headers = {"Authorization": f"Bearer {self.token}", "Idempotency-Key": "k-1"}
+        body = {"title": "Once", "content": "Sent twice", "tags": []}
+        first = self.client.post("/entries/", json=body, headers=headers)
+        retry = self.client.post("/entries/", json=body, headers=headers)
+        self.assertEqual((first.status_code, retry.status_code), (201, 201))
+        self.assertEqual(first.get_json()["entry_id"], retry.get_json()["entry_id"])
+        other = self.client.post("/entries/", json=body, headers={**headers, "Idempotency-Key": "k-2"})
+        self.assertNotEqual(other.get_json()["entry_id"], first.get_json()["entry_id"])
+        entries = self.client.get("/entries/", headers=headers).get_json()["entries"]
+        self.assertEqual(len(entries), 2)
+        too_long = self.client.post("/entries/", json=body, headers={**headers, "Idempotency-Key": "k" * 65})
+        self.assertEqual(too_long.status_code, 400)
+
+    def test_writes_honour_if_match_and_if_unmodified_since(self):
+        auth = {"Authorization": f"Bearer {self.token}"}
+        entry_id = self.client.post("/entries/", json={"title": "T", "content": "C", "tags": []},
+                                    headers=auth).get_json()["entry_id"]
+        url = f"/entries/{entry_id}"
+        etag = self.client.get(url, headers=auth).headers["ETag"]
+        response = self.client.patch(url, json={"title": "Mine"}, headers={**auth, "If-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        for method, kwargs in (("patch", {"json": {"title": "Late"}}),
+                               ("put", {"json": {"title": "Late", "content": "C", "tags": []}}),
+                               ("delete", {})):
+            response = getattr(self.client, method)(url, headers={**auth, "If-Match": etag}, **kwargs)
+            self.assertEqual(response.status_code, 412, method)
+            self.assertIn("error", response.get_json())
+        self.assertEqual(self.client.get(url, headers=auth).get_json()["title"], "Mine")
+        stale = "Mon, 01 Jan 2001 00:00:00 GMT"
+        self.assertEqual(self.client.delete(url, headers={**auth, "If-Unmodified-Since": stale}).status_code, 412)
+        fresh = self.client.get(url, headers=auth).headers["ETag"]
+        self.assertEqual(self.client.delete(url, headers={**auth, "If-Match": fresh}).status_code, 200)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,123 @@
+# tests/test_large_content.py
+import io
+import unittest
+from app import create_app
+from extensions import db
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token
+from journalapi.blobs import offload_existing
+from journalapi.compaction import purge_deleted
+from journalapi.models import EntryBlob, JournalEntry, User
+
+class TestLargeContent(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "RATELIMIT_ENABLED": False,
+            "MAX_CONTENT_LENGTH": 64 * 1024,
+            "ENTRY_MAX_CONTENT_BYTES": 256 * 1024,
+            "ENTRY_INLINE_MAX_BYTES": 1024
+        })
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="testuser", email="test@example.com",
+                        password=generate_password_hash("password123"))
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _create(self, content):
+        response = self.client.post("/entries/", json={"title": "t", "content": content, "tags": []},
+                                    headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        return response.get_json()["entry_id"]
+
+    def _row(self, entry_id):
+        with self.app.app_context():
+            entry = db.session.get(JournalEntry, entry_id)
+            return entry.inline_content, entry.content_digest
+
+    def test_oversized_json_body_is_rejected_before_parsing(self):
+        response = self.client.post("/entries/", json={"title": "t", "content": "x" * 70000, "tags": []},
+                                    headers=self.headers)
+        self.assertEqual(response.status_code, 413)
+        self.assertIn("too large", response.get_json()["error"])
+
+    def test_chunked_body_is_cut_off_at_the_limit(self):
+        body = b'{"title": "t", "content": "' + b"x" * 70000 + b'", "tags": []}'
+        response = self.client.post("/entries/", input_stream=io.BytesIO(body),
+                                    headers={**self.headers, "Content-Type": "application/json"},
+                                    environ_overrides={"wsgi.input_terminated": True})
+        self.assertEqual(response.status_code, 413)
+
+    def test_large_body_moves_to_blob_tier(self):
+        text = "word " * 1000
+        entry_id = self._create(text)
+        inline, digest = self._row(entry_id)
+        self.assertEqual(inline, "")
+        self.assertIsNotNone(digest)
+        small_id = self._create("short body")
+        self.assertEqual(self._row(small_id), ("short body", None))
+
+        self.assertEqual(self.client.get(f"/entries/{entry_id}", headers=self.headers).get_json()["content"], text)
+        listed = self.client.get("/entries/", headers=self.headers).get_json()["entries"]
+        self.assertEqual(len(listed), 2)
+        stats = self.client.get(f"/users/{self.user_id}/stats", headers=self.headers).get_json()
+        self.assertEqual(stats["word_count"], 1002)
+
+        # Identical bodies share one blob.
+        self._create(text)
+        with self.app.app_context():
+            blob = db.session.get(EntryBlob, digest)
+            self.assertEqual(EntryBlob.query.count(), 1)
+            self.assertLess(len(blob.data), blob.size)
+
+    def test_shrinking_an_entry_orphans_its_blob_for_compaction(self):
+        entry_id = self._create("y" * 5000)
+        self.client.patch(f"/entries/{entry_id}", json={"content": "now short"}, headers=self.headers)
+        self.assertEqual(self._row(entry_id), ("now short", None))
+        with self.app.app_context():
+            self.assertEqual(purge_deleted()["blobs"], 1)
+            self.assertEqual(EntryBlob.query.count(), 0)
+
+    def test_streamed_content_upload(self):
+        entry_id = self._create("short")
+        text = "é" * 100000  # 200 KB: over the JSON limit, under the upload limit
+        response = self.client.put(f"/entries/{entry_id}/content", data=text.encode("utf-8"),
+                                   headers={**self.headers, "Content-Type": "text/plain; charset=utf-8"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["size"], 200000)
+        self.assertIsNotNone(self._row(entry_id)[1])
+        response = self.client.get(f"/entries/{entry_id}/content", headers=self.headers)
+        self.assertEqual(response.get_data(as_text=True), text)
+
+        url = f"/entries/{entry_id}/content"
+        self.assertEqual(self.client.put(url, data=b"x" * 300000,
+                                         headers={**self.headers, "Content-Type": "text/plain"}).status_code, 413)
+        self.assertEqual(self.client.put(url, json={"content": "x"}, headers=self.headers).status_code, 415)
+        self.assertEqual(self.client.put(url, data=b"\xff\xfe\xfa",
+                                         headers={**self.headers, "Content-Type": "text/plain"}).status_code, 422)
+
+    def test_offload_existing_keeps_last_updated(self):
+        self.app.config["ENTRY_INLINE_MAX_BYTES"] = 1024 * 1024
+        entry_id = self._create("z" * 5000)
+        with self.app.app_context():
+            before = db.session.get(JournalEntry, entry_id).last_updated
+            self.app.config["ENTRY_INLINE_MAX_BYTES"] = 1024
+            self.assertEqual(offload_existing(), 1)
+            db.session.expire_all()
+            entry = db.session.get(JournalEntry, entry_id)
+            self.assertEqual(entry.last_updated, before)
+            self.assertEqual(entry.content, "z" * 5000)
+            self.assertEqual(offload_existing(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+# tests/test_patch.py
+import unittest
+import pytest
+from sqlalchemy import event
+from extensions import db
+from werkzeug.security import check_password_hash, generate_password_hash
+from flask_jwt_extended import create_access_token
+from journalapi.models import Change, JournalEntry, User
+from journalapi.utils import merge_patch
+
+MERGE_PATCH = "application/merge-patch+json"
+
+@pytest.mark.usefixtures("transactional_db")
+class TestPatch(unittest.TestCase):
+    def setUp(self):
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            user = User(username="testuser", email="test@example.com",
+                        password=generate_password_hash("password123"))
+            other = User(username="otheruser", email="other@example.com",
+                         password=generate_password_hash("password123"))
+            db.session.add_all([user, other])
+            db.session.commit()
+            self.user_id = user.id
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+        response = self.client.post("/entries/", json={"title": "Title", "content": "Body", "tags": ["a", "b"]},
+                                    headers=self.headers)
+        self.entry_id = response.get_json()["entry_id"]
+
+    def _patch(self, url, body):
+        return self.client.patch(url, json=body, headers={**self.headers, "Content-Type": MERGE_PATCH})
+
+    def _statements(self, fn):
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            # Savepoints belong to the transactional_db fixture, not the request.
+            if not statement.startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")):
+                statements.append(statement)
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = fn()
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        return response, statements
+
+    def _entry(self):
+        with self.app.app_context():
+            return db.session.get(JournalEntry, self.entry_id)
+
+    def test_merge_patch_rfc_examples(self):
+        self.assertEqual(merge_patch({"a": "b"}, {"a": "c"}), {"a": "c"})
+        self.assertEqual(merge_patch({"a": "b"}, {"b": "c"}), {"a": "b", "b": "c"})
+        self.assertEqual(merge_patch({"a": "b"}, {"a": None}), {})
+        self.assertEqual(merge_patch({"a": [{"b": "c"}]}, {"a": [1]}), {"a": [1]})
+        self.assertEqual(merge_patch({"a": {"b": "c"}}, {"a": {"b": "d", "c": None}}), {"a": {"b": "d"}})
+        self.assertEqual(merge_patch({"a": "foo"}, "bar"), "bar")
+
+    def test_patch_entry_updates_only_changed_columns(self):
+        before = self._entry().last_updated
+        response, statements = self._statements(
+            lambda: self._patch(f"/entries/{self.entry_id}", {"tags": ["c"]}))
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data["changed"], ["tags"])
+        self.assertEqual((data["title"], data["content"], data["tags"]), ("Title", "Body", ["c"]))
+        updates = [s for s in statements if s.startswith("UPDATE journal_entries")]
+        self.assertEqual(len(updates), 1)
+        self.assertIn("tags=?", updates[0])
+        self.assertNotIn("title", updates[0])
+        self.assertNotIn("content", updates[0])
+        self.assertGreater(self._entry().last_updated, before)
+
+    def test_noop_patch_skips_commit_and_last_updated(self):
+        before = self._entry().last_updated
+        with self.app.app_context():
+            changes_before = Change.query.count()
+        response, statements = self._statements(
+            lambda: self._patch(f"/entries/{self.entry_id}", {"title": "Title", "tags": ["a", "b"], "unknown": 1}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["changed"], [])
+        self.assertFalse([s for s in statements if not s.startswith("SELECT")])
+        self.assertEqual(self._entry().last_updated, before)
+        with self.app.app_context():
+            self.assertEqual(Change.query.count(), changes_before)
+
+    def test_patch_entry_validation(self):
+        response = self._patch(f"/entries/{self.entry_id}", {"title": None})
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("title", response.get_json()["errors"])
+        self.assertEqual(self._patch(f"/entries/{self.entry_id}", {"content": ""}).status_code, 422)
+        self.assertEqual(self._patch(f"/entries/{self.entry_id}", ["not", "an", "object"]).status_code, 422)
+        self.assertEqual(self._patch("/entries/999", {"title": "x"}).status_code, 404)
+
+    def test_patch_comment(self):
+        comment_id = self.client.post(f"/entries/{self.entry_id}/comments", json={"content": "hi"},
+                                      headers=self.headers).get_json()["comment_id"]
+        url = f"/entries/{self.entry_id}/comments/{comment_id}"
+        response = self._patch(url, {"content": "edited", "parent_id": 12345})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual((data["content"], data["parent_id"], data["changed"]), ("edited", None, ["content"]))
+        self.assertEqual(self._patch(url, {"content": "edited"}).get_json()["changed"], [])
+        self.assertEqual(self._patch(url, {"content": None}).status_code, 422)
+
+    def test_patch_user(self):
+        url = f"/users/{self.user_id}"
+        response = self._patch(url, {"username": "renamed", "password": "password123"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["changed"], ["username"])
+        self.assertEqual(response.get_json()["username"], "renamed")
+
+        response = self._patch(url, {"password": "newpassword"})
+        self.assertEqual(response.get_json()["changed"], ["password"])
+        with self.app.app_context():
+            self.assertTrue(check_password_hash(db.session.get(User, self.user_id).password, "newpassword"))
+
+        self.assertEqual(self._patch(url, {"email": "not-an-email"}).status_code, 422)
+        self.assertEqual(self._patch(url, {"password": "short"}).status_code, 422)
+        self.assertEqual(self._patch(url, {"email": "other@example.com"}).status_code, 400)
+        self.assertEqual(self._patch(url, {}).get_json()["changed"], [])
+
+    def test_put_user_is_validated(self):
+        response = self.client.put(f"/users/{self.user_id}", json={"email": "nope"}, headers=self.headers)
+        self.assertEqual(response.status_code, 422)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+# tests/test_profiles.py
+import os
+import sys
+import types
+import unittest
+from unittest import mock
+from flask_sqlalchemy import SQLAlchemy
+from extensions import db
+from journalapi import create_app, check_shared_engine, profiles
+from journalapi.handlers import user_handler
+
+MEMORY = {"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"}
+
+class TestProfiles(unittest.TestCase):
+    def setUp(self):
+        patch = mock.patch.dict(os.environ)
+        patch.start()
+        self.addCleanup(patch.stop)
+        os.environ.pop("JOURNAL_PROFILE", None)
+
+    def test_profile_resolution(self):
+        self.assertEqual(create_app(MEMORY).config["PROFILE"], "dev")
+        self.assertEqual(create_app({**MEMORY, "TESTING": True}).config["PROFILE"], "test")
+        os.environ["JOURNAL_PROFILE"] = "prod"
+        self.assertEqual(create_app(MEMORY).config["PROFILE"], "prod")
+        self.assertEqual(create_app(MEMORY, profile="test").config["PROFILE"], "test")
+        with self.assertRaises(ValueError):
+            create_app(MEMORY, profile="staging")
+
+    def test_profile_settings_and_overrides(self):
+        dev = create_app(MEMORY, profile="dev")
+        self.assertTrue(dev.debug)
+        self.assertTrue(dev.config["SWAGGER_ENABLED"])
+        prod = create_app({**MEMORY, "COMPRESSION_ENABLED": False}, profile="prod")
+        self.assertFalse(prod.debug)
+        self.assertFalse(prod.config["SWAGGER_ENABLED"])
+        self.assertFalse(prod.config["COMPRESSION_ENABLED"])
+        self.assertEqual(prod.logger.level, 20)
+        self.assertTrue(prod.config["SQLALCHEMY_ENGINE_OPTIONS"]["pool_pre_ping"])
+        # Extensions fill in engine options in place; the shared profile must not change.
+        self.assertEqual(profiles.PROFILES["prod"]["SQLALCHEMY_ENGINE_OPTIONS"]["connect_args"], {"timeout": 15})
+
+    def test_prod_factory_serves_requests(self):
+        app = create_app(MEMORY, profile="prod")
+        with app.app_context():
+            db.create_all()
+        response = app.test_client().post("/users/register", json={
+            "username": "produser", "email": "prod@example.com", "password": "password123"})
+        self.assertEqual(response.status_code, 201)
+
+
+class TestSharedEngineCheck(unittest.TestCase):
+    def test_one_instance_everywhere(self):
+        import journalapi
+        self.assertIs(journalapi.db, db)
+        self.assertIs(user_handler.db, db)
+
+    def test_second_instance_is_rejected(self):
+        app = create_app({**MEMORY, "TESTING": True})
+        rogue = types.ModuleType("journalapi.rogue")
+        rogue.db = SQLAlchemy()
+        with mock.patch.dict(sys.modules, {"journalapi.rogue": rogue}):
+            with self.assertRaisesRegex(RuntimeError, "journalapi.rogue"):
+                check_shared_engine(app)
+
+if __name__ == "__main__":
+    unittest.main()
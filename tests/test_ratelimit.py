@@ -0,0 +1,129 @@
+# tests/test_ratelimit.py
+import os
+import tempfile
+import unittest
+from app import create_app
+from extensions import db
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token
+from journalapi.models import User
+from journalapi.ratelimit import SQLiteStorage, SlidingWindow, TokenBucket, parse_rate
+
+class TestRateLimitAlgorithms(unittest.TestCase):
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("10/minute"), (10, 60))
+        self.assertEqual(parse_rate("5/30seconds"), (5, 30))
+        self.assertEqual(parse_rate("1000/day"), (1000, 86400))
+
+    def test_token_bucket_burst_then_refill(self):
+        bucket = TokenBucket(3, 3)
+        state = None
+        for _ in range(3):
+            state, decision = bucket(state, 100.0)
+            self.assertTrue(decision.allowed)
+        state, decision = bucket(state, 100.0)
+        self.assertFalse(decision.allowed)
+        self.assertAlmostEqual(decision.retry_after, 1.0)
+        state, decision = bucket(state, 101.0)
+        self.assertTrue(decision.allowed)
+
+    def test_sliding_window_weights_previous_window(self):
+        window = SlidingWindow(4, 10)
+        state = None
+        for _ in range(4):
+            state, decision = window(state, 5.0)
+            self.assertTrue(decision.allowed)
+        state, decision = window(state, 9.0)
+        self.assertFalse(decision.allowed)
+        # At t=12.5 the previous window still counts 4 * 0.75 = 3 requests.
+        state, decision = window(state, 12.5)
+        self.assertTrue(decision.allowed)
+        state, decision = window(state, 12.6)
+        self.assertFalse(decision.allowed)
+        self.assertGreater(decision.retry_after, 0)
+
+    def test_sqlite_storage_is_shared(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ratelimit.db")
+            worker_a, worker_b = SQLiteStorage(path), SQLiteStorage(path)
+            bucket = TokenBucket(2, 60)
+            self.assertTrue(worker_a.update("k", bucket, 100.0).allowed)
+            self.assertTrue(worker_b.update("k", bucket, 100.0).allowed)
+            self.assertFalse(worker_a.update("k", bucket, 100.0).allowed)
+            self.assertTrue(worker_b.update("other", bucket, 100.0).allowed)
+
+    def test_sqlite_storage_purges_expired_counters(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = SQLiteStorage(os.path.join(tmp, "ratelimit.db"), purge_every=3)
+            bucket = TokenBucket(2, 60)
+            count = "SELECT COUNT(*) FROM ratelimit"
+            storage.update("once-a", bucket, 100.0)
+            storage.update("once-b", bucket, 100.0)
+            self.assertEqual(storage._connection().execute(count).fetchone()[0], 2)
+            # Both expire 120 s after their last hit; the third update purges them.
+            storage.update("later", bucket, 300.0)
+            self.assertEqual(storage._connection().execute("SELECT key FROM ratelimit").fetchall(), [("later",)])
+
+class TestRateLimitRoutes(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "RATELIMIT_DEFAULT": "3/minute",
+            "RATELIMIT_RULES": {"api.userloginresource": {"rate": "2/minute", "key": "ip"}}
+        })
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            users = [User(username=f"user{i}", email=f"user{i}@example.com",
+                          password=generate_password_hash("password123")) for i in range(2)]
+            db.session.add_all(users)
+            db.session.commit()
+            self.tokens = [create_access_token(identity=str(u.id)) for u in users]
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def auth(self, i):
+        return {"Authorization": f"Bearer {self.tokens[i]}"}
+
+    def test_headers_on_allowed_response(self):
+        response = self.client.get("/entries/", headers=self.auth(0))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["RateLimit-Limit"], "3")
+        self.assertEqual(response.headers["RateLimit-Remaining"], "2")
+        self.assertIn("RateLimit-Reset", response.headers)
+
+    def test_limit_returns_429_with_retry_after(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get("/entries/", headers=self.auth(0)).status_code, 200)
+        response = self.client.get("/entries/", headers=self.auth(0))
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response.headers["Retry-After"]), 1)
+        self.assertIn("error", response.get_json())
+
+    def test_budgets_are_per_identity(self):
+        for _ in range(4):
+            self.client.get("/entries/", headers=self.auth(0))
+        self.assertEqual(self.client.get("/entries/", headers=self.auth(1)).status_code, 200)
+
+    def test_route_rule_keyed_by_ip(self):
+        body = {"email": "user0@example.com", "password": "wrong"}
+        self.assertEqual(self.client.post("/users/login", json=body).status_code, 401)
+        self.assertEqual(self.client.post("/users/login", json=body).status_code, 401)
+        self.assertEqual(self.client.post("/users/login", json=body).status_code, 429)
+        other_ip = self.client.post("/users/login", json=body, environ_base={"REMOTE_ADDR": "10.0.0.9"})
+        self.assertEqual(other_ip.status_code, 401)
+
+    def test_disabled(self):
+        app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "RATELIMIT_ENABLED": False
+        })
+        self.assertNotIn("journal_ratelimit", app.extensions)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+# tests/test_replica.py
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+import requests
+from werkzeug.serving import make_server
+from app import create_app
+from extensions import db
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token
+from journalapi.models import JournalEntry, User
+
+from client import http_client, replica
+from client import config as client_config
+
+class TestReplica(unittest.TestCase):
+    """The CLI's offline replica syncing against a real local server."""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{self.path}",
+            "RATELIMIT_ENABLED": False,
+            "EVENTS_TAILER_ENABLED": False
+        })
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="testuser", email="test@example.com",
+                        password=generate_password_hash("password123"))
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+            self.token = token = create_access_token(identity=str(user.id))
+        self.server = make_server("127.0.0.1", 0, self.app, threaded=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.home = tempfile.mkdtemp()
+        patches = [
+            mock.patch.object(client_config, "API_URL", f"http://127.0.0.1:{self.server.server_port}"),
+            mock.patch.object(client_config, "CACHE_ENABLED", False),
+            mock.patch.object(http_client.auth, "get_auth", return_value={"Authorization": f"Bearer {token}"}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.store = replica.Replica(os.path.join(self.home, "replica.db"))
+
+    def tearDown(self):
+        self.store.close()
+        self.server.shutdown()
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.remove(self.path)
+        shutil.rmtree(self.home)
+
+    def _server_entry(self, title, content="c"):
+        return http_client.post("/entries/", json={"title": title, "content": content, "tags": []}).json()["entry_id"]
+
+    def _server_titles(self):
+        with self.app.app_context():
+            return sorted(e.title for e in JournalEntry.query.all())
+
+    def test_pull_is_incremental(self):
+        first = self._server_entry("first")
+        self.assertEqual(self.store.sync()["pulled"], 1)
+        self.assertEqual([e["title"] for e in self.store.entries()], ["first"])
+
+        second = self._server_entry("second")
+        http_client.delete(f"/entries/{first}")
+        report = self.store.sync()
+        self.assertEqual(report["pulled"], 2)
+        self.assertEqual([e["id"] for e in self.store.entries()], [second])
+        self.assertEqual(self.store.sync()["pulled"], 0)
+
+    def test_offline_writes_are_pushed_later(self):
+        # No retries against the dead port; the shared session's backoff would only add seconds.
+        with mock.patch.object(client_config, "API_URL", "http://127.0.0.1:9"), \
+                mock.patch.object(http_client, "_session", requests.Session()):
+            local_id = self.store.create("written offline", "on a plane", ["travel"])
+            self.assertLess(local_id, 0)
+            with self.assertRaises(requests.RequestException):
+                self.store.sync()
+        self.assertEqual(self.store.pending_count(), 1)
+
+        self.assertEqual(self.store.sync()["pushed"], 1)
+        self.assertEqual(self._server_titles(), ["written offline"])
+        entry = self.store.entries()[0]
+        self.assertGreater(entry["id"], 0)
+        self.assertIsNotNone(entry["last_updated"])
+        self.assertEqual(self.store.pending_count(), 0)
+
+        self.store.edit(entry["id"], title="edited offline")
+        self.store.sync()
+        self.assertEqual(self._server_titles(), ["edited offline"])
+        self.store.delete(entry["id"])
+        self.store.sync()
+        self.assertEqual(self._server_titles(), [])
+
+    def test_concurrent_edit_is_a_conflict(self):
+        entry_id = self._server_entry("original")
+        self.store.sync()
+        self.store.edit(entry_id, title="mine")
+        time.sleep(0.01)
+        http_client.request("PATCH", f"/entries/{entry_id}", json={"title": "theirs"})
+
+        report = self.store.sync()
+        self.assertEqual((report["pushed"], report["conflicts"]), (0, 1))
+        conflict = self.store.conflicts()[0]
+        self.assertEqual((conflict["local"]["title"], conflict["server"]["title"]), ("mine", "theirs"))
+        self.assertEqual(self._server_titles(), ["theirs"])
+
+        self.assertTrue(self.store.resolve(entry_id, "local"))
+        self.assertEqual(self.store.sync()["conflicts"], 0)
+        self.assertEqual(self._server_titles(), ["mine"])
+
+    def test_edit_landing_after_the_check_is_refused(self):
+        entry_id = self._server_entry("original")
+        self.store.sync()
+        self.store.edit(entry_id, title="mine")
+        server_copy = self.store._server_copy
+
+        def checked_then_edited(entry_id):
+            copy = server_copy(entry_id)
+            time.sleep(0.01)
+            http_client.request("PATCH", f"/entries/{entry_id}", json={"title": "theirs"})
+            return copy
+
+        with mock.patch.object(self.store, "_server_copy", side_effect=checked_then_edited):
+            report = self.store.push()
+        self.assertEqual(report, 0)
+        self.assertEqual(self._server_titles(), ["theirs"])
+        self.assertEqual(self.store.conflicts()[0]["server"]["title"], "theirs")
+
+    def test_retried_create_is_not_duplicated(self):
+        self.store.create("once", "body", [])
+        post = http_client.post
+
+        def lost_response(*args, **kwargs):
+            post(*args, **kwargs)
+            raise requests.ConnectionError("response lost")
+
+        with mock.patch.object(http_client, "post", side_effect=lost_response):
+            with self.assertRaises(requests.ConnectionError):
+                self.store.sync()
+        self.assertEqual(self.store.sync()["pushed"], 1)
+        self.assertEqual(self._server_titles(), ["once"])
+        self.assertEqual(self.store.db.execute("SELECT count(*) FROM meta WHERE key LIKE 'create_key:%'")
+                         .fetchone()[0], 0)
+
+    def test_resolve_keeping_server_copy(self):
+        entry_id = self._server_entry("original")
+        self.store.sync()
+        self.store.delete(entry_id)
+        time.sleep(0.01)
+        http_client.request("PATCH", f"/entries/{entry_id}", json={"content": "still here"})
+        self.store.sync()
+        self.store.resolve(entry_id, "server")
+        self.assertEqual(self.store.get(entry_id)["content"], "still here")
+        self.assertEqual(self.store.pending_count(), 0)
+
+    def test_local_search(self):
+        self._server_entry("Lake trip", "We swam in the cold lake at dawn")
+        self._server_entry("Work", "Quarterly planning all day")
+        self.store.sync()
+        self.assertEqual([e["title"] for e in self.store.search("lake")], ["Lake trip"])
+        self.assertEqual([e["title"] for e in self.store.search("planning day")], ["Work"])
+        self.assertEqual(self.store.search('"unbalanced'), [])
+
+    def test_background_sync_runs_the_cli(self):
+        self._server_entry("from the server")
+        with open(os.path.join(self.home, ".journal_token"), "w") as f:
+            json.dump({"token": self.token}, f)
+        env = {"HOME": self.home, "API_URL": client_config.API_URL, "JOURNAL_REPLICA_DIR": self.home,
+               "JOURNAL_CACHE": "0"}
+        with mock.patch.dict(os.environ, env), mock.patch.object(client_config, "REPLICA_DIR", self.home):
+            store = replica.Replica(replica.replica_path(self.token))
+            self.addCleanup(store.close)
+            process = replica.sync_in_background(store, force=True)
+            self.assertEqual(process.wait(60), 0)
+        with open(store.path + ".log") as log:
+            self.assertEqual(log.read(), "")
+        self.assertEqual([e["title"] for e in store.entries()], ["from the server"])
+        self.assertIsNone(replica.sync_in_background(store))  # fresh, nothing pending
+
+    def test_replica_per_user(self):
+        with mock.patch.object(client_config, "REPLICA_DIR", self.home):
+            with self.app.app_context():
+                mine = create_access_token(identity=str(self.user_id))
+                theirs = create_access_token(identity=str(self.user_id + 1))
+            self.assertEqual(replica.replica_path(mine), replica.replica_path(mine))
+            self.assertNotEqual(replica.replica_path(mine), replica.replica_path(theirs))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+# tests/test_replicas.py
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from sqlalchemy import delete
+from app import create_app
+from extensions import db
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token
+from journalapi.models import JournalEntry, User, UserStats
+from journalapi.replicas import SQLiteMarkers
+
+class TestReplicaRouting(unittest.TestCase):
+    """Two SQLite files stand in for a primary and its replicas; copying the file is replication."""
+
+    def setUp(self):
+        self.work = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work)
+        self.primary = os.path.join(self.work, "primary.db")
+        self.replica_paths = [os.path.join(self.work, f"replica{i}.db") for i in range(2)]
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{self.primary}",
+            "DATABASE_REPLICA_URIS": [f"sqlite:///{path}" for path in self.replica_paths],
+            "REPLICA_STICKY_SECONDS": 0.3,
+            "RATELIMIT_ENABLED": False,
+            "EVENTS_TAILER_ENABLED": False,
+        })
+        self.router = self.app.extensions["journal_replicas"]
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            users = [User(username=name, email=f"{name}@example.com", password=generate_password_hash("password123"))
+                     for name in ("writer", "reader")]
+            db.session.add_all(users)
+            db.session.commit()
+            self.writer_id, self.reader_id = (user.id for user in users)
+            self.headers = {name: {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+                            for name, user in zip(("writer", "reader"), users)}
+        self.replicate()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        for engine in self.router.engines:
+            engine.dispose()
+
+    def replicate(self, *replicas):
+        for i in replicas or range(len(self.replica_paths)):
+            self.router.engines[i].dispose()
+            shutil.copyfile(self.primary, self.replica_paths[i])
+
+    def _add_entry(self, title):
+        with self.app.app_context():
+            entry = JournalEntry(user_id=self.writer_id, title=title, content="Body", tags="[]")
+            db.session.add(entry)
+            db.session.commit()
+            return entry.id
+
+    def _titles(self, user="writer"):
+        response = self.client.get("/entries/", headers=self.headers[user])
+        self.assertEqual(response.status_code, 200)
+        return [entry["title"] for entry in response.get_json()["entries"]]
+
+    def test_reads_come_from_replicas_in_turn(self):
+        self._add_entry("first")
+        self.assertEqual(self._titles(), [])
+        self.replicate(0)
+        self.assertEqual([self._titles() for _ in range(4)], [[], ["first"], [], ["first"]])
+
+    def test_read_your_writes_after_a_write(self):
+        response = self.client.post("/entries/", json={"title": "mine", "content": "Body", "tags": []},
+                                    headers=self.headers["writer"])
+        self.assertEqual(response.status_code, 201)
+        entry_id = response.get_json()["entry_id"]
+        # The writer reads from the primary for a while; everyone else still reads the replicas.
+        self.assertEqual(self.client.get(f"/entries/{entry_id}", headers=self.headers["writer"]).status_code, 200)
+        self.assertEqual(self._titles(), ["mine"])
+        self.assertFalse(self.router.reads_from_primary(str(self.reader_id)))
+        time.sleep(0.35)
+        self.assertEqual(self.client.get(f"/entries/{entry_id}", headers=self.headers["writer"]).status_code, 404)
+
+    def test_writes_inside_a_read_go_to_the_primary(self):
+        # The first stats read builds the stats row; the insert and later reads must use the primary.
+        response = self.client.get(f"/users/{self.reader_id}/stats", headers=self.headers["reader"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["entry_count"], 0)
+        with self.app.app_context():
+            self.assertIsNotNone(db.session.get(UserStats, self.reader_id))
+
+    def _post(self, title):
+        response = self.client.post("/entries/", json={"title": title, "content": "Body", "tags": []},
+                                    headers=self.headers["writer"])
+        self.assertEqual(response.status_code, 201)
+
+    def _entry_count(self, path):
+        response = self.client.get(path, headers=self.headers["writer"])
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        return body["entry_count"] if "entry_count" in body else sum(b["entry_count"] for b in body["buckets"])
+
+    def test_caches_are_rebuilt_from_the_primary_not_a_stale_replica(self):
+        analytics = f"/users/{self.writer_id}/analytics?bucket=month"
+        stats = f"/users/{self.writer_id}/stats"
+        self._post("first")
+        self.assertEqual(self._entry_count(analytics), 1)  # builds the cache (sticky read on the primary)
+        self._post("second")  # flags the bucket stale
+        with self.app.app_context():
+            db.session.execute(delete(UserStats))  # built again on the next stats read
+            db.session.commit()
+        self.replicate()
+        self._add_entry("third")  # the replicas now lag the primary by one entry
+        time.sleep(0.35)
+        self.assertFalse(self.router.reads_from_primary(str(self.writer_id)))
+        self.assertEqual(self._entry_count(analytics), 3)
+        self.assertEqual(self._entry_count(stats), 3)
+        self.replicate()
+        self.assertEqual([self._entry_count(analytics), self._entry_count(stats)], [3, 3])
+
+    def test_no_replicas_no_routing(self):
+        app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+        self.assertNotIn("journal_replicas", app.extensions)
+
+    def test_sqlite_markers_are_shared(self):
+        path = os.path.join(self.work, "sticky.db")
+        SQLiteMarkers(path).mark("7", time.time() + 60)
+        other = SQLiteMarkers(path)
+        self.assertTrue(other.active("7", time.time()))
+        self.assertFalse(other.active("8", time.time()))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+# tests/test_seed.py
+import datetime
+import unittest
+from collections import Counter
+from sqlalchemy import func, select
+from app import create_app
+from extensions import db
+from werkzeug.security import check_password_hash
+from journalapi.models import Comment, EditHistory, JournalEntry, User, UserStats
+from journalapi.seed import SEED_PASSWORD, seed
+
+UNTIL = datetime.date(2026, 1, 31)
+
+class TestSeed(unittest.TestCase):
+    def _app(self):
+        app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+        with app.app_context():
+            db.create_all()
+        return app
+
+    def _seeded(self, **options):
+        app = self._app()
+        with app.app_context():
+            totals = seed(**{"users": 40, "entries": 1500, "until": UNTIL, **options})
+        return app, totals
+
+    def _rows(self, app, model, *columns):
+        with app.app_context():
+            return db.session.execute(select(*(getattr(model, c) for c in columns)).order_by(model.id)).all()
+
+    def test_volumes_and_consistency(self):
+        app, totals = self._seeded()
+        with app.app_context():
+            self.assertEqual(totals["users"], db.session.scalar(select(func.count(User.id))))
+            self.assertEqual(totals["entries"], 1500)
+            self.assertEqual(totals["comments"], db.session.scalar(select(func.sum(JournalEntry.comment_count))))
+            self.assertEqual(totals["edit_history"], db.session.scalar(select(func.count(EditHistory.id))))
+            self.assertEqual(db.session.scalar(select(func.sum(UserStats.entry_count))), 1500)
+
+            user = db.session.scalars(select(User)).first()
+            self.assertTrue(check_password_hash(user.password, SEED_PASSWORD))
+            latest = db.session.scalar(select(func.max(JournalEntry.date)))
+            self.assertLess(latest, datetime.datetime.combine(UNTIL + datetime.timedelta(days=1), datetime.time()))
+
+            replies = db.session.scalars(select(Comment).where(Comment.parent_id.is_not(None))).all()
+            self.assertTrue(replies)
+            for reply in replies:
+                parent = db.session.get(Comment, reply.parent_id)
+                self.assertEqual(parent.journal_entry_id, reply.journal_entry_id)
+                self.assertTrue(reply.path.startswith(parent.path + "/"))
+
+    def test_distributions_are_skewed(self):
+        app, _ = self._seeded()
+        per_user = sorted(Counter(row.user_id for row in self._rows(app, JournalEntry, "user_id")).values())
+        # The busiest tenth of users writes far more than a tenth of the entries.
+        self.assertGreater(sum(per_user[-4:]) / 1500, 0.3)
+        comments = [row.comment_count for row in self._rows(app, JournalEntry, "comment_count")]
+        self.assertGreater(comments.count(0) / len(comments), 0.4)
+        self.assertGreater(max(comments), 10)
+
+    def test_same_seed_same_rows(self):
+        columns = ("id", "user_id", "title", "inline_content", "tags", "sentiment_score", "date")
+        first = self._rows(self._seeded(seed=7)[0], JournalEntry, *columns)
+        self.assertEqual(first, self._rows(self._seeded(seed=7)[0], JournalEntry, *columns))
+        self.assertNotEqual(first, self._rows(self._seeded(seed=8)[0], JournalEntry, *columns))
+
+    def test_seed_command_appends(self):
+        app = self._app()
+        runner = app.test_cli_runner()
+        for _ in range(2):
+            result = runner.invoke(args=["seed", "--users", "5", "--entries", "50", "--until", "2026-01-31"])
+            self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Inserted 5 users, 50 entries", result.output)
+        with app.app_context():
+            self.assertEqual(db.session.scalar(select(func.count(User.id))), 10)
+            self.assertEqual(db.session.scalar(select(func.count(JournalEntry.id))), 100)
+
+if __name__ == "__main__":
+    unittest.main()
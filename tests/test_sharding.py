@@ -0,0 +1,339 @@
+# tests/test_sharding.py
+import os
+import shutil
+import tempfile
+import unittest
+from flask_jwt_extended import decode_token
+from sqlalchemy import create_engine, func, select, text
+from app import create_app
+from extensions import db
+from journalapi import sharding
+from journalapi.models import JournalEntry, User
+
+def _count(engine, sql, **params):
+    with engine.connect() as conn:
+        return conn.execute(text(sql), params).scalar()
+
+class ShardedAppTestCase(unittest.TestCase):
+    """A directory file and a few shard files in a temporary folder."""
+    shard_count = 3
+
+    def setUp(self):
+        self.work = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work)
+        self.apps = []
+        self.app = self._app(self.shard_count)
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            sharding.create_all()
+
+    def tearDown(self):
+        for app in self.apps:
+            with app.app_context():
+                db.session.remove()
+                db.engine.dispose()
+            shards = app.extensions.get("journal_shards")
+            for engine in shards.engines if shards else ():
+                engine.dispose()
+
+    def _path(self, name):
+        return os.path.join(self.work, name)
+
+    def _app(self, shard_count, **config):
+        app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{self._path('directory.db')}",
+            "SHARD_URIS": [f"sqlite:///{self._path(f'shard{i}.db')}" for i in range(shard_count)],
+            "SHARD_ID_BLOCK_SIZE": 5,
+            "SHARD_MOVE_GRACE_SECONDS": 0,
+            "RATELIMIT_ENABLED": False,
+            "EVENTS_TAILER_ENABLED": False,
+            **config,
+        })
+        self.apps.append(app)
+        return app
+
+    def register(self, name, client=None):
+        client = client or self.client
+        response = client.post("/users/register", json={"username": name, "email": f"{name}@example.com",
+                                                        "password": "password123"})
+        self.assertEqual(response.status_code, 201, response.get_json())
+        token = client.post("/users/login", json={"email": f"{name}@example.com",
+                                                  "password": "password123"}).get_json()["token"]
+        with client.application.app_context():
+            user_id = int(decode_token(token)["sub"])
+        return user_id, {"Authorization": f"Bearer {token}"}
+
+    def shard_of(self, user_id, app=None):
+        with (app or self.app).app_context():
+            return sharding.router().locate(user_id=user_id).shard
+
+    def engines(self, app=None):
+        return (app or self.app).extensions["journal_shards"].engines
+
+    def post_entry(self, headers, title, client=None):
+        response = (client or self.client).post("/entries/", json={"title": title, "content": "Body", "tags": []},
+                                                headers=headers)
+        self.assertEqual(response.status_code, 201)
+        return response.get_json()["entry_id"]
+
+    def titles(self, headers, client=None):
+        response = (client or self.client).get("/entries/", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        return sorted(entry["title"] for entry in response.get_json()["entries"])
+
+class TestShardRouting(ShardedAppTestCase):
+    def test_users_live_on_their_home_shard_only(self):
+        users = [self.register(f"user{i}")[0] for i in range(12)]
+        router = self.app.extensions["journal_shards"]
+        for user_id in users:
+            shard = self.shard_of(user_id)
+            self.assertEqual(shard, router.home(user_id))
+            for index, engine in enumerate(self.engines()):
+                self.assertEqual(_count(engine, "SELECT count(*) FROM users WHERE id = :id", id=user_id),
+                                 int(index == shard))
+        self.assertGreater(len({self.shard_of(user_id) for user_id in users}), 1)
+        # The directory keeps only global rows.
+        self.assertEqual(_count(create_engine(f"sqlite:///{self._path('directory.db')}"),
+                                "SELECT count(*) FROM users"), 0)
+
+    def test_requests_read_and_write_their_users_shard(self):
+        accounts = [self.register(f"user{i}") for i in range(6)]
+        entry_ids = []
+        for i, (user_id, headers) in enumerate(accounts):
+            entry_ids.append(self.post_entry(headers, f"entry of {i}"))
+            self.assertEqual(self.client.post(f"/entries/{entry_ids[-1]}/comments", json={"content": "Nice"},
+                                              headers=headers).status_code, 201)
+        self.assertEqual(len(set(entry_ids)), len(entry_ids))
+        for i, (user_id, headers) in enumerate(accounts):
+            self.assertEqual(self.titles(headers), [f"entry of {i}"])
+            stats = self.client.get(f"/users/{user_id}/stats", headers=headers).get_json()
+            self.assertEqual(stats["entry_count"], 1)
+            shard = self.engines()[self.shard_of(user_id)]
+            self.assertEqual(_count(shard, "SELECT count(*) FROM comments WHERE journal_entry_id = :id",
+                                    id=entry_ids[i]), 1)
+        # Another user's entry is on another shard, or at least not theirs.
+        other = accounts[1][1]
+        self.assertEqual(self.client.get(f"/entries/{entry_ids[0]}", headers=other).status_code, 404)
+
+    def test_comments_on_another_users_entry_live_with_the_entry(self):
+        accounts = [self.register(f"user{i}") for i in range(6)]
+        (owner, owner_headers), (commenter, headers) = next(
+            (a, b) for a in accounts for b in accounts if self.shard_of(a[0]) != self.shard_of(b[0]))
+        entry_id = self.post_entry(owner_headers, "shared")
+        url = f"/entries/{entry_id}/comments"
+        response = self.client.post(url, json={"content": "Nice"}, headers=headers)
+        self.assertEqual(response.status_code, 201)
+        comment_id = response.get_json()["comment_id"]
+        owner_shard, commenter_shard = (self.engines()[self.shard_of(u)] for u in (owner, commenter))
+        self.assertEqual(_count(owner_shard, "SELECT count(*) FROM comments WHERE id = :id", id=comment_id), 1)
+        self.assertEqual(_count(commenter_shard, "SELECT count(*) FROM comments"), 0)
+
+        listing = self.client.get(url, headers=owner_headers).get_json()
+        self.assertEqual(([c["id"] for c in listing["comments"]], listing["count"]), ([comment_id], 1))
+        response = self.client.patch(f"{url}/{comment_id}", json={"content": "Very nice"}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.delete(f"{url}/{comment_id}", headers=owner_headers).status_code, 404)
+        self.assertEqual(self.client.delete(f"{url}/{comment_id}", headers=headers).status_code, 200)
+        self.assertEqual(self.client.get(url, headers=owner_headers).get_json()["count"], 0)
+        self.assertEqual(self.client.post("/entries/999999/comments", json={"content": "?"},
+                                          headers=headers).status_code, 404)
+
+    def test_deleting_a_commenter_hides_their_comments_on_other_shards(self):
+        accounts = [self.register(f"user{i}") for i in range(6)]
+        (owner, owner_headers), (commenter, headers) = next(
+            (a, b) for a in accounts for b in accounts if self.shard_of(a[0]) != self.shard_of(b[0]))
+        entry_id = self.post_entry(owner_headers, "shared")
+        url = f"/entries/{entry_id}/comments"
+        self.client.post(url, json={"content": "Nice"}, headers=owner_headers)
+        self.client.post(url, json={"content": "Bye"}, headers=headers)
+        sync = self.client.get("/sync", headers=owner_headers).get_json()
+        self.assertEqual(self.client.delete(f"/users/{commenter}", headers=headers).status_code, 200)
+
+        listing = self.client.get(url, headers=owner_headers).get_json()
+        self.assertEqual(([c["content"] for c in listing["comments"]], listing["count"]), (["Nice"], 1))
+        entry = self.client.get(f"/entries/{entry_id}", headers=owner_headers).get_json()
+        self.assertEqual(entry["comment_count"], 1)
+        delta = self.client.get(f"/sync?since={sync['next']}", headers=owner_headers).get_json()
+        self.assertEqual([(c["kind"], c["op"]) for c in delta["changes"]], [("comment", "delete")])
+
+    def test_user_check_finds_a_commenter_routed_to_another_shard(self):
+        self.app = self._app(self.shard_count, JWT_USER_CHECK=True)
+        self.client = self.app.test_client()
+        accounts = [self.register(f"user{i}") for i in range(6)]
+        (owner, owner_headers), (commenter, headers) = next(
+            (a, b) for a in accounts for b in accounts if self.shard_of(a[0]) != self.shard_of(b[0]))
+        entry_id = self.post_entry(owner_headers, "shared")
+        response = self.client.post(f"/entries/{entry_id}/comments", json={"content": "Nice"}, headers=headers)
+        self.assertEqual(response.status_code, 201, response.get_json())
+        # No cached "deleted" answer locks the commenter out of their own shard afterwards.
+        self.assertEqual(self.titles(headers), [])
+        self.client.delete(f"/users/{commenter}", headers=headers)
+        self.assertEqual(self.client.get("/entries/", headers=headers).status_code, 401)
+
+    def test_email_and_username_are_unique_across_shards(self):
+        user_id, headers = self.register("alice")
+        self.register("bob")
+        duplicate = self.client.post("/users/register", json={"username": "carol", "email": "alice@example.com",
+                                                              "password": "password123"})
+        self.assertEqual(duplicate.status_code, 400)
+        taken = self.client.post("/users/register", json={"username": "alice", "email": "other@example.com",
+                                                          "password": "password123"})
+        self.assertEqual(taken.status_code, 400)
+        response = self.client.patch(f"/users/{user_id}", json={"email": "bob@example.com"}, headers=headers)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(f"/users/{user_id}", json={"email": "alice2@example.com"}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        login = self.client.post("/users/login", json={"email": "alice2@example.com", "password": "password123"})
+        self.assertEqual(login.status_code, 200)
+
+    def test_sharded_table_without_a_shard_raises(self):
+        with self.app.app_context():
+            with self.assertRaises(RuntimeError):
+                JournalEntry.query.all()
+            with sharding.use_shard(0):
+                self.assertEqual(JournalEntry.query.all(), [])
+
+    def test_query_all_spans_every_shard(self):
+        accounts = [self.register(f"user{i}") for i in range(6)]
+        for user_id, headers in accounts:
+            self.post_entry(headers, "one")
+            self.post_entry(headers, "two")
+        with self.app.app_context():
+            self.assertEqual(sharding.count_all(JournalEntry), 12)
+            per_shard = sharding.query_all(select(JournalEntry.user_id, func.count())
+                                           .group_by(JournalEntry.user_id))
+            self.assertEqual(sorted(row[0] for _, row in per_shard), sorted(u for u, _ in accounts))
+            for shard, row in per_shard:
+                self.assertEqual(shard, self.shard_of(row[0]))
+
+    def test_replicas_and_shards_cannot_be_combined(self):
+        with self.assertRaises(ValueError):
+            self._app(2, DATABASE_REPLICA_URIS=[f"sqlite:///{self._path('replica.db')}"])
+
+class TestMovingUsers(ShardedAppTestCase):
+    def test_move_keeps_rows_ids_and_feed(self):
+        user_id, headers = self.register("mover")
+        entry_id = self.post_entry(headers, "before")
+        self.client.post(f"/entries/{entry_id}/comments", json={"content": "Root"}, headers=headers)
+        self.client.put(f"/entries/{entry_id}", json={"title": "after", "content": "Edited", "tags": []},
+                        headers=headers)
+        old_token = self.client.get("/sync", headers=headers).get_json()["next"]
+        source = self.shard_of(user_id)
+        target = (source + 1) % self.shard_count
+
+        with self.app.app_context():
+            copied = sharding.move_user(user_id, target)
+        self.assertEqual(copied["journal_entries"], 1)
+        self.assertEqual(copied["comments"], 1)
+        self.assertEqual(self.shard_of(user_id), target)
+        self.assertEqual(_count(self.engines()[source], "SELECT count(*) FROM journal_entries"), 0)
+        self.assertEqual(_count(self.engines()[source], "SELECT count(*) FROM users"), 0)
+
+        self.assertEqual(self.titles(headers), ["after"])
+        comments = self.client.get(f"/entries/{entry_id}/comments", headers=headers).get_json()
+        self.assertEqual([c["content"] for c in comments["comments"]], ["Root"])
+        history = self.client.get(f"/entries/{entry_id}/history", headers=headers)
+        self.assertEqual(history.status_code, 200)
+        # The old feed position belongs to the old shard: the client starts over from a snapshot.
+        self.assertEqual(self.client.get(f"/sync?since={old_token}", headers=headers).status_code, 400)
+        snapshot = self.client.get("/sync", headers=headers).get_json()
+        self.assertIn(entry_id, [item["id"] for item in snapshot["changes"] if item["kind"] == "entry"])
+        # New rows keep getting ids unique across shards.
+        self.assertGreater(self.post_entry(headers, "later"), entry_id)
+
+    def test_writes_wait_while_a_user_moves(self):
+        user_id, headers = self.register("busy")
+        with self.app.app_context():
+            sharding._set_moving([user_id], True)
+        response = self.client.post("/entries/", json={"title": "t", "content": "c", "tags": []}, headers=headers)
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response.headers)
+        self.assertEqual(self.client.get("/entries/", headers=headers).status_code, 200)
+
+    def test_rebalance_after_adding_a_shard(self):
+        accounts = {name: self.register(name) for name in (f"user{i}" for i in range(16))}
+        for name, (_, headers) in accounts.items():
+            self.post_entry(headers, name)
+        bigger = self._app(self.shard_count + 1)
+        with bigger.app_context():
+            sharding.create_all()
+            moved = sharding.rebalance()
+            router = sharding.router()
+            self.assertTrue(all(self.shard_of(user_id, bigger) == router.home(user_id)
+                                for user_id, _ in accounts.values()))
+            # Jump hashing only sends users to the new shard.
+            self.assertEqual(sharding.count_all(User), 16)
+        self.assertEqual(moved, _count(self.engines(bigger)[-1], "SELECT count(*) FROM users"))
+        self.assertLess(moved, 16)
+        client = bigger.test_client()
+        for name, (_, headers) in accounts.items():
+            self.assertEqual(self.titles(headers, client), [name])
+
+    def test_migrating_an_unsharded_database(self):
+        single = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{self._path('shard0.db')}",
+                             "RATELIMIT_ENABLED": False, "EVENTS_TAILER_ENABLED": False})
+        self.apps.append(single)
+        with single.app_context():
+            db.drop_all()
+            db.create_all()
+        client = single.test_client()
+        accounts = {name: self.register(name, client) for name in ("ann", "ben", "cat", "dan", "eve")}
+        last_entry = max(self.post_entry(headers, name, client) for name, (_, headers) in accounts.items())
+
+        with self.app.app_context():
+            self.assertEqual(sharding.sync_directory(), {"added": 5, "updated": 0, "removed": 0})
+            sharding.rebalance()
+        for name, (user_id, headers) in accounts.items():
+            self.assertEqual(self.titles(headers), [name])
+        self.assertGreater(self.post_entry(accounts["ann"][1], "new"), last_entry)
+
+    def test_shards_cli(self):
+        self.register("cli")
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=["shards", "status"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("entries", result.output)
+        result = runner.invoke(args=["shards", "rebalance", "--dry-run"])
+        self.assertIn("0 users would move", result.output)
+        self.assertNotEqual(runner.invoke(args=["seed", "--users", "1"]).exit_code, 0)
+
+class TestShardedJobs(ShardedAppTestCase):
+    def test_drafts_and_compaction_run_per_shard(self):
+        accounts = [self.register(f"user{i}") for i in range(4)]
+        for user_id, headers in accounts:
+            entry_id = self.post_entry(headers, "draft me")
+            response = self.client.patch(f"/entries/{entry_id}/draft?durable=1", json={"title": "draft"},
+                                         headers=headers)
+            self.assertEqual(response.status_code, 200)
+        for user_id, _ in accounts:
+            self.assertEqual(_count(self.engines()[self.shard_of(user_id)],
+                                    "SELECT count(*) FROM entry_drafts WHERE user_id = :id", id=user_id), 1)
+
+        gone, headers = accounts[0]
+        self.assertEqual(self.client.delete(f"/users/{gone}", headers=headers).status_code, 200)
+        with self.app.app_context():
+            totals = self.app.extensions["journal_compaction"].run_once()
+            self.assertEqual(totals["users"], 1)
+            self.assertIsNone(sharding.router().locate(user_id=gone))
+            self.assertEqual(sharding.count_all(User), 3)
+        # The deleted account's email can be registered again.
+        self.register("user0")
+
+class TestHomeShard(unittest.TestCase):
+    def test_adding_a_shard_moves_a_fair_share_to_it(self):
+        before = [sharding.home_shard(i, 4) for i in range(4000)]
+        after = [sharding.home_shard(i, 5) for i in range(4000)]
+        moved = [b for a, b in zip(before, after) if a != b]
+        self.assertEqual(set(moved), {4})
+        self.assertAlmostEqual(len(moved) / 4000, 1 / 5, delta=0.03)
+        self.assertEqual(set(before), {0, 1, 2, 3})
+
+    def test_no_shards_no_routing(self):
+        app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+        self.assertNotIn("journal_shards", app.extensions)
+        with app.app_context():
+            self.assertEqual(sharding.for_each_shard(lambda: "once"), ["once"])
+
+if __name__ == "__main__":
+    unittest.main()
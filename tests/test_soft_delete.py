@@ -0,0 +1,147 @@
+# tests/test_soft_delete.py
+import unittest
+from app import create_app
+from extensions import db
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token
+from journalapi.compaction import purge_deleted, vacuum
+from journalapi.models import Comment, EditHistory, JournalEntry, User, UserStats
+
+class TestSoftDelete(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "RATELIMIT_ENABLED": False
+        })
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            user = User(username="testuser", email="test@example.com",
+                        password=generate_password_hash("password123"))
+            other = User(username="otheruser", email="other@example.com",
+                         password=generate_password_hash("password123"))
+            db.session.add_all([user, other])
+            db.session.commit()
+            self.user_id, self.other_id = user.id, other.id
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+            self.other_headers = {"Authorization": f"Bearer {create_access_token(identity=str(other.id))}"}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _create_entry(self, title, headers=None):
+        response = self.client.post("/entries/", json={"title": title, "content": "c", "tags": ["t"]},
+                                    headers=headers or self.headers)
+        self.assertEqual(response.status_code, 201)
+        return response.get_json()["entry_id"]
+
+    def _comment(self, entry_id, headers):
+        response = self.client.post(f"/entries/{entry_id}/comments", json={"content": "hi"}, headers=headers)
+        self.assertEqual(response.status_code, 201)
+        return response.get_json()["comment_id"]
+
+    def _count(self, model):
+        return db.session.query(model).execution_options(include_deleted=True).count()
+
+    def test_deleted_entry_is_hidden_but_kept(self):
+        keep = self._create_entry("keep")
+        gone = self._create_entry("gone")
+        self._comment(gone, self.headers)
+        self.assertEqual(self.client.delete(f"/entries/{gone}", headers=self.headers).status_code, 200)
+
+        self.assertEqual(self.client.get(f"/entries/{gone}", headers=self.headers).status_code, 404)
+        self.assertEqual(self.client.get(f"/entries/{gone}/comments", headers=self.headers).status_code, 404)
+        listed = self.client.get("/entries/", headers=self.headers).get_json()
+        self.assertEqual([e["id"] for e in listed["entries"]], [keep])
+        stats = self.client.get(f"/users/{self.user_id}/stats", headers=self.headers).get_json()
+        self.assertEqual(stats["entry_count"], 1)
+        analytics = self.client.get(f"/users/{self.user_id}/analytics", headers=self.headers).get_json()
+        self.assertEqual(sum(b["entry_count"] for b in analytics["buckets"]), 1)
+
+        sync = self.client.get("/sync", headers=self.headers).get_json()
+        self.assertEqual({(c["kind"], c["id"]) for c in sync["changes"]}, {("entry", keep)})
+
+        with self.app.app_context():
+            self.assertEqual(self._count(JournalEntry), 2)
+            self.assertIsNone(db.session.get(JournalEntry, gone))
+            self.assertEqual(purge_deleted(batch_size=1), {"entries": 1, "comments": 0, "users": 0, "blobs": 0, "drafts": 0})
+            self.assertEqual(self._count(JournalEntry), 1)
+            self.assertEqual(self._count(Comment), 0)
+
+    def test_delete_is_a_tombstone_in_the_change_feed(self):
+        token = self.client.get("/sync", headers=self.headers).get_json()["next"]
+        entry_id = self._create_entry("e")
+        self.client.delete(f"/entries/{entry_id}", headers=self.headers)
+        delta = self.client.get("/sync", query_string={"since": token}, headers=self.headers).get_json()
+        self.assertEqual([(c["id"], c["op"]) for c in delta["changes"]], [(entry_id, "delete")])
+
+    def test_comment_subtree_soft_delete(self):
+        entry_id = self._create_entry("e")
+        root = self._comment(entry_id, self.headers)
+        self.client.post(f"/entries/{entry_id}/comments", json={"content": "reply", "parent_id": root},
+                         headers=self.headers)
+        response = self.client.delete(f"/entries/{entry_id}/comments/{root}", headers=self.headers)
+        self.assertEqual(response.get_json()["deleted"], 2)
+        listed = self.client.get(f"/entries/{entry_id}/comments", headers=self.headers).get_json()
+        self.assertEqual(listed["count"], 0)
+        with self.app.app_context():
+            self.assertEqual(db.session.get(JournalEntry, entry_id).comment_count, 0)
+            self.assertEqual(self._count(Comment), 2)
+            self.assertEqual(purge_deleted()["comments"], 2)
+            self.assertEqual(self._count(Comment), 0)
+
+    def test_user_delete_hides_everything_and_frees_email(self):
+        mine = self._create_entry("mine")
+        self.client.put(f"/entries/{mine}", json={"title": "v2", "content": "c", "tags": []}, headers=self.headers)
+        theirs = self._create_entry("theirs", self.other_headers)
+        self._comment(theirs, self.headers)
+
+        response = self.client.delete(f"/users/{self.user_id}", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get("/entries/", headers=self.headers).status_code, 401)
+        login = self.client.post("/users/login", json={"email": "test@example.com", "password": "password123"})
+        self.assertEqual(login.status_code, 401)
+
+        other_comments = self.client.get(f"/entries/{theirs}/comments", headers=self.other_headers).get_json()
+        self.assertEqual(other_comments["count"], 0)
+        with self.app.app_context():
+            self.assertEqual(db.session.get(JournalEntry, theirs).comment_count, 0)
+
+        register = self.client.post("/users/register", json={
+            "username": "testuser", "email": "test@example.com", "password": "password123"})
+        self.assertEqual(register.status_code, 201)
+
+        progress = []
+        with self.app.app_context():
+            totals = purge_deleted(progress=lambda stage, done: progress.append((stage, done)))
+            self.assertEqual(totals, {"entries": 1, "comments": 1, "users": 1, "blobs": 0, "drafts": 0})
+            self.assertEqual(progress, [("entries", 1), ("comments", 1), ("users", 1)])
+            self.assertIsNone(db.session.query(User).execution_options(include_deleted=True)
+                              .filter_by(id=self.user_id).first())
+            self.assertEqual(self._count(EditHistory), 0)
+            self.assertEqual(db.session.query(UserStats).filter_by(user_id=self.user_id).count(), 0)
+            self.assertEqual(self._count(JournalEntry), 1)
+
+    def test_grace_period_and_vacuum(self):
+        entry_id = self._create_entry("e")
+        self.client.delete(f"/entries/{entry_id}", headers=self.headers)
+        with self.app.app_context():
+            self.assertEqual(purge_deleted(grace_seconds=3600)["entries"], 0)
+            self.assertEqual(purge_deleted()["entries"], 1)
+            self.assertIsNone(vacuum("none"))
+            self.assertIsNotNone(vacuum("full"))
+            self.assertIsNotNone(vacuum("incremental"))
+
+    def test_purge_deleted_cli(self):
+        entry_id = self._create_entry("e")
+        self.client.delete(f"/entries/{entry_id}", headers=self.headers)
+        result = self.app.test_cli_runner().invoke(args=["purge-deleted", "--vacuum", "none"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("entries: 1 purged", result.output)
+        self.assertIn("Purged 1 entries, 0 comments, 0 users, 0 blobs, 0 drafts.", result.output)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+# tests/test_startup.py
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+from app import create_app
+from journalapi import docs
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Wall time of a worker boot (imports + create_app) in a fresh interpreter, as a deploy sees it.
+# Raise it on slow CI runners and for parallel runs, where other test workers share the cores.
+BOOT_BUDGET_MS = float(os.environ.get("BOOT_BUDGET_MS", "3000"))
+
+class TestWorkerBoot(unittest.TestCase):
+    def _boot(self, factory):
+        script = (f"import sys\n{factory}\n"
+                  "sys.stdout.write('\\n'.join(sys.modules))")
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, timeout=60)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return set(result.stdout.splitlines()), elapsed
+
+    def test_production_factory_skips_optional_imports(self):
+        modules, elapsed = self._boot("from journalapi import create_app; create_app(profile='prod')")
+        for optional in ("flasgger", "yaml", "numpy"):
+            self.assertNotIn(optional, modules)
+        self.assertLess(elapsed, BOOT_BUDGET_MS)
+
+    def test_swagger_disabled_skips_flasgger(self):
+        modules, _ = self._boot("from app import create_app; create_app({'SWAGGER_ENABLED': False})")
+        self.assertNotIn("flasgger", modules)
+
+
+class TestSwaggerDocs(unittest.TestCase):
+    def setUp(self):
+        self.work = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work)
+        self.spec_file = os.path.join(self.work, "openapi.yaml")
+        shutil.copy(docs.SPEC_FILE, self.spec_file)
+        self.compiled = os.path.join(self.work, "openapi.json")
+        patch = mock.patch.object(docs, "compiled_path", return_value=self.compiled)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def _app(self, **config):
+        return create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+                           "SWAGGER_ENABLED": True, "OPENAPI_SPEC_FILE": self.spec_file, **config})
+
+    def test_spec_compiled_once_and_served(self):
+        client = self._app().test_client()
+        self.assertTrue(os.path.exists(self.compiled))
+        self.assertEqual(client.get("/apidocs/").status_code, 200)
+        spec = client.get("/apispec_1.json").get_json()
+        with open(self.compiled) as f:
+            self.assertEqual(spec["info"]["title"], json.load(f)["info"]["title"])
+
+        with mock.patch.object(docs, "compile_spec", wraps=docs.compile_spec) as compile_spec:
+            self._app()
+            compile_spec.assert_not_called()
+            os.utime(self.spec_file, (time.time() + 10, time.time() + 10))  # the YAML was edited
+            self._app()
+            compile_spec.assert_called_once()
+
+    def test_disabled(self):
+        client = self._app(SWAGGER_ENABLED=False).test_client()
+        self.assertEqual(client.get("/apidocs/").status_code, 404)
+        self.assertFalse(os.path.exists(self.compiled))
+
+if __name__ == "__main__":
+    unittest.main()
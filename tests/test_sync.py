@@ -0,0 +1,149 @@
+# tests/test_sync.py
+import unittest
+import pytest
+from extensions import db
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token
+from journalapi.models import User, Change, EditHistory
+
+@pytest.mark.usefixtures("transactional_db")
+class TestSync(unittest.TestCase):
+    def setUp(self):
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            user = User(username="testuser", email="test@example.com",
+                        password=generate_password_hash("password123"))
+            other = User(username="otheruser", email="other@example.com",
+                         password=generate_password_hash("password123"))
+            db.session.add_all([user, other])
+            db.session.commit()
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+            self.other_headers = {"Authorization": f"Bearer {create_access_token(identity=str(other.id))}"}
+
+    def _create_entry(self, title, headers=None):
+        response = self.client.post("/entries/", json={"title": title, "content": "c", "tags": []},
+                                    headers=headers or self.headers)
+        self.assertEqual(response.status_code, 201)
+        return response.get_json()["entry_id"]
+
+    def _sync(self, since=None, **params):
+        query = {"since": since, **params} if since else params
+        response = self.client.get("/sync", query_string=query, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def test_snapshot_then_incremental(self):
+        first = self._create_entry("first")
+        snapshot = self._sync()
+        self.assertEqual([(c["kind"], c["id"]) for c in snapshot["changes"]], [("entry", first)])
+        token = snapshot["next"]
+
+        self.assertEqual(self._sync(token)["changes"], [])
+
+        second = self._create_entry("second")
+        self.client.put(f"/entries/{first}", json={"title": "first v2", "content": "c", "tags": []},
+                        headers=self.headers)
+        delta = self._sync(token)
+        self.assertEqual([(c["id"], c["op"]) for c in delta["changes"]], [(second, "upsert"), (first, "upsert")])
+        self.assertEqual(delta["changes"][1]["data"]["title"], "first v2")
+
+        self.client.delete(f"/entries/{second}", headers=self.headers)
+        delta = self._sync(delta["next"])
+        self.assertEqual([(c["kind"], c["id"], c["op"]) for c in delta["changes"]], [("entry", second, "delete")])
+        self.assertNotIn("data", delta["changes"][0])
+
+    def test_insert_then_delete_collapses_to_tombstone(self):
+        token = self._sync()["next"]
+        entry_id = self._create_entry("short lived")
+        self.client.delete(f"/entries/{entry_id}", headers=self.headers)
+        changes = self._sync(token)["changes"]
+        self.assertEqual([(c["id"], c["op"]) for c in changes], [(entry_id, "delete")])
+
+    def test_comments_and_subtree_tombstones(self):
+        entry_id = self._create_entry("entry")
+        token = self._sync()["next"]
+        root = self.client.post(f"/entries/{entry_id}/comments", json={"content": "root"},
+                                headers=self.other_headers).get_json()["comment_id"]
+        reply = self.client.post(f"/entries/{entry_id}/comments", json={"content": "reply", "parent_id": root},
+                                 headers=self.other_headers).get_json()["comment_id"]
+        delta = self._sync(token)
+        self.assertEqual([(c["kind"], c["id"]) for c in delta["changes"]], [("comment", root), ("comment", reply)])
+
+        self.client.delete(f"/entries/{entry_id}/comments/{root}", headers=self.other_headers)
+        delta = self._sync(delta["next"])
+        self.assertEqual(sorted((c["id"], c["op"]) for c in delta["changes"]),
+                         [(root, "delete"), (reply, "delete")])
+
+    def test_feed_is_per_user(self):
+        token = self._sync()["next"]
+        self._create_entry("not mine", self.other_headers)
+        self.assertEqual(self._sync(token)["changes"], [])
+
+    def test_pagination(self):
+        token = self._sync()["next"]
+        ids = [self._create_entry(f"e{i}") for i in range(5)]
+        seen = []
+        while True:
+            page = self._sync(token, limit=2)
+            seen.extend(c["id"] for c in page["changes"])
+            token = page["next"]
+            if not page["has_more"]:
+                break
+        self.assertEqual(seen, ids)
+
+    def test_snapshot_pagination(self):
+        ids = [self._create_entry(f"e{i}") for i in range(3)]
+        comment = self.client.post(f"/entries/{ids[0]}/comments", json={"content": "c"},
+                                   headers=self.other_headers).get_json()["comment_id"]
+        page = self._sync(limit=2)
+        seen = [(c["kind"], c["id"]) for c in page["changes"]]
+        self.assertTrue(page["has_more"])
+        late = self._create_entry("written while paging")
+        while page["has_more"]:
+            page = self._sync(page["next"], limit=2)
+            seen.extend((c["kind"], c["id"]) for c in page["changes"])
+        self.assertEqual(seen[:5], [("entry", i) for i in ids] + [("entry", late), ("comment", comment)])
+        # The last page's token continues from before the first page, so nothing written meanwhile is missed.
+        delta = self._sync(page["next"])
+        self.assertIn(late, [c["id"] for c in delta["changes"]])
+        self.assertEqual(self._sync(delta["next"])["changes"], [])
+
+    def test_snapshot_includes_edit_history(self):
+        entry_id = self._create_entry("entry")
+        other_entry = self._create_entry("not mine", self.other_headers)
+        with self.app.app_context():
+            edits = [EditHistory(journal_entry_id=entry_id, user_id=2, previous_content="a", new_content="b"),
+                     EditHistory(journal_entry_id=other_entry, user_id=2, previous_content="a", new_content="b")]
+            db.session.add_all(edits)
+            db.session.commit()
+            edit_id = edits[0].id
+        snapshot = self._sync()
+        self.assertEqual([(c["kind"], c["id"]) for c in snapshot["changes"]],
+                         [("entry", entry_id), ("history", edit_id)])
+        self.assertEqual(snapshot["changes"][1]["data"]["new_content"], "b")
+        pages = [self._sync(limit=1)]
+        pages.append(self._sync(pages[0]["next"], limit=1))
+        self.assertEqual([c["kind"] for page in pages for c in page["changes"]], ["entry", "history"])
+        self.assertFalse(pages[1]["has_more"])
+        # Already in the snapshot, so not replayed as a delta.
+        self.assertEqual(self._sync(snapshot["next"])["changes"], [])
+
+    def test_unpaged_snapshot_without_limit(self):
+        for i in range(3):
+            self._create_entry(f"e{i}")
+        snapshot = self._sync()
+        self.assertEqual((len(snapshot["changes"]), snapshot["has_more"]), (3, False))
+
+    def test_invalid_token(self):
+        response = self.client.get("/sync?since=***", headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_sequence_is_monotonic(self):
+        for i in range(3):
+            self._create_entry(f"e{i}")
+        with self.app.app_context():
+            seqs = [c.seq for c in Change.query.order_by(Change.seq)]
+        self.assertEqual(seqs, sorted(set(seqs)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,25 +1,18 @@
 # tests/test_user_routes.py
-import sys
-import os
 import unittest
+import pytest
 from werkzeug.security import generate_password_hash
 from flask_jwt_extended import create_access_token
 from unittest.mock import patch
-from app import create_app
 from extensions import db
 from journalapi.models import User
 
+@pytest.mark.usefixtures("transactional_db")
 class TestUserRoutes(unittest.TestCase):
     def setUp(self):
-        self.app = create_app({
-            "TESTING": True,
-            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"
-        })
         self.client = self.app.test_client()
 
         with self.app.app_context():
-            db.create_all()
-
             # Create test user
             hashed_password = generate_password_hash("password123")
             user = User(username="testuser", email="test@example.com", password=hashed_password)
@@ -29,10 +22,6 @@ class TestUserRoutes(unittest.TestCase):
             self.user_id = user.id
             self.token = create_access_token(identity=str(self.user_id))
 
-    def tearDown(self):
-        with self.app.app_context():
-            db.drop_all()
-
     def test_register_user(self):
         response = self.client.post(
             "/users/register",
@@ -233,6 +222,22 @@ class TestUserRoutes(unittest.TestCase):
         self.assertEqual(links["edit"]["href"], f"/users/{self.user_id}")
         self.assertEqual(links["delete"]["href"], f"/users/{self.user_id}")
 
+    def test_update_user_to_taken_username(self):
+        with self.app.app_context():
+            db.session.add(User(username="takenuser", email="taken@example.com",
+                                password=generate_password_hash("password123")))
+            db.session.commit()
+        headers = {"Authorization": f"Bearer {self.token}"}
+        for method, body in ((self.client.put, {"username": "takenuser", "email": "test@example.com",
+                                                "password": "password123"}),
+                             (self.client.patch, {"username": "takenuser"})):
+            response = method(f"/users/{self.user_id}", json=body, headers=headers)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("username already taken", response.get_json()["error"].lower())
+        # Keeping one's own username is not a conflict.
+        response = self.client.patch(f"/users/{self.user_id}", json={"username": "testuser"}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+
     def test_update_user_unauthorized(self):
         with self.app.app_context():
             other_token = create_access_token(identity=str(self.user_id + 1))
@@ -0,0 +1,132 @@
+# tests/test_user_stats.py
+import unittest
+import pytest
+import json
+from datetime import date, datetime, timedelta, timezone
+from extensions import db
+from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token
+from journalapi import stats
+from journalapi.models import User, JournalEntry, UserStats, UserEntryDay
+
+@pytest.mark.usefixtures("transactional_db")
+class TestUserStats(unittest.TestCase):
+    def setUp(self):
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            user = User(username="testuser", email="test@example.com",
+                        password=generate_password_hash("password123"))
+            db.session.add(user)
+            db.session.commit()
+            self.user_id = user.id
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+
+    def _create(self, content):
+        response = self.client.post(
+            "/entries/",
+            json={"title": "Entry", "content": content, "tags": []},
+            headers=self.headers
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.get_json()["entry_id"]
+
+    def _stats(self):
+        response = self.client.get(f"/users/{self.user_id}/stats", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def _rebuilt(self):
+        with self.app.app_context():
+            stats.rebuild_all()
+            return stats.get_stats(self.user_id)
+
+    def test_counts_follow_create_update_delete(self):
+        first = self._create("one two three")
+        self._create("four five")
+        data = self._stats()
+        self.assertEqual(data["entry_count"], 2)
+        self.assertEqual(data["word_count"], 5)
+        self.assertAlmostEqual(data["average_sentiment"], 0.75)
+        self.assertEqual(data["current_streak"], 1)
+        self.assertEqual(data["_links"]["self"]["href"], f"/users/{self.user_id}/stats")
+
+        self.client.put(f"/entries/{first}", json={"title": "Entry", "content": "one", "tags": []},
+                        headers=self.headers)
+        self.assertEqual(self._stats()["word_count"], 3)
+
+        self.client.delete(f"/entries/{first}", headers=self.headers)
+        data = self._stats()
+        self.assertEqual(data["entry_count"], 1)
+        self.assertEqual(data["word_count"], 2)
+        data.pop("_links")
+        self.assertEqual(data, self._rebuilt())
+
+    def test_deleting_last_entry_of_day_clears_streak(self):
+        entry_id = self._create("hello")
+        self.client.delete(f"/entries/{entry_id}", headers=self.headers)
+        data = self._stats()
+        self.assertEqual(data["entry_count"], 0)
+        self.assertEqual(data["current_streak"], 0)
+        self.assertIsNone(data["last_entry_day"])
+        self.assertIsNone(data["average_sentiment"])
+
+    def test_streaks_from_backdated_entries(self):
+        today = datetime.now(timezone.utc)
+        with self.app.app_context():
+            for days_ago in (0, 1, 2, 5, 6):
+                db.session.add(JournalEntry(user_id=self.user_id, title="t", content="w",
+                                            date=today - timedelta(days=days_ago)))
+            db.session.commit()
+        data = self._stats()
+        self.assertEqual(data["current_streak"], 3)
+        self.assertEqual(data["longest_streak"], 3)
+
+        with self.app.app_context():
+            entry = JournalEntry(user_id=self.user_id, title="t", content="w",
+                                 date=today - timedelta(days=4))
+            db.session.add(entry)
+            db.session.flush()
+            stats.entry_created(entry)
+            db.session.commit()
+            self.assertEqual(db.session.get(UserStats, self.user_id).longest_streak, 3)
+            entry = JournalEntry(user_id=self.user_id, title="t", content="w",
+                                 date=today - timedelta(days=3))
+            db.session.add(entry)
+            db.session.flush()
+            stats.entry_created(entry)
+            db.session.commit()
+        self.assertEqual(self._stats()["longest_streak"], 7)
+        self.assertEqual(self._stats()["current_streak"], 7)
+
+    def test_stale_streak_is_not_current(self):
+        with self.app.app_context():
+            db.session.add(JournalEntry(user_id=self.user_id, title="t", content="w",
+                                        date=datetime.now(timezone.utc) - timedelta(days=10)))
+            db.session.commit()
+        data = self._stats()
+        self.assertEqual(data["current_streak"], 0)
+        self.assertEqual(data["longest_streak"], 1)
+
+    def test_streaks_helper(self):
+        days = [date(2024, 1, d) for d in (1, 2, 3, 7, 8)]
+        self.assertEqual(stats.streaks(days), (2, 3, date(2024, 1, 8)))
+        self.assertEqual(stats.streaks([]), (0, 0, None))
+
+    def test_stats_of_other_user_forbidden(self):
+        response = self.client.get(f"/users/{self.user_id + 1}/stats", headers=self.headers)
+        self.assertEqual(response.status_code, 403)
+
+    def test_rebuild_stats_command(self):
+        self._create("a b c")
+        with self.app.app_context():
+            UserStats.query.delete()
+            UserEntryDay.query.delete()
+            db.session.commit()
+        result = self.app.test_cli_runner().invoke(args=["rebuild-stats", "--batch-size", "1"])
+        self.assertIn("Rebuilt stats for 1 users", result.output)
+        with self.app.app_context():
+            row = db.session.get(UserStats, self.user_id)
+            self.assertEqual((row.entry_count, row.word_count), (1, 3))
+
+if __name__ == "__main__":
+    unittest.main()